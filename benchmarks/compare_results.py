@@ -0,0 +1,117 @@
+# (C) 2025 GoodData Corporation
+"""Compares two benchmark results and reports regressions.
+
+A phase regresses if its throughput drops or its peak memory grows by more
+than the threshold. The script exits with a non-zero status if any phase
+regressed, so it can be used to gate changes.
+
+Usage:
+    python benchmarks/compare_results.py baseline.json candidate.json
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+ResultKey = tuple[str, str, int, int, int | None]
+
+
+@dataclass
+class Comparison:
+    """Change of a single phase between the baseline and the candidate."""
+
+    key: ResultKey
+    throughput_change: float
+    memory_change: float | None
+
+    def is_regression(self, threshold: float) -> bool:
+        return self.throughput_change < -threshold or (
+            self.memory_change is not None and self.memory_change > threshold
+        )
+
+
+def _load_results(path: Path) -> dict[ResultKey, dict[str, Any]]:
+    results = json.loads(path.read_text())["results"]
+    return {
+        (
+            result["tool"],
+            result["phase"],
+            result["rows"],
+            result["workers"],
+            result["batch_size"],
+        ): result
+        for result in results
+    }
+
+
+def _relative_change(baseline: float, candidate: float) -> float:
+    return (candidate - baseline) / baseline * 100 if baseline else 0.0
+
+
+def compare_results(baseline_path: Path, candidate_path: Path) -> list[Comparison]:
+    """Compares the phases measured in both results."""
+    baseline = _load_results(baseline_path)
+    candidate = _load_results(candidate_path)
+
+    comparisons = []
+    for key in baseline.keys() & candidate.keys():
+        old, new = baseline[key], candidate[key]
+        memory_change = None
+        if old["peak_memory_mib"] is not None and new["peak_memory_mib"] is not None:
+            memory_change = _relative_change(
+                old["peak_memory_mib"], new["peak_memory_mib"]
+            )
+        comparisons.append(
+            Comparison(
+                key=key,
+                throughput_change=_relative_change(
+                    old["rows_per_second"], new["rows_per_second"]
+                ),
+                memory_change=memory_change,
+            )
+        )
+
+    return sorted(comparisons, key=lambda c: (c.key[0], c.key[2], c.key[1]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("baseline", type=Path, help="Path to the baseline results.")
+    parser.add_argument("candidate", type=Path, help="Path to the new results.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Tolerated change in percent. Defaults to 10.",
+    )
+    args = parser.parse_args()
+
+    comparisons = compare_results(args.baseline, args.candidate)
+    regressions = 0
+    for comparison in comparisons:
+        tool, phase, rows, _, _ = comparison.key
+        memory = (
+            f"{comparison.memory_change:+8.1f} %"
+            if comparison.memory_change is not None
+            else f"{'-':>10}"
+        )
+        flag = ""
+        if comparison.is_regression(args.threshold):
+            regressions += 1
+            flag = "  REGRESSION"
+        print(
+            f"{tool:<18} {phase:<32} {rows:>10} "
+            + f"throughput {comparison.throughput_change:+8.1f} % "
+            + f"memory {memory}{flag}"
+        )
+
+    print(f"Compared {len(comparisons)} phases, {regressions} regressed.")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# (C) 2025 GoodData Corporation
+"""Generator of synthetic input files for the scripts.
+
+The generated rows are realistic enough to exercise the same code paths as
+production inputs (e.g., users with several user groups, nested user groups,
+workspaces with and without workspace data filter values), deterministic for
+a given seed, and streamed to disk so that files with millions of rows can be
+generated with constant memory usage.
+
+Usage:
+    python benchmarks/data_generator.py 100k --tools users permissions
+"""
+
+import argparse
+import csv
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+INNER_DELIMITER = "|"
+
+FIRST_NAMES = ["jozef", "peter", "anna", "maria", "john", "eva", "tomas", "lucia"]
+LAST_NAMES = ["mrkva", "novak", "smith", "horvath", "kovac", "brown", "varga"]
+PERMISSIONS = ["VIEW", "ANALYZE", "MANAGE", "EXPORT"]
+WDF_IDS = ["wdf_region", "wdf_client_id", "wdf_country"]
+DATA_TYPES = ["INT", "STRING", "DATE", "NUMERIC"]
+FIELD_TYPES = ["attribute", "fact", "date"]
+
+RowGenerator = Callable[[int, random.Random], Iterator[dict[str, Any]]]
+
+
+def _is_active(rng: random.Random) -> str:
+    return "True" if rng.random() < 0.95 else "False"
+
+
+def _pool_size(rows: int, ratio: int, minimum: int = 10) -> int:
+    """Size of a pool of referenced entities, e.g., user groups of users."""
+    return max(rows // ratio, minimum)
+
+
+def generate_users(rows: int, rng: random.Random) -> Iterator[dict[str, Any]]:
+    """Users, each a member of zero to five user groups."""
+    user_groups = _pool_size(rows, 100)
+    for i in range(rows):
+        firstname = rng.choice(FIRST_NAMES)
+        lastname = rng.choice(LAST_NAMES)
+        groups = rng.sample(range(user_groups), rng.randint(0, 5))
+        yield {
+            "user_id": f"user_{i}",
+            "firstname": firstname,
+            "lastname": lastname,
+            "email": f"{firstname}.{lastname}.{i}@example.com",
+            "auth_id": f"auth_{i}",
+            "user_groups": INNER_DELIMITER.join(f"ug_{group}" for group in groups),
+            "is_active": _is_active(rng),
+        }
+
+
+def generate_user_groups(rows: int, rng: random.Random) -> Iterator[dict[str, Any]]:
+    """User groups nested up to several levels, parents listed before children."""
+    for i in range(rows):
+        parents = rng.sample(range(i), min(i, rng.randint(0, 2))) if i else []
+        yield {
+            "user_group_id": f"ug_{i}",
+            "user_group_name": f"User Group {i}",
+            "parent_user_groups": INNER_DELIMITER.join(f"ug_{p}" for p in parents),
+            "is_active": _is_active(rng),
+        }
+
+
+def generate_permissions(rows: int, rng: random.Random) -> Iterator[dict[str, Any]]:
+    """Permissions of users and user groups to workspaces."""
+    users = _pool_size(rows, 5)
+    user_groups = _pool_size(rows, 100)
+    workspaces = _pool_size(rows, 20)
+    for _ in range(rows):
+        is_user = rng.random() < 0.8
+        yield {
+            "user_id": f"user_{rng.randrange(users)}" if is_user else "",
+            "ug_id": "" if is_user else f"ug_{rng.randrange(user_groups)}",
+            "ws_id": f"ws_{rng.randrange(workspaces)}",
+            "ws_permissions": rng.choice(PERMISSIONS),
+            "is_active": _is_active(rng),
+        }
+
+
+def generate_workspaces(rows: int, rng: random.Random) -> Iterator[dict[str, Any]]:
+    """Child workspaces, most of them with workspace data filter values."""
+    parents = _pool_size(rows, 1000, minimum=1)
+    for i in range(rows):
+        has_wdf = rng.random() < 0.7
+        values = [str(rng.randrange(1000)) for _ in range(rng.randint(1, 5))]
+        yield {
+            "parent_id": f"parent_{rng.randrange(parents)}",
+            "workspace_id": f"ws_{i}",
+            "workspace_name": f"Workspace {i}",
+            "workspace_data_filter_id": rng.choice(WDF_IDS) if has_wdf else "",
+            "workspace_data_filter_values": (
+                INNER_DELIMITER.join(values) if has_wdf else ""
+            ),
+            "is_active": _is_active(rng),
+        }
+
+
+def generate_user_data_filters(
+    rows: int, rng: random.Random
+) -> Iterator[dict[str, Any]]:
+    """User data filter values of users in workspaces."""
+    workspaces = _pool_size(rows, 50)
+    users = _pool_size(rows, 5)
+    for _ in range(rows):
+        yield {
+            "workspace_id": f"ws_{rng.randrange(workspaces)}",
+            "udf_id": f"user_{rng.randrange(users)}",
+            "udf_value": str(rng.randrange(1000)),
+        }
+
+
+def generate_custom_datasets(rows: int, rng: random.Random) -> Iterator[dict[str, Any]]:
+    """Custom datasets, each connected to a parent dataset."""
+    for i in range(rows):
+        has_wdf = rng.random() < 0.5
+        yield {
+            "workspace_id": f"ws_{i // 5}",
+            "dataset_id": f"custom_dataset_{i}",
+            "dataset_name": f"Custom Dataset {i}",
+            "dataset_datasource_id": "datasource",
+            "dataset_source_table": f"table_{i}",
+            "dataset_source_sql": "",
+            "parent_dataset_reference": "products",
+            "parent_dataset_reference_attribute_id": "products.product_id",
+            "dataset_reference_source_column": "product_id",
+            "dataset_reference_source_column_data_type": "STRING",
+            "workspace_data_filter_id": "wdf_client_id" if has_wdf else None,
+            "workspace_data_filter_column_name": "client_id" if has_wdf else None,
+        }
+
+
+def generate_custom_fields(rows: int, rng: random.Random) -> Iterator[dict[str, Any]]:
+    """Custom fields of the custom datasets, ten fields per dataset."""
+    for i in range(rows):
+        dataset = i // 10
+        yield {
+            "workspace_id": f"ws_{dataset // 5}",
+            "dataset_id": f"custom_dataset_{dataset}",
+            "custom_field_id": f"custom_field_{i}",
+            "custom_field_name": f"Custom Field {i}",
+            "custom_field_type": rng.choice(FIELD_TYPES),
+            "custom_field_source_column": f"column_{i}",
+            "custom_field_source_column_data_type": rng.choice(DATA_TYPES),
+        }
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Synthetic input file of a single tool."""
+
+    columns: list[str]
+    generate: RowGenerator
+
+
+DATASETS: dict[str, Dataset] = {
+    "users": Dataset(
+        [
+            "user_id",
+            "firstname",
+            "lastname",
+            "email",
+            "auth_id",
+            "user_groups",
+            "is_active",
+        ],
+        generate_users,
+    ),
+    "user_groups": Dataset(
+        ["user_group_id", "user_group_name", "parent_user_groups", "is_active"],
+        generate_user_groups,
+    ),
+    "permissions": Dataset(
+        ["user_id", "ug_id", "ws_id", "ws_permissions", "is_active"],
+        generate_permissions,
+    ),
+    "workspaces": Dataset(
+        [
+            "parent_id",
+            "workspace_id",
+            "workspace_name",
+            "workspace_data_filter_id",
+            "workspace_data_filter_values",
+            "is_active",
+        ],
+        generate_workspaces,
+    ),
+    "user_data_filters": Dataset(
+        ["workspace_id", "udf_id", "udf_value"],
+        generate_user_data_filters,
+    ),
+    "custom_datasets": Dataset(
+        [
+            "workspace_id",
+            "dataset_id",
+            "dataset_name",
+            "dataset_datasource_id",
+            "dataset_source_table",
+            "dataset_source_sql",
+            "parent_dataset_reference",
+            "parent_dataset_reference_attribute_id",
+            "dataset_reference_source_column",
+            "dataset_reference_source_column_data_type",
+            "workspace_data_filter_id",
+            "workspace_data_filter_column_name",
+        ],
+        generate_custom_datasets,
+    ),
+    "custom_fields": Dataset(
+        [
+            "workspace_id",
+            "dataset_id",
+            "custom_field_id",
+            "custom_field_name",
+            "custom_field_type",
+            "custom_field_source_column",
+            "custom_field_source_column_data_type",
+        ],
+        generate_custom_fields,
+    ),
+}
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(size: str) -> int:
+    """Parses a row count such as `10k` or `1M`."""
+    suffix = size[-1].lower()
+    if suffix in SIZE_SUFFIXES:
+        return int(size[:-1]) * SIZE_SUFFIXES[suffix]
+    return int(size)
+
+
+def format_size(rows: int) -> str:
+    """Formats a row count as `10k`, `1M` etc. where possible."""
+    for suffix, multiplier in sorted(SIZE_SUFFIXES.items(), key=lambda s: -s[1]):
+        if rows >= multiplier and rows % multiplier == 0:
+            return f"{rows // multiplier}{suffix.upper() if suffix == 'm' else suffix}"
+    return str(rows)
+
+
+def write_dataset(name: str, rows: int, path: Path, seed: int = 0) -> Path:
+    """Writes the synthetic input file of the tool to the path."""
+    dataset = DATASETS[name]
+    rng = random.Random(f"{name}-{seed}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=dataset.columns)
+        writer.writeheader()
+        writer.writerows(dataset.generate(rows, rng))
+
+    return path
+
+
+def dataset_path(data_dir: Path, name: str, rows: int, seed: int = 0) -> Path:
+    """Returns the path of the input file, generating it if it does not exist."""
+    path = Path(data_dir, f"{name}_{format_size(rows)}_seed{seed}.csv")
+    if not path.exists():
+        write_dataset(name, rows, path, seed)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("rows", type=parse_size, help="Number of rows, e.g. 10k or 1M.")
+    parser.add_argument(
+        "--tools",
+        nargs="+",
+        choices=list(DATASETS),
+        default=list(DATASETS),
+        help="Input files to generate. Defaults to all.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("benchmark_data"),
+        help="Directory to write the files to. Defaults to ./benchmark_data.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    for name in args.tools:
+        path = Path(
+            args.output_dir, f"{name}_{format_size(args.rows)}_seed{args.seed}.csv"
+        )
+        write_dataset(name, args.rows, path, args.seed)
+        print(f"Generated {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,865 @@
+# (C) 2025 GoodData Corporation
+"""Local stand-in for the GoodData Cloud API.
+
+The server keeps an in-memory organization and implements the endpoints used
+by the provisioners (users, user groups, permissions, workspaces, workspace
+data filters, user data filters) and by the backup and restore managers. It
+can add latency, fail a share of the requests and answer with 429 once a rate
+limit is exceeded, so the scripts can be load tested end to end without
+touching a real organization.
+
+The GoodData clients always connect over HTTPS, so the server uses a
+self-signed certificate. The clients trust it through the CA bundle written
+next to the certificate, see `FakeApiServer.environment()`.
+
+Usage:
+    python benchmarks/fake_api_server.py --port 8443 --latency-ms 20 --rate-limit 100
+
+The command prints the environment variables to export before running a
+script against the server.
+"""
+
+import argparse
+import datetime
+import json
+import random
+import re
+import ssl
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlsplit
+
+import certifi
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+API_PREFIX = "/api/v1"
+DEFAULT_TOKEN = "fake-token"
+
+# JSON:API type of the entities in each collection
+ENTITY_TYPES = {
+    "users": "user",
+    "userGroups": "userGroup",
+    "workspaces": "workspace",
+    "workspaceDataFilters": "workspaceDataFilter",
+    "workspaceDataFilterSettings": "workspaceDataFilterSetting",
+    "userDataFilters": "userDataFilter",
+    "automations": "automation",
+    "metrics": "metric",
+    "visualizationObjects": "visualizationObject",
+    "analyticalDashboards": "analyticalDashboard",
+}
+
+# Collections of types referenced by relationships, used to resolve includes
+COLLECTIONS = {entity_type: name for name, entity_type in ENTITY_TYPES.items()}
+COLLECTIONS["workspace"] = "workspaces"
+
+# Empty layout of every workspace layout section
+EMPTY_LAYOUTS: dict[str, Callable[[], Any]] = {
+    "logicalModel": lambda: {"ldm": {"datasets": [], "dateInstances": []}},
+    "analyticsModel": lambda: {
+        "analytics": {
+            "analyticalDashboards": [],
+            "analyticalDashboardExtensions": [],
+            "attributeHierarchies": [],
+            "dashboardPlugins": [],
+            "exportDefinitions": [],
+            "filterContexts": [],
+            "metrics": [],
+            "visualizationObjects": [],
+        }
+    },
+    "permissions": lambda: {"permissions": [], "hierarchyPermissions": []},
+    "userDataFilters": lambda: {"userDataFilters": []},
+    "filterViews": lambda: [],
+    "automations": lambda: [],
+}
+
+
+class ApiError(Exception):
+    """Error response of the fake API."""
+
+    def __init__(self, status: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+@dataclass
+class FakeApiConfig:
+    """Behavior of the fake API.
+
+    Attributes:
+        latency_ms (float): Minimum latency added to every request.
+        jitter_ms (float): Maximum random latency added on top of `latency_ms`.
+        error_rate (float): Share of requests failing with 503, 0 to 1.
+        rate_limit (float | None): Requests per second served before the
+            server starts answering with 429. Unlimited if None.
+        retry_after (int): Value of the `Retry-After` header of 429 responses.
+        token (str): Accepted bearer token.
+        seed (int): Seed of the random latency and errors.
+    """
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    rate_limit: float | None = None
+    retry_after: int = 1
+    token: str = DEFAULT_TOKEN
+    seed: int = 0
+
+
+class FakeOrganization:
+    """In-memory state of the organization served by the fake API.
+
+    Entities are kept as JSON:API resources (`id`, `type`, `attributes` and
+    `relationships`), keyed by their collection path, e.g. `users` or
+    `workspaces/ws_1/userDataFilters`. Workspace layouts are kept per
+    workspace and section, e.g. `("ws_1", "logicalModel")`.
+    """
+
+    def __init__(self, organization_id: str = "default") -> None:
+        self.organization_id = organization_id
+        self.lock = threading.RLock()
+        self.entities: dict[str, dict[str, dict[str, Any]]] = defaultdict(dict)
+        self.layouts: dict[tuple[str, str], Any] = {}
+
+        self.add_user("admin")
+
+    def add_user(
+        self,
+        user_id: str,
+        user_groups: list[str] | None = None,
+        **attributes: Any,
+    ) -> None:
+        self.put(
+            "users",
+            {
+                "id": user_id,
+                "type": "user",
+                "attributes": attributes,
+                "relationships": _to_many("userGroup", user_groups or []),
+            },
+        )
+
+    def add_user_group(
+        self, user_group_id: str, parents: list[str] | None = None, name: str = ""
+    ) -> None:
+        self.put(
+            "userGroups",
+            {
+                "id": user_group_id,
+                "type": "userGroup",
+                "attributes": {"name": name or user_group_id},
+                "relationships": {
+                    "parents": _to_many("userGroup", parents or [])["userGroups"]
+                },
+            },
+        )
+
+    def add_workspace(
+        self, workspace_id: str, parent_id: str | None = None, name: str = ""
+    ) -> None:
+        resource: dict[str, Any] = {
+            "id": workspace_id,
+            "type": "workspace",
+            "attributes": {"name": name or workspace_id},
+        }
+        if parent_id:
+            resource["relationships"] = {
+                "parent": {"data": {"id": parent_id, "type": "workspace"}}
+            }
+        self.put("workspaces", resource)
+
+    def add_workspace_data_filter(
+        self, workspace_id: str, wdf_id: str, column_name: str
+    ) -> None:
+        self.put(
+            f"workspaces/{workspace_id}/workspaceDataFilters",
+            {
+                "id": wdf_id,
+                "type": "workspaceDataFilter",
+                "attributes": {"columnName": column_name, "title": wdf_id},
+            },
+        )
+
+    def put(self, collection: str, resource: dict[str, Any]) -> None:
+        with self.lock:
+            self.entities[collection][resource["id"]] = resource
+
+    def layout(self, workspace_id: str, section: str) -> Any:
+        with self.lock:
+            if (workspace_id, section) not in self.layouts:
+                return EMPTY_LAYOUTS[section]()
+            return self.layouts[workspace_id, section]
+
+    def workspace_children(self, workspace_id: str) -> list[str]:
+        with self.lock:
+            return [
+                child_id
+                for child_id, child in self.entities["workspaces"].items()
+                if _parent_id(child) == workspace_id
+            ]
+
+    def counts(self) -> dict[str, int]:
+        """Number of entities in each top-level collection."""
+        with self.lock:
+            counts: dict[str, int] = defaultdict(int)
+            for collection, entities in self.entities.items():
+                counts[collection.rsplit("/", 1)[-1]] += len(entities)
+            return dict(counts)
+
+
+def _to_many(entity_type: str, ids: list[str]) -> dict[str, Any]:
+    return {f"{entity_type}s": {"data": [{"id": i, "type": entity_type} for i in ids]}}
+
+
+def _parent_id(workspace: dict[str, Any]) -> str | None:
+    parent = workspace.get("relationships", {}).get("parent", {}).get("data")
+    return parent["id"] if parent else None
+
+
+@dataclass
+class RequestRecord:
+    """A single request served by the fake API."""
+
+    method: str
+    route: str
+    status: int
+    seconds: float
+
+
+@dataclass
+class RequestStats:
+    """Thread-safe log of the served requests."""
+
+    records: list[RequestRecord] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, record: RequestRecord) -> None:
+        with self.lock:
+            self.records.append(record)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.records.clear()
+
+    def summary(self) -> dict[str, Any]:
+        """Request counts by status and latency percentiles, in milliseconds."""
+        with self.lock:
+            records = list(self.records)
+
+        statuses: dict[str, int] = defaultdict(int)
+        for record in records:
+            statuses[str(record.status)] += 1
+
+        latencies = sorted(record.seconds * 1000 for record in records)
+        return {
+            "requests": len(records),
+            "statuses": dict(sorted(statuses.items())),
+            "latency_ms": {
+                name: round(_percentile(latencies, q), 3)
+                for name, q in [("p50", 50), ("p95", 95), ("p99", 99), ("max", 100)]
+            },
+        }
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(int(-(-q * len(values) // 100)), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+class RequestRateLimiter:
+    """Fixed one-second window limiting the requests per second."""
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.requests_per_second = requests_per_second
+        self._window = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            window = int(time.monotonic())
+            if window != self._window:
+                self._window = window
+                self._count = 0
+            self._count += 1
+            return self._count <= self.requests_per_second
+
+
+Handler = Callable[["FakeApiHandler", re.Match[str]], Any]
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """Request handler of the fake API."""
+
+    server: "_FakeHttpServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, avoid the delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_PUT(self) -> None:
+        self._handle("PUT")
+
+    def do_PATCH(self) -> None:
+        self._handle("PATCH")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+    @property
+    def organization(self) -> FakeOrganization:
+        return self.server.organization
+
+    def _handle(self, method: str) -> None:
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        self.query = parse_qs(url.query)
+        self.body = self._read_body()
+        route = "unknown"
+
+        try:
+            handler, match, route = self._resolve(method, url.path)
+            self._simulate_conditions()
+            self._authorize()
+            status, payload = 200, handler(self, match)
+            if payload is None:
+                status = 204
+            elif method == "POST":
+                status = 201
+        except ApiError as e:
+            status, payload = e.status, {"status": e.status, "detail": e.detail}
+        except Exception as e:
+            status = 500
+            payload = {"status": 500, "detail": f"{e.__class__.__name__}: {e}"}
+
+        # Recorded before responding, so that the client never sees a response
+        # of a request which is not in the stats yet
+        self.server.stats.add(
+            RequestRecord(method, route, status, time.perf_counter() - start)
+        )
+        self._respond(status, payload)
+
+    def _read_body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _resolve(self, method: str, path: str) -> tuple[Handler, re.Match[str], str]:
+        for route_method, pattern, handler in ROUTES:
+            if route_method != method:
+                continue
+            match = pattern.fullmatch(path)
+            if match:
+                return handler, match, f"{method} {pattern.pattern}"
+        raise ApiError(404, f"Route {method} {path} is not supported.")
+
+    def _simulate_conditions(self) -> None:
+        config = self.server.config
+        if config.latency_ms or config.jitter_ms:
+            with self.server.random_lock:
+                jitter = self.server.random.uniform(0, config.jitter_ms)
+            time.sleep((config.latency_ms + jitter) / 1000)
+
+        if self.server.rate_limiter and not self.server.rate_limiter.allow():
+            raise ApiError(429, "Too many requests.")
+
+        if config.error_rate:
+            with self.server.random_lock:
+                fails = self.server.random.random() < config.error_rate
+            if fails:
+                raise ApiError(503, "Injected failure.")
+
+    def _authorize(self) -> None:
+        expected = f"Bearer {self.server.config.token}"
+        if self.headers.get("Authorization") != expected:
+            raise ApiError(401, "Invalid token.")
+
+    def _respond(self, status: int, payload: Any) -> None:
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        if body:
+            content_type = (
+                "application/problem+json"
+                if status >= 400
+                else "application/vnd.gooddata.api+json"
+            )
+            self.send_header("Content-Type", content_type)
+        if status == 429:
+            self.send_header("Retry-After", str(self.server.config.retry_after))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Entities
+
+    def _url(self, path: str) -> str:
+        return f"https://{self.headers.get('Host')}{API_PREFIX}{path}"
+
+    def _out(self, collection: str, resource: dict[str, Any]) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            **resource,
+            "links": {"self": self._url(f"/entities/{collection}/{resource['id']}")},
+        }
+        if collection.startswith("workspaces/"):
+            # Workspace-scoped entities always report their origin
+            out["meta"] = {
+                "origin": {"originType": "NATIVE", "originId": collection.split("/")[1]}
+            }
+        if resource["type"] == "workspace" and "hierarchy" in self._meta_include():
+            out["meta"] = {
+                "hierarchy": {
+                    "childrenCount": len(
+                        self.organization.workspace_children(resource["id"])
+                    )
+                }
+            }
+        return out
+
+    def _meta_include(self) -> set[str]:
+        return {
+            value
+            for values in self.query.get("metaInclude", [])
+            for value in values.split(",")
+        }
+
+    def _included(self, resources: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        includes = {
+            value
+            for values in self.query.get("include", [])
+            for value in values.split(",")
+        }
+        if not includes:
+            return []
+
+        included: dict[tuple[str, str], dict[str, Any]] = {}
+        for resource in resources:
+            for name, relationship in resource.get("relationships", {}).items():
+                if "ALL" not in includes and name not in includes:
+                    # Workspaces are included as `workspaces` by the SDK
+                    if not (name == "parent" and "workspaces" in includes):
+                        continue
+                data = relationship.get("data")
+                for identifier in data if isinstance(data, list) else [data]:
+                    if not identifier:
+                        continue
+                    related = self._find(identifier["type"], identifier["id"])
+                    if related is not None:
+                        key = (identifier["type"], identifier["id"])
+                        included[key] = self._out(
+                            COLLECTIONS[identifier["type"]], related
+                        )
+        return list(included.values())
+
+    def _find(self, entity_type: str, entity_id: str) -> dict[str, Any] | None:
+        collection = COLLECTIONS.get(entity_type)
+        if collection is None:
+            return None
+        with self.organization.lock:
+            return self.organization.entities[collection].get(entity_id)
+
+    def _collection(self, match: re.Match[str]) -> str:
+        workspace_id = match.groupdict().get("workspace_id")
+        name = match["collection"]
+        if name not in ENTITY_TYPES:
+            raise ApiError(404, f"Collection {name} is not supported.")
+        if workspace_id is None:
+            return name
+        self._require_workspace(workspace_id)
+        return f"workspaces/{workspace_id}/{name}"
+
+    def _require_workspace(self, workspace_id: str) -> None:
+        if self._find("workspace", workspace_id) is None:
+            raise ApiError(404, f"Workspace {workspace_id} does not exist.")
+
+    def list_entities(self, match: re.Match[str]) -> Any:
+        collection = self._collection(match)
+        page = int(self.query.get("page", ["0"])[0])
+        size = int(self.query.get("size", ["20"])[0])
+
+        with self.organization.lock:
+            resources = list(self.organization.entities[collection].values())
+
+        for expression in self.query.get("filter", []):
+            resources = _filter_resources(resources, expression)
+
+        page_resources = resources[page * size : (page + 1) * size]
+        links = {"self": self._url(self.path.removeprefix(API_PREFIX))}
+        if (page + 1) * size < len(resources):
+            links["next"] = self._url(
+                re.sub(r"page=\d+", f"page={page + 1}", self.path).removeprefix(
+                    API_PREFIX
+                )
+            )
+
+        document: dict[str, Any] = {
+            "data": [self._out(collection, r) for r in page_resources],
+            "links": links,
+        }
+        if "page" in self._meta_include():
+            document["meta"] = {
+                "page": {
+                    "number": page,
+                    "size": size,
+                    "totalElements": len(resources),
+                    "totalPages": -(-len(resources) // size) if size else 0,
+                }
+            }
+        included = self._included(page_resources)
+        if included:
+            document["included"] = included
+        return document
+
+    def get_entity(self, match: re.Match[str]) -> Any:
+        collection = self._collection(match)
+        with self.organization.lock:
+            resource = self.organization.entities[collection].get(match["entity_id"])
+        if resource is None:
+            raise ApiError(404, f"Entity {collection}/{match['entity_id']} not found.")
+
+        document: dict[str, Any] = {
+            "data": self._out(collection, resource),
+            "links": {"self": self._url(f"/entities/{collection}/{resource['id']}")},
+        }
+        included = self._included([resource])
+        if included:
+            document["included"] = included
+        return document
+
+    def create_entity(self, match: re.Match[str]) -> Any:
+        collection = self._collection(match)
+        resource = _resource_from_document(self.body, ENTITY_TYPES[match["collection"]])
+        with self.organization.lock:
+            if resource["id"] in self.organization.entities[collection]:
+                raise ApiError(409, f"Entity {resource['id']} already exists.")
+            self.organization.put(collection, resource)
+        return {"data": self._out(collection, resource)}
+
+    def update_entity(self, match: re.Match[str]) -> Any:
+        collection = self._collection(match)
+        resource = _resource_from_document(self.body, ENTITY_TYPES[match["collection"]])
+        resource["id"] = match["entity_id"]
+        with self.organization.lock:
+            if resource["id"] not in self.organization.entities[collection]:
+                raise ApiError(404, f"Entity {resource['id']} not found.")
+            self.organization.put(collection, resource)
+        return {"data": self._out(collection, resource)}
+
+    def delete_entity(self, match: re.Match[str]) -> Any:
+        collection = self._collection(match)
+        entity_id = match["entity_id"]
+        with self.organization.lock:
+            if self.organization.entities[collection].pop(entity_id, None) is None:
+                raise ApiError(404, f"Entity {collection}/{entity_id} not found.")
+            if collection == "workspaces":
+                for nested in list(self.organization.entities):
+                    if nested.startswith(f"workspaces/{entity_id}/"):
+                        del self.organization.entities[nested]
+        return None
+
+    # Layouts
+
+    def get_layout(self, match: re.Match[str]) -> Any:
+        workspace_id = match["workspace_id"]
+        self._require_workspace(workspace_id)
+        return self.organization.layout(workspace_id, match["section"])
+
+    def put_layout(self, match: re.Match[str]) -> Any:
+        workspace_id = match["workspace_id"]
+        self._require_workspace(workspace_id)
+        with self.organization.lock:
+            self.organization.layouts[workspace_id, match["section"]] = self.body
+        return None
+
+    def get_workspace_layout(self, match: re.Match[str]) -> Any:
+        workspace_id = match["workspace_id"]
+        self._require_workspace(workspace_id)
+        return {
+            **self.organization.layout(workspace_id, "logicalModel"),
+            **self.organization.layout(workspace_id, "analyticsModel"),
+        }
+
+    # Organization
+
+    def get_organization(self, match: re.Match[str]) -> Any:
+        organization_id = self.organization.organization_id
+        return {
+            "data": {
+                "id": organization_id,
+                "type": "organization",
+                "attributes": {
+                    "name": organization_id,
+                    "hostname": self.headers.get("Host", "localhost"),
+                },
+            },
+            "links": {
+                "self": self._url(f"/entities/admin/organizations/{organization_id}")
+            },
+        }
+
+    def get_profile(self, match: re.Match[str]) -> Any:
+        return {
+            "userId": "admin",
+            "organizationId": self.organization.organization_id,
+            "organizationName": self.organization.organization_id,
+            "name": "admin",
+            "permissions": ["MANAGE"],
+            "links": {"self": self._url("/profile")},
+        }
+
+
+def _resource_from_document(document: Any, entity_type: str) -> dict[str, Any]:
+    if not isinstance(document, dict) or not isinstance(document.get("data"), dict):
+        raise ApiError(400, "Request body must be a JSON:API document.")
+    data = document["data"]
+    if data.get("type") != entity_type or not data.get("id"):
+        raise ApiError(400, f"Expected entity of type {entity_type} with an ID.")
+    resource = {
+        "id": data["id"],
+        "type": entity_type,
+        "attributes": data.get("attributes") or {},
+    }
+    if entity_type in ("workspaceDataFilter", "workspaceDataFilterSetting"):
+        resource["attributes"].setdefault("title", data["id"])
+    if data.get("relationships"):
+        resource["relationships"] = data["relationships"]
+    return resource
+
+
+def _filter_resources(
+    resources: list[dict[str, Any]], expression: str
+) -> list[dict[str, Any]]:
+    """Applies a `relationship.id==value` filter, the only form used by the tools."""
+    match = re.fullmatch(r"(\w+)\.id==(.+)", expression)
+    if not match:
+        raise ApiError(400, f"Filter {expression} is not supported.")
+
+    relationship, value = match.groups()
+
+    def related_id(resource: dict[str, Any]) -> str | None:
+        data = resource.get("relationships", {}).get(relationship, {}).get("data")
+        return data["id"] if isinstance(data, dict) else None
+
+    return [resource for resource in resources if related_id(resource) == value]
+
+
+_ENTITY = r"(?P<entity_id>[^/]+)"
+_COLLECTION = r"(?P<collection>\w+)"
+_WORKSPACE = r"/entities/workspaces/(?P<workspace_id>[^/]+)"
+_LAYOUT = r"/layout/workspaces/(?P<workspace_id>[^/]+)"
+_SECTION = rf"(?P<section>{'|'.join(EMPTY_LAYOUTS)})"
+
+ROUTES: list[tuple[str, re.Pattern[str], Handler]] = [
+    (method, re.compile(API_PREFIX + pattern), handler)
+    for method, pattern, handler in [
+        ("GET", "/profile", FakeApiHandler.get_profile),
+        ("GET", "/entities/organization", FakeApiHandler.get_organization),
+        ("GET", f"{_WORKSPACE}/{_COLLECTION}/?", FakeApiHandler.list_entities),
+        ("GET", f"{_WORKSPACE}/{_COLLECTION}/{_ENTITY}", FakeApiHandler.get_entity),
+        ("POST", f"{_WORKSPACE}/{_COLLECTION}/?", FakeApiHandler.create_entity),
+        ("PUT", f"{_WORKSPACE}/{_COLLECTION}/{_ENTITY}", FakeApiHandler.update_entity),
+        (
+            "DELETE",
+            f"{_WORKSPACE}/{_COLLECTION}/{_ENTITY}",
+            FakeApiHandler.delete_entity,
+        ),
+        ("GET", f"/entities/{_COLLECTION}", FakeApiHandler.list_entities),
+        ("GET", f"/entities/{_COLLECTION}/{_ENTITY}", FakeApiHandler.get_entity),
+        ("POST", f"/entities/{_COLLECTION}", FakeApiHandler.create_entity),
+        ("PUT", f"/entities/{_COLLECTION}/{_ENTITY}", FakeApiHandler.update_entity),
+        ("DELETE", f"/entities/{_COLLECTION}/{_ENTITY}", FakeApiHandler.delete_entity),
+        ("GET", f"{_LAYOUT}/{_SECTION}", FakeApiHandler.get_layout),
+        ("PUT", f"{_LAYOUT}/{_SECTION}", FakeApiHandler.put_layout),
+        ("GET", _LAYOUT, FakeApiHandler.get_workspace_layout),
+    ]
+]
+
+
+class _FakeHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        organization: FakeOrganization,
+        config: FakeApiConfig,
+    ) -> None:
+        super().__init__(address, FakeApiHandler)
+        self.organization = organization
+        self.config = config
+        self.stats = RequestStats()
+        self.random = random.Random(config.seed)
+        self.random_lock = threading.Lock()
+        self.rate_limiter = (
+            RequestRateLimiter(config.rate_limit) if config.rate_limit else None
+        )
+
+
+def write_self_signed_certificate(directory: Path, hostname: str) -> tuple[Path, Path]:
+    """Writes a self-signed certificate and its key, returns their paths."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, hostname)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=7))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName(hostname)]), critical=False
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+
+    certificate_path = Path(directory, "fake_api.crt")
+    key_path = Path(directory, "fake_api.key")
+    certificate_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    return certificate_path, key_path
+
+
+class FakeApiServer:
+    """Fake GoodData API served over HTTPS from a background thread.
+
+    Usable as a context manager. The server listens on `localhost` and a
+    random free port unless a port is given.
+    """
+
+    def __init__(
+        self,
+        config: FakeApiConfig | None = None,
+        organization: FakeOrganization | None = None,
+        port: int = 0,
+        hostname: str = "localhost",
+    ) -> None:
+        self.config = config or FakeApiConfig()
+        self.organization = organization or FakeOrganization()
+        self.hostname = hostname
+
+        self._tempdir = tempfile.TemporaryDirectory(prefix="fake_gooddata_api_")
+        certificate, key = write_self_signed_certificate(
+            Path(self._tempdir.name), hostname
+        )
+
+        # The bundle keeps the public CAs, so that e.g. S3 remains reachable
+        self.ca_bundle = Path(self._tempdir.name, "ca_bundle.pem")
+        self.ca_bundle.write_bytes(
+            Path(certifi.where()).read_bytes() + certificate.read_bytes()
+        )
+
+        self._server = _FakeHttpServer((hostname, port), self.organization, self.config)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certificate, key)
+        self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def stats(self) -> RequestStats:
+        return self._server.stats
+
+    @property
+    def url(self) -> str:
+        return f"https://{self.hostname}:{self._server.server_address[1]}"
+
+    def environment(self) -> dict[str, str]:
+        """Environment variables pointing the scripts to the server."""
+        return {
+            "GDC_HOSTNAME": self.url,
+            "GDC_AUTH_TOKEN": self.config.token,
+            # Trusted by the SDK (urllib3) and by the direct API calls (requests)
+            "SSL_CERT_FILE": str(self.ca_bundle),
+            "REQUESTS_CA_BUNDLE": str(self.ca_bundle),
+        }
+
+    def start(self) -> "FakeApiServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._tempdir.cleanup()
+
+    def __enter__(self) -> "FakeApiServer":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--port", type=int, default=8443, help="Defaults to 8443.")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests failing with 503, 0 to 1.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Requests per second served before answering with 429.",
+    )
+    parser.add_argument("--token", default=DEFAULT_TOKEN)
+    args = parser.parse_args()
+
+    config = FakeApiConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        token=args.token,
+    )
+    with FakeApiServer(config, port=args.port) as server:
+        print("Fake GoodData API is running. Point the scripts to it with:\n")
+        for name, value in server.environment().items():
+            print(f"export {name}={value}")
+        print("\nPress Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(60)
+                print(json.dumps(server.stats.summary()))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
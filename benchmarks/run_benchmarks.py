@@ -0,0 +1,498 @@
+# (C) 2025 GoodData Corporation
+"""Offline benchmarks of the hot paths of the scripts.
+
+Every phase which does not talk to the API (reading the CSV file, validating
+the rows, reading and validating in batches) is run against synthetic input
+files of the requested sizes. Wall time and throughput are measured first, the
+peak memory is then measured in a separate run, as tracing the allocations
+slows the code down considerably.
+
+The startup time of every script is measured too: the time to import the
+script in a fresh interpreter, and the time to print its help through the
+`gdtools.py` entry point, which parses the arguments before the import.
+
+The results are written as JSON, so that they can be compared between commits
+with `benchmarks/compare_results.py`.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 10k 100k --tools users
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import partial
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from data_generator import DATASETS, dataset_path, format_size, parse_size  # noqa: E402
+from gdtools import COMMANDS  # noqa: E402
+from gooddata_pipelines import (  # noqa: E402
+    CustomDatasetDefinition,
+    CustomFieldDefinition,
+)
+from permission_mgmt import (  # noqa: E402
+    read_permissions_from_csv,
+    validate_permission_data,
+)
+from user_data_filter_mgmt import validate_user_data_filter_data  # noqa: E402
+from user_group_mgmt import (  # noqa: E402
+    read_users_groups_from_csv,
+    validate_user_group_data,
+)
+from user_mgmt import read_users_from_csv, validate_user_data  # noqa: E402
+from utils.args.schemas import PermissionArgs, UserGroupArgs  # noqa: E402
+from utils.utils import read_csv_file_to_dict  # noqa: E402
+from utils.validation import validate_rows  # noqa: E402
+from workspace_mgmt import validate_workspace_data  # noqa: E402
+
+DELIMITER = ","
+INNER_DELIMITER = "|"
+QUOTECHAR = '"'
+
+RawRows = list[dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class PhaseContext:
+    """Input of a single benchmarked phase."""
+
+    path: Path
+    raw_rows: RawRows
+    workers: int
+    batch_size: int | None
+
+
+@dataclass(frozen=True)
+class Phase:
+    """Benchmarked function, returning the number of processed rows."""
+
+    tool: str
+    name: str
+    run: Callable[[PhaseContext], int]
+
+
+@dataclass
+class PhaseResult:
+    """Measurements of a single phase at a single input size."""
+
+    tool: str
+    phase: str
+    rows: int
+    workers: int
+    batch_size: int | None
+    seconds: float
+    rows_per_second: float
+    peak_memory_mib: float | None
+
+
+def _read_csv(context: PhaseContext) -> int:
+    return len(read_csv_file_to_dict(context.path, DELIMITER, QUOTECHAR))
+
+
+def _count_batches(batches: Any) -> int:
+    return sum(len(batch) for batch in batches)
+
+
+def _read_users(context: PhaseContext, engine: str = "rows") -> int:
+    return _count_batches(
+        read_users_from_csv(
+            context.path,
+            DELIMITER,
+            QUOTECHAR,
+            INNER_DELIMITER,
+            context.batch_size,
+            context.workers,
+            engine,
+        )
+    )
+
+
+def _read_user_groups(context: PhaseContext, engine: str = "rows") -> int:
+    args = UserGroupArgs(
+        user_group_csv=context.path,
+        delimiter=DELIMITER,
+        inner_delimiter=INNER_DELIMITER,
+        quotechar=QUOTECHAR,
+        profile_config=Path(),
+        profile="default",
+        http_pool_size=10,
+        shard=None,
+        batch_size=context.batch_size,
+        validation_workers=context.workers,
+        validation_engine=engine,
+        compact=False,
+        provisioning_workers=1,
+        checkpoint_file=None,
+        resume=False,
+        plan=False,
+        api_calls_per_second=None,
+    )
+    return _count_batches(read_users_groups_from_csv(args))
+
+
+def _read_permissions(context: PhaseContext, engine: str = "rows") -> int:
+    args = PermissionArgs(
+        perm_csv=context.path,
+        delimiter=DELIMITER,
+        quotechar=QUOTECHAR,
+        profile_config=Path(),
+        profile="default",
+        http_pool_size=10,
+        shard=None,
+        batch_size=context.batch_size,
+        validation_workers=context.workers,
+        validation_engine=engine,
+        compact=False,
+        state_file=None,
+        checkpoint_file=None,
+        resume=False,
+        plan=False,
+        api_calls_per_second=None,
+    )
+    return _count_batches(read_permissions_from_csv(args))
+
+
+PHASES: list[Phase] = [
+    *(Phase(tool, "read_csv_file_to_dict", _read_csv) for tool in DATASETS),
+    Phase(
+        "users",
+        "validate_user_data",
+        lambda c: len(validate_user_data(c.raw_rows, INNER_DELIMITER, c.workers)),
+    ),
+    Phase("users", "read_users_from_csv", _read_users),
+    Phase(
+        "users",
+        "read_users_from_csv[columnar]",
+        partial(_read_users, engine="columnar"),
+    ),
+    Phase(
+        "user_groups",
+        "validate_user_group_data",
+        lambda c: len(validate_user_group_data(c.raw_rows, INNER_DELIMITER, c.workers)),
+    ),
+    Phase("user_groups", "read_users_groups_from_csv", _read_user_groups),
+    Phase(
+        "user_groups",
+        "read_users_groups_from_csv[columnar]",
+        partial(_read_user_groups, engine="columnar"),
+    ),
+    Phase(
+        "permissions",
+        "validate_permission_data",
+        lambda c: len(validate_permission_data(c.raw_rows, c.workers)),
+    ),
+    Phase("permissions", "read_permissions_from_csv", _read_permissions),
+    Phase(
+        "permissions",
+        "read_permissions_from_csv[columnar]",
+        partial(_read_permissions, engine="columnar"),
+    ),
+    Phase(
+        "workspaces",
+        "validate_workspace_data",
+        lambda c: len(validate_workspace_data(c.raw_rows, INNER_DELIMITER, c.workers)),
+    ),
+    Phase(
+        "user_data_filters",
+        "validate_user_data_filter_data",
+        lambda c: len(validate_user_data_filter_data(c.raw_rows, c.workers)),
+    ),
+    Phase(
+        "custom_datasets",
+        "validate_custom_datasets",
+        lambda c: len(
+            validate_rows(
+                c.raw_rows,
+                CustomDatasetDefinition.model_validate,
+                raise_on_error=True,
+                workers=c.workers,
+            )
+        ),
+    ),
+    Phase(
+        "custom_fields",
+        "validate_custom_fields",
+        lambda c: len(
+            validate_rows(
+                c.raw_rows,
+                CustomFieldDefinition.model_validate,
+                raise_on_error=True,
+                workers=c.workers,
+            )
+        ),
+    ),
+]
+
+
+@dataclass
+class StartupResult:
+    """Wall time of starting a script, including the interpreter startup."""
+
+    command: str
+    import_seconds: float
+    help_seconds: float
+
+
+def _best_wall_time(command: list[str], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=SCRIPTS_DIR, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure_startup(repeat: int = 3) -> list[StartupResult]:
+    """Measures the import time of every script and its help via `gdtools.py`."""
+    results = []
+    for name, command in COMMANDS.items():
+        result = StartupResult(
+            command=name,
+            import_seconds=round(
+                _best_wall_time(
+                    [sys.executable, "-c", f"import {command.module}"], repeat
+                ),
+                3,
+            ),
+            help_seconds=round(
+                _best_wall_time([sys.executable, "gdtools.py", name, "-h"], repeat), 3
+            ),
+        )
+        print(
+            f"{'startup':<18} {name:<32} import {result.import_seconds:6.3f} s "
+            + f"gdtools -h {result.help_seconds:6.3f} s",
+            flush=True,
+        )
+        results.append(result)
+    return results
+
+
+def measure_time(phase: Phase, context: PhaseContext, repeat: int) -> float:
+    """Returns the best wall time of the phase out of `repeat` runs."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        phase.run(context)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure_peak_memory(phase: Phase, context: PhaseContext) -> float:
+    """Returns the peak memory allocated by the phase, in MiB.
+
+    Only the allocations of the main process are traced, so the memory used
+    by validation worker processes is not included.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        phase.run(context)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def run_phase(
+    phase: Phase, context: PhaseContext, repeat: int, trace_memory: bool
+) -> PhaseResult:
+    processed = phase.run(context)
+    if processed != len(context.raw_rows):
+        raise RuntimeError(
+            f"{phase.tool}.{phase.name} processed {processed} "
+            + f"of {len(context.raw_rows)} rows."
+        )
+
+    seconds = measure_time(phase, context, repeat)
+    return PhaseResult(
+        tool=phase.tool,
+        phase=phase.name,
+        rows=processed,
+        workers=context.workers,
+        batch_size=context.batch_size,
+        seconds=round(seconds, 6),
+        rows_per_second=round(processed / seconds, 1) if seconds else 0.0,
+        peak_memory_mib=(
+            round(measure_peak_memory(phase, context), 3) if trace_memory else None
+        ),
+    )
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _package_version(package: str) -> str | None:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return None
+
+
+def environment_metadata() -> dict[str, Any]:
+    """Describes the environment the benchmarks ran in."""
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "gooddata_pipelines": _package_version("gooddata-pipelines"),
+    }
+
+
+def run_benchmarks(
+    tools: list[str],
+    sizes: list[int],
+    data_dir: Path,
+    workers: int = 1,
+    batch_size: int | None = None,
+    repeat: int = 3,
+    trace_memory: bool = True,
+) -> list[PhaseResult]:
+    """Runs the phases of the tools against inputs of every size."""
+    results = []
+    for rows in sizes:
+        for tool in tools:
+            path = dataset_path(data_dir, tool, rows)
+            context = PhaseContext(
+                path=path,
+                raw_rows=read_csv_file_to_dict(path, DELIMITER, QUOTECHAR),
+                workers=workers,
+                batch_size=batch_size,
+            )
+            for phase in PHASES:
+                if phase.tool != tool:
+                    continue
+                result = run_phase(phase, context, repeat, trace_memory)
+                print(_format_result(result), flush=True)
+                results.append(result)
+    return results
+
+
+def _format_result(result: PhaseResult) -> str:
+    memory = (
+        f"{result.peak_memory_mib:10.1f} MiB"
+        if result.peak_memory_mib is not None
+        else f"{'-':>14}"
+    )
+    return (
+        f"{result.tool:<18} {result.phase:<32} {format_size(result.rows):>6} "
+        + f"{result.seconds:10.3f} s {result.rows_per_second:14,.0f} rows/s {memory}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=parse_size,
+        default=[10_000, 100_000],
+        help="Input sizes, e.g. 10k 100k 1M 10M. Defaults to 10k and 100k.",
+    )
+    parser.add_argument(
+        "--tools",
+        nargs="+",
+        choices=list(DATASETS),
+        default=list(DATASETS),
+        help="Tools to benchmark. Defaults to all.",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path("benchmark_data"),
+        help="Directory with (cached) generated inputs. Defaults to ./benchmark_data.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Path to the JSON results. Defaults to "
+        + "./benchmark_results/<timestamp>.json.",
+    )
+    parser.add_argument(
+        "--validation-workers",
+        type=int,
+        default=1,
+        help="Number of validation processes. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Batch size of the read phases. Defaults to a single batch.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of timed runs of each phase, the best is kept. Defaults to 3.",
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Skip the (slow) peak memory measurement.",
+    )
+    parser.add_argument(
+        "--no-startup",
+        action="store_true",
+        help="Skip the measurement of the startup time of the scripts.",
+    )
+    args = parser.parse_args()
+
+    startup = [] if args.no_startup else measure_startup(args.repeat)
+
+    results = run_benchmarks(
+        args.tools,
+        args.sizes,
+        args.data_dir,
+        workers=args.validation_workers,
+        batch_size=args.batch_size,
+        repeat=args.repeat,
+        trace_memory=not args.no_memory,
+    )
+
+    output = args.output or Path(
+        "benchmark_results", f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "metadata": environment_metadata(),
+                "results": [asdict(result) for result in results],
+                "startup": [asdict(result) for result in startup],
+            },
+            indent=2,
+        )
+    )
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+# (C) 2025 GoodData Corporation
+"""End-to-end benchmarks of the scripts against the fake GoodData API.
+
+Every scenario starts a fresh fake organization, seeds it with the entities
+referenced by the generated input (e.g., the workspaces and users of the
+permissions), runs the script in a subprocess pointed to the server via
+`GDC_HOSTNAME`, and records the wall time of the script together with the
+request counts and latency percentiles observed by the server.
+
+Usage:
+    python benchmarks/run_end_to_end.py --rows 1k --latency-ms 20 --rate-limit 200
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from data_generator import WDF_IDS, dataset_path, format_size, parse_size
+from fake_api_server import FakeApiConfig, FakeApiServer, FakeOrganization
+from run_benchmarks import environment_metadata
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from utils.utils import iter_csv_file  # noqa: E402
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+
+@dataclass(frozen=True)
+class ScenarioContext:
+    """Everything a scenario needs to prepare its input."""
+
+    rows: int
+    data_dir: Path
+    workdir: Path
+    organization: FakeOrganization
+    environment: dict[str, str]
+    workers: int
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Run of a single script.
+
+    `prepare` seeds the organization, writes the input files and returns the
+    command line arguments of the script.
+    """
+
+    tool: str
+    script: str
+    prepare: Callable[[ScenarioContext], list[str]]
+
+
+@dataclass
+class ScenarioResult:
+    """Outcome of a single scenario."""
+
+    tool: str
+    rows: int
+    exit_code: int
+    seconds: float
+    rows_per_second: float
+    requests: int
+    statuses: dict[str, int]
+    latency_ms: dict[str, float]
+    log: str
+
+
+def _column_values(path: Path, *columns: str) -> set[str]:
+    return {
+        row[column] for row in iter_csv_file(path) for column in columns if row[column]
+    }
+
+
+def _prepare_users(context: ScenarioContext) -> list[str]:
+    path = dataset_path(context.data_dir, "users", context.rows)
+    for row in iter_csv_file(path):
+        for user_group in row["user_groups"].split("|"):
+            if user_group:
+                context.organization.add_user_group(user_group)
+    return [str(path)]
+
+
+def _prepare_user_groups(context: ScenarioContext) -> list[str]:
+    return [str(dataset_path(context.data_dir, "user_groups", context.rows))]
+
+
+def _prepare_permissions(context: ScenarioContext) -> list[str]:
+    path = dataset_path(context.data_dir, "permissions", context.rows)
+    organization = context.organization
+    for user_id in _column_values(path, "user_id"):
+        organization.add_user(user_id)
+    for user_group_id in _column_values(path, "ug_id"):
+        organization.add_user_group(user_group_id)
+    for workspace_id in _column_values(path, "ws_id"):
+        organization.add_workspace(workspace_id)
+    return [str(path)]
+
+
+def _prepare_workspaces(context: ScenarioContext) -> list[str]:
+    path = dataset_path(context.data_dir, "workspaces", context.rows)
+    for parent_id in _column_values(path, "parent_id"):
+        context.organization.add_workspace(parent_id)
+        for wdf_id in WDF_IDS:
+            context.organization.add_workspace_data_filter(
+                parent_id, wdf_id, wdf_id.removeprefix("wdf_")
+            )
+    return [str(path)]
+
+
+def _prepare_user_data_filters(context: ScenarioContext) -> list[str]:
+    path = dataset_path(context.data_dir, "user_data_filters", context.rows)
+    for workspace_id in _column_values(path, "workspace_id"):
+        context.organization.add_workspace(workspace_id)
+    for user_id in _column_values(path, "udf_id"):
+        context.organization.add_user(user_id)
+    return [str(path), "client_id", "{label/client_id}"]
+
+
+def _write_backup_config(context: ScenarioContext) -> Path:
+    config = Path(context.workdir, "backup_config.yaml")
+    config.write_text(
+        "storage_type: local\n"
+        + "storage:\n"
+        + "  backup_path: local_backups\n"
+        + f"max_workers: {context.workers}\n"
+        + "api_calls_per_second: 1000\n"
+    )
+    return config
+
+
+def _prepare_backup(context: ScenarioContext) -> list[str]:
+    input_csv = Path(context.workdir, "backup_input.csv")
+    with open(input_csv, "w") as file:
+        file.write("workspace_id\n")
+        for i in range(context.rows):
+            context.organization.add_workspace(f"ws_{i}")
+            file.write(f"ws_{i}\n")
+    return [str(input_csv), str(_write_backup_config(context))]
+
+
+def _prepare_restore(context: ScenarioContext) -> list[str]:
+    # Restores the backups created by an (unmeasured) backup run
+    backup_arguments = _prepare_backup(context)
+    _run_script("backup.py", backup_arguments, context, Path(os.devnull))
+
+    backups = Path(context.workdir, "local_backups")
+    input_csv = Path(context.workdir, "restore_input.csv")
+    with open(input_csv, "w") as file:
+        file.write("workspace_id,path\n")
+        for archive in sorted(backups.glob("*/*/*/gooddata_layouts.zip")):
+            path = archive.parent.relative_to(backups).as_posix()
+            file.write(f"{archive.parent.parent.name},{path}\n")
+    return [str(input_csv), backup_arguments[1]]
+
+
+SCENARIOS = {
+    scenario.tool: scenario
+    for scenario in [
+        Scenario("users", "user_mgmt.py", _prepare_users),
+        Scenario("user_groups", "user_group_mgmt.py", _prepare_user_groups),
+        Scenario("permissions", "permission_mgmt.py", _prepare_permissions),
+        Scenario("workspaces", "workspace_mgmt.py", _prepare_workspaces),
+        Scenario(
+            "user_data_filters", "user_data_filter_mgmt.py", _prepare_user_data_filters
+        ),
+        Scenario("backup", "backup.py", _prepare_backup),
+        Scenario("restore", "restore.py", _prepare_restore),
+    ]
+}
+
+
+def _run_script(
+    script: str, arguments: list[str], context: ScenarioContext, log: Path
+) -> int:
+    with open(log, "w") as log_file:
+        return subprocess.run(
+            [sys.executable, str(SCRIPTS_DIR / script), *arguments],
+            cwd=context.workdir,
+            env={**os.environ, **context.environment},
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+        ).returncode
+
+
+def run_scenario(
+    scenario: Scenario,
+    rows: int,
+    config: FakeApiConfig,
+    data_dir: Path,
+    workdir: Path,
+    workers: int = 1,
+) -> ScenarioResult:
+    """Runs the script of the scenario against a freshly seeded fake API."""
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    with FakeApiServer(config) as server:
+        context = ScenarioContext(
+            rows=rows,
+            data_dir=data_dir,
+            workdir=workdir,
+            organization=server.organization,
+            environment=server.environment(),
+            workers=workers,
+        )
+        arguments = scenario.prepare(context)
+        server.stats.reset()
+
+        log = Path(workdir, f"{scenario.tool}.log")
+        start = time.perf_counter()
+        exit_code = _run_script(scenario.script, arguments, context, log)
+        seconds = time.perf_counter() - start
+
+        summary = server.stats.summary()
+
+    return ScenarioResult(
+        tool=scenario.tool,
+        rows=rows,
+        exit_code=exit_code,
+        seconds=round(seconds, 3),
+        rows_per_second=round(rows / seconds, 1) if seconds else 0.0,
+        requests=summary["requests"],
+        statuses=summary["statuses"],
+        latency_ms=summary["latency_ms"],
+        log=str(log),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--rows",
+        type=parse_size,
+        default=1_000,
+        help="Number of input rows (workspaces for backup and restore). "
+        + "Defaults to 1k.",
+    )
+    parser.add_argument(
+        "--tools",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+        help="Scripts to benchmark. Defaults to all.",
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests failing with 503, 0 to 1.",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Requests per second served before answering with 429.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Value of `max_workers` in the backup and restore configuration.",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path("benchmark_data"),
+        help="Directory with (cached) generated inputs. Defaults to ./benchmark_data.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Path to the JSON results. Defaults to "
+        + "./benchmark_results/end_to_end_<timestamp>.json.",
+    )
+    args = parser.parse_args()
+
+    config = FakeApiConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+    )
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="end_to_end_") as tempdir:
+        for tool in args.tools:
+            result = run_scenario(
+                SCENARIOS[tool],
+                args.rows,
+                config,
+                args.data_dir.resolve(),
+                Path(tempdir, tool),
+                args.workers,
+            )
+            if result.exit_code:
+                result.log = _keep_log(Path(result.log))
+            results.append(result)
+            print(_format_result(result), flush=True)
+
+    output = args.output or Path(
+        "benchmark_results", f"end_to_end_{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "metadata": environment_metadata(),
+                "api": asdict(config),
+                "results": [asdict(result) for result in results],
+            },
+            indent=2,
+        )
+    )
+    print(f"Results written to {output}")
+
+
+def _keep_log(log: Path) -> str:
+    """Copies the log of a failed script out of the temporary directory."""
+    kept = Path("benchmark_results", f"{log.stem}_{datetime.now():%H%M%S}.log")
+    kept.parent.mkdir(parents=True, exist_ok=True)
+    kept.write_text(log.read_text())
+    return str(kept)
+
+
+def _format_result(result: ScenarioResult) -> str:
+    latency = result.latency_ms
+    status = "ok" if result.exit_code == 0 else f"exit code {result.exit_code}"
+    return (
+        f"{result.tool:<18} {format_size(result.rows):>6} {result.seconds:9.2f} s "
+        + f"{result.rows_per_second:10,.0f} rows/s {result.requests:8} requests "
+        + f"p50 {latency['p50']:7.1f} ms p99 {latency['p99']:7.1f} ms "
+        + f"{json.dumps(result.statuses)} {status}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,11 @@
 
 import logging
 
-from gooddata_pipelines import BackupManager
 from utils.args.parser import Parser
 from utils.args.schemas import BackupArgs
+from utils.backup_manager import ExtendedBackupManager
 from utils.backup_restore_config import load_config_from_yaml
+from utils.checkpoint import input_fingerprint, open_checkpoint
 from utils.logger import setup_logging
 from utils.utils import create_client
 
@@ -13,28 +14,46 @@ setup_logging()
 logger = logging.getLogger(__name__)
 
 
-def backup():
-    args: BackupArgs = Parser.parse_backup_args()
+def backup(args: BackupArgs | None = None):
+    if args is None:
+        args = Parser.parse_backup_args()
 
     backup_restore_config = load_config_from_yaml(args.conf)
 
     backup_manager = create_client(
-        BackupManager,
+        ExtendedBackupManager,
         args.profile_config,
         args.profile,
         config=backup_restore_config,
+        pool_size=args.http_pool_size,
     )
 
     backup_manager.logger.subscribe(logger)
 
-    if args.input_type == "entire-organization":
-        backup_manager.backup_entire_organization()
-    elif args.input_type == "list-of-workspaces":
-        backup_manager.backup_workspaces(str(args.ws_csv))
-    elif args.input_type == "list-of-parents":
-        backup_manager.backup_hierarchies(str(args.ws_csv))
-    else:
-        raise ValueError(f"Unsupported input type: {args.input_type}")
+    if args.shard is not None:
+        backup_manager.enable_sharding(args.shard)
+    if args.incremental:
+        backup_manager.enable_incremental()
+
+    input_file = None if args.input_type == "entire-organization" else args.ws_csv
+    fingerprint = input_fingerprint(
+        args.input_type, args.shard, files=(input_file, args.conf)
+    )
+
+    with open_checkpoint(
+        args.checkpoint_file, "backup", fingerprint, args.resume
+    ) as checkpoint:
+        if checkpoint is not None:
+            backup_manager.enable_checkpoint(checkpoint)
+
+        if args.input_type == "entire-organization":
+            backup_manager.backup_entire_organization()
+        elif args.input_type == "list-of-workspaces":
+            backup_manager.backup_workspaces(str(args.ws_csv))
+        elif args.input_type == "list-of-parents":
+            backup_manager.backup_hierarchies(str(args.ws_csv))
+        else:
+            raise ValueError(f"Unsupported input type: {args.input_type}")
 
 
 if __name__ == "__main__":
@@ -5,55 +5,80 @@ This script allows you to extend the Logical Data Model (LDM) of a child workspa
 Documentation and usage instructions are located in `docs/CUSTOM_FIELDS.md` file.
 """
 
+from operator import attrgetter
+
 from gooddata_pipelines import (
     CustomDatasetDefinition,
     CustomFieldDefinition,
-    LdmExtensionManager,
 )
 from utils.args.parser import Parser
 from utils.args.schemas import CustomFieldsArgs
+from utils.ldm_extension_manager import ExtendedLdmExtensionManager
 from utils.logger import get_logger, setup_logging
+from utils.profiling import timer
+from utils.sharding import shard_rows
 from utils.utils import (
     create_client,
-    read_csv_file_to_dict,
+    iter_csv_file,
 )
+from utils.validation import validate_rows
 
 setup_logging()
 logger = get_logger(__name__)
 
 
-def custom_fields() -> None:
+def custom_fields(args: CustomFieldsArgs | None = None) -> None:
     """Main function to run the custom fields script."""
 
-    args: CustomFieldsArgs = Parser.parse_custom_fields_args()
+    if args is None:
+        args = Parser.parse_custom_fields_args()
 
     # Load input data from csv files
-    raw_custom_datasets: list[dict[str, str]] = read_csv_file_to_dict(
+    raw_custom_datasets = iter_csv_file(
         args.path_to_custom_datasets_csv, args.delimiter, args.quotechar
     )
 
-    custom_datasets = [
-        CustomDatasetDefinition.model_validate(raw_custom_dataset)
-        for raw_custom_dataset in raw_custom_datasets
-    ]
+    custom_datasets = validate_rows(
+        raw_custom_datasets,
+        CustomDatasetDefinition.model_validate,
+        raise_on_error=True,
+        workers=args.validation_workers,
+    )
 
-    raw_custom_fields: list[dict[str, str]] = read_csv_file_to_dict(
+    raw_custom_fields = iter_csv_file(
         args.path_to_custom_fields_csv, args.delimiter, args.quotechar
     )
 
-    custom_fields = [
-        CustomFieldDefinition.model_validate(raw_custom_field)
-        for raw_custom_field in raw_custom_fields
-    ]
+    custom_fields = validate_rows(
+        raw_custom_fields,
+        CustomFieldDefinition.model_validate,
+        raise_on_error=True,
+        workers=args.validation_workers,
+    )
+
+    # The datasets and fields of a workspace go to the same shard
+    workspace_id = attrgetter("workspace_id")
+    custom_datasets = shard_rows(
+        custom_datasets, args.shard, workspace_id, "custom dataset"
+    )
+    custom_fields = shard_rows(custom_fields, args.shard, workspace_id, "custom field")
 
     # Create instance of CustomFieldManager with host and token
-    manager = create_client(LdmExtensionManager, args.profile_config, args.profile)
+    manager = create_client(
+        ExtendedLdmExtensionManager,
+        args.profile_config,
+        args.profile,
+        pool_size=args.http_pool_size,
+    )
+    manager.set_max_workers(args.provisioning_workers)
 
     # Subscribe to logs
     manager.logger.subscribe(logger)
 
-    # Process the custom datasets and fields
-    manager.process(custom_datasets, custom_fields, args.check_relations)
+    # Process the custom datasets and fields, fetching the LDM of each parent
+    # workspace only once
+    with timer.phase("provisioning"):
+        manager.process(custom_datasets, custom_fields, args.check_relations)
 
 
 if __name__ == "__main__":
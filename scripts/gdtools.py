@@ -0,0 +1,124 @@
+# (C) 2025 GoodData Corporation
+"""Single entry point for all the scripts.
+
+Usage:
+    python scripts/gdtools.py <command> [arguments of the command]
+
+`python scripts/gdtools.py user_mgmt users.csv` is equivalent to
+`python scripts/user_mgmt.py users.csv`, including the log file name, but the
+arguments are parsed and validated before the script (and with it the
+GoodData SDK) is imported. Asking for help or passing invalid arguments thus
+returns in a fraction of a second.
+"""
+
+import importlib
+import os
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from utils.args.parser import Parser
+from utils.profiling import timer
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass(frozen=True)
+class Command:
+    """Script run by a command: its argument parser and its main function."""
+
+    parse_args: Callable[[], Any]
+    module: str
+    function: str
+    help: str
+
+
+COMMANDS = {
+    "user_mgmt": Command(
+        Parser.parse_user_args, "user_mgmt", "user_mgmt", "Manage users."
+    ),
+    "user_group_mgmt": Command(
+        Parser.parse_user_group_args,
+        "user_group_mgmt",
+        "user_group_mgmt",
+        "Manage user groups.",
+    ),
+    "permission_mgmt": Command(
+        Parser.parse_permission_args,
+        "permission_mgmt",
+        "permission_mgmt",
+        "Manage workspace permissions.",
+    ),
+    "workspace_mgmt": Command(
+        Parser.parse_workspace_args,
+        "workspace_mgmt",
+        "workspace_mgmt",
+        "Manage workspaces.",
+    ),
+    "user_data_filter_mgmt": Command(
+        Parser.parse_user_data_filter_args,
+        "user_data_filter_mgmt",
+        "udf_mgmt",
+        "Manage user data filters.",
+    ),
+    "custom_fields": Command(
+        Parser.parse_custom_fields_args,
+        "custom_fields",
+        "custom_fields",
+        "Extend the LDM of child workspaces with custom datasets and fields.",
+    ),
+    "backup": Command(
+        Parser.parse_backup_args, "backup", "backup", "Back up workspaces."
+    ),
+    "restore": Command(
+        Parser.parse_restore_args, "restore", "restore", "Restore workspaces."
+    ),
+    "merge_metrics": Command(
+        Parser.parse_merge_metrics_args,
+        "merge_metrics",
+        "merge",
+        "Merge the metrics of the shards of a job.",
+    ),
+}
+
+
+def usage() -> str:
+    commands = "\n".join(
+        f"  {name:<24}{command.help}" for name, command in COMMANDS.items()
+    )
+    return (
+        f"usage: {os.path.basename(sys.argv[0])} <command> [arguments]\n\n"
+        + f"commands:\n{commands}\n\n"
+        + "Run a command with -h to see its arguments."
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        sys.exit(0 if argv else 2)
+
+    name, arguments = argv[0], argv[1:]
+    command = COMMANDS.get(name)
+    if command is None:
+        print(f"Unknown command: {name}\n\n{usage()}", file=sys.stderr)
+        sys.exit(2)
+
+    # The command runs as if its script was executed directly, so that the
+    # usage, the log file and the reports are named after the script
+    sys.argv = [os.path.join(SCRIPTS_DIR, f"{command.module}.py"), *arguments]
+    try:
+        args = command.parse_args()
+    except ValueError as e:
+        print(f"{command.module}.py: error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    with timer.phase("import"):
+        module = importlib.import_module(command.module)
+    getattr(module, command.function)(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# (C) 2025 GoodData Corporation
+"""Merges the metrics written by the shards of a job.
+
+Each shard of a job run with `--shard i/N` writes its own metrics with
+`--metrics-out`. This script merges them into the metrics of the whole job.
+"""
+
+import json
+import logging
+
+from utils.args.parser import Parser
+from utils.args.schemas import MergeMetricsArgs
+from utils.logger import setup_logging
+from utils.metrics import merge_metrics, write_textfile
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def merge(args: MergeMetricsArgs | None = None) -> None:
+    """Main entry point of the script."""
+    if args is None:
+        args = Parser.parse_merge_metrics_args()
+
+    documents = [json.loads(path.read_text()) for path in args.inputs]
+    merged = merge_metrics(documents)
+    script = documents[0]["script"]
+
+    content = json.dumps(merged.to_dict(script), indent=2)
+    if args.output is None:
+        print(content)
+    else:
+        args.output.write_text(content)
+        logger.info(
+            f"Merged metrics of {len(documents)} shards written to {args.output}"
+        )
+
+    if args.textfile is not None:
+        write_textfile(args.textfile, merged.to_prometheus(script))
+        logger.info(f"Merged metrics written to {args.textfile}")
+
+
+if __name__ == "__main__":
+    merge()
@@ -1,83 +1,327 @@
 # (C) 2025 GoodData Corporation
 
+from functools import partial
+from operator import attrgetter
+from typing import Any, Iterable, Iterator
+
 from gooddata_pipelines import (
     EntityType,
     PermissionIncrementalLoad,
     PermissionProvisioner,
 )
+from gooddata_pipelines.provisioning.entities.users.models.permissions import (
+    PermissionDeclaration,
+)
 from utils.args.parser import Parser
 from utils.args.schemas import PermissionArgs
+from utils.checkpoint import input_fingerprint, open_checkpoint
+from utils.columnar import Columns, ConvertedColumns, iter_columnar_batches
+from utils.compaction import any_active_wins, compact_batches
+from utils.grouping import check_grouped, keep_groups_together
 from utils.logger import get_logger, setup_logging
+from utils.plan import Plan, run_plan
+from utils.sharding import shard_batches
+from utils.state import incremental_load_batches, open_state_store
 from utils.utils import (
     create_client,
-    read_csv_file_to_dict,
+    iter_csv_file,
+    iter_validated_batches,
 )
+from utils.validation import format_row_error, validate_rows
 
 setup_logging()
 logger = get_logger(__name__)
 
 
-def read_permissions_from_csv(
-    args: PermissionArgs,
+def _validate_permission_row(
+    raw_permission: dict[str, Any],
+) -> PermissionIncrementalLoad:
+    """Converts a single raw CSV row to a permission model."""
+    if raw_permission["user_id"] and raw_permission["ug_id"]:
+        raise RuntimeError(
+            "UserID and UserGroupID are mutually exclusive per csv row. "
+            f'Skipping following row: "{raw_permission}".'
+        )
+
+    entity_id = raw_permission["user_id"] or raw_permission["ug_id"]
+    if not entity_id:
+        raise RuntimeError(
+            "Either UserID or UserGroupID have to be defined per csv row. "
+            f'Skipping following row: "{raw_permission}".'
+        )
+
+    if raw_permission["user_id"]:
+        entity_type = EntityType.user
+    else:
+        entity_type = EntityType.user_group
+
+    return PermissionIncrementalLoad(
+        permission=raw_permission["ws_permissions"],
+        workspace_id=raw_permission["ws_id"],
+        entity_id=entity_id,
+        entity_type=entity_type,
+        is_active=raw_permission["is_active"],
+    )
+
+
+def _convert_permission_columns(columns: Columns) -> ConvertedColumns:
+    """Converts a chunk of raw CSV columns to permission model fields.
+
+    Rows with both or neither of the user and user group IDs do not pass, the
+    row validator reports them.
+    """
+    user_ids, user_group_ids = columns["user_id"], columns["ug_id"]
+    return ConvertedColumns(
+        {
+            "permission": columns["ws_permissions"],
+            "workspace_id": columns["ws_id"],
+            "entity_id": [
+                user_id or ug_id for user_id, ug_id in zip(user_ids, user_group_ids)
+            ],
+            "entity_type": [
+                EntityType.user if user_id else EntityType.user_group
+                for user_id in user_ids
+            ],
+            "is_active": columns["is_active"],
+        },
+        passed=[
+            bool(user_id) != bool(ug_id)
+            for user_id, ug_id in zip(user_ids, user_group_ids)
+        ],
+    )
+
+
+def _format_permission_error(raw_permission: dict[str, Any], error: Exception) -> str:
+    """Creates the error message for a permission row which failed validation."""
+    if isinstance(error, KeyError):
+        return f"Missing key in following row: {raw_permission}. Error: {error}"
+    return format_row_error(raw_permission, error)
+
+
+def _assignee_key(permission: PermissionIncrementalLoad) -> tuple[str, ...]:
+    """Identifies the assignee of a permission within its workspace.
+
+    The provisioner replaces all permissions of an assignee in a workspace
+    with the rows of the batch, so these rows must always be sent together.
+    """
+    return (
+        permission.workspace_id,
+        permission.entity_type.value,
+        permission.entity_id,
+    )
+
+
+def _raw_assignee_key(raw_permission: dict[str, Any]) -> tuple[str, ...]:
+    """Identifies the assignee of a raw CSV row, see `_assignee_key`."""
+    if raw_permission.get("user_id"):
+        return (
+            raw_permission.get("ws_id", ""),
+            EntityType.user.value,
+            raw_permission["user_id"],
+        )
+    return (
+        raw_permission.get("ws_id", ""),
+        EntityType.user_group.value,
+        raw_permission.get("ug_id", ""),
+    )
+
+
+def _permission_key(permission: PermissionIncrementalLoad) -> tuple[str, ...]:
+    """Identifies the permission a row declares, see `utils.compaction`."""
+    return (
+        permission.workspace_id,
+        permission.entity_type.value,
+        permission.entity_id,
+        permission.permission,
+    )
+
+
+def validate_permission_data(
+    raw_permissions: Iterable[dict[str, Any]],
+    workers: int = 1,
 ) -> list[PermissionIncrementalLoad]:
-    """Reads permissions from the input csv file."""
-    validated_permissions: list[PermissionIncrementalLoad] = []
-    raw_permissions = read_csv_file_to_dict(
-        args.perm_csv, args.delimiter, args.quotechar
+    """Validates raw permission rows against the input model."""
+    return validate_rows(
+        raw_permissions,
+        _validate_permission_row,
+        format_error=_format_permission_error,
+        workers=workers,
     )
 
-    for raw_permission in raw_permissions:
-        try:
-            if raw_permission["user_id"] and raw_permission["ug_id"]:
-                raise RuntimeError(
-                    "UserID and UserGroupID are mutually exclusive per csv row. "
-                    f'Skipping following row: "{raw_permission}".'
-                )
 
-            entity_id = raw_permission["user_id"] or raw_permission["ug_id"]
-            if not entity_id:
-                raise RuntimeError(
-                    "Either UserID or UserGroupID have to be defined per csv row. "
-                    f'Skipping following row: "{raw_permission}".'
-                )
+def read_permissions_from_csv(
+    args: PermissionArgs,
+) -> Iterator[list[PermissionIncrementalLoad]]:
+    """Reads permissions from the input csv file in batches.
+
+    The rows of an assignee in a workspace are never split across batches,
+    see `utils.grouping`.
+    """
+    if args.batch_size is not None:
+        check_grouped(
+            iter_csv_file(args.perm_csv, args.delimiter, args.quotechar),
+            _raw_assignee_key,
+            "workspace and assignee",
+        )
+
+    batches: Iterator[list[PermissionIncrementalLoad]]
+    if args.validation_engine == "columnar":
+        batches = iter_columnar_batches(
+            args.perm_csv,
+            args.delimiter,
+            args.quotechar,
+            PermissionIncrementalLoad,
+            _convert_permission_columns,
+            _validate_permission_row,
+            batch_size=args.batch_size,
+            workers=args.validation_workers,
+            format_error=_format_permission_error,
+        )
+    else:
+        batches = iter_validated_batches(
+            iter_csv_file(args.perm_csv, args.delimiter, args.quotechar),
+            partial(validate_permission_data, workers=args.validation_workers),
+            args.batch_size,
+        )
+
+    if args.batch_size is None:
+        return batches
+    return keep_groups_together(batches, _assignee_key)
+
+
+def _assignments(declaration: PermissionDeclaration) -> set[tuple[str, str, str]]:
+    """Returns the granted permissions of a declaration as (type, ID, name)."""
+    return {
+        (entity_type.value, entity_id, name)
+        for entity_type, targets in (
+            (EntityType.user, declaration.users),
+            (EntityType.user_group, declaration.user_groups),
+        )
+        for entity_id, permissions in targets.items()
+        for name, is_active in permissions.items()
+        if is_active
+    }
+
+
+def plan_permissions(
+    provisioner: PermissionProvisioner,
+    batches: Iterable[list[PermissionIncrementalLoad]],
+    plan: Plan,
+) -> None:
+    """Counts the operations of an incremental load of the permissions.
 
-            if raw_permission["user_id"]:
-                entity_type = EntityType.user
+    The users, user groups and workspaces are listed once, instead of being
+    fetched for every row like the provisioner does. The permissions of each
+    workspace are fetched once.
+    """
+    sdk = provisioner._api._sdk
+    existing = {
+        EntityType.user: {user.id for user in sdk.catalog_user.list_users()},
+        EntityType.user_group: {
+            group.id for group in sdk.catalog_user.list_user_groups()
+        },
+    }
+    workspace_ids = {
+        workspace.id for workspace in sdk.catalog_workspace.list_workspaces()
+    }
+    upstream_declarations: dict[str, PermissionDeclaration] = {}
+
+    for batch in batches:
+        valid_permissions = []
+        for permission in batch:
+            if permission.entity_id not in existing[permission.entity_type]:
+                # The provisioner stops at the missing user or user group
+                plan.count("skip permission of missing assignee", api_calls=1)
+            elif permission.workspace_id not in workspace_ids:
+                plan.count("skip permission in missing workspace", api_calls=2)
             else:
-                entity_type = EntityType.user_group
-
-            validated_permission = PermissionIncrementalLoad(
-                permission=raw_permission["ws_permissions"],
-                workspace_id=raw_permission["ws_id"],
-                entity_id=entity_id,
-                entity_type=entity_type,
-                is_active=raw_permission["is_active"],
-            )
-            validated_permissions.append(validated_permission)
-        except KeyError as e:
-            logger.error(f"Missing key in following row: {raw_permission}. Error: {e}")
-            continue
-        except Exception as e:
-            logger.error(
-                f'Unable to load following row: "{raw_permission}". Error: "{e}"'
-            )
-            continue
+                plan.api_calls += 2
+                valid_permissions.append(permission)
+
+        input_declarations = provisioner._construct_declarations(valid_permissions)
+        for workspace_id, declaration in input_declarations.items():
+            if workspace_id not in upstream_declarations:
+                upstream_declarations[
+                    workspace_id
+                ] = PermissionDeclaration.from_sdk_api(
+                    sdk.catalog_permission.get_declarative_permissions(workspace_id)
+                )
+            upstream = upstream_declarations[workspace_id]
+
+            before = _assignments(upstream)
+            upstream.upsert(declaration)
+            after = _assignments(upstream)
 
-    return validated_permissions
+            granted, revoked = len(after - before), len(before - after)
+            plan.count("grant permission", times=granted)
+            plan.count("revoke permission", times=revoked)
 
+            # The declaration of the workspace is fetched and put back as a
+            # whole, even if it did not change
+            if granted or revoked:
+                plan.count("update workspace permissions", api_calls=2)
+            else:
+                plan.count("unchanged workspace permissions", api_calls=2)
 
-def permission_mgmt():
-    args = Parser.parse_permission_args()
 
-    permissions = read_permissions_from_csv(args)
+def permission_mgmt(args: PermissionArgs | None = None):
+    if args is None:
+        args = Parser.parse_permission_args()
 
     permission_manager = create_client(
-        PermissionProvisioner, args.profile_config, args.profile
+        PermissionProvisioner,
+        args.profile_config,
+        args.profile,
+        pool_size=args.http_pool_size,
     )
 
     permission_manager.logger.subscribe(logger)
 
-    permission_manager.incremental_load(permissions)
+    # All permissions of a workspace go to the same shard, as the provisioner
+    # replaces the permission declaration of the whole workspace
+    permission_batches = shard_batches(
+        read_permissions_from_csv(args),
+        args.shard,
+        attrgetter("workspace_id"),
+        "permission",
+    )
+    if args.compact:
+        # The provisioner grants a permission if any of its rows is active
+        permission_batches = compact_batches(
+            permission_batches, "permission", _permission_key, any_active_wins
+        )
+
+    # The rows of an assignee are hashed and sent together, as the provisioner
+    # replaces all permissions of the assignee in the workspace
+    with open_state_store(args.state_file, "permission", _assignee_key) as state:
+        if args.plan:
+            run_plan(
+                permission_manager,
+                plan_permissions,
+                "permission",
+                permission_batches,
+                state,
+                args.api_calls_per_second,
+            )
+        else:
+            fingerprint = input_fingerprint(
+                args.delimiter,
+                args.quotechar,
+                args.batch_size,
+                args.shard,
+                files=(args.perm_csv,),
+            )
+            with open_checkpoint(
+                args.checkpoint_file, "permission", fingerprint, args.resume
+            ) as checkpoint:
+                # Other shards may share the state file, keep their rows
+                incremental_load_batches(
+                    permission_manager,
+                    permission_batches,
+                    state,
+                    checkpoint,
+                    prune=args.shard is None,
+                )
 
 
 if __name__ == "__main__":
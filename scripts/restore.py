@@ -1,37 +1,43 @@
 # (C) 2025 GoodData Corporation
 
 import logging
+from operator import attrgetter
 
-from gooddata_pipelines import RestoreManager, WorkspaceToRestore
+from gooddata_pipelines import WorkspaceToRestore
 from utils.args.parser import Parser
 from utils.args.schemas import RestoreArgs
 from utils.backup_restore_config import load_config_from_yaml
+from utils.checkpoint import input_fingerprint, open_checkpoint
 from utils.logger import setup_logging
-from utils.utils import create_client, read_csv_file_to_dict
+from utils.restore_manager import ExtendedRestoreManager
+from utils.sharding import shard_rows
+from utils.utils import create_client, iter_csv_file
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 
-def restore():
+def restore(args: RestoreArgs | None = None):
     """Main entry point of the script."""
 
-    args: RestoreArgs = Parser.parse_restore_args()
+    if args is None:
+        args = Parser.parse_restore_args()
 
     backup_restore_config = load_config_from_yaml(args.conf)
 
     restore_manager = create_client(
-        RestoreManager,
+        ExtendedRestoreManager,
         args.profile_config,
         args.profile,
         config=backup_restore_config,
+        pool_size=args.http_pool_size,
     )
 
     # Subscribe to logs
     restore_manager.logger.subscribe(logger)
 
     # Load workspaces from CSV
-    workspaces = read_csv_file_to_dict(args.ws_csv)
+    workspaces = iter_csv_file(args.ws_csv)
 
     # Validate data from CSV input
     workspaces_to_restore = [
@@ -41,9 +47,19 @@ def restore():
         )
         for workspace in workspaces
     ]
+    workspaces_to_restore = shard_rows(
+        workspaces_to_restore, args.shard, attrgetter("id"), "workspace"
+    )
+
+    # Restore workspaces, skipping the ones restored by an interrupted run
+    fingerprint = input_fingerprint(args.shard, files=(args.ws_csv, args.conf))
+    with open_checkpoint(
+        args.checkpoint_file, "restore", fingerprint, args.resume
+    ) as checkpoint:
+        if checkpoint is not None:
+            restore_manager.enable_checkpoint(checkpoint)
 
-    # Restore workspaces
-    restore_manager.restore(workspaces_to_restore)
+        restore_manager.restore(workspaces_to_restore)
 
 
 if __name__ == "__main__":
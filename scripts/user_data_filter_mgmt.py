@@ -1,63 +1,179 @@
 # (C) 2025 GoodData Corporation
 
-from typing import Any
+from operator import attrgetter
+from typing import Any, Iterable
 
 from gooddata_pipelines import UserDataFilterFullLoad, UserDataFilterProvisioner
 from utils.args.parser import Parser
+from utils.args.schemas import UserDataFilterArgs
+from utils.columnar import Columns, ConvertedColumns, iter_columnar_batches
 from utils.logger import get_logger, setup_logging
+from utils.plan import Plan, run_plan
+from utils.profiling import timer
+from utils.sharding import shard_rows
+from utils.user_data_filter_provisioner import ExtendedUserDataFilterProvisioner
 from utils.utils import (
     create_client,
-    read_csv_file_to_dict,
+    iter_csv_file,
 )
+from utils.validation import validate_rows
 
 # Setup logging
 setup_logging()
 logger = get_logger(__name__)
 
 
+def _validate_user_data_filter_row(
+    raw_user_data_filter: dict[str, Any],
+) -> UserDataFilterFullLoad:
+    """Converts a single raw CSV row to a user data filter model."""
+    return UserDataFilterFullLoad(
+        workspace_id=raw_user_data_filter["workspace_id"],
+        udf_id=raw_user_data_filter["udf_id"],
+        udf_value=raw_user_data_filter["udf_value"],
+    )
+
+
+def _convert_user_data_filter_columns(columns: Columns) -> ConvertedColumns:
+    """Converts a chunk of raw CSV columns to user data filter model fields."""
+    return ConvertedColumns(
+        {
+            "workspace_id": columns["workspace_id"],
+            "udf_id": columns["udf_id"],
+            "udf_value": columns["udf_value"],
+        }
+    )
+
+
 def validate_user_data_filter_data(
-    raw_user_data_filters: list[dict[str, Any]],
+    raw_user_data_filters: Iterable[dict[str, Any]],
+    workers: int = 1,
 ) -> list[UserDataFilterFullLoad]:
-    """Validate workspace against input model."""
-    validated_user_data_filters: list[UserDataFilterFullLoad] = []
-    for raw_user_data_filter in raw_user_data_filters:
-        validated_user_data_filter = UserDataFilterFullLoad(
-            workspace_id=raw_user_data_filter["workspace_id"],
-            udf_id=raw_user_data_filter["udf_id"],
-            udf_value=raw_user_data_filter["udf_value"],
-        )
+    """Validate workspace against input model.
+
+    Full load overwrites the user data filters of each listed workspace, so an
+    invalid row is not skipped but stops the script.
+    """
+    return validate_rows(
+        raw_user_data_filters,
+        _validate_user_data_filter_row,
+        raise_on_error=True,
+        workers=workers,
+    )
 
-        validated_user_data_filters.append(validated_user_data_filter)
 
-    return validated_user_data_filters
+def plan_user_data_filters(
+    provisioner: UserDataFilterProvisioner,
+    batches: Iterable[list[UserDataFilterFullLoad]],
+    plan: Plan,
+) -> None:
+    """Counts the operations of a full load of the user data filters.
 
+    The user data filters of every listed workspace are fetched once, like
+    the provisioner does. Creating or updating a user data filter takes two
+    API calls, as the GoodData SDK checks whether it exists first.
+    """
+    sdk = provisioner._api._sdk
+    rows = [row for batch in batches for row in batch]
 
-def udf_mgmt():
+    for workspace in provisioner._group_db_user_data_filters_by_ws_id(rows):
+        upstream_filters = sdk.catalog_workspace.list_user_data_filters(
+            workspace.workspace_id
+        )
+        plan.api_calls += 1
+
+        upstream_user_ids = {
+            udf.relationships.user["data"].id
+            for udf in upstream_filters
+            if udf.relationships and udf.relationships.user
+        }
+        source_user_ids = {udf.udf_id for udf in workspace.user_data_filters}
+        deleted = len(upstream_user_ids - source_user_ids)
+        plan.count("delete user data filter", api_calls=deleted, times=deleted)
+
+        for udf_group in workspace.user_data_filters:
+            existing = [udf for udf in upstream_filters if udf.id == udf_group.udf_id]
+            if provisioner._skip_user_data_filter_update(
+                existing, udf_group.udf_values
+            ):
+                plan.count("unchanged user data filter")
+            elif existing:
+                plan.count("update user data filter", api_calls=2)
+            else:
+                plan.count("create user data filter", api_calls=2)
+
+
+def udf_mgmt(args: UserDataFilterArgs | None = None):
     """Main function for workspace management."""
 
     # Create parser and parse arguments
-    args = Parser.parse_user_data_filter_args()
+    if args is None:
+        args = Parser.parse_user_data_filter_args()
+
+    # Stream CSV input. Full load overwrites all UDFs of every listed workspace,
+    # so all rows are validated before provisioning, but only the validated
+    # models are kept in memory.
+    if args.validation_engine == "columnar":
+        validated_user_data_filters = [
+            user_data_filter
+            for batch in iter_columnar_batches(
+                args.filepath,
+                args.delimiter,
+                args.quotechar,
+                UserDataFilterFullLoad,
+                _convert_user_data_filter_columns,
+                _validate_user_data_filter_row,
+                workers=args.validation_workers,
+                raise_on_error=True,
+            )
+            for user_data_filter in batch
+        ]
+    else:
+        raw_user_data_filters = iter_csv_file(
+            args.filepath, args.delimiter, args.quotechar
+        )
 
-    # Read CSV input
-    raw_user_data_filters = read_csv_file_to_dict(
-        args.filepath, args.delimiter, args.quotechar
-    )
+        # Validate user data filter data
+        validated_user_data_filters = validate_user_data_filter_data(
+            raw_user_data_filters, args.validation_workers
+        )
 
-    # Validate user data filter data
-    validated_user_data_filters = validate_user_data_filter_data(raw_user_data_filters)
+    # The shard of a workspace gets all its rows, so that full load does not
+    # remove the user data filters of its other rows
+    validated_user_data_filters = shard_rows(
+        validated_user_data_filters,
+        args.shard,
+        attrgetter("workspace_id"),
+        "user data filter",
+    )
 
     # Create provisioner and subscribe to logger
-    provisioner: UserDataFilterProvisioner = create_client(
-        UserDataFilterProvisioner, args.profile_config, args.profile
+    provisioner = create_client(
+        ExtendedUserDataFilterProvisioner,
+        args.profile_config,
+        args.profile,
+        pool_size=args.http_pool_size,
     )
+    provisioner.set_max_workers(args.provisioning_workers)
 
     provisioner.set_ldm_column_name(args.ldm_column_name)
     provisioner.set_maql_column_name(args.maql_column_name)
 
     provisioner.logger.subscribe(logger)
 
-    # Incremental load user data filters
-    provisioner.full_load(validated_user_data_filters)
+    if args.plan:
+        run_plan(
+            provisioner,
+            plan_user_data_filters,
+            "user data filter",
+            [validated_user_data_filters],
+            calls_per_second=args.api_calls_per_second,
+        )
+        return
+
+    # Full load user data filters, overwriting only the ones which changed
+    with timer.phase("provisioning"):
+        provisioner.full_load(validated_user_data_filters)
 
 
 if __name__ == "__main__":
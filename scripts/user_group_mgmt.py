@@ -11,66 +11,214 @@
 # THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 
-from typing import Any
+from functools import partial
+from operator import attrgetter
+from typing import Any, Iterable, Iterator
 
 from gooddata_pipelines import (
     UserGroupIncrementalLoad,
     UserGroupProvisioner,
 )
+from gooddata_sdk import CatalogUserGroup
 from utils.args.parser import Parser
 from utils.args.schemas import UserGroupArgs
+from utils.checkpoint import input_fingerprint, open_checkpoint
+from utils.columnar import Columns, ConvertedColumns, iter_columnar_batches
+from utils.compaction import compact_batches, last_wins_unless_conflicting
+from utils.hierarchy import order_by_hierarchy
 from utils.logger import get_logger, setup_logging
-from utils.utils import create_client, read_csv_file_to_dict
+from utils.plan import Plan, run_plan
+from utils.state import incremental_load_batches
+from utils.user_group_provisioner import ExtendedUserGroupProvisioner
+from utils.utils import create_client, iter_csv_file, iter_validated_batches
+from utils.validation import validate_rows
 
 setup_logging()
 logger = get_logger(__name__)
 
 
+def _validate_user_group_row(
+    raw_user_group: dict[str, Any], parent_delimiter: str
+) -> UserGroupIncrementalLoad:
+    """Converts a single raw CSV row to a user group model."""
+    processed_user_group: dict[str, Any] = dict(raw_user_group)
+    parent_user_groups = raw_user_group["parent_user_groups"]
+
+    if parent_user_groups:
+        processed_user_group["parent_user_groups"] = parent_user_groups.split(
+            parent_delimiter
+        )
+    else:
+        processed_user_group["parent_user_groups"] = []
+
+    return UserGroupIncrementalLoad.model_validate(processed_user_group)
+
+
+def _user_group_key(user_group: UserGroupIncrementalLoad) -> tuple[str, ...]:
+    """Identifies the user group a row belongs to."""
+    return (user_group.user_group_id,)
+
+
+def _convert_user_group_columns(
+    columns: Columns, parent_delimiter: str
+) -> ConvertedColumns:
+    """Converts a chunk of raw CSV columns to user group model fields."""
+    fields: dict[str, Any] = dict(columns)
+    fields["parent_user_groups"] = [
+        value.split(parent_delimiter) if value else []
+        for value in columns["parent_user_groups"]
+    ]
+    return ConvertedColumns(fields)
+
+
+def validate_user_group_data(
+    raw_user_groups: Iterable[dict[str, Any]],
+    parent_delimiter: str,
+    workers: int = 1,
+) -> list[UserGroupIncrementalLoad]:
+    """Validates raw user group rows against the input model."""
+    return validate_rows(
+        raw_user_groups,
+        partial(_validate_user_group_row, parent_delimiter=parent_delimiter),
+        workers=workers,
+    )
+
+
 def read_users_groups_from_csv(
     args: UserGroupArgs,
-) -> list[UserGroupIncrementalLoad]:
-    """Reads users from csv file."""
-    user_groups: list[UserGroupIncrementalLoad] = []
-    raw_user_groups = read_csv_file_to_dict(
-        args.user_group_csv, args.delimiter, args.quotechar
+) -> Iterator[list[UserGroupIncrementalLoad]]:
+    """Reads user groups from csv file in batches."""
+    if args.validation_engine == "columnar":
+        return iter_columnar_batches(
+            args.user_group_csv,
+            args.delimiter,
+            args.quotechar,
+            UserGroupIncrementalLoad,
+            partial(_convert_user_group_columns, parent_delimiter=args.inner_delimiter),
+            partial(_validate_user_group_row, parent_delimiter=args.inner_delimiter),
+            batch_size=args.batch_size,
+            workers=args.validation_workers,
+        )
+
+    raw_user_groups = iter_csv_file(args.user_group_csv, args.delimiter, args.quotechar)
+
+    return iter_validated_batches(
+        raw_user_groups,
+        partial(
+            validate_user_group_data,
+            parent_delimiter=args.inner_delimiter,
+            workers=args.validation_workers,
+        ),
+        args.batch_size,
     )
-    for raw_user_group in raw_user_groups:
-        processed_user_group: dict[str, Any] = dict(raw_user_group)
-        parent_user_groups = raw_user_group["parent_user_groups"]
 
-        if parent_user_groups:
-            processed_user_group["parent_user_groups"] = parent_user_groups.split(
-                args.inner_delimiter
-            )
-        else:
-            processed_user_group["parent_user_groups"] = []
-
-        try:
-            user_group = UserGroupIncrementalLoad.model_validate(processed_user_group)
-            user_groups.append(user_group)
-        except Exception as e:
-            logger.error(
-                f'Unable to load following row: "{raw_user_group}". Error: "{e}"'
+
+def plan_user_groups(
+    provisioner: UserGroupProvisioner,
+    batches: Iterable[list[UserGroupIncrementalLoad]],
+    plan: Plan,
+) -> None:
+    """Counts the operations of an incremental load of the user groups.
+
+    Creating or updating a user group takes two API calls, as the GoodData
+    SDK checks whether it exists first.
+    """
+    upstream_groups = {
+        group.id: group
+        for group in provisioner._api._sdk.catalog_user.list_user_groups()
+    }
+
+    for batch in batches:
+        # The provisioner lists the user groups for each batch
+        plan.api_calls += 1
+
+        for group in batch:
+            upstream_group = upstream_groups.get(group.user_group_id)
+
+            if not group.is_active:
+                if upstream_group is None:
+                    plan.count("skip delete of missing user group")
+                else:
+                    plan.count("delete user group", api_calls=1)
+                    del upstream_groups[group.user_group_id]
+                continue
+
+            if upstream_group is None:
+                plan.count("create user group", api_calls=2)
+            elif provisioner._is_changed(group, upstream_group):
+                plan.count("update user group", api_calls=2)
+            else:
+                plan.count("unchanged user group")
+                continue
+
+            upstream_groups[group.user_group_id] = CatalogUserGroup.init(
+                user_group_id=group.user_group_id,
+                user_group_name=group.user_group_name,
+                user_group_parent_ids=sorted(group.parent_user_groups),
             )
-            continue
-    return user_groups
 
 
-def user_group_mgmt():
+def user_group_mgmt(args: UserGroupArgs | None = None):
     """Main function for user management."""
 
-    args = Parser.parse_user_group_args()
+    if args is None:
+        args = Parser.parse_user_group_args()
 
     try:
         provisioner = create_client(
-            UserGroupProvisioner, args.profile_config, args.profile
+            ExtendedUserGroupProvisioner,
+            args.profile_config,
+            args.profile,
+            pool_size=args.http_pool_size,
         )
+        provisioner.set_max_workers(args.provisioning_workers)
 
         provisioner.logger.subscribe(logger)
 
-        validated_user_groups = read_users_groups_from_csv(args)
+        user_group_batches = read_users_groups_from_csv(args)
+        if args.compact:
+            user_group_batches = compact_batches(
+                user_group_batches,
+                "user group",
+                _user_group_key,
+                last_wins_unless_conflicting,
+            )
+
+        # Parents are provisioned before their children, whatever the order
+        # of the input rows. Shards keep whole hierarchies for the same reason.
+        user_group_batches = order_by_hierarchy(
+            user_group_batches,
+            "user group",
+            attrgetter("user_group_id"),
+            attrgetter("parent_user_groups"),
+            args.batch_size,
+            args.shard,
+        )
 
-        provisioner.incremental_load(validated_user_groups)
+        if args.plan:
+            run_plan(
+                provisioner,
+                plan_user_groups,
+                "user group",
+                user_group_batches,
+                calls_per_second=args.api_calls_per_second,
+            )
+            return
+
+        fingerprint = input_fingerprint(
+            args.delimiter,
+            args.quotechar,
+            args.inner_delimiter,
+            args.batch_size,
+            args.shard,
+            files=(args.user_group_csv,),
+        )
+        with open_checkpoint(
+            args.checkpoint_file, "user group", fingerprint, args.resume
+        ) as checkpoint:
+            incremental_load_batches(
+                provisioner, user_group_batches, checkpoint=checkpoint
+            )
 
     except RuntimeError as e:
         logger.error(f"Runtime error has occurred: {e}")
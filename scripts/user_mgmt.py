@@ -1,71 +1,227 @@
 # (C) 2025 GoodData Corporation
 
-import csv
+from functools import partial
+from operator import attrgetter
 from pathlib import Path
+from typing import Any, Iterable, Iterator
 
 from gooddata_pipelines import UserIncrementalLoad, UserProvisioner
 from utils.args.parser import Parser
+from utils.args.schemas import UserArgs
+from utils.checkpoint import input_fingerprint, open_checkpoint
+from utils.columnar import Columns, ConvertedColumns, iter_columnar_batches
+from utils.compaction import compact_batches
 from utils.logger import get_logger, setup_logging
-from utils.utils import create_client
+from utils.plan import Plan, run_plan
+from utils.sharding import shard_batches
+from utils.state import incremental_load_batches, open_state_store
+from utils.utils import create_client, iter_csv_file, iter_validated_batches
+from utils.validation import validate_rows
 
 setup_logging()
 logger = get_logger(__name__)
 
 
-def read_users_from_csv(
-    path_to_csv: Path, row_delimiter: str, quotechar: str, user_group_delimiter: str
+def _validate_user_row(
+    row: dict[str, Any], user_group_delimiter: str
+) -> UserIncrementalLoad:
+    """Converts a single raw CSV row to a user model."""
+    return UserIncrementalLoad(
+        user_id=row["user_id"],
+        firstname=row["firstname"],
+        lastname=row["lastname"],
+        email=row["email"],
+        auth_id=row["auth_id"],
+        user_groups=row["user_groups"].split(user_group_delimiter),
+        is_active=row["is_active"] == "True",
+    )
+
+
+def _convert_user_columns(
+    columns: Columns, user_group_delimiter: str
+) -> ConvertedColumns:
+    """Converts a chunk of raw CSV columns to user model fields."""
+    return ConvertedColumns(
+        {
+            "user_id": columns["user_id"],
+            "firstname": columns["firstname"],
+            "lastname": columns["lastname"],
+            "email": columns["email"],
+            "auth_id": columns["auth_id"],
+            "user_groups": [
+                value.split(user_group_delimiter) for value in columns["user_groups"]
+            ],
+            "is_active": [value == "True" for value in columns["is_active"]],
+        }
+    )
+
+
+def _user_key(user: UserIncrementalLoad) -> tuple[str, ...]:
+    """Identifies the user a row belongs to in the state store."""
+    return (user.user_id,)
+
+
+def validate_user_data(
+    raw_users: Iterable[dict[str, Any]],
+    user_group_delimiter: str,
+    workers: int = 1,
 ) -> list[UserIncrementalLoad]:
-    """Reads users from csv file."""
+    """Validates raw user rows against the input model."""
+    return validate_rows(
+        raw_users,
+        partial(_validate_user_row, user_group_delimiter=user_group_delimiter),
+        workers=workers,
+    )
 
-    users: list[UserIncrementalLoad] = []
 
-    with open(path_to_csv, "r") as f:
-        reader = csv.DictReader(
-            f, delimiter=row_delimiter, quotechar=quotechar, skipinitialspace=True
+def read_users_from_csv(
+    path_to_csv: Path,
+    row_delimiter: str,
+    quotechar: str,
+    user_group_delimiter: str,
+    batch_size: int | None = None,
+    workers: int = 1,
+    engine: str = "rows",
+) -> Iterator[list[UserIncrementalLoad]]:
+    """Reads users from csv file in batches."""
+    if engine == "columnar":
+        return iter_columnar_batches(
+            path_to_csv,
+            row_delimiter,
+            quotechar,
+            UserIncrementalLoad,
+            partial(_convert_user_columns, user_group_delimiter=user_group_delimiter),
+            partial(_validate_user_row, user_group_delimiter=user_group_delimiter),
+            skipinitialspace=True,
+            batch_size=batch_size,
+            workers=workers,
         )
-        for row in reader:
-            try:
-                user_id = row["user_id"]
-                firstname = row["firstname"]
-                lastname = row["lastname"]
-                email = row["email"]
-                auth_id = row["auth_id"]
-                user_groups = row["user_groups"].split(user_group_delimiter)
-                is_active = row["is_active"] == "True"
-
-                user = UserIncrementalLoad(
-                    user_id=user_id,
-                    firstname=firstname,
-                    lastname=lastname,
-                    email=email,
-                    auth_id=auth_id,
-                    user_groups=user_groups,
-                    is_active=is_active,
-                )
 
-            except Exception as e:
-                logger.error(f'Unable to load following row: "{row}". Error: "{e}"')
-                continue
+    raw_users = iter_csv_file(
+        path_to_csv, row_delimiter, quotechar, skipinitialspace=True
+    )
+
+    return iter_validated_batches(
+        raw_users,
+        partial(
+            validate_user_data,
+            user_group_delimiter=user_group_delimiter,
+            workers=workers,
+        ),
+        batch_size,
+    )
+
 
-            users.append(user)
+def plan_users(
+    provisioner: UserProvisioner,
+    batches: Iterable[list[UserIncrementalLoad]],
+    plan: Plan,
+) -> None:
+    """Counts the operations of an incremental load of the users.
+
+    The users and user groups are listed once, instead of being fetched one
+    by one like the provisioner does. Creating or updating an entity takes
+    two API calls, as the GoodData SDK checks whether it exists first.
+    """
+    sdk = provisioner._api._sdk
+    upstream_users = {
+        user.id: UserIncrementalLoad.from_sdk_obj(user)
+        for user in sdk.catalog_user.list_users()
+    }
+    upstream_groups = {group.id for group in sdk.catalog_user.list_user_groups()}
+    protected_users = {*provisioner.protected_users, provisioner._get_current_user_id()}
+
+    for batch in batches:
+        # The provisioner fetches the current user's profile for each batch
+        plan.api_calls += 1
+
+        for user in batch:
+            upstream_user = upstream_users.get(user.user_id)
+
+            if user.user_id in protected_users:
+                plan.count("skip protected user")
+            elif not user.is_active:
+                if upstream_user is None:
+                    plan.count("skip delete of missing user", api_calls=1)
+                else:
+                    plan.count("delete user", api_calls=2)
+                    del upstream_users[user.user_id]
+            elif provisioner._user_is_equal_upstream(user, upstream_user):
+                plan.count("unchanged user", api_calls=1)
+            else:
+                missing_groups = set(user.user_groups) - upstream_groups
+                plan.count(
+                    "create user group",
+                    api_calls=2 * len(missing_groups),
+                    times=len(missing_groups),
+                )
+                upstream_groups |= missing_groups
 
-    return users
+                operation = "create user" if upstream_user is None else "update user"
+                plan.count(operation, api_calls=3 + len(user.user_groups))
+                upstream_users[user.user_id] = user
 
 
-def user_mgmt() -> None:
+def user_mgmt(args: UserArgs | None = None) -> None:
     """Main function for user management."""
 
-    args = Parser.parse_user_args()
+    if args is None:
+        args = Parser.parse_user_args()
 
-    users = read_users_from_csv(
-        args.user_csv, args.delimiter, args.quotechar, args.inner_delimiter
+    provisioner = create_client(
+        UserProvisioner,
+        args.profile_config,
+        args.profile,
+        pool_size=args.http_pool_size,
     )
 
-    provisioner = create_client(UserProvisioner, args.profile_config, args.profile)
-
     provisioner.logger.subscribe(logger)
 
-    provisioner.incremental_load(users)
+    user_batches = read_users_from_csv(
+        args.user_csv,
+        args.delimiter,
+        args.quotechar,
+        args.inner_delimiter,
+        args.batch_size,
+        args.validation_workers,
+        args.validation_engine,
+    )
+    user_batches = shard_batches(
+        user_batches, args.shard, attrgetter("user_id"), "user"
+    )
+    if args.compact:
+        user_batches = compact_batches(user_batches, "user", _user_key)
+
+    with open_state_store(args.state_file, "user", _user_key) as state_store:
+        if args.plan:
+            run_plan(
+                provisioner,
+                plan_users,
+                "user",
+                user_batches,
+                state_store,
+                args.api_calls_per_second,
+            )
+        else:
+            fingerprint = input_fingerprint(
+                args.delimiter,
+                args.quotechar,
+                args.inner_delimiter,
+                args.batch_size,
+                args.shard,
+                files=(args.user_csv,),
+            )
+            with open_checkpoint(
+                args.checkpoint_file, "user", fingerprint, args.resume
+            ) as checkpoint:
+                # Other shards may share the state file, keep their rows
+                incremental_load_batches(
+                    provisioner,
+                    user_batches,
+                    state_store,
+                    checkpoint,
+                    prune=args.shard is None,
+                )
 
 
 if __name__ == "__main__":
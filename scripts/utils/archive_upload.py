@@ -0,0 +1,192 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the streaming archive upload used by the backup.
+
+Instead of creating the `gooddata_layouts.zip` archive on disk and uploading
+it afterwards, the archive is compressed directly into an S3 multipart upload.
+Parts are uploaded in parallel while the rest of the archive is still being
+compressed, and only a bounded number of parts is held in memory.
+"""
+
+import io
+import os
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from gooddata_pipelines.backup_and_restore.constants import DirNames
+
+MIB = 1024 * 1024
+
+# S3 rejects multipart uploads with parts (except the last) below 5 MiB
+MIN_PART_SIZE = 5 * MIB
+
+
+class S3MultipartWriter(io.RawIOBase):
+    """Write-only file object uploading its content as an S3 multipart upload.
+
+    Data is buffered until a part is full, which is then uploaded by one of
+    `max_concurrency` threads. At most `max_concurrency` parts are in flight,
+    so the memory usage is bounded by `(max_concurrency + 1) * part_size`.
+    Content smaller than a single part is uploaded with a single request.
+
+    The upload is completed on `close()`. If the writer is used as a context
+    manager and an exception is raised, the upload is aborted instead.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        key: str,
+        part_size: int = 8 * MIB,
+        max_concurrency: int = 4,
+    ) -> None:
+        super().__init__()
+
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"Part size must be at least {MIN_PART_SIZE} bytes.")
+        if max_concurrency < 1:
+            raise ValueError("Upload concurrency must be a positive integer.")
+
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id: str | None = None
+        self._parts: list[Future[dict[str, Any]]] = []
+        self._executor: ThreadPoolExecutor | None = None
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data: Any) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+
+        self._buffer += data
+        self._position += len(data)
+
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[: self.part_size])
+            del self._buffer[: self.part_size]
+            self._submit_part(part)
+
+        return len(data)
+
+    def close(self) -> None:
+        """Uploads the remaining data and completes the upload."""
+        if self.closed:
+            return
+
+        try:
+            if self._upload_id is None:
+                self.client.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer)
+                )
+            else:
+                if self._buffer:
+                    self._submit_part(bytes(self._buffer))
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": [part.result() for part in self._parts]},
+                )
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._shutdown()
+            super().close()
+
+    def abort(self) -> None:
+        """Discards the upload, including the already uploaded parts."""
+        if not self.closed and self._upload_id is not None:
+            self._shutdown()
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+            self._upload_id = None
+        self._buffer.clear()
+        super().close()
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def _submit_part(self, data: bytes) -> None:
+        if self._upload_id is None:
+            response = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )
+            self._upload_id = response["UploadId"]
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+
+        assert self._executor is not None
+
+        # Wait for the oldest part in flight to bound the memory usage
+        in_flight = [part for part in self._parts if not part.done()]
+        if len(in_flight) >= self.max_concurrency:
+            in_flight[0].result()
+
+        part_number = len(self._parts) + 1
+        self._parts.append(self._executor.submit(self._upload_part, part_number, data))
+
+    def _upload_part(self, part_number: int, data: bytes) -> dict[str, Any]:
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def _shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def write_layouts_zip(
+    workspace_layout_dir: Path, output: Any, compression_level: int
+) -> None:
+    """Compresses the workspace layout into a `gooddata_layouts.zip` archive.
+
+    The archive has the same structure as the one created by the backup
+    manager: the content of the workspace layout directory (`ldm`,
+    `analytics_model`, `user_data_filters`, ...) under a `gooddata_layouts`
+    root folder. Empty directories are kept, as the restore relies on them.
+
+    Args:
+        workspace_layout_dir (Path): Path to the exported workspace layout,
+            i.e., `.../gooddata_layouts/<org_id>/workspaces/<workspace_id>`.
+        output: Writable binary file object. Does not need to be seekable.
+        compression_level (int): Deflate compression level, 0 to 9.
+    """
+    with zipfile.ZipFile(
+        output,
+        "w",
+        compression=zipfile.ZIP_DEFLATED,
+        compresslevel=compression_level,
+    ) as archive:
+        for root, dirs, files in os.walk(workspace_layout_dir):
+            dirs.sort()
+            root_path = Path(root)
+            arc_root = Path(
+                DirNames.LAYOUTS, root_path.relative_to(workspace_layout_dir)
+            )
+
+            archive.write(root_path, arc_root.as_posix())
+            for file_name in sorted(files):
+                archive.write(root_path / file_name, (arc_root / file_name).as_posix())
@@ -1,10 +1,11 @@
 import argparse
+import time
 from pathlib import Path
 
-from gooddata_sdk.utils import PROFILES_FILE_PATH
 from utils.args.schemas import (
     BackupArgs,
     CustomFieldsArgs,
+    MergeMetricsArgs,
     PermissionArgs,
     RestoreArgs,
     UserArgs,
@@ -12,6 +13,24 @@ from utils.args.schemas import (
     UserGroupArgs,
     WorkspaceArgs,
 )
+from utils.args.validators import VALIDATION_ENGINES, rate_bounds_must_be_valid
+from utils.metrics import start_metrics
+from utils.profiling import start_diagnostics, timer
+from utils.sharding import Shard
+
+# Same as `gooddata_sdk.utils.PROFILES_FILE_PATH`. Not imported from the SDK,
+# so that parsing the arguments does not pay the import of the whole SDK.
+PROFILES_FILE_PATH = Path.home() / ".gooddata" / "profiles.yaml"
+
+# Same as `utils.sessions.DEFAULT_POOL_SIZE`, not imported for the same reason
+DEFAULT_POOL_SIZE = 10
+
+
+def _shard(value: str) -> Shard:
+    try:
+        return Shard.parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
 
 
 class Parser:
@@ -25,9 +44,12 @@ class Parser:
     DEFAULT_DELIMITER = ","
     DEFAULT_INNER_DELIMITER = "|"
     DEFAULT_QUOTECHAR = '"'
+    DEFAULT_MIN_CALLS_PER_SECOND = 1.0
+    DEFAULT_MAX_CALLS_PER_SECOND = 100.0
 
     def __init__(self, description: str) -> None:
         self.parser = argparse.ArgumentParser(description=description)
+        self._started_at = time.perf_counter()
 
     @classmethod
     def parse_workspace_args(cls) -> WorkspaceArgs:
@@ -36,8 +58,15 @@ class Parser:
 
         parser._add_file_path("filepath", "Path to CSV file with input data.")
         parser._add_common_args()
+        parser._add_batch_size()
+        parser._add_validation_workers()
+        parser._add_validation_engine()
+        parser._add_provisioning_workers("workspaces")
+        parser._add_state_file()
+        parser._add_checkpoint()
+        parser._add_plan()
 
-        namespace = parser.parser.parse_args()
+        namespace = parser._parse()
 
         return WorkspaceArgs(
             filepath=namespace.filepath,
@@ -46,6 +75,17 @@ class Parser:
             quotechar=namespace.quotechar,
             profile_config=namespace.profile_config,
             profile=namespace.profile,
+            http_pool_size=namespace.http_pool_size,
+            shard=namespace.shard,
+            batch_size=namespace.batch_size,
+            validation_workers=namespace.validation_workers,
+            validation_engine=namespace.validation_engine,
+            provisioning_workers=namespace.provisioning_workers,
+            state_file=namespace.state_file,
+            checkpoint_file=namespace.checkpoint_file,
+            resume=namespace.resume,
+            plan=namespace.plan,
+            api_calls_per_second=namespace.api_calls_per_second,
         )
 
     @classmethod
@@ -55,8 +95,15 @@ class Parser:
 
         parser._add_file_path("user_csv", "Path to csv with user definitions.")
         parser._add_common_args()
+        parser._add_batch_size()
+        parser._add_validation_workers()
+        parser._add_validation_engine()
+        parser._add_compact()
+        parser._add_state_file()
+        parser._add_checkpoint()
+        parser._add_plan()
 
-        namespace = parser.parser.parse_args()
+        namespace = parser._parse()
 
         return UserArgs(
             user_csv=namespace.user_csv,
@@ -65,6 +112,17 @@ class Parser:
             quotechar=namespace.quotechar,
             profile_config=namespace.profile_config,
             profile=namespace.profile,
+            http_pool_size=namespace.http_pool_size,
+            shard=namespace.shard,
+            batch_size=namespace.batch_size,
+            validation_workers=namespace.validation_workers,
+            validation_engine=namespace.validation_engine,
+            compact=namespace.compact,
+            state_file=namespace.state_file,
+            checkpoint_file=namespace.checkpoint_file,
+            resume=namespace.resume,
+            plan=namespace.plan,
+            api_calls_per_second=namespace.api_calls_per_second,
         )
 
     @classmethod
@@ -76,8 +134,15 @@ class Parser:
             "user_group_csv", "Path to csv with user groups definitions."
         )
         parser._add_common_args()
+        parser._add_batch_size()
+        parser._add_validation_workers()
+        parser._add_validation_engine()
+        parser._add_compact()
+        parser._add_provisioning_workers("user groups")
+        parser._add_checkpoint()
+        parser._add_plan()
 
-        namespace = parser.parser.parse_args()
+        namespace = parser._parse()
 
         return UserGroupArgs(
             user_group_csv=namespace.user_group_csv,
@@ -86,6 +151,17 @@ class Parser:
             quotechar=namespace.quotechar,
             profile_config=namespace.profile_config,
             profile=namespace.profile,
+            http_pool_size=namespace.http_pool_size,
+            shard=namespace.shard,
+            batch_size=namespace.batch_size,
+            validation_workers=namespace.validation_workers,
+            validation_engine=namespace.validation_engine,
+            compact=namespace.compact,
+            provisioning_workers=namespace.provisioning_workers,
+            checkpoint_file=namespace.checkpoint_file,
+            resume=namespace.resume,
+            plan=namespace.plan,
+            api_calls_per_second=namespace.api_calls_per_second,
         )
 
     @classmethod
@@ -96,8 +172,15 @@ class Parser:
 
         parser._add_csv_args()
         parser._add_profile_args()
+        parser._add_batch_size()
+        parser._add_validation_workers()
+        parser._add_validation_engine()
+        parser._add_compact()
+        parser._add_state_file()
+        parser._add_checkpoint()
+        parser._add_plan()
 
-        namespace = parser.parser.parse_args()
+        namespace = parser._parse()
 
         return PermissionArgs(
             perm_csv=namespace.perm_csv,
@@ -105,6 +188,17 @@ class Parser:
             quotechar=namespace.quotechar,
             profile_config=namespace.profile_config,
             profile=namespace.profile,
+            http_pool_size=namespace.http_pool_size,
+            shard=namespace.shard,
+            batch_size=namespace.batch_size,
+            validation_workers=namespace.validation_workers,
+            validation_engine=namespace.validation_engine,
+            compact=namespace.compact,
+            state_file=namespace.state_file,
+            checkpoint_file=namespace.checkpoint_file,
+            resume=namespace.resume,
+            plan=namespace.plan,
+            api_calls_per_second=namespace.api_calls_per_second,
         )
 
     @classmethod
@@ -120,7 +214,12 @@ class Parser:
         parser._add_csv_args()
         parser._add_profile_args()
 
-        namespace = parser.parser.parse_args()
+        parser._add_validation_workers()
+        parser._add_validation_engine()
+        parser._add_provisioning_workers("workspaces")
+        parser._add_plan()
+
+        namespace = parser._parse()
 
         return UserDataFilterArgs(
             filepath=namespace.filepath,
@@ -130,6 +229,13 @@ class Parser:
             quotechar=namespace.quotechar,
             profile_config=namespace.profile_config,
             profile=namespace.profile,
+            http_pool_size=namespace.http_pool_size,
+            shard=namespace.shard,
+            validation_workers=namespace.validation_workers,
+            validation_engine=namespace.validation_engine,
+            provisioning_workers=namespace.provisioning_workers,
+            plan=namespace.plan,
+            api_calls_per_second=namespace.api_calls_per_second,
         )
 
     @classmethod
@@ -149,7 +255,10 @@ class Parser:
 
         parser._add_check_relations()
 
-        namespace = parser.parser.parse_args()
+        parser._add_validation_workers()
+        parser._add_provisioning_workers("workspaces")
+
+        namespace = parser._parse()
 
         return CustomFieldsArgs(
             path_to_custom_datasets_csv=namespace.path_to_custom_datasets_csv,
@@ -159,6 +268,10 @@ class Parser:
             check_relations=namespace.check_relations,
             profile_config=namespace.profile_config,
             profile=namespace.profile,
+            http_pool_size=namespace.http_pool_size,
+            shard=namespace.shard,
+            validation_workers=namespace.validation_workers,
+            provisioning_workers=namespace.provisioning_workers,
         )
 
     @classmethod
@@ -169,15 +282,22 @@ class Parser:
         parser._add_file_path("conf", "Path to backup storage configuration file.")
         parser._add_profile_args()
         parser._add_input_type()
+        parser._add_incremental()
+        parser._add_checkpoint()
 
-        namespace = parser.parser.parse_args()
+        namespace = parser._parse()
 
         return BackupArgs(
             ws_csv=namespace.ws_csv,
             conf=namespace.conf,
             profile_config=namespace.profile_config,
             profile=namespace.profile,
+            http_pool_size=namespace.http_pool_size,
+            shard=namespace.shard,
             input_type=namespace.input_type,
+            incremental=namespace.incremental,
+            checkpoint_file=namespace.checkpoint_file,
+            resume=namespace.resume,
         )
 
     @classmethod
@@ -187,14 +307,149 @@ class Parser:
         parser._add_file_path("ws_csv", "Path to csv with input data.")
         parser._add_file_path("conf", "Path to backup storage configuration file.")
         parser._add_profile_args()
+        parser._add_checkpoint()
 
-        namespace = parser.parser.parse_args()
+        namespace = parser._parse()
 
         return RestoreArgs(
             ws_csv=namespace.ws_csv,
             conf=namespace.conf,
             profile_config=namespace.profile_config,
             profile=namespace.profile,
+            http_pool_size=namespace.http_pool_size,
+            shard=namespace.shard,
+            checkpoint_file=namespace.checkpoint_file,
+            resume=namespace.resume,
+        )
+
+    @classmethod
+    def parse_merge_metrics_args(cls) -> MergeMetricsArgs:
+        """Parses metrics merge command line arguments."""
+        parser = cls("Merge of the metrics written by the shards of a job.")
+        parser.parser.add_argument(
+            "inputs",
+            type=Path,
+            nargs="+",
+            help="Paths to the metrics of the shards, as written by --metrics-out.",
+        )
+        parser.parser.add_argument(
+            "-o",
+            "--output",
+            type=Path,
+            default=None,
+            help="Path to write the merged metrics to as JSON. "
+            "If not provided, they are printed to the standard output.",
+        )
+        parser.parser.add_argument(
+            "--textfile",
+            type=Path,
+            default=None,
+            help="Path to write the merged metrics to in the Prometheus text "
+            "format, e.g. into the node exporter textfile directory.",
+        )
+
+        # The merge does not call any API, so the rate control and
+        # diagnostic arguments do not apply
+        namespace = parser.parser.parse_args()
+
+        return MergeMetricsArgs(
+            inputs=namespace.inputs,
+            output=namespace.output,
+            textfile=namespace.textfile,
+        )
+
+    def _parse(self) -> argparse.Namespace:
+        """Parses the arguments and starts the requested diagnostics.
+
+        The rate control and diagnostic arguments are shared by all scripts
+        and are not part of the argument schemas.
+        """
+        self._add_rate_control_args()
+        self._add_diagnostics_args()
+
+        namespace = self.parser.parse_args()
+
+        # Metrics are written last at exit, after the profile and the timings
+        start_metrics(namespace.metrics_out, namespace.metrics_textfile)
+        start_diagnostics(
+            namespace.profile_out, namespace.timings, namespace.timings_json
+        )
+        if namespace.adaptive_rate:
+            rate_bounds_must_be_valid(
+                namespace.min_calls_per_second, namespace.max_calls_per_second
+            )
+            # Imported only when used, as it imports GoodData Pipelines
+            from utils.rate_limiter import start_adaptive_rate
+
+            start_adaptive_rate(
+                namespace.min_calls_per_second, namespace.max_calls_per_second
+            )
+        timer.record("argument_parsing", time.perf_counter() - self._started_at)
+
+        return namespace
+
+    def _add_rate_control_args(self) -> None:
+        group = self.parser.add_argument_group("rate control")
+        group.add_argument(
+            "--adaptive-rate",
+            action="store_true",
+            help="Adapt the rate of the API calls to the responses of the API: "
+            "increase it while the responses are healthy and lower it on "
+            "429 and 5xx responses, failed requests or a rising latency. The "
+            "rate is shared by all API calls of the run.",
+        )
+        group.add_argument(
+            "--min-calls-per-second",
+            type=float,
+            default=self.DEFAULT_MIN_CALLS_PER_SECOND,
+            help="Lowest rate of the API calls with --adaptive-rate, which is "
+            "also the starting rate. "
+            f"(default: {self.DEFAULT_MIN_CALLS_PER_SECOND:g})",
+        )
+        group.add_argument(
+            "--max-calls-per-second",
+            type=float,
+            default=self.DEFAULT_MAX_CALLS_PER_SECOND,
+            help="Highest rate of the API calls with --adaptive-rate. "
+            f"(default: {self.DEFAULT_MAX_CALLS_PER_SECOND:g})",
+        )
+
+    def _add_diagnostics_args(self) -> None:
+        group = self.parser.add_argument_group("diagnostics")
+        group.add_argument(
+            "--profile-out",
+            type=Path,
+            default=None,
+            help="Path to write a cProfile dump of the run to. The dump can "
+            "be inspected with `python -m pstats` or tools like snakeviz.",
+        )
+        group.add_argument(
+            "--timings",
+            action="store_true",
+            help="Report wall time and peak memory of each phase of the run "
+            "(argument parsing, client creation, CSV read, validation, "
+            "provisioning, ...) when the script finishes.",
+        )
+        group.add_argument(
+            "--timings-json",
+            action="store_true",
+            help="Like --timings, but also write the report as JSON to "
+            "`<script_name>_<timestamp>_timings.json` next to the log file.",
+        )
+        group.add_argument(
+            "--metrics-out",
+            type=Path,
+            default=None,
+            help="Path to write the metrics of the run to as JSON: rows read "
+            "and rejected, API requests, retries and latencies, transferred "
+            "bytes and phase durations.",
+        )
+        group.add_argument(
+            "--metrics-textfile",
+            type=Path,
+            default=None,
+            help="Path to write the metrics of the run to in the Prometheus "
+            "text format, e.g. into the node exporter textfile directory.",
         )
 
     def _add_common_args(self) -> None:
@@ -206,6 +461,8 @@ class Parser:
     def _add_profile_args(self) -> None:
         self._add_profile_config()
         self._add_profile()
+        self._add_http_pool_size()
+        self._add_shard()
 
     def _add_csv_args(self) -> None:
         self._add_quotechar()
@@ -218,6 +475,104 @@ class Parser:
             help=help,
         )
 
+    def _add_batch_size(self) -> None:
+        self.parser.add_argument(
+            "-b",
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Number of input rows to read, validate and provision at once. "
+            "Keeps memory usage flat for large input files. If not provided, "
+            "the whole input file is processed as a single batch.",
+        )
+
+    def _add_validation_workers(self) -> None:
+        self.parser.add_argument(
+            "--validation-workers",
+            type=int,
+            default=1,
+            help="Number of processes used to validate the input rows. "
+            "Useful for very large input files on multi-core machines. "
+            "Defaults to 1, i.e., validation in the main process.",
+        )
+
+    def _add_provisioning_workers(self, entities: str) -> None:
+        self.parser.add_argument(
+            "--provisioning-workers",
+            type=int,
+            default=1,
+            help=f"Number of {entities} provisioned at the same time. Parents "
+            "in a hierarchy are always provisioned before their children. "
+            "Defaults to 1, i.e., one at a time.",
+        )
+
+    def _add_validation_engine(self) -> None:
+        self.parser.add_argument(
+            "--validation-engine",
+            choices=VALIDATION_ENGINES,
+            default="rows",
+            help="Engine used to validate the input rows. The columnar engine "
+            "processes chunks of the CSV file as columns and validates them at "
+            "once, which is faster for large files. Both engines accept and "
+            "reject the same rows. Defaults to 'rows'.",
+        )
+
+    def _add_compact(self) -> None:
+        self.parser.add_argument(
+            "--compact",
+            action="store_true",
+            help="Collapse the rows of every batch to one row per entity before "
+            "provisioning, eliminating duplicate and superseded rows. The last "
+            "row of an entity wins, except for permissions, where an active "
+            "row wins as in the provisioner.",
+        )
+
+    def _add_state_file(self) -> None:
+        self.parser.add_argument(
+            "--state-file",
+            type=Path,
+            default=None,
+            help="Path to a local state file (SQLite) recording the rows "
+            "provisioned by previous runs. If provided, only rows added or "
+            "changed since the last run are sent to GoodData Cloud. The file "
+            "is created if it does not exist.",
+        )
+
+    def _add_checkpoint(self) -> None:
+        group = self.parser.add_argument_group("checkpoint")
+        group.add_argument(
+            "--checkpoint-file",
+            type=Path,
+            default=None,
+            help="Path to a checkpoint journal (SQLite) recording the work "
+            "completed by the run, so that an interrupted run can be resumed "
+            "with --resume. The file is created if it does not exist.",
+        )
+        group.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the work recorded in the checkpoint journal by an "
+            "interrupted run with the same input. Requires --checkpoint-file.",
+        )
+
+    def _add_plan(self) -> None:
+        group = self.parser.add_argument_group("plan")
+        group.add_argument(
+            "--plan",
+            action="store_true",
+            help="Do not change anything. Fetch the current state once, compare "
+            "it with the input and print the number of operations of each type "
+            "a run would perform, with the estimated duration of the run.",
+        )
+        group.add_argument(
+            "--api-calls-per-second",
+            type=float,
+            default=None,
+            help="API rate limit used to estimate the duration of the run in "
+            "the plan. If not provided, the estimate is based on the measured "
+            "latency of the API only.",
+        )
+
     def _add_delimiter(self) -> None:
         self.parser.add_argument(
             "-d",
@@ -269,6 +624,28 @@ class Parser:
             "is used.",
         )
 
+    def _add_shard(self) -> None:
+        self.parser.add_argument(
+            "--shard",
+            type=_shard,
+            default=None,
+            metavar="I/N",
+            help="Handle only shard I of N, e.g. 2/8. The work is split by a "
+            "stable hash of the workspace ID (the user or user group ID for "
+            "users and user groups), so that N runs, one for each shard, "
+            "handle every entity exactly once.",
+        )
+
+    def _add_http_pool_size(self) -> None:
+        self.parser.add_argument(
+            "--http-pool-size",
+            type=int,
+            default=DEFAULT_POOL_SIZE,
+            help="Maximum number of keep-alive connections to GoodData Cloud. "
+            "All clients of the run share the same connections. "
+            f"Defaults to {DEFAULT_POOL_SIZE}.",
+        )
+
     def _add_check_relations(self) -> None:
         self.parser.add_argument(
             "--no-relations-check",
@@ -302,3 +679,12 @@ class Parser:
             default="list-of-workspaces",
             help="Type of input to use as the base of the backup. If not provided, `list-of-workspaces` is used as default.",
         )
+
+    def _add_incremental(self) -> None:
+        self.parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only upload workspaces whose content changed since the last "
+            "backup. Unchanged workspaces keep pointing to their previous "
+            "backup in the manifest stored next to the backups.",
+        )
@@ -4,11 +4,18 @@ from dataclasses import dataclass
 from pathlib import Path
 
 from utils.args.validators import (
+    batch_size_must_be_positive,
     delimiters_must_be_different,
     inner_delimiter_must_be_valid,
     path_must_exist,
+    pool_size_must_be_positive,
     quotechar_must_be_valid,
+    rate_must_be_positive,
+    resume_requires_checkpoint,
+    validation_engine_must_be_valid,
+    workers_must_be_positive,
 )
+from utils.sharding import Shard
 
 
 @dataclass
@@ -21,12 +28,29 @@ class UserArgs:
     quotechar: str
     profile_config: Path
     profile: str
+    http_pool_size: int
+    shard: Shard | None
+    batch_size: int | None
+    validation_workers: int
+    validation_engine: str
+    compact: bool
+    state_file: Path | None
+    checkpoint_file: Path | None
+    resume: bool
+    plan: bool
+    api_calls_per_second: float | None
 
     def __post_init__(self) -> None:
         path_must_exist(self.user_csv)
         delimiters_must_be_different(self.delimiter, self.inner_delimiter)
         inner_delimiter_must_be_valid(self.inner_delimiter)
         quotechar_must_be_valid(self.quotechar)
+        batch_size_must_be_positive(self.batch_size)
+        workers_must_be_positive(self.validation_workers)
+        validation_engine_must_be_valid(self.validation_engine)
+        rate_must_be_positive(self.api_calls_per_second)
+        pool_size_must_be_positive(self.http_pool_size)
+        resume_requires_checkpoint(self.resume, self.checkpoint_file)
 
 
 @dataclass
@@ -39,12 +63,30 @@ class WorkspaceArgs:
     quotechar: str
     profile_config: Path
     profile: str
+    http_pool_size: int
+    shard: Shard | None
+    batch_size: int | None
+    validation_workers: int
+    validation_engine: str
+    provisioning_workers: int
+    state_file: Path | None
+    checkpoint_file: Path | None
+    resume: bool
+    plan: bool
+    api_calls_per_second: float | None
 
     def __post_init__(self) -> None:
         path_must_exist(self.filepath)
         delimiters_must_be_different(self.delimiter, self.inner_delimiter)
         inner_delimiter_must_be_valid(self.inner_delimiter)
         quotechar_must_be_valid(self.quotechar)
+        batch_size_must_be_positive(self.batch_size)
+        workers_must_be_positive(self.validation_workers)
+        workers_must_be_positive(self.provisioning_workers)
+        validation_engine_must_be_valid(self.validation_engine)
+        rate_must_be_positive(self.api_calls_per_second)
+        pool_size_must_be_positive(self.http_pool_size)
+        resume_requires_checkpoint(self.resume, self.checkpoint_file)
 
 
 @dataclass
@@ -57,12 +99,30 @@ class UserGroupArgs:
     quotechar: str
     profile_config: Path
     profile: str
+    http_pool_size: int
+    shard: Shard | None
+    batch_size: int | None
+    validation_workers: int
+    validation_engine: str
+    compact: bool
+    provisioning_workers: int
+    checkpoint_file: Path | None
+    resume: bool
+    plan: bool
+    api_calls_per_second: float | None
 
     def __post_init__(self) -> None:
         path_must_exist(self.user_group_csv)
         delimiters_must_be_different(self.delimiter, self.inner_delimiter)
         inner_delimiter_must_be_valid(self.inner_delimiter)
         quotechar_must_be_valid(self.quotechar)
+        batch_size_must_be_positive(self.batch_size)
+        workers_must_be_positive(self.validation_workers)
+        workers_must_be_positive(self.provisioning_workers)
+        validation_engine_must_be_valid(self.validation_engine)
+        rate_must_be_positive(self.api_calls_per_second)
+        pool_size_must_be_positive(self.http_pool_size)
+        resume_requires_checkpoint(self.resume, self.checkpoint_file)
 
 
 @dataclass
@@ -74,10 +134,27 @@ class PermissionArgs:
     quotechar: str
     profile_config: Path
     profile: str
+    http_pool_size: int
+    shard: Shard | None
+    batch_size: int | None
+    validation_workers: int
+    validation_engine: str
+    compact: bool
+    state_file: Path | None
+    checkpoint_file: Path | None
+    resume: bool
+    plan: bool
+    api_calls_per_second: float | None
 
     def __post_init__(self) -> None:
         path_must_exist(self.perm_csv)
         quotechar_must_be_valid(self.quotechar)
+        batch_size_must_be_positive(self.batch_size)
+        workers_must_be_positive(self.validation_workers)
+        validation_engine_must_be_valid(self.validation_engine)
+        rate_must_be_positive(self.api_calls_per_second)
+        pool_size_must_be_positive(self.http_pool_size)
+        resume_requires_checkpoint(self.resume, self.checkpoint_file)
 
 
 @dataclass
@@ -91,10 +168,22 @@ class UserDataFilterArgs:
     quotechar: str
     profile_config: Path
     profile: str
+    http_pool_size: int
+    shard: Shard | None
+    validation_workers: int
+    validation_engine: str
+    provisioning_workers: int
+    plan: bool
+    api_calls_per_second: float | None
 
     def __post_init__(self) -> None:
         path_must_exist(self.filepath)
         quotechar_must_be_valid(self.quotechar)
+        workers_must_be_positive(self.validation_workers)
+        workers_must_be_positive(self.provisioning_workers)
+        validation_engine_must_be_valid(self.validation_engine)
+        rate_must_be_positive(self.api_calls_per_second)
+        pool_size_must_be_positive(self.http_pool_size)
 
 
 @dataclass
@@ -108,11 +197,18 @@ class CustomFieldsArgs:
     check_relations: bool
     profile_config: Path
     profile: str
+    http_pool_size: int
+    shard: Shard | None
+    validation_workers: int
+    provisioning_workers: int
 
     def __post_init__(self) -> None:
         path_must_exist(self.path_to_custom_datasets_csv)
         path_must_exist(self.path_to_custom_fields_csv)
         quotechar_must_be_valid(self.quotechar)
+        workers_must_be_positive(self.validation_workers)
+        workers_must_be_positive(self.provisioning_workers)
+        pool_size_must_be_positive(self.http_pool_size)
 
 
 @dataclass
@@ -123,10 +219,17 @@ class BackupArgs:
     conf: Path
     profile_config: Path
     profile: str
+    http_pool_size: int
+    shard: Shard | None
     input_type: str
+    incremental: bool
+    checkpoint_file: Path | None
+    resume: bool
 
     def __post_init__(self) -> None:
         path_must_exist(self.conf)
+        pool_size_must_be_positive(self.http_pool_size)
+        resume_requires_checkpoint(self.resume, self.checkpoint_file)
 
         # If input type is not entire organization, ws_csv must be provided
         if self.input_type != "entire-organization":
@@ -141,7 +244,26 @@ class RestoreArgs:
     conf: Path
     profile_config: Path
     profile: str
+    http_pool_size: int
+    shard: Shard | None
+    checkpoint_file: Path | None
+    resume: bool
 
     def __post_init__(self) -> None:
         path_must_exist(self.ws_csv)
         path_must_exist(self.conf)
+        pool_size_must_be_positive(self.http_pool_size)
+        resume_requires_checkpoint(self.resume, self.checkpoint_file)
+
+
+@dataclass
+class MergeMetricsArgs:
+    """Schema for metrics merge command line arguments."""
+
+    inputs: list[Path]
+    output: Path | None
+    textfile: Path | None
+
+    def __post_init__(self) -> None:
+        for path in self.inputs:
+            path_must_exist(path)
@@ -5,6 +5,8 @@ from pathlib import Path
 
 UG_REGEX = r"^(?!\.)[.A-Za-z0-9_-]{1,255}$"
 
+VALIDATION_ENGINES = ("rows", "columnar")
+
 
 def path_must_exist(value: Path) -> None:
     """Validate that a provided filesystem path exists."""
@@ -31,3 +33,52 @@ def quotechar_must_be_valid(quotechar: str) -> None:
     """Validate that a provided quotechar is valid."""
     if len(quotechar) != 1:
         raise RuntimeError("The quotechar argument must be exactly one character long.")
+
+
+def batch_size_must_be_positive(batch_size: int | None) -> None:
+    """Validate that a provided batch size is a positive integer, if set."""
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("Batch size must be a positive integer.")
+
+
+def pool_size_must_be_positive(pool_size: int) -> None:
+    """Validate that a provided HTTP pool size is a positive integer."""
+    if pool_size < 1:
+        raise ValueError("HTTP pool size must be a positive integer.")
+
+
+def workers_must_be_positive(workers: int) -> None:
+    """Validate that a provided number of workers is a positive integer."""
+    if workers < 1:
+        raise ValueError("Number of workers must be a positive integer.")
+
+
+def rate_must_be_positive(calls_per_second: float | None) -> None:
+    """Validate that a provided API rate is positive, if set."""
+    if calls_per_second is not None and calls_per_second <= 0:
+        raise ValueError("Number of API calls per second must be positive.")
+
+
+def rate_bounds_must_be_valid(floor: float, ceiling: float) -> None:
+    """Validate that the bounds of the adaptive API rate are positive and ordered."""
+    if floor <= 0 or ceiling <= 0:
+        raise ValueError("Number of API calls per second must be positive.")
+    if floor > ceiling:
+        raise ValueError(
+            "Minimum number of API calls per second cannot exceed the maximum."
+        )
+
+
+def resume_requires_checkpoint(resume: bool, checkpoint_file: Path | None) -> None:
+    """Validate that a checkpoint file is provided to resume a run from."""
+    if resume and checkpoint_file is None:
+        raise ValueError("--resume requires --checkpoint-file.")
+
+
+def validation_engine_must_be_valid(engine: str) -> None:
+    """Validate that a provided validation engine is known."""
+    if engine not in VALIDATION_ENGINES:
+        raise ValueError(
+            f"Unknown validation engine: {engine}. "
+            f"Use one of: {', '.join(VALIDATION_ENGINES)}."
+        )
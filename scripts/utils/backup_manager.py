@@ -0,0 +1,339 @@
+# (C) 2025 GoodData Corporation
+"""This module extends the GoodData Pipelines backup manager.
+
+`ExtendedBackupManager` behaves exactly like `BackupManager` unless one of
+its optional features is enabled via the configuration or the `enable_*`
+methods.
+"""
+
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from gooddata_pipelines import BackupManager, BackupRestoreConfig
+from gooddata_pipelines.backup_and_restore.backup_manager import BackupBatch
+from gooddata_pipelines.backup_and_restore.constants import BackupSettings, DirNames
+from gooddata_pipelines.backup_and_restore.storage.s3_storage import S3Storage
+from gooddata_pipelines.utils.rate_limiter import RateLimiter
+from utils.archive_upload import MIB, S3MultipartWriter, write_layouts_zip
+from utils.backup_manifest import (
+    BackupManifest,
+    ManifestEntry,
+    ManifestStore,
+    collect_workspace_changes,
+    completed_exports,
+)
+from utils.backup_restore_config import (
+    ExtendedBackupRestoreConfig,
+    ExtendedS3StorageConfig,
+)
+from utils.checkpoint import CheckpointJournal
+from utils.metrics import metrics
+from utils.profiling import timer
+from utils.rate_limiter import (
+    Unlimited,
+    get_adaptive_rate_limiter,
+    get_shared_rate_limiter,
+)
+from utils.sharding import Shard, shard_batches
+
+
+class ExtendedBackupManager(BackupManager):
+    """Backup manager with support for concurrent, incremental and streamed backups."""
+
+    _checkpoint: CheckpointJournal | None = None
+    _shard: Shard | None = None
+
+    def __init__(self, host: str, token: str, config: BackupRestoreConfig):
+        super().__init__(host, token, config)
+
+        self.max_workers = (
+            config.max_workers if isinstance(config, ExtendedBackupRestoreConfig) else 1
+        )
+
+        # All workers share one process-wide limit on the API calls. With
+        # adaptive rate control, the requests are limited at the HTTP layer.
+        self._api_rate_limiter: RateLimiter
+        if get_adaptive_rate_limiter() is not None:
+            self._api_rate_limiter = Unlimited()
+        else:
+            self._api_rate_limiter = get_shared_rate_limiter(
+                self.config.api_calls_per_second
+            )
+
+        self._manifest_store: ManifestStore | None = None
+        self._manifest = BackupManifest()
+        self._manifest_lock = threading.Lock()
+
+        # Each batch is processed (including retries) by a single thread
+        self._batch_state = threading.local()
+
+    def enable_incremental(self) -> None:
+        """Skips workspaces whose content did not change since the last backup.
+
+        The content hashes are kept in a manifest in the backup storage. For
+        unchanged workspaces, no new archive is created and the manifest entry
+        keeps pointing to the archive of the previous backup. With sharding,
+        call `enable_sharding` first, so that each shard keeps its own
+        manifest file.
+        """
+        self._manifest_store = ManifestStore(self.storage, self.org_id, self._shard)
+        self._manifest = self._manifest_store.load()
+        self.logger.info(
+            "Incremental backup enabled. Manifest contains "
+            + f"{len(self._manifest.workspaces)} workspaces."
+        )
+
+    def enable_checkpoint(self, checkpoint: CheckpointJournal) -> None:
+        """Records the workspaces backed up by the run in the checkpoint journal.
+
+        Workspaces recorded by an interrupted backup with the same input are
+        not backed up again.
+        """
+        self._checkpoint = checkpoint
+
+    def enable_sharding(self, shard: Shard) -> None:
+        """Backs up only the workspaces of the shard, see `utils.sharding`."""
+        self._shard = shard
+
+    @property
+    def _pending_entries(self) -> dict[str, ManifestEntry]:
+        return getattr(self._batch_state, "pending_entries", {})
+
+    @_pending_entries.setter
+    def _pending_entries(self, entries: dict[str, ManifestEntry]) -> None:
+        self._batch_state.pending_entries = entries
+
+    @property
+    def _exported_ids(self) -> list[str]:
+        return getattr(self._batch_state, "exported_ids", [])
+
+    @_exported_ids.setter
+    def _exported_ids(self, workspace_ids: list[str]) -> None:
+        self._batch_state.exported_ids = workspace_ids
+
+    @timer.phase("export")
+    def _get_workspace_export(
+        self,
+        local_target_path: str,
+        workspaces_to_export: list[str],
+    ) -> None:
+        self._pending_entries = {}
+
+        super()._get_workspace_export(local_target_path, workspaces_to_export)
+
+        # Workspaces which failed to export are only logged by the export
+        self._exported_ids = completed_exports(
+            Path(local_target_path, self.org_id),
+            self.org_id,
+            workspaces_to_export,
+            BackupSettings.TIMESTAMP_SDK_FOLDER,
+        )
+
+        if self._manifest_store is None:
+            return
+
+        self._pending_entries, unchanged = collect_workspace_changes(
+            Path(local_target_path, self.org_id),
+            self.org_id,
+            workspaces_to_export,
+            self._manifest,
+            BackupSettings.TIMESTAMP_SDK_FOLDER,
+        )
+
+        if unchanged:
+            self.logger.info(
+                f"Skipping upload of {len(unchanged)} unchanged workspaces."
+            )
+
+    @timer.phase("archive")
+    def _archive_gooddata_layouts_to_zip(self, folder: str) -> None:
+        storage_config = self.config.storage
+        if (
+            isinstance(self.storage, S3Storage)
+            and isinstance(storage_config, ExtendedS3StorageConfig)
+            and storage_config.streaming_upload
+        ):
+            self._stream_archives_to_s3(Path(folder), self.storage, storage_config)
+        else:
+            super()._archive_gooddata_layouts_to_zip(folder)
+            for archive in Path(folder).rglob(f"{DirNames.LAYOUTS}.zip"):
+                metrics.inc(
+                    "archive_bytes_total", archive.stat().st_size, direction="upload"
+                )
+
+    def _stream_archives_to_s3(
+        self,
+        org_folder: Path,
+        storage: S3Storage,
+        storage_config: ExtendedS3StorageConfig,
+    ) -> None:
+        """Compresses the exported workspaces directly into S3 uploads.
+
+        Uploaded workspaces are removed from the export folder, so they are
+        not uploaded again when the folder is exported to the storage.
+        """
+        for workspace_folder in sorted(org_folder.iterdir()):
+            workspace_id = workspace_folder.name
+
+            for backup_folder in sorted(workspace_folder.iterdir()):
+                layout_dir = Path(
+                    backup_folder,
+                    DirNames.LAYOUTS,
+                    self.org_id,
+                    "workspaces",
+                    workspace_id,
+                )
+                if not Path(layout_dir, DirNames.LDM).is_dir():
+                    continue
+
+                key = (
+                    f"{storage._backup_path}{self.org_id}/{workspace_id}/"
+                    + f"{backup_folder.name}/{DirNames.LAYOUTS}.zip"
+                )
+                with S3MultipartWriter(
+                    storage._client,
+                    storage_config.bucket,
+                    key,
+                    part_size=storage_config.upload_part_size_mb * MIB,
+                    max_concurrency=storage_config.upload_concurrency,
+                ) as writer:
+                    write_layouts_zip(
+                        layout_dir, writer, storage_config.compression_level
+                    )
+                    metrics.inc(
+                        "archive_bytes_total", writer.tell(), direction="upload"
+                    )
+
+                shutil.rmtree(backup_folder)
+
+    # Export and archive are timed separately, so the rest of the batch is
+    # the upload of the archives to the storage
+    @timer.phase("upload")
+    def _process_batch(
+        self,
+        batch: BackupBatch,
+        retry_count: int = 0,
+    ) -> None:
+        super()._process_batch(batch, retry_count)
+
+        # The manifest is updated only once the batch is stored, so that it
+        # never points to archives which were not uploaded
+        if self._manifest_store is not None and self._pending_entries:
+            with self._manifest_lock:
+                self._manifest.workspaces.update(self._pending_entries)
+                self._manifest_store.save(self._manifest)
+            self._pending_entries = {}
+
+    def _process_batches(
+        self,
+        batches: list[BackupBatch],
+    ) -> None:
+        """Processes the batches, concurrently if `max_workers` is above 1.
+
+        Each batch is exported, archived and uploaded by a single worker, so
+        the API calls of one batch overlap with the storage I/O of the others.
+        If there are fewer batches than workers, the workspaces are split
+        evenly among the workers. If any batch fails, the remaining batches
+        are cancelled. Workspaces of other shards, and workspaces recorded in
+        the checkpoint journal, are skipped.
+
+        The checkpoint journal records only the workspaces which were exported
+        and uploaded, and is finished only if no workspace failed.
+        """
+        if self._shard is not None:
+            batches = [
+                BackupBatch(workspace_ids)
+                for workspace_ids in shard_batches(
+                    (batch.list_of_ids for batch in batches),
+                    self._shard,
+                    str,
+                    "workspace",
+                )
+            ]
+        if self._checkpoint is not None:
+            batches = self._skip_completed(batches, self._checkpoint)
+
+        failed = self._process_remaining_batches(batches)
+
+        if self._checkpoint is None:
+            return
+        if failed:
+            self.logger.warning(
+                f"{len(failed)} workspaces failed to back up, they will be "
+                + "backed up again on resume."
+            )
+        else:
+            self._checkpoint.finish()
+
+    def _skip_completed(
+        self, batches: list[BackupBatch], checkpoint: CheckpointJournal
+    ) -> list[BackupBatch]:
+        """Leaves out the workspaces backed up by an interrupted backup."""
+        remaining = []
+        skipped = 0
+        for batch in batches:
+            workspace_ids = [
+                workspace_id
+                for workspace_id in batch.list_of_ids
+                if not checkpoint.is_completed(workspace_id)
+            ]
+            skipped += len(batch.list_of_ids) - len(workspace_ids)
+            if workspace_ids:
+                remaining.append(BackupBatch(workspace_ids))
+
+        if skipped:
+            self.logger.info(
+                f"Skipping {skipped} workspaces backed up by a previous run."
+            )
+        return remaining
+
+    def _process_and_record_batch(self, batch: BackupBatch) -> list[str]:
+        """Processes the batch and returns the IDs of its failed workspaces."""
+        self._exported_ids = []
+        self._process_batch(batch)
+
+        exported = set(self._exported_ids)
+        if self._checkpoint is not None and exported:
+            self._checkpoint.record(*sorted(exported))
+        return [
+            workspace_id
+            for workspace_id in batch.list_of_ids
+            if workspace_id not in exported
+        ]
+
+    def _process_remaining_batches(self, batches: list[BackupBatch]) -> list[str]:
+        """Returns the IDs of the workspaces which failed to back up."""
+        failed: list[str] = []
+        if self.max_workers <= 1:
+            for i, batch in enumerate(batches, 1):
+                self.logger.info(f"Processing batch {i}/{len(batches)}...")
+                failed.extend(self._process_and_record_batch(batch))
+            return failed
+
+        if len(batches) < self.max_workers:
+            workspace_ids = [
+                workspace_id for batch in batches for workspace_id in batch.list_of_ids
+            ]
+            batch_size = -(-len(workspace_ids) // self.max_workers)
+            batches = self._split_to_batches(workspace_ids, max(batch_size, 1))
+
+        self.logger.info(
+            f"Processing {len(batches)} batches with {self.max_workers} workers..."
+        )
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._process_and_record_batch, batch)
+                for batch in batches
+            ]
+
+            try:
+                for i, future in enumerate(as_completed(futures), 1):
+                    failed.extend(future.result())
+                    self.logger.info(f"Completed batch {i}/{len(batches)}.")
+            except Exception:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+        return failed
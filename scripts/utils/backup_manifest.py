@@ -0,0 +1,270 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the manifest used for incremental backups.
+
+The manifest is a JSON file kept in the backup storage next to the workspace
+backups of an organization. For every workspace, it records the hash of the
+exported declarative content and the path of the archive holding it. When the
+content of a workspace did not change since the last backup, the workspace is
+not archived and uploaded again, only its manifest entry is refreshed to point
+to the existing archive.
+
+With `--shard`, every shard keeps its own manifest file, as the shards run
+concurrently. All manifest files of the organization are merged on load.
+"""
+
+import hashlib
+import json
+import re
+import shutil
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Iterator
+
+from gooddata_pipelines.backup_and_restore.constants import DirNames
+from gooddata_pipelines.backup_and_restore.storage.base_storage import (
+    BackupStorage,
+)
+from gooddata_pipelines.backup_and_restore.storage.local_storage import (
+    LocalStorage,
+)
+from gooddata_pipelines.backup_and_restore.storage.s3_storage import S3Storage
+from utils.sharding import Shard
+
+MANIFEST_FILE_NAME = "backup_manifest.json"
+SHARD_MANIFEST_FILE_NAME = "backup_manifest.shard-{index}-of-{count}.json"
+MANIFEST_FILE_PATTERN = re.compile(r"backup_manifest(\.shard-\d+-of-\d+)?\.json")
+
+
+@dataclass
+class ManifestEntry:
+    """Latest backup of a single workspace.
+
+    Attributes:
+        content_hash: Hash of the exported declarative content.
+        path: Path of the folder with the `gooddata_layouts.zip` archive,
+            relative to the backup path, i.e., the value to use in the
+            restore input file.
+        checked_at: Timestamp folder name of the last backup run which
+            confirmed the content.
+    """
+
+    content_hash: str
+    path: str
+    checked_at: str
+
+
+@dataclass
+class BackupManifest:
+    """Latest backups of all workspaces of an organization."""
+
+    workspaces: dict[str, ManifestEntry] = field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, content: str) -> "BackupManifest":
+        raw_manifest = json.loads(content)
+        return cls(
+            workspaces={
+                workspace_id: ManifestEntry(**entry)
+                for workspace_id, entry in raw_manifest["workspaces"].items()
+            }
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=2, sort_keys=True)
+
+
+def hash_directory(path: Path) -> str:
+    """Returns a hash of the directory tree, including its file names.
+
+    Empty directories are part of the hash, as the restore relies on some of
+    them (e.g., `user_data_filters`) being present.
+    """
+    digest = hashlib.sha256()
+
+    for item in sorted(path.rglob("*")):
+        relative_path = item.relative_to(path).as_posix()
+        if item.is_dir():
+            digest.update(f"dir:{relative_path}\n".encode("utf-8"))
+            continue
+
+        digest.update(f"file:{relative_path}\n".encode("utf-8"))
+        with open(item, "rb") as file:
+            while chunk := file.read(1024 * 1024):
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def completed_exports(
+    export_root: Path, org_id: str, workspace_ids: list[str], timestamp: str
+) -> list[str]:
+    """Returns the IDs of the workspaces whose export completed.
+
+    The export of a workspace which fails is logged and skipped, so the
+    workspaces of a batch are not necessarily all exported.
+    """
+    completed = []
+    for workspace_id in workspace_ids:
+        # User data filters are stored last, their folder marks a complete export
+        udf_folder = Path(
+            export_root,
+            workspace_id,
+            timestamp,
+            DirNames.LAYOUTS,
+            org_id,
+            "workspaces",
+            workspace_id,
+            DirNames.UDF,
+        )
+        if udf_folder.is_dir():
+            completed.append(workspace_id)
+    return completed
+
+
+def collect_workspace_changes(
+    export_root: Path,
+    org_id: str,
+    workspace_ids: list[str],
+    manifest: BackupManifest,
+    timestamp: str,
+) -> tuple[dict[str, ManifestEntry], list[str]]:
+    """Compares freshly exported workspaces with the manifest.
+
+    Exports of workspaces with unchanged content are deleted from the export
+    root, so that they are neither archived nor uploaded. Workspaces whose
+    export did not complete are ignored.
+
+    Args:
+        export_root (Path): Folder containing the exports of the organization,
+            i.e., `<tmpdir>/<org_id>`.
+        org_id (str): Organization ID.
+        workspace_ids (list[str]): IDs of the exported workspaces.
+        manifest (BackupManifest): Manifest of the previous backups.
+        timestamp (str): Timestamp folder name of the current backup run.
+
+    Returns:
+        tuple: New manifest entries of the exported workspaces and the IDs
+            of the workspaces which were skipped as unchanged.
+    """
+    entries: dict[str, ManifestEntry] = {}
+    unchanged: list[str] = []
+
+    for workspace_id in completed_exports(
+        export_root, org_id, workspace_ids, timestamp
+    ):
+        workspace_folder = Path(export_root, workspace_id)
+        backup_folder = Path(workspace_folder, timestamp)
+
+        content_hash = hash_directory(backup_folder)
+        previous = manifest.workspaces.get(workspace_id)
+
+        if previous is not None and previous.content_hash == content_hash:
+            shutil.rmtree(workspace_folder)
+            entries[workspace_id] = replace(previous, checked_at=timestamp)
+            unchanged.append(workspace_id)
+        else:
+            entries[workspace_id] = ManifestEntry(
+                content_hash=content_hash,
+                path=f"{org_id}/{workspace_id}/{timestamp}",
+                checked_at=timestamp,
+            )
+
+    return entries, unchanged
+
+
+class ManifestStore:
+    """Reads and writes the backup manifest in the backup storage.
+
+    With a shard, the store writes the manifest file of the shard, which
+    holds only the workspaces of the shard, so that concurrent shards do not
+    overwrite each other's entries.
+    """
+
+    def __init__(
+        self, storage: BackupStorage, org_id: str, shard: Shard | None = None
+    ) -> None:
+        if not isinstance(storage, (LocalStorage, S3Storage)):
+            raise ValueError(
+                "Incremental backup is only supported with local and S3 storage."
+            )
+        self.storage = storage
+        self.org_id = org_id
+        self.shard = shard
+
+    def load(self) -> BackupManifest:
+        """Loads and merges all manifest files of the organization.
+
+        The latest entry of each workspace wins. Returns an empty manifest if
+        there is none yet.
+        """
+        manifest = BackupManifest()
+        for content in self._read_manifests():
+            for workspace_id, entry in BackupManifest.from_json(
+                content
+            ).workspaces.items():
+                current = manifest.workspaces.get(workspace_id)
+                if current is None or entry.checked_at > current.checked_at:
+                    manifest.workspaces[workspace_id] = entry
+        return manifest
+
+    def save(self, manifest: BackupManifest) -> None:
+        """Saves the manifest file of the shard, replacing the previous one."""
+        if self.shard is not None:
+            manifest = BackupManifest(
+                workspaces={
+                    workspace_id: entry
+                    for workspace_id, entry in manifest.workspaces.items()
+                    if self.shard.owns(workspace_id)
+                }
+            )
+        content = manifest.to_json()
+
+        if isinstance(self.storage, S3Storage):
+            self.storage._client.put_object(
+                Bucket=self.storage._config.bucket,
+                Key=self._s3_prefix + self._file_name,
+                Body=content.encode("utf-8"),
+            )
+            return
+
+        path = Path(self._local_folder, self._file_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def _read_manifests(self) -> Iterator[str]:
+        if isinstance(self.storage, S3Storage):
+            client = self.storage._client
+            bucket = self.storage._config.bucket
+            paginator = client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(
+                Bucket=bucket, Prefix=self._s3_prefix, Delimiter="/"
+            ):
+                for item in page.get("Contents", []):
+                    name = item["Key"][len(self._s3_prefix) :]
+                    if MANIFEST_FILE_PATTERN.fullmatch(name):
+                        response = client.get_object(Bucket=bucket, Key=item["Key"])
+                        yield response["Body"].read().decode("utf-8")
+            return
+
+        if not self._local_folder.is_dir():
+            return
+        for path in sorted(self._local_folder.iterdir()):
+            if MANIFEST_FILE_PATTERN.fullmatch(path.name):
+                yield path.read_text(encoding="utf-8")
+
+    @property
+    def _file_name(self) -> str:
+        if self.shard is None:
+            return MANIFEST_FILE_NAME
+        return SHARD_MANIFEST_FILE_NAME.format(
+            index=self.shard.index, count=self.shard.count
+        )
+
+    @property
+    def _s3_prefix(self) -> str:
+        return f"{self.storage._backup_path}{self.org_id}/"
+
+    @property
+    def _local_folder(self) -> Path:
+        assert isinstance(self.storage, LocalStorage)
+        return Path(Path.cwd(), self.storage._config.backup_path, self.org_id)
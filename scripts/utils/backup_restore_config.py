@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Annotated
 
 import yaml
 from gooddata_pipelines import (
@@ -8,9 +9,63 @@ from gooddata_pipelines import (
     StorageType,
 )
 from gooddata_pipelines.backup_and_restore.constants import BackupSettings
+from pydantic import Field
 
 
-def load_config_from_yaml(path: Path) -> BackupRestoreConfig:
+class ExtendedS3StorageConfig(S3StorageConfig):
+    """S3 storage configuration with streaming upload settings.
+
+    Args:
+        streaming_upload: Compress the backup archives directly into
+            a multipart upload, without creating them on disk first.
+        upload_part_size_mb: Size of the uploaded parts in MiB. At least 5.
+        upload_concurrency: Number of parts uploaded in parallel per archive.
+        compression_level: Deflate compression level of the archives, 0 to 9.
+    """
+
+    streaming_upload: bool = False
+    upload_part_size_mb: Annotated[
+        int,
+        Field(
+            ge=5,
+            description="Part size must be at least 5 MiB",
+        ),
+    ] = Field(default=8)
+    upload_concurrency: Annotated[
+        int,
+        Field(
+            gt=0,
+            description="Upload concurrency must be greater than 0",
+        ),
+    ] = Field(default=4)
+    compression_level: Annotated[
+        int,
+        Field(
+            ge=0,
+            le=9,
+            description="Compression level must be between 0 and 9",
+        ),
+    ] = Field(default=6)
+
+
+class ExtendedBackupRestoreConfig(BackupRestoreConfig):
+    """Backup and restore configuration with settings specific to the scripts.
+
+    Args:
+        max_workers: Number of workspace batches processed concurrently.
+            Defaults to 1, i.e., sequential processing.
+    """
+
+    max_workers: Annotated[
+        int,
+        Field(
+            gt=0,
+            description="Number of workers must be greater than 0",
+        ),
+    ] = Field(default=1)
+
+
+def load_config_from_yaml(path: Path) -> ExtendedBackupRestoreConfig:
     """Loads the backup and restore configuration from a YAML file."""
     storage_config: LocalStorageConfig | S3StorageConfig
 
@@ -34,7 +89,7 @@ def load_config_from_yaml(path: Path) -> BackupRestoreConfig:
 
         storage_config = LocalStorageConfig(backup_path=backup_path)
     else:
-        storage_config = S3StorageConfig(
+        storage_config = ExtendedS3StorageConfig(
             backup_path=contents["storage"]["backup_path"],
             bucket=contents["storage"]["bucket"],
             profile=contents["storage"].get("profile"),
@@ -43,9 +98,13 @@ def load_config_from_yaml(path: Path) -> BackupRestoreConfig:
             aws_default_region=contents["storage"].get(
                 "aws_default_region", "us-east-1"
             ),
+            streaming_upload=contents["storage"].get("streaming_upload", False),
+            upload_part_size_mb=contents["storage"].get("upload_part_size_mb", 8),
+            upload_concurrency=contents["storage"].get("upload_concurrency", 4),
+            compression_level=contents["storage"].get("compression_level", 6),
         )
 
-    config = BackupRestoreConfig(
+    config = ExtendedBackupRestoreConfig(
         storage_type=storage_type,
         storage=storage_config,
         api_page_size=contents.get("api_page_size", BackupSettings.API.PAGE_SIZE),
@@ -53,6 +112,7 @@ def load_config_from_yaml(path: Path) -> BackupRestoreConfig:
         api_calls_per_second=contents.get(
             "api_calls_per_second", BackupSettings.API.CALLS_PER_SECOND
         ),
+        max_workers=contents.get("max_workers", 1),
     )
 
     return config
@@ -0,0 +1,144 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the checkpoint journal used to resume interrupted runs.
+
+The journal is an SQLite file which records the units of work (batches of
+input rows, or workspaces) completed by a run, as soon as each of them is
+completed. If the run is interrupted (e.g., killed or out of memory), the next
+run with `--resume` skips the recorded units instead of starting over.
+
+A journal belongs to one input: the units are recorded with a fingerprint of
+the input and the arguments which determine the units (e.g., the batch size).
+If the fingerprint changes, the recorded units are discarded. Once a run
+completes without errors, its units are removed from the journal.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def input_fingerprint(*parts: Any, files: tuple[Path | None, ...] = ()) -> str:
+    """Returns a fingerprint of the arguments and the input files of a run.
+
+    Files are identified by their path, size and modification time, so that
+    fingerprinting does not read their content.
+    """
+    described: list[Any] = list(parts)
+    for path in files:
+        if path is None or not path.exists():
+            described.append(None)
+            continue
+        stat = path.stat()
+        described.append([str(path.resolve()), stat.st_size, stat.st_mtime_ns])
+
+    return hashlib.sha256(json.dumps(described, default=str).encode()).hexdigest()
+
+
+class CheckpointJournal:
+    """Record of the units of work completed by a run of a job.
+
+    One journal file can be shared by several scripts, as the units are kept
+    separately for each job (e.g., `permission` or `backup`). Units can be
+    recorded from several threads at once.
+    """
+
+    def __init__(self, path: Path, job: str, fingerprint: str, resume: bool) -> None:
+        self.path = path
+        self.job = job
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoint_runs (
+                job TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS completed_units (
+                job TEXT NOT NULL,
+                unit TEXT NOT NULL,
+                PRIMARY KEY (job, unit)
+            );
+            """
+        )
+
+        stored = self.connection.execute(
+            "SELECT fingerprint FROM checkpoint_runs WHERE job = ?", (job,)
+        ).fetchone()
+        if resume and stored is not None and stored[0] != fingerprint:
+            logger.warning(
+                f"The input of the {job} run recorded in {path} has changed. "
+                + "Starting from the beginning."
+            )
+        if not resume or stored is None or stored[0] != fingerprint:
+            self._clear()
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoint_runs (job, fingerprint) "
+                "VALUES (?, ?)",
+                (job, fingerprint),
+            )
+
+        self.completed: set[str] = {
+            unit
+            for (unit,) in self.connection.execute(
+                "SELECT unit FROM completed_units WHERE job = ?", (job,)
+            )
+        }
+        if self.completed:
+            logger.info(
+                f"Resuming the {job} run, skipping {len(self.completed)} units "
+                + "of work completed before."
+            )
+
+    def is_completed(self, unit: str) -> bool:
+        return unit in self.completed
+
+    def record(self, *units: str) -> None:
+        """Records the units as completed, durably."""
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO completed_units (job, unit) VALUES (?, ?)",
+                ((self.job, unit) for unit in units),
+            )
+            self.completed.update(units)
+
+    def finish(self) -> None:
+        """Forgets the run, once it completed without errors."""
+        with self._lock:
+            self._clear()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _clear(self) -> None:
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM completed_units WHERE job = ?", (self.job,)
+            )
+            self.connection.execute(
+                "DELETE FROM checkpoint_runs WHERE job = ?", (self.job,)
+            )
+
+
+@contextmanager
+def open_checkpoint(
+    path: Path | None, job: str, fingerprint: str, resume: bool
+) -> Iterator[CheckpointJournal | None]:
+    """Opens the checkpoint journal at the path. Yields None if no path is provided."""
+    if path is None:
+        yield None
+        return
+
+    checkpoint = CheckpointJournal(path, job, fingerprint, resume)
+    try:
+        yield checkpoint
+    finally:
+        checkpoint.close()
@@ -0,0 +1,273 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the columnar validation engine for large CSV inputs.
+
+The default engine (`utils.validation.validate_rows`) converts the CSV rows
+one by one. The columnar engine reads chunks of the CSV file as columns and
+runs the checks and conversions of a script (e.g., splitting the user groups
+or parsing `is_active`) over whole columns. The rows passing these checks are
+validated by pydantic in a single call per chunk.
+
+Rows failing any check, as well as rows which do not have as many values as
+the header, are handed to the row validator of the script. The accepted and
+rejected rows, and the errors logged for the rejected ones, are therefore the
+same as with the default engine.
+"""
+
+import gc
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Sequence, TypeVar
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from utils.logger import MAX_SHOWN_ERRORS
+from utils.profiling import timer
+from utils.utils import batched, iter_csv_rows, iter_validated_batches
+from utils.validation import (
+    DEFAULT_CHUNK_SIZE,
+    ChunkResult,
+    ErrorClassifier,
+    ErrorFormatter,
+    RawRow,
+    RowValidationError,
+    RowValidator,
+    _collect,
+    _map_in_order,
+    _record_error,
+    classify_row_error,
+    format_row_error,
+    get_worker_pool,
+)
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+Columns = dict[str, Sequence[str]]
+
+# Number of attempts to validate the rows of a chunk at once. Rows rejected
+# by pydantic in one attempt are left to the row validator in the next one.
+VALIDATION_ATTEMPTS = 2
+
+
+@dataclass
+class ConvertedColumns:
+    """Model fields of a chunk of rows, as columns.
+
+    `passed` tells which rows passed the checks of the script. The other rows
+    are handed to the row validator. If None, all rows passed.
+    """
+
+    fields: dict[str, Sequence[Any]]
+    passed: Sequence[bool] | None = None
+
+
+ColumnConverter = Callable[[Columns], ConvertedColumns]
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Pauses the cyclic garbage collector.
+
+    Converting a chunk allocates many short-lived, acyclic objects (strings,
+    dicts and models), which trigger collections of all the models validated
+    so far. These collections take more time than the conversion itself.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+@lru_cache
+def _list_adapter(model: type[ModelT]) -> TypeAdapter[list[ModelT]]:
+    return TypeAdapter(list[model])  # type: ignore[valid-type]
+
+
+def _row_dict(header: list[str], values: list[str]) -> RawRow:
+    """Returns the row as `csv.DictReader` would."""
+    row: RawRow = dict(zip(header, values))
+    if len(values) > len(header):
+        row[None] = values[len(header) :]  # type: ignore[index]
+    else:
+        for key in header[len(values) :]:
+            row[key] = None
+    return row
+
+
+def _validate_records(
+    model: type[ModelT], records: list[dict[str, Any]]
+) -> dict[int, ModelT]:
+    """Validates the records at once. Returns the models by record index.
+
+    Records rejected by pydantic are left out.
+    """
+    indexes = list(range(len(records)))
+    for _ in range(VALIDATION_ATTEMPTS):
+        try:
+            models = _list_adapter(model).validate_python([records[i] for i in indexes])
+        except ValidationError as e:
+            rejected = {indexes[int(error["loc"][0])] for error in e.errors()}
+            indexes = [i for i in indexes if i not in rejected]
+        else:
+            return dict(zip(indexes, models))
+    return {}
+
+
+def _validate_regular_rows(
+    rows: list[list[str]],
+    header: list[str],
+    model: type[ModelT],
+    convert_columns: ColumnConverter,
+) -> dict[int, ModelT]:
+    """Validates rows with a value for every column of the header as columns.
+
+    Returns the models of the accepted rows by row index.
+    """
+    columns: Columns = dict(zip(header, zip(*rows)))
+    try:
+        converted = convert_columns(columns)
+    except Exception:
+        # E.g., a missing column. The row validator reports it for each row.
+        return {}
+
+    names = list(converted.fields)
+    records = [dict(zip(names, values)) for values in zip(*converted.fields.values())]
+    if converted.passed is None:
+        return _validate_records(model, records)
+
+    accepted = [i for i, passed in enumerate(converted.passed) if passed]
+    validated = _validate_records(model, [records[i] for i in accepted])
+    return {accepted[j]: m for j, m in validated.items()}
+
+
+def _validate_column_chunk(
+    chunk: list[list[str]],
+    header: list[str],
+    model: type[ModelT],
+    convert_columns: ColumnConverter,
+    validate_row: RowValidator[ModelT],
+    format_error: ErrorFormatter,
+    raise_on_error: bool,
+    classify_error: ErrorClassifier = classify_row_error,
+    max_shown: int = MAX_SHOWN_ERRORS,
+) -> ChunkResult[ModelT]:
+    """Validates a chunk of CSV rows. Runs either in-process or in a worker."""
+    regular = [i for i, values in enumerate(chunk) if len(values) == len(header)]
+    models: dict[int, ModelT] = {}
+
+    if regular:
+        with _gc_paused():
+            validated = _validate_regular_rows(
+                [chunk[i] for i in regular], header, model, convert_columns
+            )
+        models = {regular[j]: m for j, m in validated.items()}
+
+    result: ChunkResult[ModelT] = ChunkResult()
+    shown: dict[str, int] = {}
+
+    for i, values in enumerate(chunk):
+        if i in models:
+            result.models.append(models[i])
+            continue
+
+        row = _row_dict(header, values)
+        try:
+            result.models.append(validate_row(row))
+        except Exception as e:
+            if raise_on_error:
+                raise RowValidationError(format_error(row, e)) from e
+            _record_error(
+                result, shown, row, e, format_error, classify_error, max_shown
+            )
+
+    return result
+
+
+@timer.phase("validation")
+def validate_csv_rows(
+    rows: Iterable[list[str]],
+    header: list[str],
+    model: type[ModelT],
+    convert_columns: ColumnConverter,
+    validate_row: RowValidator[ModelT],
+    *,
+    format_error: ErrorFormatter = format_row_error,
+    classify_error: ErrorClassifier = classify_row_error,
+    raise_on_error: bool = False,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[ModelT]:
+    """Converts CSV rows into validated models, a chunk of columns at a time.
+
+    Takes the same arguments as `utils.validation.validate_rows`, plus the
+    header of the CSV file, the model and the function converting the columns
+    of a chunk into model fields. The converter should not raise for invalid
+    values, but mark their rows as not passed.
+
+    Returns:
+        list[ModelT]: Validated models in the same order as the input rows.
+    """
+    validate_chunk = partial(
+        _validate_column_chunk,
+        header=header,
+        model=model,
+        convert_columns=convert_columns,
+        validate_row=validate_row,
+        format_error=format_error,
+        raise_on_error=raise_on_error,
+        classify_error=classify_error,
+    )
+    chunks = batched(rows, chunk_size)
+
+    validated: list[ModelT] = []
+
+    if workers <= 1:
+        for chunk in chunks:
+            _collect(validate_chunk(chunk), validated)
+        return validated
+
+    executor = get_worker_pool(workers)
+    for result in _map_in_order(executor, validate_chunk, chunks, workers * 2):
+        _collect(result, validated)
+
+    return validated
+
+
+def iter_columnar_batches(
+    file_path: Path,
+    delimiter: str,
+    quotechar: str,
+    model: type[ModelT],
+    convert_columns: ColumnConverter,
+    validate_row: RowValidator[ModelT],
+    *,
+    skipinitialspace: bool = False,
+    batch_size: int | None = None,
+    workers: int = 1,
+    format_error: ErrorFormatter = format_row_error,
+    raise_on_error: bool = False,
+) -> Iterator[list[ModelT]]:
+    """Reads the CSV file with the columnar engine, see `iter_validated_batches`."""
+    rows = iter_csv_rows(file_path, delimiter, quotechar, skipinitialspace)
+    header: list[str] = next(rows, [])
+
+    return iter_validated_batches(
+        rows,
+        partial(
+            validate_csv_rows,
+            header=header,
+            model=model,
+            convert_columns=convert_columns,
+            validate_row=validate_row,
+            format_error=format_error,
+            raise_on_error=raise_on_error,
+            workers=workers,
+        ),
+        batch_size,
+    )
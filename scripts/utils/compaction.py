@@ -0,0 +1,95 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the compaction of input rows before provisioning.
+
+Generated input files often contain duplicate rows, or several rows for the
+same entity (e.g., a permission granted and then revoked). The provisioners
+process every row, so each of them costs API calls. Compaction collapses the
+rows of every batch to a single row per entity key, the final intent for the
+entity, before the batch is provisioned.
+
+By default, the last row of an entity wins, as the provisioner of users
+applies the rows in order. A script can resolve the rows of an entity
+differently if its provisioner does (see `any_active_wins`), or keep rows
+whose result the provisioner only decides against the server (see
+`last_wins_unless_conflicting`).
+"""
+
+import logging
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from pydantic import BaseModel
+from utils.metrics import metrics
+from utils.state import KeyFunction
+
+logger = logging.getLogger(__name__)
+
+RowModelT = TypeVar("RowModelT", bound=BaseModel)
+
+Resolver = Callable[[list[RowModelT]], list[RowModelT]]
+
+
+def last_wins(rows: list[RowModelT]) -> list[RowModelT]:
+    """Keeps the last row of the entity."""
+    return [rows[-1]]
+
+
+def any_active_wins(rows: list[RowModelT]) -> list[RowModelT]:
+    """Keeps the last active row of the entity, or the last row if none is active."""
+    for row in reversed(rows):
+        if getattr(row, "is_active", False):
+            return [row]
+    return [rows[-1]]
+
+
+def last_wins_unless_conflicting(rows: list[RowModelT]) -> list[RowModelT]:
+    """Keeps the last row of the entity, or all of its rows if some are active
+    and others are not.
+
+    The provisioner of user groups creates the active groups which do not exist
+    and deletes the inactive groups which do, so the result of conflicting rows
+    depends on whether the group exists.
+    """
+    if len({getattr(row, "is_active", True) for row in rows}) > 1:
+        return rows
+    return last_wins(rows)
+
+
+def compact(
+    rows: Iterable[RowModelT],
+    key: KeyFunction[RowModelT],
+    resolve: Resolver[RowModelT] = last_wins,
+) -> list[RowModelT]:
+    """Collapses the rows of every entity key to the rows its resolver keeps.
+
+    The entities keep the position of their first row.
+    """
+    groups: dict[tuple[str, ...], list[RowModelT]] = {}
+    for row in rows:
+        groups.setdefault(key(row), []).append(row)
+
+    return [
+        row
+        for group in groups.values()
+        for row in (group if len(group) == 1 else resolve(group))
+    ]
+
+
+def compact_batches(
+    batches: Iterable[list[RowModelT]],
+    entity_type: str,
+    key: KeyFunction[RowModelT],
+    resolve: Resolver[RowModelT] = last_wins,
+) -> Iterator[list[RowModelT]]:
+    """Compacts every batch, see `compact`, and reports the eliminated rows."""
+    total = eliminated = 0
+    for batch in batches:
+        compacted = compact(batch, key, resolve)
+        total += len(batch)
+        eliminated += len(batch) - len(compacted)
+        yield compacted
+
+    metrics.inc("rows_compacted_total", eliminated)
+    logger.info(
+        f"Compaction eliminated {eliminated} of {total} {entity_type} rows "
+        + "(duplicates and rows superseded by another row of the same entity)."
+    )
@@ -0,0 +1,80 @@
+# (C) 2025 GoodData Corporation
+"""This module keeps the rows of a group within a single batch.
+
+Some provisioners replace a whole group of rows at once. The permission
+provisioner, for instance, replaces all permissions of an assignee in a
+workspace with the rows of the batch, so if the rows of an assignee were split
+across two batches, the second batch would revoke what the first one granted.
+
+With `--batch-size`, the input is streamed, so the groups can only be kept
+together if the rows of every group are consecutive in the input.
+`check_grouped` verifies that before anything is provisioned, and
+`keep_groups_together` then moves the boundaries of the batches between groups.
+Rows which are already in memory, with the rows of every group consecutive,
+are batched by `batched_by_group`.
+"""
+
+from typing import Callable, Hashable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+def check_grouped(
+    rows: Iterable[T], key: Callable[[T], Hashable], group_type: str
+) -> None:
+    """Raises ValueError if the rows of a group are not consecutive.
+
+    Only the keys of the groups are held in memory, not the rows.
+    """
+    finished: set[Hashable] = set()
+    current: Hashable = None
+    for index, row in enumerate(rows, 1):
+        row_key = key(row)
+        if row_key == current:
+            continue
+        if row_key in finished:
+            raise ValueError(
+                f"Rows of {group_type} {row_key} are not consecutive (row {index}). "
+                + f"Sort the input by {group_type} or do not set --batch-size."
+            )
+        if current is not None:
+            finished.add(current)
+        current = row_key
+
+
+def keep_groups_together(
+    batches: Iterable[list[T]], key: Callable[[T], Hashable]
+) -> Iterator[list[T]]:
+    """Yields the batches with the rows of their last group moved to the next
+    batch, so that consecutive rows of a group are never split."""
+    carried: list[T] = []
+    for batch in batches:
+        rows = carried + batch
+        if not rows:
+            continue
+
+        split = len(rows)
+        last_key = key(rows[-1])
+        while split and key(rows[split - 1]) == last_key:
+            split -= 1
+
+        carried = rows[split:]
+        if split:
+            yield rows[:split]
+
+    if carried:
+        yield carried
+
+
+def batched_by_group(
+    rows: list[T], batch_size: int, key: Callable[[T], Hashable]
+) -> Iterator[list[T]]:
+    """Yields batches of `batch_size` rows, extended to the end of the group of
+    their last row, so that consecutive rows of a group are never split."""
+    start = 0
+    while start < len(rows):
+        end = min(start + batch_size, len(rows))
+        while end < len(rows) and key(rows[end]) == key(rows[end - 1]):
+            end += 1
+        yield rows[start:end]
+        start = end
@@ -0,0 +1,144 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the ordering of hierarchical input by its hierarchy.
+
+Entities such as user groups reference their parents, which must exist before
+the entity is created. `order_by_hierarchy` reads the whole input into memory
+and moves the rows of every entity after the rows of its parents, so the
+batches can be provisioned in order however the input file is sorted.
+
+The hierarchy is checked locally, before any API call. Entities on a cycle of
+parents, entities whose parent is deleted by the input, and the descendants of
+both, can never be provisioned. Their rows are logged as errors and left out.
+Parents which are not in the input must exist in GoodData Cloud.
+
+With `--shard`, the rows are sharded by their hierarchy (see `hierarchy_roots`),
+so that every shard provisions whole hierarchies, parents before children.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Callable, Collection, Iterable, Iterator, TypeVar
+
+from pydantic import BaseModel
+from utils.grouping import batched_by_group
+from utils.metrics import metrics
+from utils.scheduling import dependency_levels
+from utils.sharding import Shard, shard_rows
+
+logger = logging.getLogger(__name__)
+
+RowModelT = TypeVar("RowModelT", bound=BaseModel)
+
+
+def order_by_hierarchy(
+    batches: Iterable[list[RowModelT]],
+    entity_type: str,
+    key: Callable[[RowModelT], str],
+    parents: Callable[[RowModelT], Collection[str]],
+    batch_size: int | None,
+    shard: Shard | None = None,
+) -> Iterator[list[RowModelT]]:
+    """Yields the rows ordered by the level of their entity in the hierarchy.
+
+    Entities of the same level keep their input order, and the rows of an
+    entity are kept together in their input order. All rows are held in
+    memory and batched again by `batch_size`, or yielded as a single batch
+    without it. The rows of an entity are never split across batches. With a shard, only the rows of
+    the hierarchies of the shard are yielded.
+    """
+    rows = [row for batch in batches for row in batch]
+
+    if shard is not None:
+        roots = hierarchy_roots(rows, key, parents)
+        rows = shard_rows(rows, shard, lambda row: roots[key(row)], entity_type)
+
+    dependencies: dict[str, set[str]] = defaultdict(set)
+    deleted: set[str] = set()
+    for row in rows:
+        if getattr(row, "is_active", True):
+            dependencies[key(row)].update(parents(row))
+        else:
+            deleted.add(key(row))
+    deleted -= set(dependencies)
+
+    levels = dependency_levels(dependencies)
+    rejected = _reject_unresolvable(dependencies, levels, deleted, entity_type)
+
+    kept = [row for row in rows if key(row) not in rejected]
+    if len(kept) < len(rows):
+        metrics.inc("rows_rejected_total", len(rows) - len(kept))
+
+    # The rows of an entity are moved next to its first row, as the
+    # provisioners replace the whole entity (e.g., all workspace data filter
+    # settings of a workspace) with the rows of the batch
+    first_rows: dict[str, int] = {}
+    for index, row in enumerate(kept):
+        first_rows.setdefault(key(row), index)
+    kept.sort(key=lambda row: (levels.get(key(row), 0), first_rows[key(row)]))
+    depth = max(levels.values(), default=-1) + 1
+    logger.info(
+        f"Ordered {len(dependencies)} {entity_type}s in {depth} levels "
+        + f"of the hierarchy, rejected {len(rejected)}."
+    )
+
+    yield from batched_by_group(kept, batch_size or len(kept), key)
+
+
+def hierarchy_roots(
+    rows: Iterable[RowModelT],
+    key: Callable[[RowModelT], str],
+    parents: Callable[[RowModelT], Collection[str]],
+) -> dict[str, str]:
+    """Returns the root of the hierarchy of the entity of every row.
+
+    Entities connected through their parents within the input share the
+    root, which is the lowest of their IDs. Parents which are not in the
+    input already exist, so they do not connect their children.
+    """
+    rows = list(rows)
+    roots = {key(row): key(row) for row in rows}
+
+    def find(entity_id: str) -> str:
+        while roots[entity_id] != entity_id:
+            roots[entity_id] = roots[roots[entity_id]]
+            entity_id = roots[entity_id]
+        return entity_id
+
+    for row in rows:
+        for parent_id in parents(row):
+            if parent_id not in roots:
+                continue
+            root, parent_root = find(key(row)), find(parent_id)
+            roots[max(root, parent_root)] = min(root, parent_root)
+
+    return {entity_id: find(entity_id) for entity_id in roots}
+
+
+def _reject_unresolvable(
+    dependencies: dict[str, set[str]],
+    levels: dict[str, int],
+    deleted: set[str],
+    entity_type: str,
+) -> set[str]:
+    """Returns the entities which can never be provisioned and logs why."""
+    rejected: set[str] = set()
+
+    for entity_id in sorted(set(dependencies) - set(levels)):
+        rejected.add(entity_id)
+        logger.error(
+            f"Skipping {entity_type} {entity_id}: it is on a cycle of parents "
+            + "or descends from one."
+        )
+
+    # Parents have lower levels than their children, so the reason is always
+    # known by the time a child is checked
+    for entity_id in sorted(levels, key=levels.__getitem__):
+        missing = sorted(dependencies[entity_id] & (deleted | rejected))
+        if missing:
+            rejected.add(entity_id)
+            logger.error(
+                f"Skipping {entity_type} {entity_id}: its parent {missing[0]} "
+                + "is deleted or skipped."
+            )
+
+    return rejected
@@ -0,0 +1,213 @@
+# (C) 2025 GoodData Corporation
+"""This module extends the GoodData Pipelines LDM extension manager.
+
+`ExtendedLdmExtensionManager` rolls custom datasets out to many child
+workspaces at once. The LDM of every parent workspace is fetched once and
+cached for all of its children, the extension of each child is built and
+checked against it locally (see `utils.ldm_relations`), and the children are
+then extended concurrently.
+"""
+
+import threading
+from typing import Any, Callable
+
+from gooddata_pipelines import LdmExtensionManager
+from gooddata_pipelines.ldm_extension.models.aliases import DatasetId, WorkspaceId
+from gooddata_pipelines.ldm_extension.models.custom_data_object import CustomDataset
+from gooddata_sdk.catalog.workspace.declarative_model.workspace.logical_model.ldm import (
+    CatalogDeclarativeModel,
+)
+from utils.ldm_relations import (
+    LdmIndex,
+    find_broken_references,
+    find_removed_objects,
+)
+from utils.metrics import metrics
+from utils.scheduling import TaskStatus, run_in_dependency_order
+
+ValidatedData = dict[WorkspaceId, dict[DatasetId, CustomDataset]]
+
+
+class ExtendedLdmExtensionManager(LdmExtensionManager):
+    """LDM extension manager which extends the child workspaces concurrently."""
+
+    max_workers = 1
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """Sets the number of workspaces extended at the same time."""
+        self.max_workers = max_workers
+
+    def _process_with_relations_check(
+        self, validated_data: ValidatedData, **kwargs: Any
+    ) -> None:
+        self._process_concurrently(
+            validated_data, self._process_workspace_with_relations_check, **kwargs
+        )
+
+    def _process_without_relations_check(
+        self, validated_data: ValidatedData, **kwargs: Any
+    ) -> None:
+        self._process_concurrently(
+            validated_data, super()._process_without_relations_check, **kwargs
+        )
+
+    def _process_workspace_with_relations_check(
+        self, validated_data: ValidatedData, **kwargs: Any
+    ) -> None:
+        """Checks the relations of the workspace remotely only if the new LDM
+        can invalidate them.
+
+        The new extension replaces the current one. If the current one is a
+        subset of it, no metric, visualization or dashboard can lose a
+        relation, so the LDM is updated without the remote check.
+        """
+        ((workspace_id, datasets),) = validated_data.items()
+        removed: list[str] = []
+        if not kwargs.get("merge_into_existing_ldm"):
+            current = self._sdk.catalog_workspace_content.get_declarative_ldm(
+                workspace_id
+            )
+            new = self._processor.datasets_to_ldm(datasets)
+            removed = find_removed_objects(
+                LdmIndex.from_models([current]), LdmIndex.from_models([new])
+            )
+            if not removed:
+                metrics.inc("ldm_relation_checks_total", result="local")
+                self.logger.info(
+                    f"{workspace_id}: the current LDM is a subset of the new one, "
+                    + "relations cannot be invalidated."
+                )
+                super()._process_without_relations_check(validated_data, **kwargs)
+                return
+
+        metrics.inc("ldm_relation_checks_total", result="remote")
+        if removed:
+            self.logger.info(
+                f"{workspace_id}: the new LDM removes or changes {len(removed)} "
+                + f"objects, e.g. {removed[0]}, checking relations remotely."
+            )
+        super()._process_with_relations_check(validated_data, **kwargs)
+
+    def _process_concurrently(
+        self,
+        validated_data: ValidatedData,
+        process: Callable[..., None],
+        **kwargs: Any,
+    ) -> None:
+        """Extends the workspaces whose custom datasets match the LDM of their
+        parents, each by its own worker.
+
+        Workspaces which do not match, or whose parents are unknown, are
+        logged and left unchanged. Every other workspace is extended, even if
+        some of them fail. The skipped and failed workspaces are raised
+        together at the end.
+        """
+        skipped: list[str] = []
+        parent_indexes = self._get_parent_indexes(list(validated_data), skipped)
+
+        valid: ValidatedData = {}
+        for workspace_id, datasets in validated_data.items():
+            if workspace_id not in parent_indexes:
+                continue
+            problems = find_broken_references(parent_indexes[workspace_id], datasets)
+            if problems:
+                metrics.inc("ldm_relation_checks_total", result="broken")
+                self.logger.error(
+                    f"❌ Skipping workspace {workspace_id}, its custom datasets do "
+                    + "not match the LDM of its parent workspaces:\n"
+                    + "\n".join(f"{self.INDENT}∙ {problem}" for problem in problems)
+                )
+                skipped.append(workspace_id)
+                continue
+            valid[workspace_id] = datasets
+
+        def extend(workspace_id: str) -> None:
+            try:
+                process({workspace_id: valid[workspace_id]}, **kwargs)
+            except Exception as e:
+                self.logger.error(f"❌ Failed to extend workspace {workspace_id}: {e}")
+                raise
+
+        statuses = run_in_dependency_order(
+            {workspace_id: [] for workspace_id in valid}, extend, self.max_workers
+        )
+
+        failed = sorted(
+            skipped
+            + [
+                workspace_id
+                for workspace_id, status in statuses.items()
+                if status == TaskStatus.FAILED
+            ]
+        )
+        if failed:
+            raise RuntimeError(
+                f"Failed to extend the LDM of {len(failed)} workspaces: "
+                + ", ".join(failed)
+            )
+
+    def _get_parent_indexes(
+        self, workspace_ids: list[str], skipped: list[str]
+    ) -> dict[str, LdmIndex]:
+        """Returns the index of the LDMs of the parent, grandparent, etc. of
+        every workspace.
+
+        The LDM of each ancestor is fetched only once, however many of the
+        workspaces descend from it, and workspaces with the same ancestors share
+        the index. Workspaces which are not child workspaces, or whose
+        ancestors could not be fetched, are logged, added to `skipped` and
+        left out.
+        """
+        parents = {
+            workspace.id: workspace.parent_id
+            for workspace in self._sdk.catalog_workspace.list_workspaces()
+        }
+
+        chains: dict[str, tuple[str, ...]] = {}
+        for workspace_id in workspace_ids:
+            ancestors: list[str] = []
+            parent_id = parents.get(workspace_id)
+            while parent_id and parent_id not in ancestors:
+                ancestors.append(parent_id)
+                parent_id = parents.get(parent_id)
+            if ancestors:
+                chains[workspace_id] = tuple(ancestors)
+            else:
+                self.logger.error(
+                    f"❌ Skipping workspace {workspace_id}, it is not a child "
+                    + "workspace, so there is no LDM to extend."
+                )
+                skipped.append(workspace_id)
+
+        ldms: dict[str, CatalogDeclarativeModel] = {}
+        lock = threading.Lock()
+
+        def fetch(ancestor_id: str) -> None:
+            ldm = self._sdk.catalog_workspace_content.get_declarative_ldm(ancestor_id)
+            with lock:
+                ldms[ancestor_id] = ldm
+
+        ancestor_ids = {ancestor for chain in chains.values() for ancestor in chain}
+        run_in_dependency_order(
+            {ancestor_id: [] for ancestor_id in ancestor_ids}, fetch, self.max_workers
+        )
+        self.logger.info(
+            f"Fetched the LDM of {len(ldms)} parent workspaces "
+            + f"for {len(workspace_ids)} workspaces."
+        )
+
+        indexes: dict[tuple[str, ...], LdmIndex] = {}
+        parent_indexes: dict[str, LdmIndex] = {}
+        for workspace_id, chain in chains.items():
+            missing = [ancestor for ancestor in chain if ancestor not in ldms]
+            if missing:
+                self.logger.error(
+                    f"❌ Skipping workspace {workspace_id}, failed to fetch the "
+                    + f"LDM of its parent workspace {missing[0]}."
+                )
+                skipped.append(workspace_id)
+                continue
+            if chain not in indexes:
+                indexes[chain] = LdmIndex.from_models(ldms[a] for a in chain)
+            parent_indexes[workspace_id] = indexes[chain]
+        return parent_indexes
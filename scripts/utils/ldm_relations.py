@@ -0,0 +1,196 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the local check of the relations of an LDM extension.
+
+Custom datasets extend the LDM a child workspace inherits from its parents.
+`LdmIndex` indexes the datasets, attributes, labels, facts, date datasets and
+references of an LDM, together with the dataset of every object, the grains
+and the source columns, so that the custom datasets of a workspace can be
+checked against the cached LDM of its parents without any API call:
+
+- `find_broken_references` lists the references the parents cannot satisfy
+  and the IDs the extension would define twice, which GoodData Cloud rejects.
+- `find_removed_objects` lists the objects of the current extension which the
+  new one removes or changes. Only those can invalidate the relations of
+  metrics, visualizations and dashboards, so an extension of which the current
+  one is a subset does not need the remote relations check and its rollback.
+"""
+
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from gooddata_pipelines.ldm_extension.input_processor import (
+    LdmExtensionDataProcessor,
+)
+from gooddata_pipelines.ldm_extension.models.aliases import DatasetId
+from gooddata_pipelines.ldm_extension.models.custom_data_object import CustomDataset
+from gooddata_sdk.catalog.workspace.declarative_model.workspace.logical_model.dataset.dataset import (
+    CatalogDeclarativeReference,
+)
+from gooddata_sdk.catalog.workspace.declarative_model.workspace.logical_model.ldm import (
+    CatalogDeclarativeModel,
+)
+
+# Source column, target attribute and data type of every column of a reference
+ReferenceSources = tuple[tuple[str, str | None, str | None], ...]
+
+
+@dataclass
+class LdmIndex:
+    """Objects of one or more LDMs by their ID."""
+
+    # Kind of every object, e.g. `dataset`, `attribute` or `date`
+    kinds: dict[str, str] = field(default_factory=dict)
+    # Dataset of every attribute, label and fact
+    owners: dict[str, str] = field(default_factory=dict)
+    # Grain attributes of every dataset
+    grains: dict[str, set[str]] = field(default_factory=dict)
+    # Sources of the references of every dataset, by the referenced dataset
+    references: dict[str, dict[str, ReferenceSources]] = field(default_factory=dict)
+    # Source column data type of every attribute
+    data_types: dict[str, str | None] = field(default_factory=dict)
+
+    @classmethod
+    def from_models(cls, models: Iterable[CatalogDeclarativeModel]) -> "LdmIndex":
+        index = cls()
+        for model in models:
+            index.add(model)
+        return index
+
+    def add(self, model: CatalogDeclarativeModel) -> None:
+        if not model.ldm:
+            return
+        for dataset in model.ldm.datasets:
+            self.kinds[dataset.id] = "dataset"
+            self.grains[dataset.id] = {grain.id for grain in dataset.grain}
+            self.references[dataset.id] = {
+                reference.identifier.id: _reference_sources(reference)
+                for reference in dataset.references
+            }
+            for attribute in dataset.attributes or []:
+                self.kinds[attribute.id] = "attribute"
+                self.owners[attribute.id] = dataset.id
+                self.data_types[attribute.id] = attribute.source_column_data_type
+                for label in attribute.labels:
+                    self.kinds[label.id] = "label"
+                    self.owners[label.id] = dataset.id
+            for fact in dataset.facts or []:
+                self.kinds[fact.id] = "fact"
+                self.owners[fact.id] = dataset.id
+        for date_instance in model.ldm.date_instances:
+            self.kinds[date_instance.id] = "date"
+
+
+def _reference_sources(reference: CatalogDeclarativeReference) -> ReferenceSources:
+    if reference.sources:
+        return tuple(
+            (source.column, source.target.id, source.data_type)
+            for source in reference.sources
+        )
+    columns = reference.source_columns or []
+    data_types: list[str | None] = list(reference.source_column_data_types or [])
+    data_types.extend([None] * (len(columns) - len(data_types)))
+    return tuple(
+        (column, None, data_type) for column, data_type in zip(columns, data_types)
+    )
+
+
+def find_broken_references(
+    parents: LdmIndex, datasets: dict[DatasetId, CustomDataset]
+) -> list[str]:
+    """Returns the problems of the custom datasets of a workspace.
+
+    `parents` indexes the LDM of the parent workspaces of the workspace.
+    """
+    problems: list[str] = []
+    defined: dict[str, str] = {}
+
+    def define(object_id: str, where: str) -> None:
+        if object_id in parents.kinds:
+            problems.append(
+                f"{where} defines {object_id}, which is already a "
+                + f"{parents.kinds[object_id]} of the parent workspaces."
+            )
+        elif defined.setdefault(object_id, where) != where:
+            problems.append(
+                f"{where} defines {object_id}, which {defined[object_id]} "
+                + "defines as well."
+            )
+
+    for dataset_id, dataset in datasets.items():
+        define(dataset_id, dataset_id)
+        for custom_field in dataset.custom_fields:
+            define(custom_field.custom_field_id, dataset_id)
+
+        parent_dataset_id = dataset.definition.parent_dataset_reference
+        if parent_dataset_id not in parents.grains:
+            problems.append(
+                f"{dataset_id} references dataset {parent_dataset_id}, "
+                + "which does not exist."
+            )
+            continue
+
+        grain = parents.grains[parent_dataset_id]
+        sources = LdmExtensionDataProcessor._build_parent_reference_sources(
+            dataset.definition
+        )
+        joined = {source.target.id for source in sources}
+        for source in sources:
+            attribute_id = source.target.id
+            data_type = parents.data_types.get(attribute_id)
+            if attribute_id not in grain:
+                problems.append(
+                    f"{dataset_id} joins on {attribute_id}, which is not in the "
+                    + f"grain of dataset {parent_dataset_id}."
+                )
+            elif data_type and source.data_type and data_type != source.data_type:
+                problems.append(
+                    f"{dataset_id} joins column {source.column} of type "
+                    + f"{source.data_type} on {attribute_id} of type {data_type}."
+                )
+        for attribute_id in sorted(grain - joined):
+            problems.append(
+                f"{dataset_id} does not join on {attribute_id}, which is in the "
+                + f"grain of dataset {parent_dataset_id}."
+            )
+
+    return problems
+
+
+def find_removed_objects(current: LdmIndex, new: LdmIndex) -> list[str]:
+    """Returns the objects of the current LDM which the new LDM removes or
+    changes.
+
+    The list is empty only if the current LDM is a subset of the new one:
+    every object keeps its kind and dataset, every dataset its grain and
+    references, and every reference and attribute its source columns and
+    data types.
+    """
+    removed = [
+        object_id
+        for object_id, kind in current.kinds.items()
+        if new.kinds.get(object_id) != kind
+    ]
+    removed_ids = set(removed)
+    removed.extend(
+        f"{object_id} (moved from {owner} to {new.owners[object_id]})"
+        for object_id, owner in current.owners.items()
+        if object_id not in removed_ids and new.owners[object_id] != owner
+    )
+    removed.extend(
+        f"{dataset_id} (grain)"
+        for dataset_id, grain in current.grains.items()
+        if dataset_id in new.grains and new.grains[dataset_id] != grain
+    )
+    removed.extend(
+        f"{attribute_id} (data type)"
+        for attribute_id, data_type in current.data_types.items()
+        if attribute_id not in removed_ids and new.data_types[attribute_id] != data_type
+    )
+    removed.extend(
+        f"{dataset_id} -> {referenced_id}"
+        for dataset_id, references in current.references.items()
+        if dataset_id in new.references
+        for referenced_id, sources in sorted(references.items())
+        if new.references[dataset_id].get(referenced_id) != sources
+    )
+    return removed
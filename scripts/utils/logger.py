@@ -1,7 +1,11 @@
+import atexit
 import logging
 import os
+import queue
 import sys
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 
 BASE_FORMAT = "%(asctime)s %(script)s [%(levelname)s] %(message)s"
 FORMATS = {
@@ -9,14 +13,79 @@ FORMATS = {
     logging.ERROR: f"\033[31m{BASE_FORMAT}\033[00m",
 }
 
+# Number of errors of the same kind logged in full, the rest is only counted
+MAX_SHOWN_ERRORS = 10
+
 
 class LevelFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__(BASE_FORMAT)
+        self.formatters = {
+            level: logging.Formatter(fmt) for level, fmt in FORMATS.items()
+        }
+
     def format(self, record):
-        fmt = FORMATS.get(record.levelno, BASE_FORMAT)
-        formatter = logging.Formatter(fmt)
+        formatter = self.formatters.get(record.levelno)
+        if formatter is None:
+            return super().format(record)
         return formatter.format(record)
 
 
+class ErrorAggregator(logging.Filter):
+    """Filter limiting the number of logged errors of the same kind.
+
+    Records logged with an `error_class` (e.g.,
+    `logger.error(message, extra={"error_class": "rows missing key 'ug_id'"})`)
+    pass only for the first `max_shown` records of their class. The others are
+    counted and reported by `summary()`, e.g., "42,311 rows missing key
+    'ug_id', first 10 shown". Records without an error class always pass.
+    """
+
+    def __init__(self, max_shown: int = MAX_SHOWN_ERRORS) -> None:
+        super().__init__()
+        self.max_shown = max_shown
+        self.counts: dict[str, int] = {}
+        self.shown: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        error_class = getattr(record, "error_class", None)
+        if error_class is None:
+            return True
+
+        with self._lock:
+            self.counts[error_class] = self.counts.get(error_class, 0) + 1
+            if self.shown.get(error_class, 0) >= self.max_shown:
+                return False
+            self.shown[error_class] = self.shown.get(error_class, 0) + 1
+            return True
+
+    def count(self, error_class: str, count: int = 1) -> None:
+        """Counts errors which were not logged at all."""
+        with self._lock:
+            self.counts[error_class] = self.counts.get(error_class, 0) + count
+
+    def summary(self) -> list[str]:
+        """Returns a line for each error class with suppressed errors."""
+        with self._lock:
+            return [
+                f"{count:,} {error_class}, first {self.shown.get(error_class, 0)} shown."
+                for error_class, count in self.counts.items()
+                if count > self.shown.get(error_class, 0)
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+            self.shown.clear()
+
+
+# Process-wide aggregator attached to the root logger by `setup_logging`
+error_aggregator = ErrorAggregator()
+
+_listener: QueueListener | None = None
+
+
 class LogHandler(logging.Handler):
     def __init__(self) -> None:
         super().__init__()
@@ -64,14 +133,55 @@ def setup_logging(verbose: bool = False) -> None:
     Terminal logs will be formatted with colors based on the log level.
     Warnings and errors will also be saved to a file named
     `<script_name>_<date>.log` in the current working directory.
+
+    Records are only put to a queue by the logging thread. Formatting and
+    writing is done by a background thread, which is flushed at exit. Errors
+    of the same class are aggregated by `error_aggregator`.
     """
+    global _listener
+
     root_logger = logging.getLogger()
 
     min_level = logging.DEBUG if verbose else logging.INFO
 
+    if _listener is not None:
+        _listener.stop()
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(error_aggregator)
+
     root_logger.setLevel(min_level)
     root_logger.handlers.clear()
-    root_logger.addHandler(LogHandler())
+    root_logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, LogHandler())
+    _listener.start()
+
+
+def flush_logging() -> None:
+    """Logs the summary of the aggregated errors and writes all pending records."""
+    global _listener
+
+    if _listener is None:
+        return
+
+    logger = logging.getLogger(__name__)
+    for line in error_aggregator.summary():
+        logger.error(line)
+    error_aggregator.reset()
+
+    _listener.stop()
+
+    # Anything logged later is written synchronously
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    for handler in _listener.handlers:
+        root_logger.addHandler(handler)
+    _listener = None
+
+
+atexit.register(flush_logging)
 
 
 def get_logger(name: str) -> logging.Logger:
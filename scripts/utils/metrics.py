@@ -0,0 +1,443 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the run metrics of the scripts.
+
+Metrics are collected only when requested by the `--metrics-out` or
+`--metrics-textfile` command line arguments and written when the script
+exits, as JSON and as a Prometheus node exporter textfile respectively.
+
+The metrics are fed by:
+    - the scripts and utilities (input rows, archive sizes),
+    - the GoodData Pipelines log observer (messages per severity),
+    - the phase timer (per-phase durations),
+    - the HTTP layer (API requests, retries, latency and transferred bytes).
+
+All HTTP clients used by the scripts (the GoodData SDK, the pipelines API
+client and boto3) are built on urllib3. Requests are observed by wrapping
+`urllib3.HTTPConnectionPool._make_request`, which is called once for every
+attempt, including retries, and `_new_conn`, which is called for every new
+connection.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from utils.logger import LogHandler
+from utils.profiling import timer
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "gooddata_tools_"
+
+# Latency buckets in seconds, the Prometheus client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Type and description of every metric, keyed by its name without the prefix
+METRICS: dict[str, tuple[str, str]] = {
+    "rows_read_total": ("counter", "Input rows read and validated."),
+    "rows_rejected_total": ("counter", "Input rows which failed validation."),
+    "rows_compacted_total": (
+        "counter",
+        "Input rows eliminated by compaction, as duplicates or superseded rows.",
+    ),
+    "shard_rows_total": (
+        "counter",
+        "Input rows which belong to the shard of the run, see --shard.",
+    ),
+    "log_messages_total": (
+        "counter",
+        "Messages reported by the GoodData Pipelines clients, by severity.",
+    ),
+    "api_requests_total": ("counter", "HTTP requests, including retries."),
+    "api_retries_total": ("counter", "HTTP requests retried by the client."),
+    "api_request_duration_seconds": ("histogram", "Latency of HTTP requests."),
+    "http_bytes_sent_total": ("counter", "Bytes of HTTP request bodies."),
+    "http_bytes_received_total": (
+        "counter",
+        "Bytes of HTTP response bodies, as announced by Content-Length.",
+    ),
+    "http_connections_opened_total": (
+        "counter",
+        "HTTP connections opened, i.e., not reused from a connection pool.",
+    ),
+    "http_pool_clients": (
+        "gauge",
+        "GoodData clients sharing the connection pool of a host.",
+    ),
+    "api_rate_limit_calls_per_second": (
+        "gauge",
+        "Current rate of the API calls allowed by the adaptive rate control.",
+    ),
+    "api_rate_decreases_total": (
+        "counter",
+        "Times the adaptive rate control lowered the rate of the API calls.",
+    ),
+    "ldm_relation_checks_total": (
+        "counter",
+        "Workspaces whose LDM extension was checked, by where the check ended.",
+    ),
+    "archive_bytes_total": (
+        "counter",
+        "Bytes of backup archives uploaded to or downloaded from the storage.",
+    ),
+    "phase_duration_seconds": ("gauge", "Wall time spent in a phase of the run."),
+    "run_duration_seconds": ("gauge", "Wall time of the run."),
+    "rows_per_second": ("gauge", "Input rows read per second of the run."),
+    "run_exit_timestamp_seconds": ("gauge", "Unix time at which the run ended."),
+}
+
+# Metrics which every shard of a job reports for the whole job (see --shard),
+# merged by taking the maximum instead of the sum
+WHOLE_JOB_METRICS = {
+    "rows_read_total",
+    "rows_rejected_total",
+    "phase_duration_seconds",
+    "run_duration_seconds",
+    "run_exit_timestamp_seconds",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class Histogram:
+    """Cumulative histogram in the Prometheus sense."""
+
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    sum: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters, gauges and histograms of a single run."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._values: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Increments a counter. Does nothing unless the metrics are enabled."""
+        if not self.enabled:
+            return
+
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Sets a gauge. Does nothing unless the metrics are enabled."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._values.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Adds an observation to a histogram."""
+        if not self.enabled:
+            return
+
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(LATENCY_BUCKETS)
+            series[key].observe(value)
+
+    def merge(self, document: dict[str, Any]) -> None:
+        """Adds the metrics of a document returned by `to_dict`.
+
+        Counters, gauges and histograms are summed, except the metrics in
+        `WHOLE_JOB_METRICS`, which keep their maximum. The rows per second,
+        derived from other metrics, are left out.
+        """
+        with self._lock:
+            for name, series in document["metrics"].items():
+                if name == "rows_per_second":
+                    continue
+                for sample in series:
+                    key = tuple(sorted(sample["labels"].items()))
+                    if "buckets" in sample:
+                        histograms = self._histograms.setdefault(name, {})
+                        h = histograms.setdefault(key, Histogram(LATENCY_BUCKETS))
+                        for i, bound in enumerate(h.buckets):
+                            h.counts[i] += sample["buckets"].get(str(bound), 0)
+                        h.sum += sample["sum"]
+                        h.count += sample["count"]
+                        continue
+
+                    values = self._values.setdefault(name, {})
+                    if name in WHOLE_JOB_METRICS:
+                        values[key] = max(values.get(key, 0), sample["value"])
+                    else:
+                        values[key] = values.get(key, 0) + sample["value"]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._histograms.clear()
+
+    def value(self, name: str, **labels: str) -> float:
+        """Returns a counter or gauge, summed over the series matching the labels."""
+        with self._lock:
+            return sum(
+                value
+                for key, value in self._values.get(name, {}).items()
+                if set(labels.items()) <= set(key)
+            )
+
+    def to_dict(self, script: str) -> dict[str, Any]:
+        """Returns the metrics as a JSON serializable document."""
+        metrics: dict[str, list[dict[str, Any]]] = {}
+        with self._lock:
+            for name, series in self._values.items():
+                metrics[name] = [
+                    {"labels": dict(key), "value": value}
+                    for key, value in series.items()
+                ]
+            for name, histograms in self._histograms.items():
+                metrics[name] = [
+                    {
+                        "labels": dict(key),
+                        "buckets": dict(zip(map(str, h.buckets), h.counts)),
+                        "sum": round(h.sum, 6),
+                        "count": h.count,
+                    }
+                    for key, h in histograms.items()
+                ]
+
+        return {
+            "script": script,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "metrics": metrics,
+        }
+
+    def to_prometheus(self, script: str) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+        base = (("script", script),)
+
+        with self._lock:
+            names = sorted(set(self._values) | set(self._histograms))
+            for name in names:
+                metric_type, description = METRICS.get(name, ("untyped", ""))
+                full_name = PREFIX + name
+                lines.append(f"# HELP {full_name} {description}")
+                lines.append(f"# TYPE {full_name} {metric_type}")
+
+                for key, value in sorted(self._values.get(name, {}).items()):
+                    lines.append(
+                        f"{full_name}{_format_labels(base + key)} {_format_value(value)}"
+                    )
+
+                for key, h in sorted(self._histograms.get(name, {}).items()):
+                    for bound, count in zip(h.buckets, h.counts):
+                        labels = _format_labels(base + key + (("le", str(bound)),))
+                        lines.append(f"{full_name}_bucket{labels} {count}")
+                    labels = _format_labels(base + key + (("le", "+Inf"),))
+                    lines.append(f"{full_name}_bucket{labels} {h.count}")
+                    labels = _format_labels(base + key)
+                    lines.append(f"{full_name}_sum{labels} {_format_value(h.sum)}")
+                    lines.append(f"{full_name}_count{labels} {h.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(round(value, 6))
+
+
+# Process-wide registry used by all scripts and utilities
+metrics = MetricsRegistry()
+
+
+def merge_metrics(documents: list[dict[str, Any]]) -> MetricsRegistry:
+    """Merges the metrics documents of the shards of a job, see `--shard`.
+
+    The rows per second are computed again for the merged job.
+    """
+    scripts = {document["script"] for document in documents}
+    if len(scripts) != 1:
+        raise ValueError(
+            "Metrics of a single script can be merged, got: "
+            + ", ".join(sorted(scripts))
+        )
+
+    merged = MetricsRegistry()
+    merged.enabled = True
+    for document in documents:
+        merged.merge(document)
+
+    duration = merged.value("run_duration_seconds")
+    if duration:
+        merged.set("rows_per_second", merged.value("rows_read_total") / duration)
+    return merged
+
+
+class MetricsSubscriber:
+    """Logger-like object counting the messages of the GoodData Pipelines clients."""
+
+    def info(self, *args: Any, **kwargs: Any) -> None:
+        metrics.inc("log_messages_total", severity="info")
+
+    def warning(self, *args: Any, **kwargs: Any) -> None:
+        metrics.inc("log_messages_total", severity="warning")
+
+    def error(self, *args: Any, **kwargs: Any) -> None:
+        metrics.inc("log_messages_total", severity="error")
+
+
+def endpoint_label(url: str) -> str:
+    """Returns the URL path without IDs, e.g. `entities/workspaces/workspaceDataFilters`.
+
+    GoodData API paths alternate collections and IDs after their kind
+    (`entities`, `layout`, `actions`), so every second segment is dropped.
+    Requests outside of the API (e.g. to S3) are labeled `storage`.
+    """
+    path = urlsplit(url).path
+    if not path.startswith("/api/"):
+        return "storage"
+
+    # Skips the empty segment, "api" and the version
+    segments = [segment for segment in path.split("/")[3:] if segment]
+    return "/".join(segments[:1] + segments[1::2])
+
+
+def _instrument_urllib3() -> None:
+    """Observes every HTTP request attempt made through urllib3."""
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.util.retry import Retry
+
+    make_request = HTTPConnectionPool._make_request
+    if getattr(make_request, "_metrics_instrumented", False):
+        return
+
+    def observed_make_request(
+        pool: HTTPConnectionPool,
+        conn: Any,
+        method: str,
+        url: str,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        endpoint = endpoint_label(url)
+        retries = kwargs.get("retries")
+        if isinstance(retries, Retry) and retries.history:
+            metrics.inc("api_retries_total", endpoint=endpoint)
+
+        body = kwargs.get("body", args[0] if args else None)
+        if isinstance(body, (bytes, str)):
+            metrics.inc("http_bytes_sent_total", len(body), endpoint=endpoint)
+
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = make_request(pool, conn, method, url, *args, **kwargs)
+            status = str(response.status)
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit():
+                metrics.inc("http_bytes_received_total", int(length), endpoint=endpoint)
+            return response
+        finally:
+            metrics.observe(
+                "api_request_duration_seconds",
+                time.perf_counter() - start,
+                endpoint=endpoint,
+            )
+            metrics.inc(
+                "api_requests_total", endpoint=endpoint, method=method, status=status
+            )
+
+    setattr(observed_make_request, "_metrics_instrumented", True)
+    setattr(HTTPConnectionPool, "_make_request", observed_make_request)
+
+    # The HTTPS pool opens its connections differently
+    for pool_class in (HTTPConnectionPool, HTTPSConnectionPool):
+        _observe_new_connections(pool_class)
+
+
+def _observe_new_connections(pool_class: Any) -> None:
+    new_conn = pool_class._new_conn
+
+    def observed_new_conn(pool: Any) -> Any:
+        metrics.inc("http_connections_opened_total", host=str(pool.host))
+        return new_conn(pool)
+
+    setattr(pool_class, "_new_conn", observed_new_conn)
+
+
+def write_textfile(path: Path, content: str) -> None:
+    """Writes the file atomically, so that the node exporter never reads a partial file."""
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(content)
+    os.replace(temporary, path)
+
+
+def start_metrics(metrics_out: Path | None, metrics_textfile: Path | None) -> None:
+    """Starts collecting the metrics as requested on the command line.
+
+    The metrics are written when the script exits.
+    """
+    if metrics_out is None and metrics_textfile is None:
+        return
+
+    from gooddata_pipelines.logger import LogObserver
+
+    metrics.enabled = True
+    if not timer.enabled:
+        timer.enable(trace_memory=False)
+
+    LogObserver().subscribe(MetricsSubscriber())
+    _instrument_urllib3()
+
+    script = LogHandler.get_top_level_script()
+
+    def write_metrics() -> None:
+        report = timer.report(script)
+        for phase in report.phases:
+            metrics.set("phase_duration_seconds", phase.seconds, phase=phase.name)
+        metrics.set("run_duration_seconds", report.total_seconds)
+        if report.total_seconds:
+            rows = metrics.value("rows_read_total")
+            metrics.set("rows_per_second", rows / report.total_seconds)
+        metrics.set("run_exit_timestamp_seconds", time.time())
+
+        name = script.removesuffix(".py")
+        if metrics_out is not None:
+            metrics_out.write_text(json.dumps(metrics.to_dict(name), indent=2))
+            logger.info(f"Metrics written to {metrics_out}")
+        if metrics_textfile is not None:
+            write_textfile(metrics_textfile, metrics.to_prometheus(name))
+            logger.info(f"Metrics written to {metrics_textfile}")
+
+    atexit.register(write_metrics)
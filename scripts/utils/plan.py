@@ -0,0 +1,133 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the plan mode of the provisioning scripts.
+
+With `--plan`, a script fetches the current state of the organization once,
+compares it with the input locally and reports the operations a run would
+perform, without changing anything. The duration of the run is estimated
+from the number of API calls the provisioner would make, one at a time, and
+the measured latency of the API or the given API rate, whichever is slower.
+
+The planners of the individual entity types live next to their scripts and
+mirror the decisions of the corresponding GoodData Pipelines provisioner.
+"""
+
+import logging
+import statistics
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+from pydantic import BaseModel
+from utils.profiling import timer
+from utils.state import StateStore
+
+logger = logging.getLogger(__name__)
+
+RowModelT = TypeVar("RowModelT", bound=BaseModel)
+
+# Number of requests used to measure the latency of the API
+LATENCY_SAMPLES = 3
+
+
+@dataclass
+class Plan:
+    """Operations a provisioning run would perform and the API calls it needs."""
+
+    entity_type: str
+    operations: Counter[str] = field(default_factory=Counter)
+    api_calls: int = 0
+    rows: int = 0
+    unchanged_rows: int = 0
+    latency_seconds: float | None = None
+
+    def count(self, operation: str, api_calls: int = 0, times: int = 1) -> None:
+        """Counts an operation and the API calls the run needs to perform it."""
+        if times:
+            self.operations[operation] += times
+        self.api_calls += api_calls
+
+    def seconds_per_call(self, calls_per_second: float | None) -> float:
+        seconds = self.latency_seconds or 0.0
+        if calls_per_second:
+            seconds = max(seconds, 1 / calls_per_second)
+        return seconds
+
+    def estimated_seconds(self, calls_per_second: float | None = None) -> float:
+        """Estimated duration of the API calls of the run."""
+        return self.api_calls * self.seconds_per_call(calls_per_second)
+
+    def format(self, calls_per_second: float | None = None) -> list[str]:
+        lines = [f"{'operation':<40} {'count':>12}"]
+        for operation, count in sorted(self.operations.items()):
+            lines.append(f"{operation:<40} {count:>12,}")
+
+        lines.append(f"{'input rows':<40} {self.rows:>12,}")
+        if self.unchanged_rows:
+            lines.append(
+                f"{'rows unchanged since the last run':<40} {self.unchanged_rows:>12,}"
+            )
+        lines.append(f"{'API calls of the run':<40} {self.api_calls:>12,}")
+
+        estimate = timedelta(seconds=round(self.estimated_seconds(calls_per_second)))
+        per_call = self.seconds_per_call(calls_per_second)
+        lines.append(
+            f"{'estimated duration':<40} {str(estimate):>12} "
+            + f"({per_call * 1000:.0f} ms per call)"
+        )
+        return lines
+
+
+def iter_planned_batches(
+    batches: Iterable[list[RowModelT]],
+    plan: Plan,
+    state_store: StateStore[RowModelT] | None = None,
+) -> Iterator[list[RowModelT]]:
+    """Yields the rows of every batch which a run would provision.
+
+    Rows unchanged since the last run are left out, as the run would skip
+    them. The state store itself is not updated.
+    """
+    for batch in batches:
+        plan.rows += len(batch)
+        if state_store is None:
+            yield batch
+            continue
+
+        delta = state_store.diff(batch)
+        plan.unchanged_rows += delta.unchanged
+        if delta.rows:
+            yield delta.rows
+
+
+def measure_latency(provisioner: Any, samples: int = LATENCY_SAMPLES) -> float:
+    """Returns the median duration of a cheap API request, in seconds."""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        provisioner._api.get_profile()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run_plan(
+    provisioner: Any,
+    planner: Callable[[Any, Iterable[list[RowModelT]], Plan], None],
+    entity_type: str,
+    batches: Iterable[list[RowModelT]],
+    state_store: StateStore[RowModelT] | None = None,
+    calls_per_second: float | None = None,
+) -> Plan:
+    """Plans the provisioning of the batches and logs the plan."""
+    plan = Plan(entity_type)
+
+    with timer.phase("planning"):
+        planner(provisioner, iter_planned_batches(batches, plan, state_store), plan)
+        plan.latency_seconds = measure_latency(provisioner)
+
+    logger.info(
+        f"Plan of the {entity_type} provisioning, nothing was changed:\n"
+        + "\n".join(plan.format(calls_per_second))
+    )
+    return plan
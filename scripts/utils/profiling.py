@@ -0,0 +1,235 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the profiling and per-phase timing of the scripts.
+
+The phases (CSV read, validation, provisioning, ...) are marked in the code
+with `timer.phase(name)` or `timer.iterate(name, iterable)`. Both are no-ops
+unless the timer is enabled by the `--timings` command line argument.
+
+Time is attributed to the innermost active phase only, e.g. reading the CSV
+rows consumed by the validation counts as CSV read, not as validation. Phases
+run by several threads at once (e.g. concurrent backup batches) report the
+time summed over all threads. Memory is traced process-wide, so the peak
+memory of such phases is approximate.
+"""
+
+import atexit
+import cProfile
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, TypeVar
+
+from utils.logger import LogHandler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MIB = 1024 * 1024
+
+
+@dataclass
+class PhaseTiming:
+    """Time and peak memory spent in a single phase."""
+
+    name: str
+    seconds: float = 0.0
+    calls: int = 0
+    peak_memory_mib: float | None = None
+
+
+@dataclass
+class TimingReport:
+    """Per-phase timings of a single run of a script."""
+
+    script: str
+    total_seconds: float
+    phases: list[PhaseTiming] = field(default_factory=list)
+
+    @property
+    def unattributed_seconds(self) -> float:
+        return max(self.total_seconds - sum(p.seconds for p in self.phases), 0.0)
+
+    def format(self) -> list[str]:
+        """Formats the report as lines of a table."""
+        lines = [
+            f"{'Phase':<20} {'Time [s]':>10} {'Share':>7} {'Calls':>9} {'Peak MiB':>9}"
+        ]
+        rows = [(p.name, p.seconds, p.calls, p.peak_memory_mib) for p in self.phases]
+        rows.append(("other", self.unattributed_seconds, 0, None))
+
+        for name, seconds, calls, peak in rows:
+            share = seconds / self.total_seconds * 100 if self.total_seconds else 0
+            peak_str = f"{peak:9.1f}" if peak is not None else f"{'-':>9}"
+            calls_str = f"{calls:9}" if calls else f"{'-':>9}"
+            lines.append(
+                f"{name:<20} {seconds:10.3f} {share:6.1f}% {calls_str} {peak_str}"
+            )
+
+        lines.append(f"{'total':<20} {self.total_seconds:10.3f}")
+        return lines
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {**asdict(self), "unattributed_seconds": self.unattributed_seconds},
+            indent=2,
+        )
+
+
+class PhaseTimer:
+    """Measures the wall time and peak memory of the phases of a script."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.trace_memory = False
+        self.start = time.perf_counter()
+
+        self._phases: dict[str, PhaseTiming] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self, trace_memory: bool = True) -> None:
+        """Starts measuring. Peak memory is traced with `tracemalloc`."""
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def record(self, name: str, seconds: float) -> None:
+        """Adds a phase measured outside of the timer, e.g. before enabling it."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            timing = self._phases.setdefault(name, PhaseTiming(name))
+            timing.seconds += seconds
+            timing.calls += 1
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Attributes the time spent in the block to the phase."""
+        if not self.enabled:
+            yield
+            return
+
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Attributes the time spent producing the items to the phase."""
+        if not self.enabled:
+            yield from iterable
+            return
+
+        iterator = iter(iterable)
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            yield item
+
+    def report(self, script: str) -> TimingReport:
+        with self._lock:
+            phases = [PhaseTiming(**asdict(p)) for p in self._phases.values()]
+        for timing in phases:
+            timing.seconds = round(timing.seconds, 6)
+            if timing.peak_memory_mib is not None:
+                timing.peak_memory_mib = round(timing.peak_memory_mib, 3)
+        return TimingReport(
+            script=script,
+            total_seconds=round(time.perf_counter() - self.start, 6),
+            phases=phases,
+        )
+
+    @property
+    def _stack(self) -> list[str]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _enter(self, name: str) -> None:
+        now = time.perf_counter()
+        stack = self._stack
+        if stack:
+            self._close_segment(stack[-1], now, count=False)
+        stack.append(name)
+        self._open_segment(now)
+
+    def _exit(self) -> None:
+        now = time.perf_counter()
+        name = self._stack.pop()
+        self._close_segment(name, now, count=True)
+        if self._stack:
+            self._open_segment(now)
+
+    def _open_segment(self, now: float) -> None:
+        self._local.segment_start = now
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+    def _close_segment(self, name: str, now: float, count: bool) -> None:
+        peak = tracemalloc.get_traced_memory()[1] / MIB if self.trace_memory else None
+        with self._lock:
+            timing = self._phases.setdefault(name, PhaseTiming(name))
+            timing.seconds += now - self._local.segment_start
+            timing.calls += int(count)
+            if peak is not None:
+                timing.peak_memory_mib = max(timing.peak_memory_mib or 0.0, peak)
+
+
+# Process-wide timer used by all scripts and utilities
+timer = PhaseTimer()
+
+
+def timings_file_path(script: str) -> Path:
+    """Path of the JSON timing report, next to the log file of the script."""
+    return Path(f"{script}_{datetime.now():%Y-%m-%d_%H%M%S}_timings.json")
+
+
+def start_diagnostics(
+    profile_out: Path | None, timings: bool, timings_json: bool
+) -> None:
+    """Starts the profiler and the phase timer as requested on the command line.
+
+    The profile and the timing report are written when the script exits.
+    """
+    script = LogHandler.get_top_level_script()
+
+    if timings or timings_json:
+        timer.enable()
+
+        def report_timings() -> None:
+            report = timer.report(script)
+            logger.info("Timings per phase:\n" + "\n".join(report.format()))
+            if timings_json:
+                path = timings_file_path(script)
+                path.write_text(report.to_json())
+                logger.info(f"Timings written to {path}")
+
+        atexit.register(report_timings)
+
+    if profile_out is not None:
+        profiler = cProfile.Profile()
+        profile_path = profile_out
+
+        def dump_profile() -> None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            logger.info(f"Profile written to {profile_path}")
+
+        # Registered after the timings, so that the report is not profiled
+        atexit.register(dump_profile)
+        profiler.enable()
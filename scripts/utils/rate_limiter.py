@@ -0,0 +1,277 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the rate limiters shared by all API workers.
+
+Besides the static token bucket, the API rate can be controlled adaptively
+(`--adaptive-rate`). The adaptive limiter is shared by all GoodData API
+requests of the process and adjusts its rate following the AIMD scheme (additive
+increase, multiplicative decrease): it ramps up while the responses are
+healthy and backs off on 429 and 5xx responses, failed requests or a rising
+latency.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from gooddata_pipelines.utils.rate_limiter import RateLimiter
+from utils.metrics import endpoint_label, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket(RateLimiter):
+    """Thread-safe token bucket rate limiter.
+
+    Drop-in replacement for `RateLimiter` (usable as a decorator and as a
+    context manager). Unlike `RateLimiter`, waiting callers do not hold the
+    lock while sleeping: each caller reserves a token under the lock and then
+    sleeps until its token is available, so any number of threads can wait
+    concurrently while the overall rate stays at `calls_per_second`.
+    """
+
+    def __init__(self, calls_per_second: float = 1.0, burst: int = 1) -> None:
+        super().__init__(calls_per_second)
+
+        if burst < 1:
+            raise ValueError("burst must be a positive integer")
+
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+
+    def wait_if_needed(self) -> float:
+        """Take a token, sleeping until it is available. Return the sleep time."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_refill
+            self._tokens = min(
+                float(self.burst), self._tokens + elapsed * self.calls_per_second
+            )
+            self._last_refill = now
+
+            # A negative balance is the queue of callers waiting for a token
+            self._tokens -= 1
+            sleep_time = max(0.0, -self._tokens / self.calls_per_second)
+
+        if sleep_time:
+            time.sleep(sleep_time)
+        return sleep_time
+
+    def reset(self) -> None:
+        """Reset the limiter (useful in tests)."""
+        with self._lock:
+            self._tokens = float(self.burst)
+            self._last_refill = time.monotonic()
+
+
+_shared_limiters: dict[float, TokenBucket] = {}
+_shared_limiters_lock = threading.Lock()
+
+
+def get_shared_rate_limiter(calls_per_second: float) -> TokenBucket:
+    """Returns the process-wide rate limiter for the given rate.
+
+    All managers and worker threads configured with the same
+    `api_calls_per_second` draw from the same bucket.
+    """
+    with _shared_limiters_lock:
+        if calls_per_second not in _shared_limiters:
+            _shared_limiters[calls_per_second] = TokenBucket(calls_per_second)
+        return _shared_limiters[calls_per_second]
+
+
+class Unlimited(RateLimiter):
+    """Rate limiter which never waits."""
+
+    def wait_if_needed(self) -> float:
+        return 0.0
+
+
+@dataclass
+class EndpointLatency:
+    """Smoothed and lowest latency of an endpoint, in seconds."""
+
+    smoothed: float
+    lowest: float
+    samples: int = 1
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """Token bucket whose rate adapts to the responses of the API.
+
+    The rate starts at `floor` and doubles every round of healthy responses
+    (a round being as many responses as the current rate) until the first
+    back off. From then on, it grows by `increase` calls per second every
+    round. A 429 or 5xx response, a failed request, or a latency of an
+    endpoint rising above `latency_factor` times its lowest latency,
+    multiplies the rate by `decrease`. The rate stays between `floor` and
+    `ceiling`.
+
+    Responses to requests sent before the last back off do not trigger
+    another one, so that a burst of throttled requests backs off only once.
+    """
+
+    # Weight of the last sample in the smoothed latency
+    LATENCY_SMOOTHING = 0.2
+    # Samples of an endpoint needed before its latency is judged
+    LATENCY_MIN_SAMPLES = 5
+
+    def __init__(
+        self,
+        floor: float,
+        ceiling: float,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_factor: float = 3.0,
+    ) -> None:
+        if not 0 < floor <= ceiling:
+            raise ValueError("floor must be positive and not above ceiling")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+
+        super().__init__(floor)
+        self.floor = floor
+        self.ceiling = ceiling
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+
+        self.slow_start = True
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._latencies: dict[str, EndpointLatency] = {}
+        metrics.set("api_rate_limit_calls_per_second", self.calls_per_second)
+
+    def record(self, endpoint: str, status: int | None, seconds: float) -> None:
+        """Adapts the rate to the response of a request.
+
+        Args:
+            endpoint (str): Endpoint of the request, see `endpoint_label`.
+            status (int | None): Status of the response, None if it failed.
+            seconds (float): Duration of the request.
+        """
+        sent_at = time.monotonic() - seconds
+
+        with self._lock:
+            reason = self._back_off_reason(endpoint, status, seconds)
+            if reason is None:
+                self._ramp_up()
+            elif sent_at >= self._last_decrease:
+                self._back_off(reason)
+            else:
+                return
+
+            metrics.set("api_rate_limit_calls_per_second", self.calls_per_second)
+
+    def _back_off_reason(
+        self, endpoint: str, status: int | None, seconds: float
+    ) -> str | None:
+        if status is None:
+            return "failed request"
+        if status == 429 or status >= 500:
+            return f"HTTP {status}"
+
+        latency = self._latencies.get(endpoint)
+        if latency is None:
+            self._latencies[endpoint] = EndpointLatency(seconds, seconds)
+            return None
+
+        latency.smoothed += self.LATENCY_SMOOTHING * (seconds - latency.smoothed)
+        latency.lowest = min(latency.lowest, seconds)
+        latency.samples += 1
+        if (
+            latency.samples >= self.LATENCY_MIN_SAMPLES
+            and latency.smoothed > self.latency_factor * latency.lowest
+        ):
+            # Judged again only once the latency settles down
+            latency.lowest = latency.smoothed / self.latency_factor
+            return f"latency of {endpoint} rising to {latency.smoothed * 1000:.0f} ms"
+        return None
+
+    def _ramp_up(self) -> None:
+        # Both are spread over a round of responses
+        if self.slow_start:
+            step = 1.0
+        else:
+            step = self.increase / self.calls_per_second
+        self.calls_per_second = min(self.ceiling, self.calls_per_second + step)
+
+    def _back_off(self, reason: str) -> None:
+        self.slow_start = False
+        self.decreases += 1
+        self._last_decrease = time.monotonic()
+        self.calls_per_second = max(self.floor, self.calls_per_second * self.decrease)
+
+        metrics.inc("api_rate_decreases_total")
+        logger.info(
+            f"Lowering the API rate to {self.calls_per_second:.1f} calls per "
+            + f"second ({reason})."
+        )
+
+
+# Process-wide adaptive limiter, if enabled
+_adaptive_limiter: AdaptiveRateLimiter | None = None
+
+
+def get_adaptive_rate_limiter() -> AdaptiveRateLimiter | None:
+    return _adaptive_limiter
+
+
+def start_adaptive_rate(floor: float, ceiling: float) -> AdaptiveRateLimiter:
+    """Controls the rate of all GoodData API requests of the process.
+
+    Every attempt of a request (including retries) waits for the adaptive
+    limiter and reports its response back to it. Requests to other hosts,
+    e.g. to the backup storage, are not limited.
+    """
+    global _adaptive_limiter
+
+    _adaptive_limiter = AdaptiveRateLimiter(floor, ceiling)
+    _control_urllib3()
+    logger.info(
+        f"Adaptive API rate enabled, between {floor:g} and {ceiling:g} calls "
+        + "per second."
+    )
+    return _adaptive_limiter
+
+
+def stop_adaptive_rate() -> None:
+    global _adaptive_limiter
+    _adaptive_limiter = None
+
+
+def _control_urllib3() -> None:
+    """Passes every GoodData API request attempt through the adaptive limiter."""
+    from urllib3.connectionpool import HTTPConnectionPool
+
+    make_request = HTTPConnectionPool._make_request
+    if getattr(make_request, "_rate_controlled", False):
+        return
+
+    def controlled_make_request(
+        pool: HTTPConnectionPool,
+        conn: Any,
+        method: str,
+        url: str,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        limiter = _adaptive_limiter
+        endpoint = endpoint_label(url)
+        if limiter is None or endpoint == "storage":
+            return make_request(pool, conn, method, url, *args, **kwargs)
+
+        limiter.wait_if_needed()
+        start = time.perf_counter()
+        status = None
+        try:
+            response = make_request(pool, conn, method, url, *args, **kwargs)
+            status = response.status
+            return response
+        finally:
+            limiter.record(endpoint, status, time.perf_counter() - start)
+
+    setattr(controlled_make_request, "_rate_controlled", True)
+    setattr(HTTPConnectionPool, "_make_request", controlled_make_request)
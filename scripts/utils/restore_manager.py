@@ -0,0 +1,306 @@
+# (C) 2025 GoodData Corporation
+"""This module extends the GoodData Pipelines restore manager.
+
+`ExtendedRestoreManager` restores workspaces concurrently, parents before
+their children, and reports the outcome of every workspace at the end.
+"""
+
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from gooddata_pipelines import (
+    BackupRestoreConfig,
+    RestoreManager,
+    WorkspaceToRestore,
+)
+from gooddata_pipelines.backup_and_restore.restore_manager import WorkspaceModel
+from utils.backup_restore_config import ExtendedBackupRestoreConfig
+from utils.checkpoint import CheckpointJournal
+from utils.metrics import metrics
+from utils.profiling import timer
+from utils.scheduling import TaskStatus, run_in_dependency_order
+
+
+class ThreadErrorCollector:
+    """Logger-like object collecting the errors logged by the current thread.
+
+    The log observer notifies its subscribers in the thread which emitted the
+    message, so the errors can be attributed to the task run by that thread.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+
+    def info(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def warning(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def error(self, message: Any, *args: Any, **kwargs: Any) -> None:
+        self.errors.append(str(message))
+
+    @property
+    def errors(self) -> list[str]:
+        if not hasattr(self._local, "errors"):
+            self._local.errors = []
+        return self._local.errors
+
+    def reset(self) -> None:
+        self._local.errors = []
+
+
+class WorkspaceRestoreError(RuntimeError):
+    """Raised when errors were logged during the restore of a workspace."""
+
+
+@dataclass
+class RestoreResult:
+    """Outcome of the restore of a single workspace."""
+
+    workspace_id: str
+    path: str
+    status: TaskStatus
+    errors: list[str] = field(default_factory=list)
+
+
+@dataclass
+class RestoreReport:
+    """Outcome of the restore of all workspaces, in the input order."""
+
+    results: list[RestoreResult] = field(default_factory=list)
+
+    def with_status(self, status: TaskStatus) -> list[RestoreResult]:
+        return [result for result in self.results if result.status == status]
+
+    @property
+    def summary(self) -> str:
+        return (
+            f"Restored {len(self.with_status(TaskStatus.SUCCEEDED))} "
+            + f"of {len(self.results)} workspaces. "
+            + f"Failed: {len(self.with_status(TaskStatus.FAILED))}, "
+            + f"skipped: {len(self.with_status(TaskStatus.SKIPPED))}."
+        )
+
+
+class ExtendedRestoreManager(RestoreManager):
+    """Restore manager restoring workspaces concurrently, by hierarchy."""
+
+    _checkpoint: CheckpointJournal | None = None
+
+    def __init__(self, host: str, token: str, config: BackupRestoreConfig):
+        super().__init__(host, token, config)
+
+        self.max_workers = (
+            config.max_workers if isinstance(config, ExtendedBackupRestoreConfig) else 1
+        )
+
+    def enable_checkpoint(self, checkpoint: CheckpointJournal) -> None:
+        """Records the workspaces restored by the run in the checkpoint journal.
+
+        Workspaces recorded by an interrupted restore with the same input are
+        not restored again and are reported as restored.
+        """
+        self._checkpoint = checkpoint
+
+    def restore(self, workspaces_to_restore: list[WorkspaceToRestore]) -> None:
+        """Restores the backups of workspaces and logs the report."""
+        self.restore_workspaces(workspaces_to_restore)
+
+    def restore_workspaces(
+        self, workspaces_to_restore: list[WorkspaceToRestore]
+    ) -> RestoreReport:
+        """Restores the backups of workspaces.
+
+        Up to `max_workers` workspaces are restored at the same time. A
+        workspace is restored only once its parent (if it is restored too) was
+        restored successfully, as the child model may depend on the inherited
+        one. Children of workspaces which failed to restore are skipped.
+
+        Args:
+            workspaces_to_restore: List of workspaces to restore.
+
+        Returns:
+            RestoreReport: Outcome of the restore of every workspace.
+        """
+        dependencies = self._get_dependencies(workspaces_to_restore)
+        checkpoint = self._checkpoint
+
+        collector = ThreadErrorCollector()
+        errors: dict[int, list[str]] = {}
+
+        def restore_one(index: int) -> None:
+            workspace = workspaces_to_restore[index]
+            if checkpoint is not None and checkpoint.is_completed(workspace.id):
+                return
+
+            collector.reset()
+            with tempfile.TemporaryDirectory() as tempdir:
+                self._restore_backup(workspace, Path(tempdir))
+            if collector.errors:
+                errors[index] = list(collector.errors)
+                raise WorkspaceRestoreError(collector.errors[0])
+
+            if checkpoint is not None:
+                checkpoint.record(workspace.id)
+
+        if checkpoint is not None:
+            resumed = sum(
+                checkpoint.is_completed(workspace.id)
+                for workspace in workspaces_to_restore
+            )
+            if resumed:
+                self.logger.info(
+                    f"Skipping {resumed} workspaces restored by a previous run."
+                )
+
+        self.logger.info(
+            f"Restoring {len(workspaces_to_restore)} workspaces "
+            + f"with {self.max_workers} workers..."
+        )
+
+        self.logger.subscribe(collector)
+        try:
+            statuses = run_in_dependency_order(
+                dependencies, restore_one, self.max_workers
+            )
+        finally:
+            self.logger.unsubscribe(collector)
+
+        report = RestoreReport(
+            [
+                RestoreResult(
+                    workspace_id=workspace.id,
+                    path=workspace.path,
+                    status=statuses[index],
+                    errors=errors.get(index, []),
+                )
+                for index, workspace in enumerate(workspaces_to_restore)
+            ]
+        )
+        self._log_report(report, workspaces_to_restore, dependencies)
+
+        succeeded = report.with_status(TaskStatus.SUCCEEDED)
+        if checkpoint is not None and len(succeeded) == len(report.results):
+            checkpoint.finish()
+
+        return report
+
+    # Extraction, loading and restore are timed separately, so the rest of the
+    # restore of a workspace is the download of its archive from the storage
+    @timer.phase("download")
+    def _restore_backup(
+        self, workspace_to_restore: WorkspaceToRestore, tempdir_path: Path
+    ) -> None:
+        super()._restore_backup(workspace_to_restore, tempdir_path)
+
+    @timer.phase("archive")
+    def _extract_zip_archive(self, file_to_extract: Path, destination: Path) -> None:
+        metrics.inc(
+            "archive_bytes_total", file_to_extract.stat().st_size, direction="download"
+        )
+        super()._extract_zip_archive(file_to_extract, destination)
+
+    @timer.phase("load")
+    def _load_workspace_layout(self, workspace_root_dir_path: Path) -> WorkspaceModel:
+        return super()._load_workspace_layout(workspace_root_dir_path)
+
+    @timer.phase("load")
+    def _load_user_data_filters(self, workspace_root_dir_path: Path) -> dict:
+        return super()._load_user_data_filters(workspace_root_dir_path)
+
+    @timer.phase("restore")
+    def _put_workspace_layout(
+        self, workspace_id: str, workspace_model: WorkspaceModel
+    ) -> None:
+        super()._put_workspace_layout(workspace_id, workspace_model)
+
+    @timer.phase("restore")
+    def _put_user_data_filters(
+        self, workspace_id: str, user_data_filters: dict
+    ) -> None:
+        super()._put_user_data_filters(workspace_id, user_data_filters)
+
+    @timer.phase("restore")
+    def _load_and_put_filter_views(
+        self, workspace_id: str, workspace_root_dir_path: Path
+    ) -> None:
+        super()._load_and_put_filter_views(workspace_id, workspace_root_dir_path)
+
+    @timer.phase("restore")
+    def _load_and_post_automations(
+        self, workspace_id: str, workspace_root_dir_path: Path
+    ) -> None:
+        super()._load_and_post_automations(workspace_id, workspace_root_dir_path)
+
+    def _get_parent_ids(self) -> dict[str, str | None]:
+        """Returns the parent ID of every workspace in the organization."""
+        return {
+            workspace.id: workspace.parent_id
+            for workspace in self._api._sdk.catalog_workspace.list_workspaces()
+        }
+
+    def _get_dependencies(
+        self, workspaces_to_restore: list[WorkspaceToRestore]
+    ) -> dict[int, list[int]]:
+        """Maps each workspace (by its index) to the workspaces it waits for.
+
+        A workspace waits for its closest ancestor which is restored as well.
+        Repeated restores of the same workspace run in the input order.
+        """
+        try:
+            parent_ids = self._get_parent_ids()
+        except Exception as e:
+            self.logger.warning(
+                "Unable to fetch the workspace hierarchy, workspaces will be "
+                + f"restored regardless of it. {e.__class__.__name__}: {e}"
+            )
+            parent_ids = {}
+
+        last_index: dict[str, int] = {}
+        dependencies: dict[int, list[int]] = {}
+
+        for index, workspace in enumerate(workspaces_to_restore):
+            dependencies[index] = []
+            if workspace.id in last_index:
+                dependencies[index].append(last_index[workspace.id])
+            last_index[workspace.id] = index
+
+        for index, workspace in enumerate(workspaces_to_restore):
+            ancestor_id = parent_ids.get(workspace.id)
+            visited: set[str] = set()
+            while ancestor_id and ancestor_id not in visited:
+                if ancestor_id in last_index:
+                    dependencies[index].append(last_index[ancestor_id])
+                    break
+                visited.add(ancestor_id)
+                ancestor_id = parent_ids.get(ancestor_id)
+
+        return dependencies
+
+    def _log_report(
+        self,
+        report: RestoreReport,
+        workspaces_to_restore: list[WorkspaceToRestore],
+        dependencies: dict[int, list[int]],
+    ) -> None:
+        for index, result in enumerate(report.results):
+            if result.status == TaskStatus.FAILED:
+                self.logger.warning(
+                    f"Restore of {result.workspace_id} from {result.path} "
+                    + f"failed: {result.errors[0]}"
+                )
+            elif result.status == TaskStatus.SKIPPED:
+                blocked_by = ", ".join(
+                    workspaces_to_restore[dependency].id
+                    for dependency in dependencies[index]
+                )
+                self.logger.warning(
+                    f"Restore of {result.workspace_id} from {result.path} "
+                    + f"skipped, as restore of {blocked_by} did not succeed."
+                )
+
+        self.logger.info(report.summary)
@@ -0,0 +1,136 @@
+# (C) 2025 GoodData Corporation
+"""This module contains helpers to run dependent tasks concurrently."""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from enum import Enum
+from typing import Callable, Collection, Hashable, Mapping, TypeVar
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+
+
+class TaskStatus(Enum):
+    """Final status of a task."""
+
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+class DependencyCycleError(ValueError):
+    """Raised when the tasks cannot be ordered because of a dependency cycle."""
+
+
+def dependency_levels(dependencies: Mapping[KeyT, Collection[KeyT]]) -> dict[KeyT, int]:
+    """Returns the level of every task: 0 without dependencies, else one more
+    than the highest level of its dependencies.
+
+    Dependencies on keys which are not tasks themselves are ignored. Tasks
+    which can never run because of a dependency cycle have no level.
+    """
+    pending = {
+        key: {dependency for dependency in deps if dependency in dependencies}
+        for key, deps in dependencies.items()
+    }
+    dependents: dict[KeyT, list[KeyT]] = {key: [] for key in dependencies}
+    for key, deps in pending.items():
+        for dependency in deps:
+            dependents[dependency].append(key)
+
+    levels = {key: 0 for key, deps in pending.items() if not deps}
+    resolvable = deque(levels)
+    while resolvable:
+        key = resolvable.popleft()
+        for dependent in dependents[key]:
+            pending[dependent].discard(key)
+            if not pending[dependent]:
+                levels[dependent] = levels[key] + 1
+                resolvable.append(dependent)
+
+    return levels
+
+
+def find_unresolvable(dependencies: Mapping[KeyT, Collection[KeyT]]) -> set[KeyT]:
+    """Returns the tasks which can never run because of a dependency cycle.
+
+    Dependencies on keys which are not tasks themselves are ignored. The result
+    contains the tasks on a cycle as well as all tasks depending on them.
+    """
+    levels = dependency_levels(dependencies)
+    return {key for key in dependencies if key not in levels}
+
+
+def run_in_dependency_order(
+    dependencies: Mapping[KeyT, Collection[KeyT]],
+    run: Callable[[KeyT], None],
+    max_workers: int = 1,
+) -> dict[KeyT, TaskStatus]:
+    """Runs the tasks concurrently, each only after all of its dependencies.
+
+    Args:
+        dependencies (Mapping): Keys of the tasks to run, mapped to the keys of
+            the tasks they depend on. Dependencies on keys which are not tasks
+            themselves are considered satisfied.
+        run (Callable): Function running a single task. A task fails if the
+            function raises an exception.
+        max_workers (int): Maximum number of tasks running at the same time.
+
+    Returns:
+        dict[KeyT, TaskStatus]: Status of every task. Tasks depending on a
+            failed or skipped task are skipped.
+
+    Raises:
+        DependencyCycleError: If some of the tasks depend on each other.
+    """
+    unresolvable = find_unresolvable(dependencies)
+    if unresolvable:
+        raise DependencyCycleError(
+            "Dependency cycle found among: "
+            + ", ".join(sorted(str(key) for key in unresolvable))
+        )
+
+    waiting_on = {
+        key: {dependency for dependency in deps if dependency in dependencies}
+        for key, deps in dependencies.items()
+    }
+    dependents: dict[KeyT, list[KeyT]] = {key: [] for key in dependencies}
+    for key, deps in waiting_on.items():
+        for dependency in deps:
+            dependents[dependency].append(key)
+
+    statuses: dict[KeyT, TaskStatus] = {}
+    ready = deque(key for key, deps in waiting_on.items() if not deps)
+
+    def skip_dependents(key: KeyT) -> None:
+        stack = list(dependents[key])
+        while stack:
+            dependent = stack.pop()
+            if dependent not in statuses:
+                statuses[dependent] = TaskStatus.SKIPPED
+                stack.extend(dependents[dependent])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running: dict[Future[None], KeyT] = {}
+
+        while ready or running:
+            # Keep at most one task per worker submitted, so that newly
+            # unblocked tasks are not queued behind the whole backlog
+            while ready and len(running) < max_workers:
+                key = ready.popleft()
+                running[executor.submit(run, key)] = key
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                if future.exception() is not None:
+                    statuses[key] = TaskStatus.FAILED
+                    skip_dependents(key)
+                    continue
+
+                statuses[key] = TaskStatus.SUCCEEDED
+                for dependent in dependents[key]:
+                    waiting_on[dependent].discard(key)
+                    if not waiting_on[dependent]:
+                        ready.append(dependent)
+
+    return statuses
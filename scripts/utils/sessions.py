@@ -0,0 +1,185 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the HTTP connections shared by the GoodData clients.
+
+Every GoodData Pipelines client (provisioner, manager) creates its own GoodData
+SDK, and sends its direct API calls through `requests` without a session, i.e.,
+over a new connection for every call. `create_client` hands all clients of the
+same host and token a single connection pool instead: one SDK with a pool of
+keep-alive connections, and one `requests` session with a pool of the same
+size for the direct API calls. Scripts using several clients, and concurrent
+provisioning, thus reuse open connections instead of setting up new ones.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import requests
+from gooddata_api_client.rest import RESTClientObject
+from gooddata_pipelines.api.gooddata_api import TIMEOUT
+from gooddata_pipelines.api.gooddata_api_wrapper import GoodDataApi
+from gooddata_sdk import GoodDataSdk
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of keep-alive connections kept open to a host, per transport
+DEFAULT_POOL_SIZE = 10
+
+
+@dataclass
+class PoolStats:
+    """Usage of the connection pool of a host."""
+
+    host: str
+    clients: int
+    pool_size: int
+    # Connections opened and requests sent, over both transports
+    connections: int
+    requests: int
+
+
+class SessionApi(GoodDataApi):
+    """GoodData API sending its direct API calls through a shared session."""
+
+    _session: requests.Session
+
+    def _get(
+        self, endpoint: str, headers: dict[str, str] | None = None
+    ) -> requests.Response:
+        return self._session.get(
+            self._get_url(endpoint), headers=headers or self.headers, timeout=TIMEOUT
+        )
+
+    def _post(
+        self, endpoint: str, data: Any, headers: dict | None = None
+    ) -> requests.Response:
+        return self._session.post(
+            self._get_url(endpoint),
+            data=json.dumps(data),
+            headers=headers or self.headers,
+            timeout=TIMEOUT,
+        )
+
+    def _put(
+        self, endpoint: str, data: Any, headers: dict | None = None
+    ) -> requests.Response:
+        return self._session.put(
+            self._get_url(endpoint),
+            data=json.dumps(data),
+            headers=headers or self.headers,
+            timeout=TIMEOUT,
+        )
+
+    def _delete(self, endpoint: str) -> requests.Response:
+        return self._session.delete(
+            self._get_url(endpoint), headers=self.headers, timeout=TIMEOUT
+        )
+
+
+@dataclass
+class ConnectionPool:
+    """SDK and session shared by the clients of a host and token."""
+
+    host: str
+    pool_size: int
+    sdk: GoodDataSdk
+    session: requests.Session
+    clients: int = 0
+
+    @classmethod
+    def create(cls, host: str, token: str, pool_size: int) -> "ConnectionPool":
+        sdk = GoodDataSdk.create(host, token)
+
+        # The generated API client sizes its pool when it is created
+        api_client = sdk.client._api_client
+        api_client.configuration.connection_pool_maxsize = pool_size
+        api_client.rest_client = RESTClientObject(api_client.configuration)
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        return cls(host, pool_size, sdk, session)
+
+    def _pool_managers(self) -> list[PoolManager]:
+        managers = [self.sdk.client._api_client.rest_client.pool_manager]
+        for adapter in set(self.session.adapters.values()):
+            if isinstance(adapter, HTTPAdapter):
+                managers.append(adapter.poolmanager)
+        return managers
+
+    def stats(self) -> PoolStats:
+        pools = [
+            manager.pools[key]
+            for manager in self._pool_managers()
+            for key in manager.pools.keys()
+        ]
+        return PoolStats(
+            host=self.host,
+            clients=self.clients,
+            pool_size=self.pool_size,
+            connections=sum(pool.num_connections for pool in pools),
+            requests=sum(pool.num_requests for pool in pools),
+        )
+
+    def close(self) -> None:
+        self.session.close()
+        self.sdk.client._api_client.rest_client.pool_manager.clear()
+
+
+class ConnectionPools:
+    """Process-wide cache of connection pools, keyed by host and token."""
+
+    def __init__(self) -> None:
+        self._pools: dict[tuple[str, str], ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def share(
+        self, client: Any, host: str, token: str, pool_size: int = DEFAULT_POOL_SIZE
+    ) -> ConnectionPool:
+        """Makes the client send its requests through the pool of its host.
+
+        The pool is created by the first client of the host and token, with
+        the pool size of that client.
+        """
+        host = GoodDataApi._get_clean_host(host)
+        with self._lock:
+            pool = self._pools.get((host, token))
+            if pool is None:
+                pool = ConnectionPool.create(host, token, pool_size)
+                self._pools[host, token] = pool
+            pool.clients += 1
+
+        # Objects created by the client (e.g., validators) hold its API, so
+        # the API is kept and only its transport is replaced
+        api = client._api
+        api.__class__ = SessionApi
+        api._session = pool.session
+        api._sdk = pool.sdk
+        if isinstance(getattr(client, "_sdk", None), GoodDataSdk):
+            client._sdk = pool.sdk
+
+        metrics.set("http_pool_clients", pool.clients, host=host)
+        logger.debug(f"Client {type(client).__name__} shares the pool of {host}.")
+        return pool
+
+    def stats(self) -> list[PoolStats]:
+        with self._lock:
+            return [pool.stats() for pool in self._pools.values()]
+
+    def clear(self) -> None:
+        """Closes all pools."""
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+
+# Process-wide cache used by `create_client`
+connection_pools = ConnectionPools()
@@ -0,0 +1,97 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the sharding of a job across several processes.
+
+With `--shard i/N`, a tool only handles the entities whose key (e.g., the
+workspace ID) hashes to shard `i` of `N`. The hash is stable across processes,
+machines and Python versions, so running all `N` shards, each on its own
+machine, covers every entity exactly once.
+
+Rows of the same entity always fall into the same shard, as do all rows of a
+workspace for the tools which work per workspace (permissions, user data
+filters, custom fields), so shards never change the same entity concurrently.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def shard_of(key: str, count: int) -> int:
+    """Returns the shard (1 to `count`) of the key."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count + 1
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard `index` (counted from 1) of `count` shards."""
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if self.count < 1 or not 1 <= self.index <= self.count:
+            raise ValueError(
+                f"Invalid shard {self}, use i/N with N positive and i from 1 to N."
+            )
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        """Parses a shard in the `i/N` form, e.g. `2/8`."""
+        index, separator, count = value.partition("/")
+        if not separator or not index.isdigit() or not count.isdigit():
+            raise ValueError(f"Invalid shard {value}, use i/N, e.g. 2/8.")
+        return cls(int(index), int(count))
+
+    def owns(self, key: str) -> bool:
+        return shard_of(key, self.count) == self.index
+
+    def select(self, items: Iterable[T], key: Callable[[T], str]) -> list[T]:
+        """Returns the items of the shard, in their original order."""
+        return [item for item in items if self.owns(key(item))]
+
+
+def shard_rows(
+    rows: list[T], shard: Shard | None, key: Callable[[T], str], entity_type: str
+) -> list[T]:
+    """Returns the rows which belong to the shard, or all rows without a shard."""
+    return [
+        row for batch in shard_batches([rows], shard, key, entity_type) for row in batch
+    ]
+
+
+def shard_batches(
+    batches: Iterable[list[T]],
+    shard: Shard | None,
+    key: Callable[[T], str],
+    entity_type: str,
+) -> Iterator[list[T]]:
+    """Yields the rows of every batch which belong to the shard.
+
+    Batches without any row of the shard are left out. Without a shard, the
+    batches are yielded unchanged.
+    """
+    if shard is None:
+        yield from batches
+        return
+
+    total = kept = 0
+    for batch in batches:
+        selected = shard.select(batch, key)
+        total += len(batch)
+        kept += len(selected)
+        if selected:
+            yield selected
+
+    metrics.inc("shard_rows_total", kept)
+    logger.info(f"Shard {shard} handled {kept} of {total} {entity_type} rows.")
@@ -0,0 +1,281 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the local state store used for delta provisioning.
+
+The state store is an SQLite file which records a hash of every input row
+that was successfully provisioned. On subsequent runs, rows whose hash did
+not change are not sent to GoodData Cloud again, so a stable input file is
+reduced to the (typically tiny) set of added and changed rows.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Generic, Iterable, Iterator, TypeVar
+
+from pydantic import BaseModel
+from utils.checkpoint import CheckpointJournal
+from utils.profiling import timer
+
+logger = logging.getLogger(__name__)
+
+RowModelT = TypeVar("RowModelT", bound=BaseModel)
+
+EntityKey = tuple[str, ...]
+KeyFunction = Callable[[RowModelT], EntityKey]
+
+
+class ErrorCounter:
+    """Logger-like object counting the errors emitted by a provisioner."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def info(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def warning(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def error(self, *args: Any, **kwargs: Any) -> None:
+        # Provisioners may log from their worker threads
+        with self._lock:
+            self.count += 1
+
+
+# The logger of all provisioners is a single process-wide observer
+_error_counting_lock = threading.Lock()
+
+
+@contextmanager
+def count_errors(provisioner: Any) -> Iterator[ErrorCounter]:
+    """Counts the errors logged while the provisioner processes one batch.
+
+    The provisioners share their logger, so an error cannot be attributed to
+    the provisioner which logged it. The batches counted in the process are
+    therefore provisioned one at a time, and the errors logged meanwhile are
+    those of the batch.
+    """
+    errors = ErrorCounter()
+    with _error_counting_lock:
+        provisioner.logger.subscribe(errors)
+        try:
+            yield errors
+        finally:
+            provisioner.logger.unsubscribe(errors)
+
+
+@dataclass
+class Delta(Generic[RowModelT]):
+    """Rows of a batch which changed since the last successful run."""
+
+    rows: list[RowModelT] = field(default_factory=list)
+    unchanged: int = 0
+    hashes: dict[str, str] = field(default_factory=dict)
+
+
+class StateStore(Generic[RowModelT]):
+    """Record of input rows provisioned by previous runs of a script.
+
+    Rows are identified by an entity key (e.g., the user ID). All rows sharing
+    the same key within a batch are hashed together and are either all sent
+    or all skipped, so that rows which only make sense together (e.g., several
+    data filter rows of one workspace) are never split.
+
+    One state file can be shared by several scripts, as the records are kept
+    separately for each entity type.
+    """
+
+    def __init__(
+        self, path: Path, entity_type: str, key: KeyFunction[RowModelT]
+    ) -> None:
+        self.entity_type = entity_type
+        self.key = key
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS applied_rows (
+                entity_type TEXT NOT NULL,
+                entity_key TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                PRIMARY KEY (entity_type, entity_key)
+            );
+            CREATE TEMP TABLE seen_keys (entity_key TEXT PRIMARY KEY);
+            """
+        )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def diff(self, rows: Iterable[RowModelT]) -> Delta[RowModelT]:
+        """Returns the rows which were added or changed since the last run."""
+        groups: dict[str, list[RowModelT]] = {}
+        for row in rows:
+            groups.setdefault(json.dumps(self.key(row)), []).append(row)
+
+        self._mark_seen(groups)
+
+        delta: Delta[RowModelT] = Delta()
+        for entity_key, group in groups.items():
+            row_hash = self._hash(group)
+            stored = self.connection.execute(
+                "SELECT row_hash FROM applied_rows "
+                "WHERE entity_type = ? AND entity_key = ?",
+                (self.entity_type, entity_key),
+            ).fetchone()
+
+            if stored is not None and stored[0] == row_hash:
+                delta.unchanged += len(group)
+                continue
+
+            delta.rows.extend(group)
+            delta.hashes[entity_key] = row_hash
+
+        return delta
+
+    def mark_seen(self, rows: Iterable[RowModelT]) -> None:
+        """Keeps the rows in the state although they are not diffed, see `prune`."""
+        self._mark_seen({json.dumps(self.key(row)) for row in rows})
+
+    def _mark_seen(self, entity_keys: Iterable[str]) -> None:
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO seen_keys (entity_key) VALUES (?)",
+            ((entity_key,) for entity_key in entity_keys),
+        )
+
+    def record(self, delta: Delta[RowModelT]) -> None:
+        """Records the rows of the delta as successfully provisioned."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO applied_rows "
+                "(entity_type, entity_key, row_hash) VALUES (?, ?, ?)",
+                (
+                    (self.entity_type, entity_key, row_hash)
+                    for entity_key, row_hash in delta.hashes.items()
+                ),
+            )
+
+    def prune(self) -> int:
+        """Forgets the rows which were not part of the input of this run.
+
+        Should only be called once the whole input has been processed.
+        Returns the number of forgotten rows.
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM applied_rows WHERE entity_type = ? "
+                "AND entity_key NOT IN (SELECT entity_key FROM seen_keys)",
+                (self.entity_type,),
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def _hash(rows: list[RowModelT]) -> str:
+        digest = hashlib.sha256()
+        for row in rows:
+            digest.update(row.model_dump_json().encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+
+@contextmanager
+def open_state_store(
+    path: Path | None, entity_type: str, key: KeyFunction[RowModelT]
+) -> Iterator[StateStore[RowModelT] | None]:
+    """Opens the state store at the path. Yields None if no path is provided."""
+    if path is None:
+        yield None
+        return
+
+    state_store = StateStore(path, entity_type, key)
+    try:
+        yield state_store
+    finally:
+        state_store.close()
+
+
+def incremental_load_batches(
+    provisioner: Any,
+    batches: Iterable[list[RowModelT]],
+    state_store: StateStore[RowModelT] | None = None,
+    checkpoint: CheckpointJournal | None = None,
+    prune: bool = True,
+) -> None:
+    """Runs an incremental load of the provisioner for each batch of rows.
+
+    With a state store, only rows added or changed since the last run are
+    sent. A batch is recorded in the state store only if the provisioner did
+    not report any error while processing it, so failed rows are retried on
+    the next run. Rows which are not in the input are forgotten at the end,
+    unless `prune` is False, e.g. because the input is only one shard of the
+    rows recorded in the state store.
+
+    With a checkpoint journal, batches completed without errors are recorded
+    in the journal, and batches recorded by an interrupted run are skipped.
+    """
+    resumed = 0
+    failed = 0
+    for index, batch in enumerate(batches):
+        unit = f"batch {index}"
+        if checkpoint is not None and checkpoint.is_completed(unit):
+            if state_store is not None:
+                state_store.mark_seen(batch)
+            resumed += 1
+            continue
+
+        if state_store is None:
+            with count_errors(provisioner) as errors, timer.phase("provisioning"):
+                provisioner.incremental_load(batch)
+            succeeded = not errors.count
+        else:
+            succeeded = _load_delta(provisioner, state_store, batch)
+
+        if not succeeded:
+            failed += 1
+        elif checkpoint is not None:
+            checkpoint.record(unit)
+
+    if resumed:
+        logger.info(f"Skipped {resumed} batches completed by a previous run.")
+
+    if state_store is not None and prune:
+        pruned = state_store.prune()
+        if pruned:
+            logger.info(f"Removed {pruned} rows no longer in the input from state.")
+
+    if checkpoint is not None and not failed:
+        checkpoint.finish()
+
+
+def _load_delta(
+    provisioner: Any,
+    state_store: StateStore[RowModelT],
+    batch: list[RowModelT],
+) -> bool:
+    """Provisions the changed rows of the batch. Returns False on errors."""
+    delta = state_store.diff(batch)
+    logger.info(
+        f"Skipping {delta.unchanged} unchanged rows, "
+        + f"provisioning {len(delta.rows)} added or changed rows."
+    )
+
+    if not delta.rows:
+        return True
+
+    with count_errors(provisioner) as errors, timer.phase("provisioning"):
+        provisioner.incremental_load(delta.rows)
+
+    if not errors.count:
+        state_store.record(delta)
+        return True
+
+    logger.warning(
+        "Errors occurred while provisioning the batch. Its rows "
+        + "will be sent again on the next run."
+    )
+    return False
@@ -0,0 +1,166 @@
+# (C) 2025 GoodData Corporation
+"""This module extends the GoodData Pipelines user data filter provisioner.
+
+`ExtendedUserDataFilterProvisioner` processes the workspaces of a full load
+concurrently. Each workspace is diffed against its current user data filters,
+so only the filters which differ are overwritten and workspaces without any
+change cost a single API call.
+"""
+
+import re
+import threading
+
+from gooddata_pipelines import UserDataFilterProvisioner
+from gooddata_pipelines.provisioning.entities.user_data_filters.models.udf_models import (
+    WorkspaceUserDataFilters,
+)
+from gooddata_pipelines.provisioning.utils.exceptions import ContextException
+from gooddata_sdk.catalog.workspace.entity_model.user_data_filter import (
+    CatalogEntityIdentifier,
+    CatalogUserDataFilter,
+    CatalogUserDataFilterAttributes,
+    CatalogUserDataFilterRelationships,
+)
+from utils.scheduling import TaskStatus, run_in_dependency_order
+
+# Quoted values of a MAQL `IN` condition
+MAQL_VALUE = re.compile(r'"([^"]*)"')
+
+
+class ExtendedUserDataFilterProvisioner(UserDataFilterProvisioner):
+    """User data filter provisioner which provisions the workspaces concurrently."""
+
+    max_workers = 1
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """Sets the number of workspaces provisioned at the same time."""
+        self.max_workers = max_workers
+
+    def _skip_user_data_filter_update(
+        self, existing_udf: list[CatalogUserDataFilter], udf_value: list[str]
+    ) -> bool:
+        """Checks whether the existing filter already has the values.
+
+        Unlike the upstream check, which only compares numeric values, any
+        values are compared, as well as the filtered column.
+        """
+        if not existing_udf:
+            return False
+
+        maql = existing_udf[0].attributes.maql
+        prefix = f"{self.maql_column_name} IN ("
+        if not maql.startswith(prefix):
+            return False
+        return set(MAQL_VALUE.findall(maql[len(prefix) :])) == set(udf_value)
+
+    def _create_user_data_filters(
+        self, user_data_filter_ids_to_create: list[WorkspaceUserDataFilters]
+    ) -> None:
+        """Provisions the user data filters of every workspace.
+
+        Every workspace is provisioned, even if some of them fail. The failures
+        are logged and raised together at the end.
+        """
+        workspaces = {
+            workspace.workspace_id: workspace
+            for workspace in user_data_filter_ids_to_create
+        }
+        changed: set[str] = set()
+        lock = threading.Lock()
+
+        def provision(workspace_id: str) -> None:
+            try:
+                if self._provision_workspace(workspaces[workspace_id]):
+                    with lock:
+                        changed.add(workspace_id)
+            except Exception as e:
+                self.logger.error(
+                    "Failed to provision user data filters of workspace "
+                    + f"{workspace_id}: {e}"
+                )
+                raise
+
+        statuses = run_in_dependency_order(
+            {workspace_id: [] for workspace_id in workspaces},
+            provision,
+            self.max_workers,
+        )
+
+        self.logger.info(
+            f"Changed user data filters of {len(changed)} of {len(workspaces)} "
+            + "workspaces, the others are up to date."
+        )
+        failed = sorted(
+            workspace_id
+            for workspace_id, status in statuses.items()
+            if status == TaskStatus.FAILED
+        )
+        if failed:
+            raise ContextException(
+                f"Failed to provision user data filters of {len(failed)} "
+                + f"workspaces: {', '.join(failed)}"
+            )
+
+    def _provision_workspace(self, workspace: WorkspaceUserDataFilters) -> bool:
+        """Overwrites the user data filters of the workspace which differ.
+
+        Returns whether any of them was changed.
+        """
+        workspace_id = workspace.workspace_id
+        existing_filters = {
+            udf.id: udf
+            for udf in self._api._sdk.catalog_workspace.list_user_data_filters(
+                workspace_id
+            )
+        }
+        existing_user_ids = {
+            udf.relationships.user["data"].id
+            for udf in existing_filters.values()
+            if udf.relationships and udf.relationships.user
+        }
+
+        udf_ids_to_delete = existing_user_ids - {
+            udf.udf_id for udf in workspace.user_data_filters
+        }
+        self._delete_user_data_filters(workspace_id, udf_ids_to_delete)
+
+        changed = bool(udf_ids_to_delete)
+        for udf_group in workspace.user_data_filters:
+            existing = existing_filters.get(udf_group.udf_id)
+            values = sorted(udf_group.udf_values)
+            if self._skip_user_data_filter_update(
+                [existing] if existing else [], values
+            ):
+                continue
+
+            formatted_values = '", "'.join(values)
+            user_data_filter = CatalogUserDataFilter(
+                id=udf_group.udf_id,
+                attributes=CatalogUserDataFilterAttributes(
+                    maql=f'{self.maql_column_name} IN ("{formatted_values}")'
+                ),
+                relationships=CatalogUserDataFilterRelationships(
+                    labels={
+                        "data": [
+                            CatalogEntityIdentifier(
+                                id=self.ldm_column_name, type="label"
+                            )
+                        ]
+                    },
+                    user={
+                        "data": CatalogEntityIdentifier(
+                            id=udf_group.udf_id, type="user"
+                        )
+                    },
+                ),
+            )
+            self._api._sdk.catalog_workspace.create_or_update_user_data_filter(
+                workspace_id, user_data_filter
+            )
+            self.logger.info(
+                "Created or updated user data filters for user with id "
+                + f"{udf_group.udf_id} for client with id {workspace_id}"
+            )
+            changed = True
+
+        return changed
@@ -0,0 +1,122 @@
+# (C) 2025 GoodData Corporation
+"""This module extends the GoodData Pipelines user group provisioner.
+
+`ExtendedUserGroupProvisioner` creates and updates the user groups of a batch
+concurrently. A user group is created only once all of its parents created by
+the same batch exist, so a deep hierarchy takes as many rounds of API calls as
+it has levels, rather than one round per user group.
+"""
+
+from typing import Sequence
+
+from gooddata_pipelines import UserGroupProvisioner
+from gooddata_pipelines.provisioning.entities.users.user_groups import UserGroupModel
+from gooddata_sdk import CatalogUserGroup
+from utils.scheduling import TaskStatus, find_unresolvable, run_in_dependency_order
+
+
+class ExtendedUserGroupProvisioner(UserGroupProvisioner):
+    """User group provisioner which provisions the user groups concurrently."""
+
+    max_workers = 1
+    _created_group_ids: set[str] = set()
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """Sets the number of user groups created or updated at the same time."""
+        self.max_workers = max_workers
+
+    def _create_missing_user_groups(
+        self, groups_to_create: Sequence[UserGroupModel]
+    ) -> None:
+        """Creates the user groups, each only after its parents.
+
+        User groups whose parents neither exist nor are created by the batch,
+        or were not created, are skipped.
+        """
+        groups = {group.user_group_id: group for group in groups_to_create}
+        known = {group.id for group in self.upstream_user_groups} | set(groups)
+        dependencies = {
+            group_id: [
+                parent for parent in group.parent_user_groups if parent in groups
+            ]
+            for group_id, group in groups.items()
+        }
+
+        for group_id in sorted(find_unresolvable(dependencies)):
+            self.logger.error(
+                f"Failed to create user group {group_id}: it is on a cycle of "
+                + "parents or descends from one."
+            )
+            del dependencies[group_id]
+
+        statuses = run_in_dependency_order(
+            dependencies,
+            lambda group_id: self._provision_user_group(groups[group_id], known),
+            self.max_workers,
+        )
+        self._log_skipped(statuses)
+        self._created_group_ids = {
+            group_id
+            for group_id, status in statuses.items()
+            if status == TaskStatus.SUCCEEDED
+        }
+
+    def _update_existing_user_groups(
+        self,
+        groups_to_update: Sequence[UserGroupModel],
+        upstream_user_groups: list[CatalogUserGroup],
+    ) -> None:
+        """Updates the changed user groups. All of them exist, so they do not
+        wait for each other."""
+        existing_groups = {group.id: group for group in upstream_user_groups}
+        known = set(existing_groups) | self._created_group_ids
+        changed = {
+            group.user_group_id: group
+            for group in groups_to_update
+            if self._is_changed(group, existing_groups[group.user_group_id])
+        }
+
+        run_in_dependency_order(
+            {group_id: [] for group_id in changed},
+            lambda group_id: self._provision_user_group(changed[group_id], known),
+            self.max_workers,
+        )
+
+    def _provision_user_group(self, group: UserGroupModel, known: set[str]) -> None:
+        """Creates or updates the user group. Raises if it failed."""
+        missing = sorted(set(group.parent_user_groups) - known)
+        if missing:
+            message = (
+                f"Failed to create/update user group {group.user_group_id}: "
+                + f"parent user group {missing[0]} does not exist."
+            )
+            self.logger.error(message)
+            raise RuntimeError(message)
+
+        catalog_user_group = CatalogUserGroup.init(
+            user_group_id=group.user_group_id,
+            user_group_name=group.user_group_name,
+            user_group_parent_ids=group.parent_user_groups,
+        )
+        try:
+            self._api._sdk.catalog_user.create_or_update_user_group(
+                user_group=catalog_user_group
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Failed to create/update user group. Error: {e} "
+                + f"Context: {catalog_user_group.__dict__}"
+            )
+            raise
+        self.logger.info(
+            f"Created/Updated user group: {group.user_group_id} "
+            + f"- {group.user_group_name}"
+        )
+
+    def _log_skipped(self, statuses: dict[str, TaskStatus]) -> None:
+        for group_id, status in sorted(statuses.items()):
+            if status == TaskStatus.SKIPPED:
+                self.logger.error(
+                    f"Skipped user group {group_id}, as one of its parents "
+                    + "failed to be created."
+                )
@@ -2,10 +2,25 @@
 """This module contains general utility functions."""
 
 import csv
+import itertools
 import logging
 import os
 from pathlib import Path
-from typing import Any, Generic, Protocol, Type, TypeVar, overload
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    Protocol,
+    Type,
+    TypeVar,
+    overload,
+)
+
+from gooddata_sdk.utils import profile_content
+from utils.profiling import timer
+from utils.sessions import DEFAULT_POOL_SIZE, connection_pools
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +28,67 @@ TOKEN_ENV_VAR_NAME = "GDC_AUTH_TOKEN"
 HOSTNAME_ENV_VAR_NAME = "GDC_HOSTNAME"
 
 
+T = TypeVar("T")
+ModelT = TypeVar("ModelT")
+
+
+def iter_csv_file(
+    file_path: Path,
+    delimiter: str = ",",
+    quotechar: str = '"',
+    skipinitialspace: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """Lazily read a CSV file row by row.
+
+    The file is kept open only while the returned iterator is being consumed,
+    so at most one row is held in memory at a time.
+
+    Args:
+        file_path (Path): The path to the CSV file.
+        delimiter (str): The delimiter used in the CSV file.
+        quotechar (str): The quote character used in the CSV file.
+        skipinitialspace (bool): Whether to ignore whitespace following
+            the delimiter.
+    Yields:
+        dict[str, Any]: A dictionary representing a row in the CSV file, with
+        keys as column headers and values as row values.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        reader = csv.DictReader(
+            file,
+            delimiter=delimiter,
+            quotechar=quotechar,
+            skipinitialspace=skipinitialspace,
+        )
+        yield from timer.iterate("csv_read", reader)
+
+
+def iter_csv_rows(
+    file_path: Path,
+    delimiter: str = ",",
+    quotechar: str = '"',
+    skipinitialspace: bool = False,
+) -> Iterator[list[str]]:
+    """Lazily read a CSV file row by row as lists of values.
+
+    The first row yielded is the header. Like `csv.DictReader`, empty lines
+    after the header are skipped.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        reader = csv.reader(
+            file,
+            delimiter=delimiter,
+            quotechar=quotechar,
+            skipinitialspace=skipinitialspace,
+        )
+        header = next(reader, None)
+        if header is None:
+            return
+
+        yield header
+        yield from timer.iterate("csv_read", (row for row in reader if row))
+
+
 def read_csv_file_to_dict(
     file_path: Path, delimiter: str = ",", quotechar: str = '"'
 ) -> list[dict[str, Any]]:
@@ -26,8 +102,45 @@ def read_csv_file_to_dict(
         list[dict[str, Any]]: A list of dictionaries where each dictionary represents
         a row in the CSV file, with keys as column headers and values as row values.
     """
-    with open(file_path, "r", encoding="utf-8") as file:
-        return list(csv.DictReader(file, delimiter=delimiter, quotechar=quotechar))
+    return list(iter_csv_file(file_path, delimiter, quotechar))
+
+
+def batched(items: Iterable[T], batch_size: int) -> Iterator[list[T]]:
+    """Split an iterable into lists of at most `batch_size` items."""
+    if batch_size < 1:
+        raise ValueError("Batch size must be a positive integer.")
+
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+
+def iter_validated_batches(
+    raw_rows: Iterable[T],
+    validate: Callable[[Iterable[T]], list[ModelT]],
+    batch_size: int | None = None,
+) -> Iterator[list[ModelT]]:
+    """Validate raw CSV rows and yield the validated models in batches.
+
+    If `batch_size` is None, all rows are validated into a single batch, which
+    matches the behavior of loading the whole file at once. Otherwise only
+    `batch_size` raw rows (and their validated models) are held in memory at
+    any point, so a batch can be provisioned while the rest of the file is
+    still unread.
+
+    Args:
+        raw_rows (Iterable): Raw rows, e.g. from `iter_csv_file`.
+        validate (Callable): Function converting raw rows to validated models.
+        batch_size (int | None): Maximum number of raw rows per batch.
+    Yields:
+        list[ModelT]: Validated models of a single batch.
+    """
+    if batch_size is None:
+        yield validate(raw_rows)
+        return
+
+    for raw_batch in batched(raw_rows, batch_size):
+        yield validate(raw_batch)
 
 
 class SimpleClient(Protocol):
@@ -67,8 +180,13 @@ ConfiguredT = TypeVar("ConfiguredT", bound="ConfiguredClient[Any]")
 
 @overload
 def create_client(
-    client_type: Type[SimpleT], profile_config: Path, profile: str
-) -> SimpleT: ...
+    client_type: Type[SimpleT],
+    profile_config: Path,
+    profile: str,
+    *,
+    pool_size: int = DEFAULT_POOL_SIZE,
+) -> SimpleT:
+    ...
 
 
 @overload
@@ -77,19 +195,28 @@ def create_client(
     profile_config: Path,
     profile: str,
     config: ConfigType,
-) -> ConfiguredT: ...
+    *,
+    pool_size: int = DEFAULT_POOL_SIZE,
+) -> ConfiguredT:
+    ...
 
 
+@timer.phase("client_creation")
 def create_client(
     client_type: Type[Any],
     profile_config: Path,
     profile: str,
     config: Any | None = None,
+    *,
+    pool_size: int = DEFAULT_POOL_SIZE,
 ) -> Any:
     """Creates a GoodData Pipelines client.
 
     Depending on whether "config" is provided, the function will call the
     appropriate classmethod on the provided client type.
+
+    Clients of the same host and token share their HTTP connections, see
+    `utils.sessions`. The pool size applies to the first client of a host.
     """
     gdc_auth_token = os.environ.get(TOKEN_ENV_VAR_NAME)
     gdc_hostname = os.environ.get(HOSTNAME_ENV_VAR_NAME)
@@ -101,23 +228,21 @@ def create_client(
                 f"{TOKEN_ENV_VAR_NAME} cannot be empty strings."
             )
         logger.info(f"Using {HOSTNAME_ENV_VAR_NAME} and {TOKEN_ENV_VAR_NAME} envvars.")
-        if config is None:
-            return client_type.create(host=gdc_hostname, token=gdc_auth_token)
-        return client_type.create(
-            config=config, host=gdc_hostname, token=gdc_auth_token
-        )
-
-    if os.path.exists(profile_config):
+        host, token = gdc_hostname, gdc_auth_token
+    elif os.path.exists(profile_config):
         logger.info(f"Using GoodData profile {profile} sourced from {profile_config}.")
-        if config is None:
-            return client_type.create_from_profile(
-                profile=profile, profiles_path=profile_config
-            )
-        return client_type.create_from_profile(
-            config=config, profile=profile, profiles_path=profile_config
+        content = profile_content(profile, profile_config)
+        host, token = content["host"], content["token"]
+    else:
+        raise RuntimeError(
+            "No GoodData credentials provided. Please export required ENVVARS "
+            f"({HOSTNAME_ENV_VAR_NAME}, {TOKEN_ENV_VAR_NAME}) or provide path to GD profile config."
         )
 
-    raise RuntimeError(
-        "No GoodData credentials provided. Please export required ENVVARS "
-        f"({HOSTNAME_ENV_VAR_NAME}, {TOKEN_ENV_VAR_NAME}) or provide path to GD profile config."
-    )
+    if config is None:
+        client = client_type.create(host=host, token=token)
+    else:
+        client = client_type.create(config=config, host=host, token=token)
+
+    connection_pools.share(client, host, token, pool_size)
+    return client
@@ -0,0 +1,252 @@
+# (C) 2025 GoodData Corporation
+"""This module contains the shared validation pipeline for CSV input rows.
+
+The scripts define how a single raw CSV row is converted into a validated
+model. This module takes care of running that conversion over all input rows,
+optionally sharded across a pool of worker processes, while preserving the
+input order and logging per-row errors centrally in the main process. The pool
+is started once per run and reused by all batches of the input.
+
+Errors are grouped by their class (e.g., rows missing the same column). Only
+the first few errors of each class are formatted and logged, the others are
+counted and summarized at the end of the run, so that a broken input file
+does not spend most of the run time on logging.
+"""
+
+import atexit
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Generic, Iterable, Iterator, TypeVar
+
+from pydantic import ValidationError
+from utils.logger import MAX_SHOWN_ERRORS, error_aggregator
+from utils.metrics import metrics
+from utils.profiling import timer
+from utils.utils import batched
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT")
+ChunkT = TypeVar("ChunkT")
+
+RawRow = dict[str, Any]
+RowValidator = Callable[[RawRow], ModelT]
+ErrorFormatter = Callable[[RawRow, Exception], str]
+ErrorClassifier = Callable[[Exception], str]
+
+DEFAULT_CHUNK_SIZE = 2_000
+
+
+_worker_pools: dict[int, ProcessPoolExecutor] = {}
+_worker_pools_lock = threading.Lock()
+
+
+def get_worker_pool(workers: int) -> ProcessPoolExecutor:
+    """Returns the process-wide pool of worker processes of the given size.
+
+    The pool is started on first use and shared by all batches, as starting
+    the worker processes can take longer than validating a batch.
+    """
+    with _worker_pools_lock:
+        if workers not in _worker_pools:
+            _worker_pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return _worker_pools[workers]
+
+
+@atexit.register
+def shutdown_worker_pools() -> None:
+    """Stops the worker processes of all pools."""
+    with _worker_pools_lock:
+        pools = list(_worker_pools.values())
+        _worker_pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+
+
+class RowValidationError(Exception):
+    """Raised when an invalid row is found and invalid rows are not tolerated."""
+
+
+@dataclass
+class ChunkResult(Generic[ModelT]):
+    """Validated models and formatted errors of a single chunk of rows."""
+
+    models: list[ModelT] = field(default_factory=list)
+    # Error class and formatted message of the logged errors
+    errors: list[tuple[str, str]] = field(default_factory=list)
+    # Number of errors per class which were not formatted
+    suppressed: dict[str, int] = field(default_factory=dict)
+
+
+def format_row_error(row: RawRow, error: Exception) -> str:
+    """Default error message for a row which failed validation."""
+    return f'Unable to load following row: "{row}". Error: "{error}"'
+
+
+def classify_row_error(error: Exception) -> str:
+    """Default error class of a row which failed validation.
+
+    Rows failing for the same reason (e.g., the same missing column or the
+    same invalid fields) share the class, regardless of their values.
+    """
+    if isinstance(error, KeyError):
+        return f"rows missing key {error}"
+    if isinstance(error, ValidationError):
+        fields = sorted(
+            {
+                ".".join(str(part) for part in e["loc"]) or e["type"]
+                for e in error.errors()
+            }
+        )
+        return f"rows with invalid {', '.join(fields)}"
+    return f"rows failing with {type(error).__name__}"
+
+
+def _validate_chunk(
+    chunk: list[RawRow],
+    validate_row: RowValidator[ModelT],
+    format_error: ErrorFormatter,
+    raise_on_error: bool,
+    classify_error: ErrorClassifier = classify_row_error,
+    max_shown: int = MAX_SHOWN_ERRORS,
+) -> ChunkResult[ModelT]:
+    """Validates a chunk of rows. Runs either in-process or in a worker process.
+
+    Errors are formatted where they occur, so that only plain strings (and not
+    exception objects, which are not always picklable) are sent back from
+    worker processes. Only the first `max_shown` errors of each class are
+    formatted, the rest is only counted.
+    """
+    result: ChunkResult[ModelT] = ChunkResult()
+    shown: dict[str, int] = {}
+
+    for row in chunk:
+        try:
+            result.models.append(validate_row(row))
+        except Exception as e:
+            if raise_on_error:
+                raise RowValidationError(format_error(row, e)) from e
+            _record_error(
+                result, shown, row, e, format_error, classify_error, max_shown
+            )
+
+    return result
+
+
+def _record_error(
+    result: ChunkResult[ModelT],
+    shown: dict[str, int],
+    row: RawRow,
+    error: Exception,
+    format_error: ErrorFormatter,
+    classify_error: ErrorClassifier,
+    max_shown: int,
+) -> None:
+    """Adds the error of an invalid row to the result of its chunk."""
+    error_class = classify_error(error)
+    if shown.get(error_class, 0) < max_shown:
+        shown[error_class] = shown.get(error_class, 0) + 1
+        result.errors.append((error_class, format_error(row, error)))
+    else:
+        result.suppressed[error_class] = result.suppressed.get(error_class, 0) + 1
+
+
+def _map_in_order(
+    executor: ProcessPoolExecutor,
+    function: Callable[[ChunkT], ChunkResult[ModelT]],
+    chunks: Iterable[ChunkT],
+    max_pending: int,
+) -> Iterator[ChunkResult[ModelT]]:
+    """Maps the function over chunks in the executor, yielding results in order.
+
+    Unlike `Executor.map`, the chunks are submitted lazily, with at most
+    `max_pending` chunks in flight, so the input is never read ahead as a whole.
+    """
+    pending: deque[Future[ChunkResult[ModelT]]] = deque()
+
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(function, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # The executor outlives the call, see `get_worker_pool`
+        for future in pending:
+            future.cancel()
+
+
+@timer.phase("validation")
+def validate_rows(
+    raw_rows: Iterable[RawRow],
+    validate_row: RowValidator[ModelT],
+    *,
+    format_error: ErrorFormatter = format_row_error,
+    classify_error: ErrorClassifier = classify_row_error,
+    raise_on_error: bool = False,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[ModelT]:
+    """Converts raw CSV rows into validated models.
+
+    Args:
+        raw_rows (Iterable[RawRow]): Raw rows to validate.
+        validate_row (RowValidator): Function converting a single raw row into
+            a model. It should raise an exception for an invalid row. When using
+            multiple workers, it must be picklable (i.e., a module level function,
+            optionally wrapped in `functools.partial`).
+        format_error (ErrorFormatter): Function creating the error message for
+            an invalid row.
+        classify_error (ErrorClassifier): Function grouping the errors of
+            invalid rows. Only the first errors of each class are logged in
+            full, the rest is summarized at the end of the run.
+        raise_on_error (bool): If True, the first invalid row raises
+            `RowValidationError`. Otherwise invalid rows are logged and skipped.
+        workers (int): Number of worker processes. With 1 worker, the rows are
+            validated in the current process. Otherwise, the pool returned by
+            `get_worker_pool` is used.
+        chunk_size (int): Number of rows sent to a worker process at once.
+
+    Returns:
+        list[ModelT]: Validated models in the same order as the input rows.
+    """
+    validate_chunk = partial(
+        _validate_chunk,
+        validate_row=validate_row,
+        format_error=format_error,
+        raise_on_error=raise_on_error,
+        classify_error=classify_error,
+    )
+    chunks = batched(raw_rows, chunk_size)
+
+    validated: list[ModelT] = []
+
+    if workers <= 1:
+        for chunk in chunks:
+            _collect(validate_chunk(chunk), validated)
+        return validated
+
+    executor = get_worker_pool(workers)
+    for result in _map_in_order(executor, validate_chunk, chunks, workers * 2):
+        _collect(result, validated)
+
+    return validated
+
+
+def _collect(result: ChunkResult[ModelT], validated: list[ModelT]) -> None:
+    """Logs the errors of a chunk and appends its models to the output."""
+    for error_class, message in result.errors:
+        logger.error(message, extra={"error_class": error_class})
+    for error_class, count in result.suppressed.items():
+        error_aggregator.count(error_class, count)
+    validated.extend(result.models)
+
+    rejected = len(result.errors) + sum(result.suppressed.values())
+    metrics.inc("rows_read_total", len(result.models) + rejected)
+    metrics.inc("rows_rejected_total", rejected)
@@ -0,0 +1,118 @@
+# (C) 2025 GoodData Corporation
+"""This module extends the GoodData Pipelines workspace provisioner.
+
+`ExtendedWorkspaceProvisioner` creates and updates the workspaces of a batch
+concurrently: parent workspaces first, then their children, each together
+with its workspace data filter settings. The children of a parent fan out
+over the workers as soon as the parent exists.
+"""
+
+from typing import Literal
+
+from gooddata_pipelines import (
+    WorkspaceFullLoad,
+    WorkspaceIncrementalLoad,
+    WorkspaceProvisioner,
+)
+from gooddata_pipelines.provisioning.utils.context_objects import WorkspaceContext
+from gooddata_sdk import CatalogWorkspace
+from utils.scheduling import TaskStatus, find_unresolvable, run_in_dependency_order
+
+WorkspaceModel = WorkspaceFullLoad | WorkspaceIncrementalLoad
+
+
+class ExtendedWorkspaceProvisioner(WorkspaceProvisioner):
+    """Workspace provisioner which provisions the workspaces concurrently."""
+
+    max_workers = 1
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """Sets the number of workspaces created or updated at the same time."""
+        self.max_workers = max_workers
+
+    def _create_or_update_panther_workspaces(
+        self,
+        workspace_ids_to_create: set[str],
+        workspace_ids_to_update: set[str],
+        child_to_parent_map: dict[str, str],
+        workspace_id_to_wdf_map: dict[str, dict[str, list[str]]],
+        source_group: list[WorkspaceFullLoad] | list[WorkspaceIncrementalLoad],
+    ) -> None:
+        """Creates or updates the workspaces, each only after its parent.
+
+        The rows of a workspace are applied in their input order by a single
+        worker. Children of workspaces which failed are skipped.
+        """
+        provisioned_ids = workspace_ids_to_create | workspace_ids_to_update
+        rows: dict[str, list[WorkspaceModel]] = {}
+        for source_workspace in source_group:
+            workspace_id = source_workspace.workspace_id
+            if workspace_id in provisioned_ids:
+                rows.setdefault(workspace_id, []).append(source_workspace)
+
+        # Parents which are not provisioned by the batch already exist
+        dependencies = {
+            workspace_id: [child_to_parent_map[workspace_id]] for workspace_id in rows
+        }
+        for workspace_id in sorted(find_unresolvable(dependencies)):
+            self.logger.error(
+                f"Failed to provision workspace {workspace_id}: it is on a cycle "
+                + "of parents or descends from one."
+            )
+            del dependencies[workspace_id]
+
+        def provision(workspace_id: str) -> None:
+            action: Literal["CREATE", "UPDATE"] = (
+                "UPDATE" if workspace_id in workspace_ids_to_update else "CREATE"
+            )
+            for source_workspace in rows[workspace_id]:
+                self._provision_workspace(
+                    source_workspace,
+                    action,
+                    child_to_parent_map[workspace_id],
+                    bool(workspace_id_to_wdf_map.get(workspace_id)),
+                )
+
+        statuses = run_in_dependency_order(dependencies, provision, self.max_workers)
+
+        for workspace_id, status in sorted(statuses.items()):
+            if status == TaskStatus.SKIPPED:
+                self.logger.error(
+                    f"Skipped workspace {workspace_id}, as its parent workspace "
+                    + "failed to be provisioned."
+                )
+
+    def _provision_workspace(
+        self,
+        source_workspace: WorkspaceModel,
+        action: Literal["CREATE", "UPDATE"],
+        parent_workspace_id: str,
+        has_wdfs: bool,
+    ) -> None:
+        """Creates or updates the workspace and its workspace data filter
+        settings. Raises if it failed."""
+        context = WorkspaceContext(
+            workspace_id=source_workspace.workspace_id,
+            workspace_name=source_workspace.workspace_name,
+            wdf_id=source_workspace.workspace_data_filter_id,
+            wdf_values=source_workspace.workspace_data_filter_values,
+        )
+
+        try:
+            self._api._sdk.catalog_workspace.create_or_update(
+                CatalogWorkspace(
+                    workspace_id=source_workspace.workspace_id,
+                    name=source_workspace.workspace_name,
+                    parent_id=parent_workspace_id,
+                )
+            )
+            self.logger.info(f"{action.title()}d workspace: {context.workspace_id}")
+
+            if has_wdfs:
+                self.wdf_manager.check_wdf_settings(context)
+        except Exception as e:
+            self.logger.error(
+                f"Failed to {action.title()} workspace: {context.workspace_id}. "
+                + f"Error: {e.__class__.__name__}: {e} Context: {context.__dict__}"
+            )
+            raise
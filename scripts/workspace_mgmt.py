@@ -1,76 +1,242 @@
 # (C) 2025 GoodData Corporation
 
-from typing import Any
+from functools import partial
+from operator import attrgetter
+from typing import Any, Iterable, Iterator
 
 from gooddata_pipelines import WorkspaceIncrementalLoad, WorkspaceProvisioner
 from utils.args.parser import Parser
+from utils.args.schemas import WorkspaceArgs
+from utils.checkpoint import input_fingerprint, open_checkpoint
+from utils.columnar import Columns, ConvertedColumns, iter_columnar_batches
+from utils.hierarchy import order_by_hierarchy
 from utils.logger import get_logger, setup_logging
+from utils.plan import Plan, run_plan
+from utils.state import incremental_load_batches, open_state_store
 from utils.utils import (
     create_client,
-    read_csv_file_to_dict,
+    iter_csv_file,
+    iter_validated_batches,
 )
+from utils.validation import validate_rows
+from utils.workspace_provisioner import ExtendedWorkspaceProvisioner
 
 # Setup logging
 setup_logging()
 logger = get_logger(__name__)
 
 
+def _validate_workspace_row(
+    raw_workspace: dict[str, Any], wdf_delimiter: str
+) -> WorkspaceIncrementalLoad:
+    """Converts a single raw CSV row to a workspace model."""
+    if raw_workspace["workspace_data_filter_values"]:
+        workspace_data_filter_values = raw_workspace[
+            "workspace_data_filter_values"
+        ].split(wdf_delimiter)
+    else:
+        workspace_data_filter_values = None
+
+    return WorkspaceIncrementalLoad(
+        parent_id=raw_workspace["parent_id"],
+        workspace_id=raw_workspace["workspace_id"],
+        workspace_name=raw_workspace["workspace_name"],
+        workspace_data_filter_id=raw_workspace["workspace_data_filter_id"],
+        workspace_data_filter_values=workspace_data_filter_values,
+        is_active=raw_workspace["is_active"],
+    )
+
+
+def _convert_workspace_columns(
+    columns: Columns, wdf_delimiter: str
+) -> ConvertedColumns:
+    """Converts a chunk of raw CSV columns to workspace model fields."""
+    return ConvertedColumns(
+        {
+            "parent_id": columns["parent_id"],
+            "workspace_id": columns["workspace_id"],
+            "workspace_name": columns["workspace_name"],
+            "workspace_data_filter_id": columns["workspace_data_filter_id"],
+            "workspace_data_filter_values": [
+                value.split(wdf_delimiter) if value else None
+                for value in columns["workspace_data_filter_values"]
+            ],
+            "is_active": columns["is_active"],
+        }
+    )
+
+
+def _workspace_key(workspace: WorkspaceIncrementalLoad) -> tuple[str, ...]:
+    """Identifies the workspace a row belongs to in the state store."""
+    return (workspace.workspace_id,)
+
+
 def validate_workspace_data(
-    raw_workspaces: list[dict[str, Any]],
+    raw_workspaces: Iterable[dict[str, Any]],
     wdf_delimiter: str,
+    workers: int = 1,
 ) -> list[WorkspaceIncrementalLoad]:
     """Validate workspace against input model."""
+    return validate_rows(
+        raw_workspaces,
+        partial(_validate_workspace_row, wdf_delimiter=wdf_delimiter),
+        workers=workers,
+    )
 
-    validated_workspaces: list[WorkspaceIncrementalLoad] = []
 
-    for raw_workspace in raw_workspaces:
-        try:
-            if raw_workspace["workspace_data_filter_values"]:
-                workspace_data_filter_values = raw_workspace[
-                    "workspace_data_filter_values"
-                ].split(wdf_delimiter)
+def plan_workspaces(
+    provisioner: WorkspaceProvisioner,
+    batches: Iterable[list[WorkspaceIncrementalLoad]],
+    plan: Plan,
+) -> None:
+    """Counts the operations of an incremental load of the workspaces.
+
+    Creating, updating and deleting a workspace takes two API calls, as the
+    GoodData SDK checks whether it exists first. Workspace data filter
+    settings are only counted as checks, as comparing them needs a request
+    per workspace.
+    """
+    upstream_workspaces = {
+        workspace.id: (workspace.name, workspace.parent_id)
+        for workspace in provisioner._api._sdk.catalog_workspace.list_workspaces()
+    }
+
+    for batch in batches:
+        # The provisioner lists the workspaces for each batch
+        plan.api_calls += 1
+
+        for workspace in batch:
+            upstream = upstream_workspaces.get(workspace.workspace_id)
+            source = (workspace.workspace_name, workspace.parent_id)
+
+            if not workspace.is_active:
+                # The GoodData SDK lists the workspaces before deleting one
+                if upstream is None:
+                    plan.count("skip delete of missing workspace", api_calls=1)
+                else:
+                    plan.count("delete workspace", api_calls=2)
+                    del upstream_workspaces[workspace.workspace_id]
+                continue
+
+            # Active workspaces are always created or updated
+            if upstream is None:
+                plan.count("create workspace", api_calls=2)
+            elif upstream[1] != workspace.parent_id:
+                # The GoodData SDK refuses to move a workspace
+                plan.count("skip change of workspace parent", api_calls=1)
+            elif upstream != source:
+                plan.count("update workspace", api_calls=2)
             else:
-                workspace_data_filter_values = None
-            validated_workspace = WorkspaceIncrementalLoad(
-                parent_id=raw_workspace["parent_id"],
-                workspace_id=raw_workspace["workspace_id"],
-                workspace_name=raw_workspace["workspace_name"],
-                workspace_data_filter_id=raw_workspace["workspace_data_filter_id"],
-                workspace_data_filter_values=workspace_data_filter_values,
-                is_active=raw_workspace["is_active"],
-            )
-
-            validated_workspaces.append(validated_workspace)
-        except Exception as e:
-            logger.error(
-                f'Unable to load following row: "{raw_workspace}". Error: "{e}"'
-            )
-            continue
-
-    return validated_workspaces
+                plan.count("unchanged workspace", api_calls=2)
+
+            if upstream is None or upstream[1] == workspace.parent_id:
+                upstream_workspaces[workspace.workspace_id] = source
+
+            if workspace.workspace_data_filter_id:
+                plan.count("check workspace data filter settings", api_calls=1)
+
+
+def read_workspaces_from_csv(
+    args: WorkspaceArgs,
+) -> Iterator[list[WorkspaceIncrementalLoad]]:
+    """Reads the workspaces from the input csv file in batches.
+
+    Parent workspaces come before their children, and the rows of a workspace
+    (one per workspace data filter) are never split across batches, as the
+    provisioner replaces all filter settings of a workspace with the rows of
+    the batch. See `utils.hierarchy`.
+    """
+    # Stream the CSV input, so that only the validated rows are kept in memory
+    # to be ordered by the hierarchy
+    if args.validation_engine == "columnar":
+        validated_batches = iter_columnar_batches(
+            args.filepath,
+            args.delimiter,
+            args.quotechar,
+            WorkspaceIncrementalLoad,
+            partial(_convert_workspace_columns, wdf_delimiter=args.inner_delimiter),
+            partial(_validate_workspace_row, wdf_delimiter=args.inner_delimiter),
+            batch_size=args.batch_size,
+            workers=args.validation_workers,
+        )
+    else:
+        raw_workspaces = iter_csv_file(args.filepath, args.delimiter, args.quotechar)
+
+        validated_batches = iter_validated_batches(
+            raw_workspaces,
+            partial(
+                validate_workspace_data,
+                wdf_delimiter=args.inner_delimiter,
+                workers=args.validation_workers,
+            ),
+            args.batch_size,
+        )
+
+    # Parent workspaces are provisioned before their children, whatever the
+    # order of the input rows, and the rows of a workspace are kept together.
+    # Shards keep whole hierarchies for the same reason.
+    return order_by_hierarchy(
+        validated_batches,
+        "workspace",
+        attrgetter("workspace_id"),
+        lambda workspace: [workspace.parent_id],
+        args.batch_size,
+        args.shard,
+    )
 
 
-def workspace_mgmt():
+def workspace_mgmt(args: WorkspaceArgs | None = None):
     """Main function for workspace management."""
 
     # Create parser and parse arguments
-    args = Parser.parse_workspace_args()
-
-    # Read CSV input
-    raw_workspaces = read_csv_file_to_dict(
-        args.filepath, args.delimiter, args.quotechar
-    )
-
-    # Validate workspace data
-    validated_workspaces = validate_workspace_data(raw_workspaces, args.inner_delimiter)
+    if args is None:
+        args = Parser.parse_workspace_args()
 
     # Create provisioner and subscribe to logger
-    provisioner = create_client(WorkspaceProvisioner, args.profile_config, args.profile)
+    provisioner = create_client(
+        ExtendedWorkspaceProvisioner,
+        args.profile_config,
+        args.profile,
+        pool_size=args.http_pool_size,
+    )
+    provisioner.set_max_workers(args.provisioning_workers)
 
     provisioner.logger.subscribe(logger)
 
-    # Incremental load workspaces
-    provisioner.incremental_load(validated_workspaces)
+    validated_batches = read_workspaces_from_csv(args)
+
+    # Incremental load workspaces (or plan it), skipping rows unchanged since
+    # the last run if a state file is provided
+    with open_state_store(args.state_file, "workspace", _workspace_key) as state:
+        if args.plan:
+            run_plan(
+                provisioner,
+                plan_workspaces,
+                "workspace",
+                validated_batches,
+                state,
+                args.api_calls_per_second,
+            )
+        else:
+            fingerprint = input_fingerprint(
+                args.delimiter,
+                args.quotechar,
+                args.inner_delimiter,
+                args.batch_size,
+                args.shard,
+                files=(args.filepath,),
+            )
+            with open_checkpoint(
+                args.checkpoint_file, "workspace", fingerprint, args.resume
+            ) as checkpoint:
+                # Other shards may share the state file, keep their rows
+                incremental_load_batches(
+                    provisioner,
+                    validated_batches,
+                    state,
+                    checkpoint,
+                    prune=args.shard is None,
+                )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import io
+import zipfile
+from pathlib import Path
+
+import boto3
+import pytest
+from gooddata_pipelines import BackupRestoreConfig, StorageType
+from gooddata_pipelines.backup_and_restore.storage.s3_storage import S3Storage
+from moto import mock_aws
+from utils.archive_upload import (  # type: ignore
+    MIB,
+    S3MultipartWriter,
+    write_layouts_zip,
+)
+from utils.backup_manager import ExtendedBackupManager  # type: ignore
+from utils.backup_restore_config import ExtendedS3StorageConfig  # type: ignore
+
+BUCKET = "bucket"
+
+
+@pytest.fixture
+def s3_client():
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def _read(client, key: str) -> bytes:
+    return client.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+def test_small_content_is_uploaded_at_once(s3_client):
+    with S3MultipartWriter(s3_client, BUCKET, "small") as writer:
+        writer.write(b"content")
+
+    assert _read(s3_client, "small") == b"content"
+
+
+def test_large_content_is_uploaded_in_parts(s3_client):
+    content = os.urandom(12 * MIB)
+
+    with S3MultipartWriter(
+        s3_client, BUCKET, "large", part_size=5 * MIB, max_concurrency=2
+    ) as writer:
+        for offset in range(0, len(content), MIB):
+            writer.write(content[offset : offset + MIB])
+
+    assert _read(s3_client, "large") == content
+    assert s3_client.head_object(Bucket=BUCKET, Key="large")["ETag"].endswith('-3"')
+
+
+def test_failed_upload_is_aborted(s3_client):
+    with pytest.raises(RuntimeError):
+        with S3MultipartWriter(s3_client, BUCKET, "failed", part_size=5 * MIB) as w:
+            w.write(os.urandom(6 * MIB))
+            raise RuntimeError("Compression failed")
+
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=BUCKET)
+    assert "Uploads" not in s3_client.list_multipart_uploads(Bucket=BUCKET)
+
+
+def test_part_size_must_be_accepted_by_s3(s3_client):
+    with pytest.raises(ValueError, match="Part size"):
+        S3MultipartWriter(s3_client, BUCKET, "key", part_size=MIB)
+
+
+def _export_workspace(root: Path, workspace_id: str) -> Path:
+    layout_dir = (
+        Path(root, workspace_id, "timestamp", "gooddata_layouts", "org", "workspaces")
+        / workspace_id
+    )
+    Path(layout_dir, "ldm", "datasets").mkdir(parents=True)
+    Path(layout_dir, "ldm", "datasets", "dataset.yaml").write_text("id: dataset")
+    Path(layout_dir, "analytics_model").mkdir()
+    Path(layout_dir, "user_data_filters").mkdir()
+    return layout_dir
+
+
+def test_zip_has_restorable_structure(tmp_path):
+    layout_dir = _export_workspace(tmp_path, "ws_1")
+    output = io.BytesIO()
+
+    write_layouts_zip(layout_dir, output, compression_level=9)
+
+    with zipfile.ZipFile(output) as archive:
+        archive.extractall(tmp_path / "extracted")
+        assert archive.read("gooddata_layouts/ldm/datasets/dataset.yaml") == (
+            b"id: dataset"
+        )
+    extracted = Path(tmp_path, "extracted", "gooddata_layouts")
+    assert sorted(path.name for path in extracted.iterdir()) == [
+        "analytics_model",
+        "ldm",
+        "user_data_filters",
+    ]
+
+
+def test_backup_archives_are_streamed_to_s3(s3_client, tmp_path):
+    storage_config = ExtendedS3StorageConfig(
+        bucket=BUCKET,
+        backup_path="backups",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        streaming_upload=True,
+    )
+    config = BackupRestoreConfig(storage_type=StorageType.S3, storage=storage_config)
+    manager = object.__new__(ExtendedBackupManager)
+    manager.org_id = "org"
+    manager.config = config
+    manager.storage = S3Storage(config)
+    org_folder = Path(tmp_path, "org")
+    _export_workspace(org_folder, "ws_1")
+
+    manager._archive_gooddata_layouts_to_zip(str(org_folder))
+
+    content = _read(s3_client, "backups/org/ws_1/timestamp/gooddata_layouts.zip")
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        assert "gooddata_layouts/user_data_filters/" in archive.namelist()
+    assert list(Path(org_folder, "ws_1").iterdir()) == []
@@ -0,0 +1,121 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import threading
+from pathlib import Path
+
+import pytest
+from gooddata_pipelines.backup_and_restore.backup_manager import BackupBatch
+from gooddata_pipelines.logger.logger import LogObserver
+from utils.backup_manager import ExtendedBackupManager  # type: ignore
+from utils.checkpoint import CheckpointJournal  # type: ignore
+from utils.sharding import Shard  # type: ignore
+
+
+class RecordingBackupManager(ExtendedBackupManager):
+    """Backup manager which records the processed batches instead of exporting."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        failing_id: str | None = None,
+        skipped_id: str | None = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.logger = LogObserver()
+        self.failing_id = failing_id
+        self.skipped_id = skipped_id
+        self._batch_state = threading.local()
+        self.processed: list[list[str]] = []
+        self.threads: set[int] = set()
+        self._barrier = threading.Barrier(max_workers, timeout=5)
+
+    def _process_batch(self, batch: BackupBatch, retry_count: int = 0) -> None:
+        self.threads.add(threading.get_ident())
+        if self.failing_id in batch.list_of_ids:
+            raise RuntimeError("Batch failed")
+        # Wait for all workers, proving that the batches run concurrently
+        self._barrier.wait()
+        self.processed.append(batch.list_of_ids)
+        # The export logs and skips the workspaces it fails to export
+        self._exported_ids = [
+            workspace_id
+            for workspace_id in batch.list_of_ids
+            if workspace_id != self.skipped_id
+        ]
+
+
+def test_batches_are_processed_concurrently():
+    manager = RecordingBackupManager(max_workers=2)
+
+    manager._process_batches([BackupBatch(["ws_1", "ws_2"]), BackupBatch(["ws_3"])])
+
+    assert sorted(manager.processed) == [["ws_1", "ws_2"], ["ws_3"]]
+    assert len(manager.threads) == 2
+
+
+def test_workspaces_are_split_among_workers():
+    manager = RecordingBackupManager(max_workers=2)
+
+    manager._process_batches([BackupBatch(["ws_1", "ws_2", "ws_3"])])
+
+    assert sorted(manager.processed) == [["ws_1", "ws_2"], ["ws_3"]]
+
+
+def test_failed_batch_is_raised():
+    manager = RecordingBackupManager(max_workers=1, failing_id="ws_1")
+    manager.max_workers = 2
+
+    with pytest.raises(RuntimeError, match="Batch failed"):
+        manager._process_batches([BackupBatch(["ws_1"]), BackupBatch(["ws_2"])])
+
+
+def test_backed_up_workspaces_are_skipped_on_resume(tmp_path):
+    path = Path(tmp_path, "checkpoint.db")
+    manager = RecordingBackupManager(max_workers=1, failing_id="ws_3")
+    manager.enable_checkpoint(CheckpointJournal(path, "backup", "input", False))
+    batches = [BackupBatch(["ws_1", "ws_2"]), BackupBatch(["ws_3", "ws_4"])]
+
+    with pytest.raises(RuntimeError):
+        manager._process_batches(batches)
+
+    manager = RecordingBackupManager(max_workers=1)
+    manager.enable_checkpoint(CheckpointJournal(path, "backup", "input", True))
+    manager._process_batches(batches)
+
+    assert manager.processed == [["ws_3", "ws_4"]]
+
+
+def test_workspaces_skipped_by_the_export_are_backed_up_on_resume(tmp_path):
+    path = Path(tmp_path, "checkpoint.db")
+    manager = RecordingBackupManager(max_workers=1, skipped_id="ws_2")
+    manager.enable_checkpoint(CheckpointJournal(path, "backup", "input", False))
+    batches = [BackupBatch(["ws_1", "ws_2"]), BackupBatch(["ws_3"])]
+
+    manager._process_batches(batches)
+
+    manager = RecordingBackupManager(max_workers=1)
+    manager.enable_checkpoint(CheckpointJournal(path, "backup", "input", True))
+    manager._process_batches(batches)
+
+    assert manager.processed == [["ws_2"]]
+
+
+def test_only_workspaces_of_the_shard_are_backed_up():
+    workspace_ids = [f"ws_{i}" for i in range(10)]
+    processed = []
+    for index in (1, 2):
+        manager = RecordingBackupManager(max_workers=1)
+        manager.enable_sharding(Shard(index, 2))
+        manager._process_batches([BackupBatch(workspace_ids)])
+        processed.append([ws for batch in manager.processed for ws in batch])
+
+    assert processed[0] and processed[1]
+    assert sorted(processed[0] + processed[1]) == sorted(workspace_ids)
@@ -0,0 +1,195 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+from pathlib import Path
+
+import boto3
+from gooddata_pipelines import (
+    BackupRestoreConfig,
+    LocalStorageConfig,
+    S3StorageConfig,
+    StorageType,
+)
+from gooddata_pipelines.backup_and_restore.storage.local_storage import (
+    LocalStorage,
+)
+from gooddata_pipelines.backup_and_restore.storage.s3_storage import S3Storage
+from moto import mock_aws
+from utils.backup_manifest import (  # type: ignore
+    BackupManifest,
+    ManifestEntry,
+    ManifestStore,
+    collect_workspace_changes,
+    hash_directory,
+)
+from utils.sharding import Shard  # type: ignore
+
+ORG_ID = "org"
+
+
+def _export_workspace(
+    export_root: Path, workspace_id: str, timestamp: str, ldm: str
+) -> Path:
+    workspace_root = Path(
+        export_root,
+        workspace_id,
+        timestamp,
+        "gooddata_layouts",
+        ORG_ID,
+        "workspaces",
+        workspace_id,
+    )
+    Path(workspace_root, "ldm").mkdir(parents=True)
+    Path(workspace_root, "ldm", "ldm.yaml").write_text(ldm)
+    Path(workspace_root, "user_data_filters").mkdir()
+    return workspace_root
+
+
+def test_hash_directory_includes_empty_directories(tmp_path):
+    Path(tmp_path, "a").mkdir()
+    hash_before = hash_directory(tmp_path)
+
+    Path(tmp_path, "a", "empty").mkdir()
+
+    assert hash_directory(tmp_path) != hash_before
+
+
+def test_unchanged_workspaces_are_skipped(tmp_path):
+    _export_workspace(tmp_path / "first", "ws_1", "t1", "ldm: 1")
+    _export_workspace(tmp_path / "first", "ws_2", "t1", "ldm: 2")
+    manifest = BackupManifest()
+    entries, unchanged = collect_workspace_changes(
+        tmp_path / "first", ORG_ID, ["ws_1", "ws_2"], manifest, "t1"
+    )
+    manifest.workspaces.update(entries)
+
+    _export_workspace(tmp_path / "second", "ws_1", "t2", "ldm: 1")
+    _export_workspace(tmp_path / "second", "ws_2", "t2", "ldm: changed")
+    entries, unchanged = collect_workspace_changes(
+        tmp_path / "second", ORG_ID, ["ws_1", "ws_2"], manifest, "t2"
+    )
+
+    assert unchanged == ["ws_1"]
+    assert not Path(tmp_path, "second", "ws_1").exists()
+    assert Path(tmp_path, "second", "ws_2").exists()
+    assert entries["ws_1"].path == "org/ws_1/t1"
+    assert entries["ws_1"].checked_at == "t2"
+    assert entries["ws_2"].path == "org/ws_2/t2"
+
+
+def test_incomplete_exports_are_ignored(tmp_path):
+    workspace_root = _export_workspace(tmp_path, "ws_1", "t1", "ldm: 1")
+    Path(workspace_root, "user_data_filters").rmdir()
+
+    entries, unchanged = collect_workspace_changes(
+        tmp_path, ORG_ID, ["ws_1", "ws_missing"], BackupManifest(), "t1"
+    )
+
+    assert entries == {}
+    assert unchanged == []
+
+
+def _manifest() -> BackupManifest:
+    return BackupManifest(
+        workspaces={"ws_1": ManifestEntry("abc", "org/ws_1/t1", "t2")}
+    )
+
+
+def test_local_manifest_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = BackupRestoreConfig(
+        storage_type=StorageType.LOCAL,
+        storage=LocalStorageConfig(backup_path="local_backups"),
+    )
+    store = ManifestStore(LocalStorage(config), ORG_ID)
+
+    assert store.load() == BackupManifest()
+
+    store.save(_manifest())
+
+    assert Path(tmp_path, "local_backups", ORG_ID, "backup_manifest.json").exists()
+    assert store.load() == _manifest()
+
+
+def _sharded_backup(storage_factory) -> list[ManifestStore]:
+    """Two shards load the manifest and then back up their workspaces."""
+    workspace_ids = [f"ws_{i}" for i in range(10)]
+    shards = [Shard(1, 2), Shard(2, 2)]
+    stores = [ManifestStore(storage_factory(), ORG_ID, shard) for shard in shards]
+    manifests = [store.load() for store in stores]
+    for shard, store, manifest in zip(shards, stores, manifests):
+        for workspace_id in shard.select(workspace_ids, str):
+            manifest.workspaces[workspace_id] = ManifestEntry(
+                "abc", f"org/{workspace_id}/t3", "t3"
+            )
+            store.save(manifest)
+    return stores
+
+
+def test_shards_keep_their_own_manifests(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = BackupRestoreConfig(
+        storage_type=StorageType.LOCAL,
+        storage=LocalStorageConfig(backup_path="local_backups"),
+    )
+    ManifestStore(LocalStorage(config), ORG_ID).save(_manifest())
+
+    stores = _sharded_backup(lambda: LocalStorage(config))
+
+    assert Path(
+        tmp_path, "local_backups", ORG_ID, "backup_manifest.shard-1-of-2.json"
+    ).exists()
+    merged = ManifestStore(LocalStorage(config), ORG_ID).load()
+    assert sorted(merged.workspaces) == [f"ws_{i}" for i in range(10)]
+    assert merged.workspaces["ws_1"].checked_at == "t3"
+    for store in stores:
+        assert store.load() == merged
+
+
+@mock_aws
+def test_s3_shards_keep_their_own_manifests():
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="bucket")
+    config = BackupRestoreConfig(
+        storage_type=StorageType.S3,
+        storage=S3StorageConfig(
+            bucket="bucket",
+            backup_path="backups",
+            aws_access_key_id="test",
+            aws_secret_access_key="test",
+            aws_default_region="us-east-1",
+        ),
+    )
+
+    _sharded_backup(lambda: S3Storage(config))
+
+    merged = ManifestStore(S3Storage(config), ORG_ID).load()
+    assert sorted(merged.workspaces) == [f"ws_{i}" for i in range(10)]
+
+
+@mock_aws
+def test_s3_manifest_store():
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="bucket")
+    config = BackupRestoreConfig(
+        storage_type=StorageType.S3,
+        storage=S3StorageConfig(
+            bucket="bucket",
+            backup_path="backups",
+            aws_access_key_id="test",
+            aws_secret_access_key="test",
+            aws_default_region="us-east-1",
+        ),
+    )
+    store = ManifestStore(S3Storage(config), ORG_ID)
+
+    assert store.load() == BackupManifest()
+
+    store.save(_manifest())
+
+    assert store.load() == _manifest()
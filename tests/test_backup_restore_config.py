@@ -29,3 +29,9 @@ def test_s3_storage_config():
     assert config.storage_type == StorageType.S3
     assert config.storage.backup_path == "some/s3/backup/path/org_id/"
     assert config.storage.bucket == "some-s3-bucket"
+
+
+def test_max_workers_defaults_to_one():
+    config = load_config_from_yaml(Path("tests/data/backup/test_local_conf.yaml"))
+
+    assert config.max_workers == 1
@@ -0,0 +1,85 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+import json
+from pathlib import Path
+
+import pytest
+from compare_results import compare_results  # type: ignore
+from data_generator import (  # type: ignore
+    DATASETS,
+    dataset_path,
+    format_size,
+    parse_size,
+)
+from run_benchmarks import PHASES, PhaseResult, run_benchmarks  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "size, rows",
+    [("500", 500), ("10k", 10_000), ("1M", 1_000_000), ("10m", 10_000_000)],
+)
+def test_parse_and_format_size(size: str, rows: int) -> None:
+    assert parse_size(size) == rows
+    assert parse_size(format_size(rows)) == rows
+
+
+def test_generated_data_is_deterministic(tmp_path: Path) -> None:
+    first = dataset_path(tmp_path / "a", "users", 100)
+    second = dataset_path(tmp_path / "b", "users", 100)
+
+    assert first.read_text() == second.read_text()
+    assert len(first.read_text().splitlines()) == 101
+
+
+def test_every_tool_is_benchmarked() -> None:
+    assert {phase.tool for phase in PHASES} == set(DATASETS)
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_generated_rows_pass_validation(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Every generated row is valid, so the benchmarks measure the happy path."""
+    results: list[PhaseResult] = run_benchmarks(
+        list(DATASETS), [200], tmp_path, repeat=1, trace_memory=False
+    )
+
+    assert len(results) == len(PHASES)
+    assert all(result.rows == 200 for result in results)
+    assert not [r for r in caplog.records if r.levelname == "ERROR"]
+
+
+def test_compare_results_flags_regressions(tmp_path: Path) -> None:
+    def write(path: Path, rows_per_second: float, memory: float) -> Path:
+        result = {
+            "tool": "users",
+            "phase": "validate_user_data",
+            "rows": 1000,
+            "workers": 1,
+            "batch_size": None,
+            "seconds": 1.0,
+            "rows_per_second": rows_per_second,
+            "peak_memory_mib": memory,
+        }
+        path.write_text(json.dumps({"metadata": {}, "results": [result]}))
+        return path
+
+    baseline = write(tmp_path / "baseline.json", 1000, 10)
+    slower = write(tmp_path / "slower.json", 800, 10)
+    bigger = write(tmp_path / "bigger.json", 1000, 12)
+    same = write(tmp_path / "same.json", 950, 10.5)
+
+    assert compare_results(baseline, slower)[0].is_regression(10)
+    assert compare_results(baseline, bigger)[0].is_regression(10)
+    assert not compare_results(baseline, same)[0].is_regression(10)
@@ -0,0 +1,107 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+from pathlib import Path
+
+import pytest
+from gooddata_pipelines import WorkspaceIncrementalLoad
+from gooddata_pipelines.logger.logger import LogObserver
+from utils.checkpoint import (  # type: ignore
+    CheckpointJournal,
+    input_fingerprint,
+    open_checkpoint,
+)
+from utils.state import incremental_load_batches  # type: ignore
+
+
+def _workspace(workspace_id: str) -> WorkspaceIncrementalLoad:
+    return WorkspaceIncrementalLoad(
+        parent_id="parent",
+        workspace_id=workspace_id,
+        workspace_name=workspace_id,
+        workspace_data_filter_id=None,
+        workspace_data_filter_values=None,
+        is_active=True,
+    )
+
+
+class CrashingProvisioner:
+    """Provisioner which dies while loading the given workspace."""
+
+    def __init__(self, crashing_id: str | None = None, failing_id: str = "") -> None:
+        self.logger = LogObserver()
+        self.crashing_id = crashing_id
+        self.failing_id = failing_id
+        self.loads: list[list[str]] = []
+
+    def incremental_load(self, rows: list[WorkspaceIncrementalLoad]) -> None:
+        ids = [row.workspace_id for row in rows]
+        if self.crashing_id in ids:
+            raise MemoryError()
+        self.loads.append(ids)
+        if self.failing_id in ids:
+            self.logger.error(f"Failed to provision {self.failing_id}")
+
+
+BATCHES = [[_workspace("ws_1")], [_workspace("ws_2")], [_workspace("ws_3")]]
+
+
+def _load(path: Path, provisioner: CrashingProvisioner, resume: bool) -> None:
+    with open_checkpoint(path, "workspace", "input", resume) as checkpoint:
+        incremental_load_batches(provisioner, BATCHES, checkpoint=checkpoint)
+
+
+def test_resumed_run_skips_completed_batches(tmp_path):
+    path = Path(tmp_path, "checkpoint.db")
+    with pytest.raises(MemoryError):
+        _load(path, CrashingProvisioner(crashing_id="ws_3", failing_id="ws_1"), False)
+
+    provisioner = CrashingProvisioner()
+    _load(path, provisioner, resume=True)
+
+    # The batch which reported errors is sent again
+    assert provisioner.loads == [["ws_1"], ["ws_3"]]
+
+    # The completed run is forgotten
+    provisioner = CrashingProvisioner()
+    _load(path, provisioner, resume=True)
+    assert len(provisioner.loads) == 3
+
+
+def test_journal_of_other_input_is_discarded(tmp_path):
+    path = Path(tmp_path, "checkpoint.db")
+    journal = CheckpointJournal(path, "backup", "old input", resume=False)
+    journal.record("ws_1", "ws_2")
+    journal.close()
+
+    resumed = CheckpointJournal(path, "backup", "old input", resume=True)
+    assert resumed.completed == {"ws_1", "ws_2"}
+    resumed.close()
+
+    # Other jobs in the same file are kept apart
+    other_job = CheckpointJournal(path, "restore", "old input", resume=True)
+    assert other_job.completed == set()
+    other_job.close()
+
+    changed = CheckpointJournal(path, "backup", "new input", resume=True)
+    assert changed.completed == set()
+    changed.close()
+
+
+def test_fingerprint_changes_with_the_input_file(tmp_path):
+    path = Path(tmp_path, "input.csv")
+    path.write_text("workspace_id\nws_1\n")
+    before = input_fingerprint(100, files=(path, None))
+
+    assert input_fingerprint(100, files=(path, None)) == before
+    assert input_fingerprint(200, files=(path, None)) != before
+
+    path.write_text("workspace_id\nws_1\nws_2\n")
+    assert input_fingerprint(100, files=(path, None)) != before
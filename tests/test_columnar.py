@@ -0,0 +1,136 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import logging
+from functools import partial
+from pathlib import Path
+
+import pytest
+from gooddata_pipelines import WorkspaceIncrementalLoad
+from permission_mgmt import read_permissions_from_csv  # type: ignore
+from user_mgmt import read_users_from_csv  # type: ignore
+from utils.args.schemas import PermissionArgs  # type: ignore
+from utils.columnar import iter_columnar_batches  # type: ignore
+from utils.validation import RowValidationError  # type: ignore
+from workspace_mgmt import (  # type: ignore
+    _convert_workspace_columns,
+    _validate_workspace_row,
+)
+
+PERMISSIONS = """user_id,ug_id,ws_id,ws_permissions,is_active
+user_1,,ws_1,ANALYZE,True
+user_2,ug_2,ws_1,VIEW,True
+,ug_1,ws_1,VIEW,False
+,,ws_2,VIEW,True
+user_3,,ws_2,VIEW,maybe
+
+user_4,,ws_2
+user_5,,ws_3,MANAGE,True,extra
+,ug_3,ws_3,MANAGE,True
+"""
+
+USERS = """user_id,firstname,lastname,email,auth_id,user_groups,is_active
+user_1,Jane,Doe,jane@example.com,,ug_1|ug_2,True
+user_2, John,Doe,,,ug_1,False
+user_3,Jim,Doe
+user_4,Jill,Doe,,,ug_1,yes
+"""
+
+
+def _write(tmp_path: Path, content: str) -> Path:
+    path = Path(tmp_path, "input.csv")
+    path.write_text(content)
+    return path
+
+
+def _read_permissions(path: Path, engine: str, workers: int) -> list:
+    args = PermissionArgs(
+        perm_csv=path,
+        delimiter=",",
+        quotechar='"',
+        profile_config=Path(),
+        profile="default",
+        http_pool_size=10,
+        shard=None,
+        batch_size=4,
+        validation_workers=workers,
+        validation_engine=engine,
+        compact=False,
+        state_file=None,
+        checkpoint_file=None,
+        resume=False,
+        plan=False,
+        api_calls_per_second=None,
+    )
+    return list(read_permissions_from_csv(args))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_engines_accept_and_reject_the_same_permissions(tmp_path, caplog, workers):
+    path = _write(tmp_path, PERMISSIONS)
+
+    with caplog.at_level(logging.ERROR):
+        rows = _read_permissions(path, "rows", workers)
+    rows_errors = list(caplog.messages)
+    caplog.clear()
+    with caplog.at_level(logging.ERROR):
+        columnar = _read_permissions(path, "columnar", workers)
+
+    assert columnar == rows
+    assert [p.entity_id for batch in columnar for p in batch] == [
+        "user_1",
+        "ug_1",
+        "user_5",
+        "ug_3",
+    ]
+    assert caplog.messages == rows_errors
+    assert len(rows_errors) == 4
+
+
+def test_engines_accept_and_reject_the_same_users(tmp_path, caplog):
+    path = _write(tmp_path, USERS)
+
+    def read(engine: str) -> list:
+        return list(read_users_from_csv(path, ",", '"', "|", None, 1, engine))
+
+    with caplog.at_level(logging.ERROR):
+        rows = read("rows")
+    rows_errors = list(caplog.messages)
+    caplog.clear()
+    with caplog.at_level(logging.ERROR):
+        columnar = read("columnar")
+
+    assert columnar == rows
+    assert [(u.user_id, u.user_groups, u.is_active) for u in columnar[0]] == [
+        ("user_1", ["ug_1", "ug_2"], True),
+        ("user_2", ["ug_1"], False),
+        ("user_4", ["ug_1"], False),
+    ]
+    assert caplog.messages == rows_errors
+
+
+def test_missing_column_is_reported_by_the_row_validator(tmp_path):
+    path = _write(
+        tmp_path,
+        "parent_id,workspace_id,workspace_name,is_active\nparent,ws_1,WS 1,True\n",
+    )
+
+    with pytest.raises(RowValidationError, match="workspace_data_filter_values"):
+        list(
+            iter_columnar_batches(
+                path,
+                ",",
+                '"',
+                WorkspaceIncrementalLoad,
+                partial(_convert_workspace_columns, wdf_delimiter="|"),
+                partial(_validate_workspace_row, wdf_delimiter="|"),
+                raise_on_error=True,
+            )
+        )
@@ -0,0 +1,197 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+import logging
+from pathlib import Path
+
+import pytest
+from fake_api_server import FakeApiServer  # type: ignore
+from gooddata_pipelines import (
+    EntityType,
+    PermissionIncrementalLoad,
+    PermissionProvisioner,
+    UserGroupIncrementalLoad,
+    UserIncrementalLoad,
+    UserProvisioner,
+)
+from permission_mgmt import _permission_key  # type: ignore
+from user_group_mgmt import _user_group_key  # type: ignore
+from user_mgmt import _user_key  # type: ignore
+from utils.compaction import (  # type: ignore
+    any_active_wins,
+    compact,
+    compact_batches,
+    last_wins_unless_conflicting,
+)
+from utils.sessions import connection_pools  # type: ignore
+from utils.user_group_provisioner import ExtendedUserGroupProvisioner  # type: ignore
+from utils.utils import create_client  # type: ignore
+
+
+def _user(user_id: str, firstname: str, is_active: bool = True) -> UserIncrementalLoad:
+    return UserIncrementalLoad(
+        user_id=user_id,
+        firstname=firstname,
+        lastname="Doe",
+        email=None,
+        auth_id=None,
+        user_groups=[],
+        is_active=is_active,
+    )
+
+
+def _permission(
+    workspace_id: str, entity_id: str, is_active: bool = True
+) -> PermissionIncrementalLoad:
+    return PermissionIncrementalLoad(
+        permission="VIEW",
+        workspace_id=workspace_id,
+        entity_id=entity_id,
+        entity_type=EntityType.user,
+        is_active=is_active,
+    )
+
+
+def _user_group(
+    user_group_id: str, name: str, is_active: bool = True
+) -> UserGroupIncrementalLoad:
+    return UserGroupIncrementalLoad(
+        user_group_id=user_group_id,
+        user_group_name=name,
+        parent_user_groups=[],
+        is_active=is_active,
+    )
+
+
+USERS = [
+    _user("user_1", "Jane"),
+    _user("user_2", "John"),
+    _user("user_1", "Jane"),
+    _user("user_1", "Janet"),
+    _user("user_3", "Jim"),
+    _user("user_3", "Jim", is_active=False),
+]
+
+
+def test_last_row_of_an_entity_wins():
+    assert compact(USERS, _user_key) == [USERS[3], USERS[1], USERS[5]]
+
+
+def test_compacted_permissions_declare_the_same_permissions():
+    permissions = [
+        _permission("ws_1", "user_1"),
+        _permission("ws_1", "user_1", is_active=False),
+        _permission("ws_1", "user_2", is_active=False),
+        _permission("ws_1", "user_2"),
+        _permission("ws_1", "user_3", is_active=False),
+        _permission("ws_1", "user_3", is_active=False),
+        _permission("ws_2", "user_1"),
+    ]
+
+    compacted = compact(permissions, _permission_key, any_active_wins)
+
+    assert len(compacted) == 4
+    declarations = PermissionProvisioner._construct_declarations
+    assert declarations(compacted) == declarations(permissions)
+
+
+def test_compaction_reports_eliminated_rows(caplog):
+    with caplog.at_level(logging.INFO):
+        batches = list(compact_batches([USERS[:3], USERS[3:]], "user", _user_key))
+
+    assert [len(batch) for batch in batches] == [2, 2]
+    assert "eliminated 2 of 6 user rows" in caplog.messages[-1]
+
+
+def _provision_users(monkeypatch, batch: list[UserIncrementalLoad]) -> tuple:
+    with FakeApiServer() as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        server.organization.add_user("user_3")
+        connection_pools.clear()
+        provisioner = create_client(UserProvisioner, Path("missing.yaml"), "default")
+
+        server.stats.reset()
+        provisioner.incremental_load(batch)
+        connection_pools.clear()
+
+        users = {
+            user_id: user["attributes"].get("firstname")
+            for user_id, user in server.organization.entities["users"].items()
+        }
+        return users, len(server.stats.records)
+
+
+def test_compaction_reduces_api_calls_without_changing_results(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    users, requests = _provision_users(monkeypatch, USERS)
+    compacted_users, compacted_requests = _provision_users(
+        monkeypatch, compact(USERS, _user_key)
+    )
+
+    assert compacted_users == users
+    assert users == {"admin": None, "user_1": "Janet", "user_2": "John"}
+    assert compacted_requests < requests
+
+
+USER_GROUPS = [
+    _user_group("group_1", "Sales"),
+    _user_group("group_1", "Sales", is_active=False),
+    _user_group("group_2", "Finance"),
+    _user_group("group_2", "Finance", is_active=False),
+    _user_group("group_3", "Support"),
+    _user_group("group_3", "Support EU"),
+]
+
+
+def test_conflicting_rows_of_an_entity_are_kept():
+    compacted = compact(USER_GROUPS, _user_group_key, last_wins_unless_conflicting)
+
+    assert compacted == USER_GROUPS[:4] + [USER_GROUPS[5]]
+
+
+def _provision_user_groups(
+    monkeypatch, batch: list[UserGroupIncrementalLoad]
+) -> dict[str, str]:
+    with FakeApiServer() as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        server.organization.add_user_group("group_1")
+        connection_pools.clear()
+        provisioner = create_client(
+            ExtendedUserGroupProvisioner, Path("missing.yaml"), "default"
+        )
+
+        provisioner.incremental_load(batch)
+        connection_pools.clear()
+
+        return {
+            user_group_id: user_group["attributes"]["name"]
+            for user_group_id, user_group in server.organization.entities[
+                "userGroups"
+            ].items()
+        }
+
+
+def test_compacted_user_groups_reach_the_same_result(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    user_groups = _provision_user_groups(monkeypatch, USER_GROUPS)
+    compacted_user_groups = _provision_user_groups(
+        monkeypatch,
+        compact(USER_GROUPS, _user_group_key, last_wins_unless_conflicting),
+    )
+
+    assert compacted_user_groups == user_groups
+    assert user_groups == {"group_2": "Finance", "group_3": "Support EU"}
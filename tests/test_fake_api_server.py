@@ -0,0 +1,125 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+import requests
+from fake_api_server import FakeApiConfig, FakeApiServer  # type: ignore
+from gooddata_pipelines import (
+    EntityType,
+    PermissionIncrementalLoad,
+    PermissionProvisioner,
+    UserIncrementalLoad,
+    UserProvisioner,
+)
+from utils.utils import create_client  # type: ignore
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeApiServer]:
+    with FakeApiServer() as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        yield server
+
+
+def _get(server: FakeApiServer, path: str) -> requests.Response:
+    return requests.get(
+        f"{server.url}/api/v1{path}",
+        headers={"Authorization": f"Bearer {server.config.token}"},
+        verify=str(server.ca_bundle),
+    )
+
+
+def test_create_client_is_pointed_to_server_via_envvars(
+    server: FakeApiServer,
+) -> None:
+    provisioner = create_client(UserProvisioner, Path("missing.yaml"), "default")
+    users = [
+        UserIncrementalLoad(
+            user_id=f"user_{i}",
+            firstname="Jane",
+            lastname="Doe",
+            email=f"jane.doe.{i}@example.com",
+            auth_id=f"auth_{i}",
+            user_groups=["ug_1"],
+            is_active=True,
+        )
+        for i in range(3)
+    ]
+
+    provisioner.incremental_load(users)
+
+    assert {"user_0", "user_1", "user_2"} <= set(server.organization.entities["users"])
+    assert "ug_1" in server.organization.entities["userGroups"]
+
+
+def test_permissions_are_stored_in_workspace_layout(server: FakeApiServer) -> None:
+    server.organization.add_workspace("ws_1")
+    server.organization.add_user("user_1")
+    provisioner = create_client(PermissionProvisioner, Path("missing.yaml"), "default")
+
+    provisioner.incremental_load(
+        [
+            PermissionIncrementalLoad(
+                permission="VIEW",
+                workspace_id="ws_1",
+                entity_id="user_1",
+                entity_type=EntityType.user,
+                is_active=True,
+            )
+        ]
+    )
+
+    assert server.organization.layout("ws_1", "permissions")["permissions"] == [
+        {"assignee": {"id": "user_1", "type": "user"}, "name": "VIEW"}
+    ]
+
+
+def test_entities_are_paged(server: FakeApiServer) -> None:
+    for i in range(5):
+        server.organization.add_workspace(f"ws_{i}")
+
+    first = _get(server, "/entities/workspaces?page=0&size=3").json()
+    second = _get(server, "/entities/workspaces?page=1&size=3").json()
+
+    assert len(first["data"]) == 3 and "next" in first["links"]
+    assert len(second["data"]) == 2 and "next" not in second["links"]
+
+
+def test_invalid_token_is_rejected(server: FakeApiServer) -> None:
+    response = requests.get(
+        f"{server.url}/api/v1/profile",
+        headers={"Authorization": "Bearer wrong"},
+        verify=str(server.ca_bundle),
+    )
+
+    assert response.status_code == 401
+
+
+def test_requests_over_rate_limit_get_429() -> None:
+    with FakeApiServer(FakeApiConfig(rate_limit=1, retry_after=3)) as server:
+        responses = [_get(server, "/profile") for _ in range(5)]
+
+        # The requests span at most two one-second windows
+        limited = [r for r in responses if r.status_code == 429]
+        assert len(limited) >= 3
+        assert all(r.headers["Retry-After"] == "3" for r in limited)
+        assert server.stats.summary()["statuses"]["429"] == len(limited)
+
+
+def test_injected_errors() -> None:
+    with FakeApiServer(FakeApiConfig(error_rate=1.0)) as server:
+        assert _get(server, "/profile").status_code == 503
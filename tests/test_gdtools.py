@@ -0,0 +1,61 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import subprocess
+
+import pytest
+from gdtools import COMMANDS, SCRIPTS_DIR, main  # type: ignore
+from utils.args import parser  # type: ignore
+
+
+def test_every_command_has_its_script():
+    for command in COMMANDS.values():
+        assert os.path.isfile(os.path.join(SCRIPTS_DIR, f"{command.module}.py"))
+
+
+def test_unknown_command_exits_with_usage(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(["user_management"])
+
+    assert exit_info.value.code == 2
+    assert "Unknown command: user_management" in capsys.readouterr().err
+
+
+def test_no_command_prints_usage(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([])
+
+    assert exit_info.value.code == 2
+    assert "user_data_filter_mgmt" in capsys.readouterr().out
+
+
+def test_help_does_not_import_the_sdk():
+    code = (
+        "import sys\n"
+        + "from gdtools import main\n"
+        + "try:\n"
+        + "    main(['user_mgmt', '-h'])\n"
+        + "except SystemExit:\n"
+        + "    pass\n"
+        + "assert 'gooddata_sdk' not in sys.modules\n"
+        + "assert 'user_mgmt' not in sys.modules\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=SCRIPTS_DIR, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "usage: user_mgmt.py" in result.stdout
+
+
+def test_profiles_file_path_matches_the_sdk():
+    from gooddata_sdk.utils import PROFILES_FILE_PATH
+
+    assert parser.PROFILES_FILE_PATH == PROFILES_FILE_PATH
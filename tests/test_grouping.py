@@ -0,0 +1,54 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import pytest
+from utils.grouping import (  # type: ignore
+    batched_by_group,
+    check_grouped,
+    keep_groups_together,
+)
+
+
+def _first(row: str) -> str:
+    return row[0]
+
+
+def test_groups_are_never_split_across_batches():
+    batches: list[list[str]] = [
+        ["a1", "a2", "b1"],
+        ["b2", "b3", "b4"],
+        ["b5", "c1"],
+        [],
+    ]
+
+    assert list(keep_groups_together(batches, _first)) == [
+        ["a1", "a2"],
+        ["b1", "b2", "b3", "b4", "b5"],
+        ["c1"],
+    ]
+
+
+def test_consecutive_groups_pass_the_check():
+    check_grouped(["a1", "a2", "b1", "c1", "c2"], _first, "letter")
+
+
+def test_group_reappearing_later_is_rejected():
+    with pytest.raises(ValueError, match="letter a are not consecutive \\(row 4\\)"):
+        check_grouped(["a1", "a2", "b1", "a3"], _first, "letter")
+
+
+def test_batches_in_memory_are_extended_to_the_end_of_a_group():
+    rows = ["a1", "a2", "b1", "b2", "b3", "c1"]
+
+    assert list(batched_by_group(rows, 3, _first)) == [
+        ["a1", "a2", "b1", "b2", "b3"],
+        ["c1"],
+    ]
+    assert list(batched_by_group([], 3, _first)) == []
@@ -0,0 +1,226 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+import logging
+from operator import attrgetter
+from pathlib import Path
+
+import pytest
+from fake_api_server import FakeApiConfig, FakeApiServer  # type: ignore
+from gooddata_pipelines import UserGroupIncrementalLoad, WorkspaceIncrementalLoad
+from utils.hierarchy import order_by_hierarchy  # type: ignore
+from utils.sessions import connection_pools  # type: ignore
+from utils.sharding import Shard  # type: ignore
+from utils.user_group_provisioner import ExtendedUserGroupProvisioner  # type: ignore
+from utils.utils import create_client  # type: ignore
+from utils.workspace_provisioner import ExtendedWorkspaceProvisioner  # type: ignore
+
+
+def _group(
+    group_id: str, *parents: str, is_active: bool = True
+) -> UserGroupIncrementalLoad:
+    return UserGroupIncrementalLoad(
+        user_group_id=group_id,
+        user_group_name=group_id,
+        parent_user_groups=list(parents),
+        is_active=is_active,
+    )
+
+
+def _order(
+    batches: list[list[UserGroupIncrementalLoad]],
+    batch_size: int | None = None,
+    shard: Shard | None = None,
+) -> list[list[str]]:
+    ordered = order_by_hierarchy(
+        batches,
+        "user group",
+        attrgetter("user_group_id"),
+        attrgetter("parent_user_groups"),
+        batch_size,
+        shard,
+    )
+    return [[group.user_group_id for group in batch] for batch in ordered]
+
+
+def test_parents_are_moved_before_their_children():
+    batches = [
+        [_group("grandchild", "child"), _group("child", "root")],
+        [_group("root"), _group("other", "existing")],
+    ]
+
+    assert _order(batches, batch_size=2) == [
+        ["root", "other"],
+        ["child", "grandchild"],
+    ]
+    assert _order(batches) == [["root", "other", "child", "grandchild"]]
+
+
+def test_batches_are_sized_by_the_batch_size_not_the_first_batch():
+    batches = [[_group("a")], [_group(f"child_{i}", "a") for i in range(4)]]
+
+    assert [len(batch) for batch in _order(batches, batch_size=2)] == [2, 2, 1]
+
+
+def test_cycles_and_deleted_parents_are_rejected(caplog):
+    batches = [
+        [
+            _group("a", "b"),
+            _group("b", "a"),
+            _group("c", "a"),
+            _group("deleted", is_active=False),
+            _group("orphan", "deleted"),
+            _group("ok"),
+        ]
+    ]
+
+    with caplog.at_level(logging.ERROR):
+        ordered = _order(batches)
+
+    assert ordered == [["deleted", "ok"]]
+    assert len(caplog.messages) == 4
+    assert "orphan: its parent deleted" in caplog.messages[-1]
+
+
+def test_shards_keep_whole_hierarchies():
+    groups = [_group(f"child_{i}", f"parent_{i % 4}") for i in range(16)]
+    groups += [_group(f"parent_{i}", "existing") for i in range(4)]
+
+    shards = [
+        {group for batch in _order([groups], shard=Shard(i, 2)) for group in batch}
+        for i in (1, 2)
+    ]
+
+    assert shards[0] and shards[1]
+    assert len(shards[0] | shards[1]) == 20
+    for i in range(16):
+        shard = shards[0] if f"child_{i}" in shards[0] else shards[1]
+        assert f"parent_{i % 4}" in shard
+
+
+def _workspace(workspace_id: str, wdf_id: str) -> WorkspaceIncrementalLoad:
+    return WorkspaceIncrementalLoad(
+        parent_id="parent",
+        workspace_id=workspace_id,
+        workspace_name=workspace_id,
+        workspace_data_filter_id=wdf_id,
+        workspace_data_filter_values=["value"],
+        is_active=True,
+    )
+
+
+def test_workspace_data_filter_rows_of_a_workspace_stay_in_one_batch():
+    batches = [
+        [_workspace("c1", "wdf_a"), _workspace("c2", "wdf_a")],
+        [_workspace("c1", "wdf_b"), _workspace("c3", "wdf_a")],
+    ]
+
+    ordered = order_by_hierarchy(
+        batches,
+        "workspace",
+        attrgetter("workspace_id"),
+        lambda workspace: [workspace.parent_id],
+        batch_size=1,
+    )
+
+    assert [
+        [(row.workspace_id, row.workspace_data_filter_id) for row in batch]
+        for batch in ordered
+    ] == [[("c1", "wdf_a"), ("c1", "wdf_b")], [("c2", "wdf_a")], [("c3", "wdf_a")]]
+
+
+def _provision(
+    monkeypatch: pytest.MonkeyPatch, groups: list[UserGroupIncrementalLoad]
+) -> dict:
+    with FakeApiServer(config=FakeApiConfig(latency_ms=20)) as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        server.organization.add_user_group("existing")
+        connection_pools.clear()
+        provisioner = create_client(
+            ExtendedUserGroupProvisioner, Path("missing.yaml"), "default"
+        )
+        provisioner.set_max_workers(8)
+
+        provisioner.incremental_load(groups)
+        connection_pools.clear()
+
+        return {
+            group_id: [
+                parent["id"] for parent in group["relationships"]["parents"]["data"]
+            ]
+            for group_id, group in server.organization.entities["userGroups"].items()
+        }
+
+
+def test_hierarchy_is_provisioned_level_by_level(monkeypatch: pytest.MonkeyPatch):
+    # Children first, as the provisioner must not depend on the input order
+    groups = [_group(f"child_{i}", f"parent_{i % 2}") for i in range(8)]
+    groups += [_group(f"parent_{i}", "existing") for i in range(2)]
+    groups += [_group("orphan", "missing"), _group("orphan_child", "orphan")]
+
+    provisioned = _provision(monkeypatch, groups)
+
+    assert "orphan" not in provisioned and "orphan_child" not in provisioned
+    assert provisioned["parent_1"] == ["existing"]
+    assert provisioned["child_3"] == ["parent_1"]
+    assert len(provisioned) == 11
+
+
+def test_workspaces_are_provisioned_with_their_filters(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    workspaces = [
+        WorkspaceIncrementalLoad(
+            parent_id="region",
+            workspace_id=f"ws_{i}",
+            workspace_name=f"Workspace {i}",
+            workspace_data_filter_id="wdf_client",
+            workspace_data_filter_values=[f"client_{i}"],
+            is_active=True,
+        )
+        for i in range(6)
+    ]
+    workspaces.append(
+        WorkspaceIncrementalLoad(
+            parent_id="parent",
+            workspace_id="region",
+            workspace_name="Region",
+            is_active=True,
+        )
+    )
+
+    with FakeApiServer(config=FakeApiConfig(latency_ms=20)) as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        server.organization.add_workspace("parent")
+        server.organization.add_workspace_data_filter("parent", "wdf_client", "c")
+        connection_pools.clear()
+        provisioner = create_client(
+            ExtendedWorkspaceProvisioner, Path("missing.yaml"), "default"
+        )
+        provisioner.set_max_workers(4)
+
+        provisioner.incremental_load(workspaces)
+        connection_pools.clear()
+
+        entities = server.organization.entities
+        assert (
+            entities["workspaces"]["region"]["relationships"]["parent"]["data"]["id"]
+            == "parent"
+        )
+        for i in range(6):
+            settings = entities[f"workspaces/ws_{i}/workspaceDataFilterSettings"]
+            assert [s["attributes"]["filterValues"] for s in settings.values()] == [
+                [f"client_{i}"]
+            ]
@@ -0,0 +1,155 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fake_api_server import FakeApiServer  # type: ignore
+from gooddata_pipelines import CustomDatasetDefinition, CustomFieldDefinition
+from utils.ldm_extension_manager import ExtendedLdmExtensionManager  # type: ignore
+from utils.sessions import connection_pools  # type: ignore
+from utils.utils import create_client  # type: ignore
+
+PARENT_LDM: dict[str, Any] = {
+    "ldm": {
+        "datasets": [
+            {
+                "id": "products",
+                "title": "Products",
+                "grain": [{"id": "products.product_id", "type": "attribute"}],
+                "references": [],
+                "attributes": [],
+                "facts": [],
+            }
+        ],
+        "dateInstances": [],
+    }
+}
+
+
+def _custom_dataset(
+    workspace_id: str, join_attribute_id: str
+) -> CustomDatasetDefinition:
+    return CustomDatasetDefinition.model_validate(
+        {
+            "workspace_id": workspace_id,
+            "dataset_id": "product_extras",
+            "dataset_name": "Product Extras",
+            "dataset_datasource_id": "ds",
+            "dataset_source_table": "product_extras",
+            "dataset_source_sql": None,
+            "parent_dataset_reference": "products",
+            "parent_dataset_references": [
+                {
+                    "attribute_id": join_attribute_id,
+                    "source_column": "product_id",
+                    "data_type": "STRING",
+                }
+            ],
+        }
+    )
+
+
+def _custom_field(workspace_id: str) -> CustomFieldDefinition:
+    return CustomFieldDefinition.model_validate(
+        {
+            "workspace_id": workspace_id,
+            "dataset_id": "product_extras",
+            "custom_field_id": "product_color",
+            "custom_field_name": "Color",
+            "custom_field_type": "attribute",
+            "custom_field_source_column": "color",
+            "custom_field_source_column_data_type": "STRING",
+        }
+    )
+
+
+def _ldm(dataset_id: str) -> dict:
+    return {
+        "ldm": {
+            "datasets": [
+                {**PARENT_LDM["ldm"]["datasets"][0], "id": dataset_id, "grain": []}
+            ],
+            "dateInstances": [],
+        }
+    }
+
+
+@pytest.mark.parametrize("check_relations", [True, False])
+def test_parent_ldm_is_fetched_once_and_broken_children_are_skipped(
+    monkeypatch: pytest.MonkeyPatch, check_relations: bool
+):
+    children = ["child_1", "child_2", "child_3"]
+    custom_datasets = [
+        _custom_dataset(workspace_id, "products.product_id")
+        for workspace_id in children
+    ] + [
+        _custom_dataset("child_broken", "products.name"),
+        _custom_dataset("root", "products.product_id"),
+    ]
+    custom_fields = [
+        _custom_field(workspace_id)
+        for workspace_id in children + ["child_broken", "root"]
+    ]
+
+    with FakeApiServer() as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        server.organization.add_workspace("parent")
+        server.organization.add_workspace("root")
+        for workspace_id in children + ["child_broken"]:
+            server.organization.add_workspace(workspace_id, "parent")
+        server.organization.layouts["parent", "logicalModel"] = PARENT_LDM
+        # Only the extension of child_3 removes an object of its current LDM
+        server.organization.layouts["child_2", "logicalModel"] = _ldm("product_extras")
+        server.organization.layouts["child_3", "logicalModel"] = _ldm("old_extras")
+        connection_pools.clear()
+        manager = create_client(
+            ExtendedLdmExtensionManager, Path("missing.yaml"), "default"
+        )
+        manager.set_max_workers(3)
+
+        fetched: list[str] = []
+        content = manager._sdk.catalog_workspace_content
+        get_declarative_ldm = content.get_declarative_ldm
+
+        def fetch(workspace_id: str) -> Any:
+            fetched.append(workspace_id)
+            return get_declarative_ldm(workspace_id)
+
+        monkeypatch.setattr(content, "get_declarative_ldm", fetch)
+
+        server.stats.reset()
+        with pytest.raises(
+            RuntimeError,
+            match="Failed to extend the LDM of 2 workspaces: child_broken, root",
+        ):
+            manager.process(custom_datasets, custom_fields, check_relations)
+        connection_pools.clear()
+
+        layouts = server.organization.layouts
+        remote_checks = [
+            record
+            for record in server.stats.records
+            if record.route.startswith("GET")
+            and record.route.endswith("/layout/workspaces/(?P<workspace_id>[^/]+)")
+        ]
+
+    for workspace_id in children:
+        (dataset,) = layouts[workspace_id, "logicalModel"]["ldm"]["datasets"]
+        assert dataset["id"] == "product_extras"
+    assert ("child_broken", "logicalModel") not in layouts
+    assert ("root", "logicalModel") not in layouts
+    assert fetched.count("parent") == 1
+    assert len(remote_checks) == (1 if check_relations else 0)
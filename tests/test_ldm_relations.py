@@ -0,0 +1,171 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+from gooddata_pipelines import CustomDatasetDefinition, CustomFieldDefinition
+from gooddata_pipelines.ldm_extension.input_processor import (
+    LdmExtensionDataProcessor,
+)
+from gooddata_pipelines.ldm_extension.models.custom_data_object import CustomDataset
+from gooddata_sdk.catalog.workspace.declarative_model.workspace.logical_model.ldm import (
+    CatalogDeclarativeModel,
+)
+from utils.ldm_relations import (  # type: ignore
+    LdmIndex,
+    find_broken_references,
+    find_removed_objects,
+)
+
+PARENTS = LdmIndex.from_models(
+    [
+        CatalogDeclarativeModel.from_dict(
+            {
+                "ldm": {
+                    "datasets": [
+                        {
+                            "id": "products",
+                            "title": "Products",
+                            "grain": [{"id": "products.id", "type": "attribute"}],
+                            "references": [],
+                            "attributes": [
+                                {
+                                    "id": "products.id",
+                                    "title": "Product",
+                                    "sourceColumn": "id",
+                                    "sourceColumnDataType": "STRING",
+                                    "labels": [],
+                                }
+                            ],
+                            "facts": [],
+                        }
+                    ],
+                    "dateInstances": [
+                        {
+                            "id": "order_date",
+                            "title": "Date",
+                            "granularities": ["DAY"],
+                            "granularitiesFormatting": {
+                                "titleBase": "",
+                                "titlePattern": "%titleBase - %granularityTitle",
+                            },
+                        }
+                    ],
+                }
+            }
+        )
+    ]
+)
+
+
+def _dataset(
+    dataset_id: str,
+    field_ids: list[str],
+    join_attribute_id: str = "products.id",
+    data_type: str = "STRING",
+) -> CustomDataset:
+    definition = CustomDatasetDefinition.model_validate(
+        {
+            "workspace_id": "ws",
+            "dataset_id": dataset_id,
+            "dataset_name": dataset_id,
+            "dataset_datasource_id": "ds",
+            "dataset_source_table": dataset_id,
+            "dataset_source_sql": None,
+            "parent_dataset_reference": "products",
+            "parent_dataset_references": [
+                {
+                    "attribute_id": join_attribute_id,
+                    "source_column": "product_id",
+                    "data_type": data_type,
+                }
+            ],
+        }
+    )
+    fields = [
+        CustomFieldDefinition.model_validate(
+            {
+                "workspace_id": "ws",
+                "dataset_id": dataset_id,
+                "custom_field_id": field_id,
+                "custom_field_name": field_id,
+                "custom_field_type": "attribute",
+                "custom_field_source_column": field_id,
+                "custom_field_source_column_data_type": "STRING",
+            }
+        )
+        for field_id in field_ids
+    ]
+    return CustomDataset(definition=definition, custom_fields=fields)
+
+
+def _index(*datasets: CustomDataset) -> LdmIndex:
+    model = LdmExtensionDataProcessor().datasets_to_ldm(
+        {dataset.definition.dataset_id: dataset for dataset in datasets}
+    )
+    return LdmIndex.from_models([model])
+
+
+def test_valid_extension_has_no_problems():
+    datasets = {"extras": _dataset("extras", ["color", "size"])}
+
+    assert find_broken_references(PARENTS, datasets) == []
+
+
+def test_broken_references_and_duplicate_ids_are_found():
+    datasets = {
+        "wrong_join": _dataset("wrong_join", ["color"], "products.name"),
+        "wrong_type": _dataset("wrong_type", ["order_date"], data_type="INT"),
+        "duplicate": _dataset("duplicate", ["color"]),
+    }
+
+    assert find_broken_references(PARENTS, datasets) == [
+        "wrong_join joins on products.name, which is not in the grain of dataset "
+        + "products.",
+        "wrong_join does not join on products.id, which is in the grain of "
+        + "dataset products.",
+        "wrong_type defines order_date, which is already a date of the parent "
+        + "workspaces.",
+        "wrong_type joins column product_id of type INT on products.id of type "
+        + "STRING.",
+        "duplicate defines color, which wrong_join defines as well.",
+    ]
+
+
+def test_only_removed_or_changed_objects_need_the_remote_check():
+    current = _index(_dataset("extras", ["color"]))
+
+    assert find_removed_objects(current, current) == []
+    assert (
+        find_removed_objects(current, _index(_dataset("extras", ["color", "size"])))
+        == []
+    )
+    assert find_removed_objects(current, _index(_dataset("extras", ["size"]))) == [
+        "color"
+    ]
+    assert find_removed_objects(current, _index(_dataset("other", ["color"]))) == [
+        "extras",
+        "color (moved from extras to other)",
+    ]
+
+
+def test_field_moved_between_datasets_needs_the_remote_check():
+    current = _index(_dataset("extras", ["color"]), _dataset("other", ["size"]))
+    new = _index(_dataset("extras", ["size"]), _dataset("other", ["color"]))
+
+    assert find_removed_objects(current, new) == [
+        "color (moved from extras to other)",
+        "size (moved from other to extras)",
+    ]
+
+
+def test_changed_reference_sources_need_the_remote_check():
+    current = _index(_dataset("extras", ["color"]))
+    new = _index(_dataset("extras", ["color"], data_type="INT"))
+
+    assert find_removed_objects(current, new) == ["extras -> products"]
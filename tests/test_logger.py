@@ -0,0 +1,118 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import logging
+from typing import Any
+
+import pytest
+from utils.logger import (  # type: ignore
+    ErrorAggregator,
+    LevelFormatter,
+    error_aggregator,
+    flush_logging,
+    setup_logging,
+)
+from utils.validation import classify_row_error, validate_rows  # type: ignore
+
+
+def _record(level: int, message: str, **extra: Any) -> logging.LogRecord:
+    record = logging.LogRecord("test", level, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def _require_int(row: dict[str, Any]) -> int:
+    return int(row["value"])
+
+
+def test_level_formatter_colors_warnings_and_errors():
+    formatter = LevelFormatter()
+
+    info = formatter.format(_record(logging.INFO, "info", script="s.py"))
+    error = formatter.format(_record(logging.ERROR, "error", script="s.py"))
+
+    assert info.endswith("s.py [INFO] info")
+    assert error.startswith("\033[31m") and "s.py [ERROR] error" in error
+
+
+def test_error_aggregator_limits_errors_of_the_same_class():
+    aggregator = ErrorAggregator(max_shown=2)
+
+    passed = [
+        aggregator.filter(_record(logging.ERROR, "e", error_class="rows missing key"))
+        for _ in range(5)
+    ]
+    aggregator.count("rows missing key", 37_306)
+
+    assert passed == [True, True, False, False, False]
+    assert aggregator.filter(_record(logging.ERROR, "unrelated"))
+    assert aggregator.summary() == ["37,311 rows missing key, first 2 shown."]
+
+
+def test_error_aggregator_without_suppressed_errors_has_no_summary():
+    aggregator = ErrorAggregator(max_shown=2)
+
+    aggregator.filter(_record(logging.ERROR, "e", error_class="rows missing key"))
+
+    assert aggregator.summary() == []
+
+
+def test_setup_logging_writes_records_in_background(capsys):
+    setup_logging()
+    logger = logging.getLogger("test_logger")
+
+    for i in range(3):
+        logger.error(f"row {i} is invalid", extra={"error_class": "invalid rows"})
+    error_aggregator.count("invalid rows", 9)
+
+    flush_logging()
+    lines = capsys.readouterr().err.splitlines()
+
+    with capsys.disabled():
+        setup_logging()
+
+    assert [line for line in lines if "row" in line and "invalid" in line][:3]
+    assert any("12 invalid rows, first 3 shown." in line for line in lines)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_rows_formats_only_first_errors_per_chunk(workers, caplog):
+    rows = [{"value": "x"}] * 30 + [{"other": "1"}]
+
+    error_aggregator.reset()
+    with caplog.at_level(logging.ERROR):
+        validated = validate_rows(
+            rows, _require_int, workers=workers, chunk_size=len(rows)
+        )
+
+    assert validated == []
+    assert len(caplog.messages) == 11
+    assert caplog.messages[-1].startswith("Unable to load following row: \"{'other'")
+
+    # Errors beyond the first 10 of a chunk are only counted
+    not_logged = {
+        error_class: count - error_aggregator.shown.get(error_class, 0)
+        for error_class, count in error_aggregator.counts.items()
+    }
+    assert not_logged["rows failing with ValueError"] == 20
+    assert not_logged.get("rows missing key 'value'", 0) == 0
+    error_aggregator.reset()
+
+
+def test_classify_row_error_ignores_values():
+    errors = []
+    for value in ["x", "y"]:
+        try:
+            int(value)
+        except ValueError as e:
+            errors.append(e)
+
+    assert classify_row_error(errors[0]) == classify_row_error(errors[1])
+    assert classify_row_error(KeyError("ug_id")) == "rows missing key 'ug_id'"
@@ -0,0 +1,154 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+import json
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+import urllib3
+from fake_api_server import FakeApiConfig, FakeApiServer  # type: ignore
+from utils.metrics import (  # type: ignore
+    MetricsRegistry,
+    _instrument_urllib3,
+    endpoint_label,
+    merge_metrics,
+    metrics,
+    write_textfile,
+)
+
+
+@pytest.fixture
+def enabled_metrics() -> Iterator[MetricsRegistry]:
+    metrics.reset()
+    metrics.enabled = True
+    yield metrics
+    metrics.enabled = False
+    metrics.reset()
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry()
+
+    registry.inc("rows_read_total", 10)
+    registry.observe("api_request_duration_seconds", 0.1, endpoint="profile")
+
+    assert registry.to_dict("script")["metrics"] == {}
+
+
+def test_prometheus_textfile_format(tmp_path: Path):
+    registry = MetricsRegistry()
+    registry.enabled = True
+    registry.inc("rows_read_total", 1000)
+    registry.inc("api_requests_total", endpoint="profile", method="GET", status="200")
+    registry.observe("api_request_duration_seconds", 0.02, endpoint="profile")
+    registry.observe("api_request_duration_seconds", 20, endpoint="profile")
+
+    path = Path(tmp_path, "user_mgmt.prom")
+    write_textfile(path, registry.to_prometheus("user_mgmt"))
+    lines = path.read_text().splitlines()
+
+    assert "# TYPE gooddata_tools_rows_read_total counter" in lines
+    assert 'gooddata_tools_rows_read_total{script="user_mgmt"} 1000' in lines
+    assert (
+        "gooddata_tools_api_requests_total"
+        + '{script="user_mgmt",endpoint="profile",method="GET",status="200"} 1'
+    ) in lines
+    assert (
+        "gooddata_tools_api_request_duration_seconds_bucket"
+        + '{script="user_mgmt",endpoint="profile",le="0.025"} 1'
+    ) in lines
+    assert (
+        "gooddata_tools_api_request_duration_seconds_bucket"
+        + '{script="user_mgmt",endpoint="profile",le="+Inf"} 2'
+    ) in lines
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_json_document(enabled_metrics: MetricsRegistry):
+    enabled_metrics.inc("rows_read_total", 5)
+    enabled_metrics.inc("rows_rejected_total", 2)
+
+    document = json.loads(json.dumps(enabled_metrics.to_dict("user_mgmt")))
+
+    assert document["script"] == "user_mgmt"
+    assert document["metrics"]["rows_read_total"] == [{"labels": {}, "value": 5}]
+    assert enabled_metrics.value("rows_rejected_total") == 2
+
+
+def _shard_metrics(rows: int, requests: int, seconds: float) -> dict:
+    registry = MetricsRegistry()
+    registry.enabled = True
+    registry.inc("rows_read_total", 1000)
+    registry.inc("shard_rows_total", rows)
+    registry.inc("api_requests_total", requests, endpoint="profile")
+    registry.observe("api_request_duration_seconds", seconds, endpoint="profile")
+    registry.set("run_duration_seconds", seconds)
+    registry.set("rows_per_second", 1000 / seconds)
+    return registry.to_dict("user_mgmt")
+
+
+def test_metrics_of_shards_are_merged():
+    merged = merge_metrics([_shard_metrics(600, 6, 2.0), _shard_metrics(400, 4, 4.0)])
+
+    # Every shard reads the whole input, the job takes as long as its slowest shard
+    assert merged.value("rows_read_total") == 1000
+    assert merged.value("run_duration_seconds") == 4.0
+    assert merged.value("rows_per_second") == 250
+    assert merged.value("shard_rows_total") == 1000
+    assert merged.value("api_requests_total", endpoint="profile") == 10
+    histogram = merged.to_dict("user_mgmt")["metrics"]["api_request_duration_seconds"]
+    assert histogram[0]["count"] == 2
+    assert histogram[0]["buckets"]["2.5"] == 1
+
+
+def test_metrics_of_different_scripts_are_not_merged():
+    other = {"script": "backup", "metrics": {}}
+
+    with pytest.raises(ValueError, match="single script"):
+        merge_metrics([_shard_metrics(1, 1, 1.0), other])
+
+
+@pytest.mark.parametrize(
+    "url, label",
+    [
+        ("/api/v1/entities/users/user_1?include=userGroups", "entities/users"),
+        (
+            "/api/v1/entities/workspaces/ws/workspaceDataFilters",
+            "entities/workspaces/workspaceDataFilters",
+        ),
+        ("/api/v1/layout/workspaces/ws/permissions", "layout/workspaces/permissions"),
+        ("/api/v1/profile", "profile"),
+        ("/bucket/backups/org/ws/gooddata_layouts.zip", "storage"),
+    ],
+)
+def test_endpoint_label_drops_ids(url: str, label: str):
+    assert endpoint_label(url) == label
+
+
+def test_http_requests_and_retries_are_counted(enabled_metrics: MetricsRegistry):
+    _instrument_urllib3()
+
+    config = FakeApiConfig(rate_limit=1, retry_after=1)
+    with FakeApiServer(config) as server:
+        http = urllib3.PoolManager(
+            ca_certs=str(server.ca_bundle),
+            retries=urllib3.Retry(total=3, status_forcelist=[429], backoff_factor=0),
+        )
+        headers = {"Authorization": f"Bearer {config.token}"}
+        for _ in range(2):
+            http.request("GET", f"{server.url}/api/v1/profile", headers=headers)
+
+    assert enabled_metrics.value("api_requests_total", endpoint="profile") >= 3
+    assert enabled_metrics.value("api_retries_total", endpoint="profile") >= 1
+    assert enabled_metrics.value("http_bytes_received_total") > 0
@@ -0,0 +1,133 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+from pathlib import Path
+
+import pytest
+from fake_api_server import FakeApiServer  # type: ignore
+from gooddata_pipelines import (
+    EntityType,
+    PermissionIncrementalLoad,
+    PermissionProvisioner,
+)
+from permission_mgmt import _assignee_key, read_permissions_from_csv  # type: ignore
+from utils.args.schemas import PermissionArgs  # type: ignore
+from utils.sessions import connection_pools  # type: ignore
+from utils.state import StateStore, incremental_load_batches  # type: ignore
+from utils.utils import create_client  # type: ignore
+
+
+def _args(
+    path: Path, batch_size: int | None, validation_engine: str = "rows"
+) -> PermissionArgs:
+    return PermissionArgs(
+        perm_csv=path,
+        delimiter=",",
+        quotechar='"',
+        profile_config=Path("missing.yaml"),
+        profile="default",
+        http_pool_size=10,
+        shard=None,
+        batch_size=batch_size,
+        validation_workers=1,
+        validation_engine=validation_engine,
+        compact=False,
+        state_file=None,
+        checkpoint_file=None,
+        resume=False,
+        plan=False,
+        api_calls_per_second=None,
+    )
+
+
+def _write(tmp_path: Path, rows: list[str]) -> Path:
+    path = Path(tmp_path, "permissions.csv")
+    path.write_text(
+        "\n".join(["user_id,ug_id,ws_id,ws_permissions,is_active", *rows]) + "\n"
+    )
+    return path
+
+
+@pytest.mark.parametrize("engine", ["rows", "columnar"])
+def test_rows_of_an_assignee_stay_in_one_batch(tmp_path, engine):
+    path = _write(
+        tmp_path,
+        [
+            "u1,,ws1,VIEW,True",
+            "u1,,ws1,ANALYZE,True",
+            "u1,,ws1,MANAGE,True",
+            ",u1,ws1,VIEW,True",
+        ],
+    )
+
+    batches = read_permissions_from_csv(
+        _args(path, batch_size=2, validation_engine=engine)
+    )
+
+    assert [[row.permission for row in batch] for batch in batches] == [
+        ["VIEW", "ANALYZE", "MANAGE"],
+        ["VIEW"],
+    ]
+
+
+def test_unsorted_input_is_refused_with_batch_size(tmp_path):
+    path = _write(
+        tmp_path,
+        ["u1,,ws1,VIEW,True", "u2,,ws1,VIEW,True", "u1,,ws1,ANALYZE,True"],
+    )
+
+    assert len(list(read_permissions_from_csv(_args(path, batch_size=None)))) == 1
+    with pytest.raises(ValueError, match="not consecutive"):
+        read_permissions_from_csv(_args(path, batch_size=2))
+
+
+def _permission(name: str) -> PermissionIncrementalLoad:
+    return PermissionIncrementalLoad(
+        permission=name,
+        workspace_id="ws1",
+        entity_id="u1",
+        entity_type=EntityType.user,
+        is_active=True,
+    )
+
+
+def test_added_permission_keeps_the_unchanged_ones(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+):
+    with FakeApiServer() as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        server.organization.add_user("u1")
+        server.organization.add_workspace("ws1")
+        connection_pools.clear()
+        provisioner = create_client(
+            PermissionProvisioner, Path("missing.yaml"), "default"
+        )
+
+        runs = [["VIEW", "ANALYZE"], ["VIEW", "ANALYZE", "MANAGE"]]
+        for names in runs:
+            state = StateStore(Path(tmp_path, "state.db"), "permission", _assignee_key)
+            try:
+                incremental_load_batches(
+                    provisioner, [[_permission(name) for name in names]], state
+                )
+            finally:
+                state.close()
+        connection_pools.clear()
+
+        layout = server.organization.layouts[("ws1", "permissions")]
+        assert sorted(
+            permission["name"]
+            for permission in layout["permissions"]
+            if permission["assignee"]["id"] == "u1"
+        ) == ["ANALYZE", "MANAGE", "VIEW"]
@@ -0,0 +1,207 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fake_api_server import FakeApiServer  # type: ignore
+from gooddata_pipelines import (
+    EntityType,
+    PermissionIncrementalLoad,
+    PermissionProvisioner,
+    UserGroupIncrementalLoad,
+    UserGroupProvisioner,
+    UserIncrementalLoad,
+    UserProvisioner,
+    WorkspaceIncrementalLoad,
+    WorkspaceProvisioner,
+)
+from permission_mgmt import plan_permissions  # type: ignore
+from user_group_mgmt import plan_user_groups  # type: ignore
+from user_mgmt import plan_users  # type: ignore
+from utils.plan import Plan, run_plan  # type: ignore
+from utils.state import StateStore  # type: ignore
+from utils.utils import create_client  # type: ignore
+from workspace_mgmt import _workspace_key, plan_workspaces  # type: ignore
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeApiServer]:
+    with FakeApiServer() as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        yield server
+
+
+def _user(user_id: str, is_active: bool = True) -> UserIncrementalLoad:
+    return UserIncrementalLoad(
+        user_id=user_id,
+        firstname="Jane",
+        lastname="Doe",
+        email=None,
+        auth_id=None,
+        user_groups=["ug_1"],
+        is_active=is_active,
+    )
+
+
+def _permission(
+    workspace_id: str, entity_id: str, is_active: bool = True
+) -> PermissionIncrementalLoad:
+    return PermissionIncrementalLoad(
+        permission="VIEW",
+        workspace_id=workspace_id,
+        entity_id=entity_id,
+        entity_type=EntityType.user,
+        is_active=is_active,
+    )
+
+
+def _requests_of_run(server: FakeApiServer, provisioner, batches) -> int:
+    server.stats.reset()
+    for batch in batches:
+        provisioner.incremental_load(batch)
+    return len(server.stats.records)
+
+
+def test_estimated_duration_uses_the_slower_of_latency_and_rate():
+    plan = Plan("user", api_calls=100, latency_seconds=0.05)
+
+    assert plan.estimated_seconds() == pytest.approx(5)
+    assert plan.estimated_seconds(calls_per_second=10) == pytest.approx(10)
+    assert plan.format(calls_per_second=10)[-1].split()[2] == "0:00:10"
+
+
+def test_plan_of_users_changes_nothing(server: FakeApiServer):
+    organization = server.organization
+    organization.add_user_group("ug_1")
+    organization.add_user("same", ["ug_1"], firstname="Jane", lastname="Doe")
+    organization.add_user("changed", ["ug_1"], firstname="John", lastname="Doe")
+    organization.add_user("inactive")
+    batches = [
+        [_user("same"), _user("changed"), _user("new")],
+        [_user("inactive", is_active=False), _user("missing", is_active=False)],
+    ]
+    provisioner = create_client(UserProvisioner, Path("missing.yaml"), "default")
+
+    server.stats.reset()
+    plan = run_plan(provisioner, plan_users, "user", batches)
+
+    assert all(record.method == "GET" for record in server.stats.records)
+    assert set(organization.entities["users"]) == {
+        "admin",
+        "same",
+        "changed",
+        "inactive",
+    }
+    assert plan.operations == {
+        "unchanged user": 1,
+        "update user": 1,
+        "create user": 1,
+        "delete user": 1,
+        "skip delete of missing user": 1,
+    }
+    assert plan.rows == 5
+    assert plan.api_calls == _requests_of_run(server, provisioner, batches)
+
+
+def test_plan_of_user_groups(server: FakeApiServer):
+    server.organization.add_user_group("ug_1")
+    server.organization.add_user_group("ug_2", name="Old name")
+    batch = [
+        UserGroupIncrementalLoad.model_validate(
+            {
+                "user_group_id": user_group_id,
+                "user_group_name": user_group_id,
+                "parent_user_groups": [],
+                "is_active": is_active,
+            }
+        )
+        for user_group_id, is_active in [
+            ("ug_1", True),
+            ("ug_2", True),
+            ("ug_3", True),
+            ("ug_4", False),
+        ]
+    ]
+    provisioner = create_client(UserGroupProvisioner, Path("missing.yaml"), "default")
+
+    plan = run_plan(provisioner, plan_user_groups, "user group", [batch])
+
+    assert plan.operations == {
+        "unchanged user group": 1,
+        "update user group": 1,
+        "create user group": 1,
+        "skip delete of missing user group": 1,
+    }
+    assert plan.api_calls == _requests_of_run(server, provisioner, [batch])
+
+
+def test_plan_of_permissions_counts_grants_and_revokes(server: FakeApiServer):
+    organization = server.organization
+    organization.add_workspace("ws_1")
+    organization.add_workspace("ws_2")
+    organization.add_user("user_1")
+    organization.add_user("user_2")
+    organization.layouts["ws_1", "permissions"] = {
+        "permissions": [{"assignee": {"id": "user_2", "type": "user"}, "name": "VIEW"}]
+    }
+    batch = [
+        _permission("ws_1", "user_1"),
+        _permission("ws_1", "user_2", is_active=False),
+        _permission("ws_2", "user_2"),
+        _permission("ws_3", "user_1"),
+        _permission("ws_1", "user_3"),
+    ]
+    provisioner = create_client(PermissionProvisioner, Path("missing.yaml"), "default")
+
+    plan = run_plan(provisioner, plan_permissions, "permission", [batch])
+
+    assert organization.layout("ws_2", "permissions")["permissions"] == []
+    assert plan.operations == {
+        "grant permission": 2,
+        "revoke permission": 1,
+        "update workspace permissions": 2,
+        "skip permission in missing workspace": 1,
+        "skip permission of missing assignee": 1,
+    }
+    assert plan.api_calls == _requests_of_run(server, provisioner, [batch])
+
+
+def test_plan_of_workspaces_skips_rows_unchanged_in_state(
+    server: FakeApiServer, tmp_path: Path
+):
+    server.organization.add_workspace("parent")
+    server.organization.add_workspace("ws_1", "parent")
+    batch = [
+        WorkspaceIncrementalLoad(
+            parent_id="parent",
+            workspace_id=workspace_id,
+            workspace_name=workspace_id,
+            workspace_data_filter_id=None,
+            workspace_data_filter_values=None,
+            is_active=True,
+        )
+        for workspace_id in ["ws_1", "ws_2", "ws_3"]
+    ]
+    state_store = StateStore(Path(tmp_path, "state.db"), "workspace", _workspace_key)
+    state_store.record(state_store.diff(batch[:1]))
+    provisioner = create_client(WorkspaceProvisioner, Path("missing.yaml"), "default")
+
+    plan = run_plan(provisioner, plan_workspaces, "workspace", [batch], state_store)
+
+    assert plan.unchanged_rows == 1
+    assert plan.operations == {"create workspace": 2}
+    assert plan.api_calls == _requests_of_run(server, provisioner, [batch[1:]])
+    state_store.close()
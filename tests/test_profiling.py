@@ -0,0 +1,99 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from utils.profiling import PhaseTimer  # type: ignore
+from utils.utils import iter_csv_file  # type: ignore
+
+
+def test_disabled_timer_records_nothing():
+    timer = PhaseTimer()
+
+    with timer.phase("validation"):
+        pass
+    assert list(timer.iterate("csv_read", [1, 2])) == [1, 2]
+    timer.record("argument_parsing", 1.0)
+
+    assert timer.report("script.py").phases == []
+
+
+def test_nested_phase_pauses_the_outer_one():
+    timer = PhaseTimer()
+    timer.enable(trace_memory=False)
+
+    with timer.phase("validation"):
+        time.sleep(0.02)
+        with timer.phase("csv_read"):
+            time.sleep(0.05)
+
+    phases = {p.name: p for p in timer.report("script.py").phases}
+
+    assert 0.02 <= phases["validation"].seconds < 0.05
+    assert phases["csv_read"].seconds >= 0.05
+    assert phases["validation"].calls == phases["csv_read"].calls == 1
+
+
+def test_iterate_times_each_item(tmp_path: Path):
+    path = Path(tmp_path, "input.csv")
+    path.write_text("id\n1\n2\n3\n")
+
+    timer = PhaseTimer()
+    timer.enable(trace_memory=False)
+
+    def slow_rows():
+        for row in iter_csv_file(path):
+            time.sleep(0.01)
+            yield row
+
+    with timer.phase("validation"):
+        rows = list(timer.iterate("csv_read", slow_rows()))
+
+    phases = {p.name: p for p in timer.report("script.py").phases}
+
+    assert [row["id"] for row in rows] == ["1", "2", "3"]
+    assert phases["csv_read"].calls == 4
+    assert phases["csv_read"].seconds >= 0.03
+    assert phases["validation"].seconds < 0.03
+
+
+def test_phase_records_exceptions_and_peak_memory():
+    timer = PhaseTimer()
+    timer.enable(trace_memory=True)
+
+    with pytest.raises(ValueError):
+        with timer.phase("provisioning"):
+            data = bytearray(4 * 1024 * 1024)
+            del data
+            raise ValueError()
+
+    (phase,) = timer.report("script.py").phases
+    tracemalloc.stop()
+
+    assert phase.calls == 1
+    assert phase.peak_memory_mib is not None and phase.peak_memory_mib >= 4
+
+
+def test_report_serializes_unattributed_time():
+    timer = PhaseTimer()
+    timer.enable(trace_memory=False)
+    timer.record("argument_parsing", 0.0)
+
+    report = timer.report("script.py")
+    document = json.loads(report.to_json())
+
+    assert document["script"] == "script.py"
+    assert document["phases"][0]["name"] == "argument_parsing"
+    assert document["unattributed_seconds"] == pytest.approx(report.total_seconds)
+    assert report.format()[-1].startswith("total")
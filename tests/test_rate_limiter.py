@@ -0,0 +1,130 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fake_api_server import FakeApiConfig, FakeApiServer  # type: ignore
+from gooddata_pipelines import UserProvisioner
+from utils.rate_limiter import (  # type: ignore
+    AdaptiveRateLimiter,
+    TokenBucket,
+    get_shared_rate_limiter,
+    start_adaptive_rate,
+    stop_adaptive_rate,
+)
+from utils.sessions import connection_pools  # type: ignore
+from utils.utils import create_client  # type: ignore
+
+
+def test_token_bucket_limits_rate_across_threads():
+    limiter = TokenBucket(calls_per_second=50)
+
+    def call(_: int) -> None:
+        with limiter:
+            pass
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        list(executor.map(call, range(11)))
+    elapsed = time.monotonic() - start
+
+    # The first call takes the initial token, the other ten wait 20 ms each
+    assert elapsed >= 0.19
+
+
+def test_token_bucket_allows_burst():
+    limiter = TokenBucket(calls_per_second=1, burst=3)
+
+    assert [limiter.wait_if_needed() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_shared_rate_limiter_is_shared():
+    assert get_shared_rate_limiter(3.0) is get_shared_rate_limiter(3.0)
+    assert get_shared_rate_limiter(3.0) is not get_shared_rate_limiter(4.0)
+
+
+def test_adaptive_rate_ramps_up_within_bounds():
+    limiter = AdaptiveRateLimiter(floor=2, ceiling=10)
+
+    # Slow start doubles the rate every round of healthy responses
+    for _ in range(2):
+        limiter.record("entities/users", 200, 0.01)
+    assert limiter.calls_per_second == 4
+    for _ in range(20):
+        limiter.record("entities/users", 200, 0.01)
+    assert limiter.calls_per_second == 10
+
+    limiter.record("entities/users", 429, 0.01)
+    assert limiter.calls_per_second == 5
+
+    # Then it grows by one call per second every round
+    for _ in range(5):
+        limiter.record("entities/users", 200, 0.01)
+    assert limiter.calls_per_second == pytest.approx(6, abs=0.1)
+
+
+def test_adaptive_rate_backs_off_once_per_burst_of_errors():
+    limiter = AdaptiveRateLimiter(floor=1, ceiling=100)
+    limiter.calls_per_second = 40
+
+    limiter.record("entities/users", 503, 0.01)
+    # Sent before the first back off, e.g. by concurrent workers
+    limiter.record("entities/users", 429, 1.0)
+    limiter.record("entities/users", None, 1.0)
+    assert (limiter.calls_per_second, limiter.decreases) == (20, 1)
+
+    for _ in range(10):
+        time.sleep(0.001)
+        limiter.record("entities/users", 429, 0)
+    assert limiter.calls_per_second == 1
+
+
+def test_adaptive_rate_backs_off_on_rising_latency():
+    limiter = AdaptiveRateLimiter(floor=1, ceiling=100)
+    limiter.calls_per_second = 40
+    limiter.slow_start = False
+
+    for _ in range(10):
+        limiter.record("entities/users", 200, 0.01)
+        # Latency of other endpoints is judged separately
+        limiter.record("layout/workspaces", 200, 0.5)
+    assert limiter.decreases == 0
+
+    for _ in range(10):
+        limiter.record("entities/users", 200, 0.2)
+    assert limiter.decreases == 1
+    assert limiter.calls_per_second < 40
+
+
+def test_adaptive_rate_keeps_below_the_rate_limit_of_the_api(monkeypatch):
+    config = FakeApiConfig(rate_limit=40)
+    with FakeApiServer(config=config) as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        connection_pools.clear()
+        limiter = start_adaptive_rate(20, 1000)
+        try:
+            provisioner = create_client(
+                UserProvisioner, Path("missing.yaml"), "default"
+            )
+            statuses = [provisioner._api.get_profile().status_code for _ in range(80)]
+        finally:
+            stop_adaptive_rate()
+            connection_pools.clear()
+
+    assert limiter.decreases >= 1
+    assert limiter.calls_per_second <= 80
+    assert statuses.count(429) < 10
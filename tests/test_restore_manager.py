@@ -0,0 +1,108 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import threading
+from pathlib import Path
+
+from gooddata_pipelines import WorkspaceToRestore
+from gooddata_pipelines.logger.logger import LogObserver
+from utils.checkpoint import CheckpointJournal  # type: ignore
+from utils.restore_manager import ExtendedRestoreManager  # type: ignore
+from utils.scheduling import TaskStatus  # type: ignore
+
+PARENT_IDS = {
+    "parent": None,
+    "child": "parent",
+    "grandchild": "child",
+    "other_child": "parent",
+    "unrelated": None,
+}
+
+
+class FakeRestoreManager(ExtendedRestoreManager):
+    """Restore manager recording the restores instead of calling the API."""
+
+    def __init__(self, max_workers: int, failing_ids: set[str]) -> None:
+        self.max_workers = max_workers
+        self.logger = LogObserver()
+        self.failing_ids = failing_ids
+        self.restored: list[str] = []
+        self._lock = threading.Lock()
+
+    def _get_parent_ids(self) -> dict[str, str | None]:
+        return PARENT_IDS
+
+    def _restore_backup(
+        self, workspace_to_restore: WorkspaceToRestore, tempdir_path: Path
+    ) -> None:
+        if workspace_to_restore.id in self.failing_ids:
+            self.logger.error(f"Failed to restore {workspace_to_restore.id}.")
+            return
+        with self._lock:
+            self.restored.append(workspace_to_restore.id)
+
+
+def _workspaces(*ids: str) -> list[WorkspaceToRestore]:
+    return [
+        WorkspaceToRestore(id=workspace_id, path=f"org/{workspace_id}/backup")
+        for workspace_id in ids
+    ]
+
+
+def test_parents_are_restored_before_children():
+    manager = FakeRestoreManager(max_workers=4, failing_ids=set())
+
+    report = manager.restore_workspaces(
+        _workspaces("grandchild", "child", "unrelated", "parent")
+    )
+
+    assert manager.restored.index("parent") < manager.restored.index("child")
+    assert manager.restored.index("child") < manager.restored.index("grandchild")
+    assert [result.status for result in report.results] == [TaskStatus.SUCCEEDED] * 4
+
+
+def test_failures_are_reported_and_children_skipped():
+    manager = FakeRestoreManager(max_workers=2, failing_ids={"child"})
+
+    report = manager.restore_workspaces(
+        _workspaces("parent", "child", "grandchild", "other_child")
+    )
+
+    assert [(result.workspace_id, result.status) for result in report.results] == [
+        ("parent", TaskStatus.SUCCEEDED),
+        ("child", TaskStatus.FAILED),
+        ("grandchild", TaskStatus.SKIPPED),
+        ("other_child", TaskStatus.SUCCEEDED),
+    ]
+    assert report.results[1].errors == ["Failed to restore child."]
+    assert report.summary == "Restored 2 of 4 workspaces. Failed: 1, skipped: 1."
+
+
+def test_missing_parent_in_input_does_not_block_children():
+    manager = FakeRestoreManager(max_workers=2, failing_ids=set())
+
+    manager.restore_workspaces(_workspaces("grandchild", "other_child"))
+
+    assert sorted(manager.restored) == ["grandchild", "other_child"]
+
+
+def test_restored_workspaces_are_skipped_on_resume(tmp_path):
+    path = Path(tmp_path, "checkpoint.db")
+    workspaces = _workspaces("parent", "child", "grandchild")
+    manager = FakeRestoreManager(max_workers=2, failing_ids={"child"})
+    manager.enable_checkpoint(CheckpointJournal(path, "restore", "input", False))
+    manager.restore_workspaces(workspaces)
+
+    manager = FakeRestoreManager(max_workers=2, failing_ids=set())
+    manager.enable_checkpoint(CheckpointJournal(path, "restore", "input", True))
+    report = manager.restore_workspaces(workspaces)
+
+    assert manager.restored == ["child", "grandchild"]
+    assert [result.status for result in report.results] == [TaskStatus.SUCCEEDED] * 3
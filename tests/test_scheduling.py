@@ -0,0 +1,90 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import threading
+
+import pytest
+from utils.scheduling import (  # type: ignore
+    DependencyCycleError,
+    TaskStatus,
+    dependency_levels,
+    find_unresolvable,
+    run_in_dependency_order,
+)
+
+
+def test_dependencies_run_first():
+    order: list[str] = []
+    lock = threading.Lock()
+
+    def run(key: str) -> None:
+        with lock:
+            order.append(key)
+
+    statuses = run_in_dependency_order(
+        {"child": ["parent"], "grandchild": ["child"], "parent": []},
+        run,
+        max_workers=4,
+    )
+
+    assert order == ["parent", "child", "grandchild"]
+    assert set(statuses.values()) == {TaskStatus.SUCCEEDED}
+
+
+def test_independent_tasks_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def run(key: str) -> None:
+        barrier.wait()
+
+    statuses = run_in_dependency_order({"a": [], "b": [], "c": []}, run, max_workers=3)
+
+    assert set(statuses.values()) == {TaskStatus.SUCCEEDED}
+
+
+def test_dependents_of_failed_task_are_skipped():
+    def run(key: str) -> None:
+        if key == "parent":
+            raise RuntimeError("failed")
+
+    statuses = run_in_dependency_order(
+        {"parent": [], "child": ["parent"], "grandchild": ["child"], "other": []},
+        run,
+        max_workers=2,
+    )
+
+    assert statuses == {
+        "parent": TaskStatus.FAILED,
+        "child": TaskStatus.SKIPPED,
+        "grandchild": TaskStatus.SKIPPED,
+        "other": TaskStatus.SUCCEEDED,
+    }
+
+
+def test_unknown_dependencies_are_ignored():
+    statuses = run_in_dependency_order({"a": ["not_a_task"]}, lambda _: None)
+
+    assert statuses == {"a": TaskStatus.SUCCEEDED}
+
+
+def test_cycles_are_detected():
+    dependencies: dict[str, list[str]] = {"a": ["b"], "b": ["a"], "c": ["a"], "d": []}
+
+    assert find_unresolvable(dependencies) == {"a", "b", "c"}
+    with pytest.raises(DependencyCycleError, match="a, b, c"):
+        run_in_dependency_order(dependencies, lambda _: None)
+
+
+def test_dependency_levels():
+    levels = dependency_levels(
+        {"root": [], "a": ["root"], "b": ["root", "a"], "c": ["c"], "d": ["external"]}
+    )
+
+    assert levels == {"root": 0, "a": 1, "b": 2, "d": 0}
@@ -0,0 +1,62 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fake_api_server import FakeApiServer  # type: ignore
+from gooddata_pipelines import UserGroupProvisioner, UserProvisioner
+from utils.sessions import connection_pools  # type: ignore
+from utils.utils import create_client  # type: ignore
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeApiServer]:
+    connection_pools.clear()
+    with FakeApiServer() as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        yield server
+    connection_pools.clear()
+
+
+def test_clients_of_a_host_share_connections(server: FakeApiServer):
+    users = create_client(UserProvisioner, Path("missing.yaml"), "default")
+    user_groups = create_client(
+        UserGroupProvisioner, Path("missing.yaml"), "default", pool_size=4
+    )
+
+    for _ in range(3):
+        users._api.get_profile()
+        user_groups._api.get_profile()
+        users._api._sdk.catalog_user.list_users()
+        user_groups._api._sdk.catalog_user.list_user_groups()
+
+    [stats] = connection_pools.stats()
+    assert users._api._sdk is user_groups._api._sdk
+    assert (stats.clients, stats.pool_size) == (2, 10)
+    assert stats.requests == len(server.stats.records) == 12
+    # One connection for the direct API calls and one for the SDK
+    assert stats.connections == 2
+
+
+def test_clients_of_other_tokens_do_not_share_connections(
+    server: FakeApiServer, monkeypatch: pytest.MonkeyPatch
+):
+    users = create_client(UserProvisioner, Path("missing.yaml"), "default")
+    monkeypatch.setenv("GDC_AUTH_TOKEN", "other-token")
+    other_users = create_client(UserProvisioner, Path("missing.yaml"), "default")
+
+    assert users._api._sdk is not other_users._api._sdk
+    assert [stats.clients for stats in connection_pools.stats()] == [1, 1]
@@ -0,0 +1,52 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import pytest
+from utils.sharding import Shard, shard_batches, shard_of  # type: ignore
+
+
+def test_shards_are_disjoint_and_complete():
+    keys = [f"ws_{i}" for i in range(1000)]
+    batches = [keys[i : i + 100] for i in range(0, len(keys), 100)]
+
+    shards = [
+        [
+            key
+            for batch in shard_batches(batches, Shard(i, 4), str, "x")
+            for key in batch
+        ]
+        for i in range(1, 5)
+    ]
+
+    assert sorted(key for shard in shards for key in shard) == sorted(keys)
+    assert all(len(shard) > 150 for shard in shards)
+
+
+def test_shard_is_stable():
+    # Guards the assignment of existing shards against changes of the hash
+    assert [shard_of(f"ws_{i}", 8) for i in range(8)] == [2, 8, 7, 4, 1, 6, 5, 1]
+    assert shard_of("ws_1", 1) == 1
+
+
+def test_without_shard_batches_are_unchanged():
+    batches = [["a", "b"], ["c"]]
+
+    assert list(shard_batches(batches, None, str, "x")) == batches
+
+
+@pytest.mark.parametrize("value", ["2", "0/4", "5/4", "a/4", "1/0", "-1/4"])
+def test_invalid_shard_is_rejected(value: str):
+    with pytest.raises(ValueError, match="Invalid shard"):
+        Shard.parse(value)
+
+
+def test_shard_is_parsed():
+    assert Shard.parse("2/8") == Shard(2, 8)
+    assert str(Shard(2, 8)) == "2/8"
@@ -0,0 +1,161 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import threading
+import time
+
+from gooddata_pipelines import WorkspaceIncrementalLoad
+from gooddata_pipelines.logger.logger import LogObserver
+from utils.state import StateStore, incremental_load_batches  # type: ignore
+
+
+def _workspace(
+    workspace_id: str, name: str, wdf_id: str | None = None
+) -> WorkspaceIncrementalLoad:
+    return WorkspaceIncrementalLoad(
+        parent_id="parent",
+        workspace_id=workspace_id,
+        workspace_name=name,
+        workspace_data_filter_id=wdf_id,
+        workspace_data_filter_values=["value"] if wdf_id else None,
+        is_active=True,
+    )
+
+
+def _key(workspace: WorkspaceIncrementalLoad) -> tuple[str, ...]:
+    return (workspace.workspace_id,)
+
+
+class FakeProvisioner:
+    def __init__(self, failing_ids: set[str] | None = None) -> None:
+        self.logger = LogObserver()
+        self.failing_ids = failing_ids or set()
+        self.loads: list[list[str]] = []
+
+    def incremental_load(self, rows: list[WorkspaceIncrementalLoad]) -> None:
+        self.loads.append([row.workspace_id for row in rows])
+        for row in rows:
+            if row.workspace_id in self.failing_ids:
+                self.logger.error(f"Failed to provision {row.workspace_id}")
+
+
+class SlowProvisioner(FakeProvisioner):
+    def __init__(self, failing_ids: set[str] | None = None) -> None:
+        super().__init__(failing_ids)
+        self.started = threading.Event()
+
+    def incremental_load(self, rows: list[WorkspaceIncrementalLoad]) -> None:
+        self.started.set()
+        time.sleep(0.2)
+        super().incremental_load(rows)
+
+
+def _run(tmp_path, batches, provisioner=None, prune=True) -> FakeProvisioner:
+    provisioner = provisioner or FakeProvisioner()
+    state_store = StateStore(tmp_path / "state.db", "workspace", _key)
+    try:
+        incremental_load_batches(provisioner, batches, state_store, prune=prune)
+    finally:
+        state_store.close()
+    return provisioner
+
+
+def test_only_changed_rows_are_sent(tmp_path):
+    _run(tmp_path, [[_workspace("ws_1", "One"), _workspace("ws_2", "Two")]])
+
+    provisioner = _run(
+        tmp_path,
+        [[_workspace("ws_1", "One"), _workspace("ws_2", "Renamed")]],
+    )
+
+    assert provisioner.loads == [["ws_2"]]
+
+
+def test_unchanged_input_sends_nothing(tmp_path):
+    batches = [[_workspace("ws_1", "One")], [_workspace("ws_2", "Two")]]
+    _run(tmp_path, batches)
+
+    provisioner = _run(tmp_path, batches)
+
+    assert provisioner.loads == []
+
+
+def test_rows_with_same_key_are_sent_together(tmp_path):
+    _run(
+        tmp_path,
+        [[_workspace("ws_1", "One", "wdf_1"), _workspace("ws_1", "One", "wdf_2")]],
+    )
+
+    provisioner = _run(
+        tmp_path,
+        [[_workspace("ws_1", "One", "wdf_1"), _workspace("ws_1", "One", "wdf_3")]],
+    )
+
+    assert provisioner.loads == [["ws_1", "ws_1"]]
+
+
+def test_failed_batch_is_sent_again(tmp_path):
+    batches = [[_workspace("ws_1", "One")], [_workspace("ws_2", "Two")]]
+    _run(tmp_path, batches, FakeProvisioner(failing_ids={"ws_2"}))
+
+    provisioner = _run(tmp_path, batches)
+
+    assert provisioner.loads == [["ws_2"]]
+
+
+def test_rows_missing_from_input_are_forgotten(tmp_path):
+    _run(tmp_path, [[_workspace("ws_1", "One"), _workspace("ws_2", "Two")]])
+    _run(tmp_path, [[_workspace("ws_1", "One")]])
+
+    provisioner = _run(
+        tmp_path, [[_workspace("ws_1", "One"), _workspace("ws_2", "Two")]]
+    )
+
+    assert provisioner.loads == [["ws_2"]]
+
+
+def test_shards_sharing_a_state_file_keep_each_others_rows(tmp_path):
+    shards = [[[_workspace("ws_1", "One")]], [[_workspace("ws_2", "Two")]]]
+    for batches in shards:
+        _run(tmp_path, batches, prune=False)
+
+    for batches in shards:
+        assert _run(tmp_path, batches, prune=False).loads == []
+
+
+def test_entity_types_are_tracked_separately(tmp_path):
+    _run(tmp_path, [[_workspace("ws_1", "One")]])
+
+    other_store = StateStore(tmp_path / "state.db", "other", _key)
+    try:
+        delta = other_store.diff([_workspace("ws_1", "One")])
+    finally:
+        other_store.close()
+
+    assert [row.workspace_id for row in delta.rows] == ["ws_1"]
+
+
+def test_errors_of_a_concurrent_load_are_not_counted(tmp_path):
+    for name in ("failing", "succeeding"):
+        (tmp_path / name).mkdir()
+    failing = SlowProvisioner({"ws_1"})
+    thread = threading.Thread(
+        target=_run,
+        args=(tmp_path / "failing", [[_workspace("ws_1", "One")]], failing),
+    )
+    thread.start()
+    failing.started.wait(timeout=5)
+
+    batches = [[_workspace("ws_2", "Two")]]
+    _run(tmp_path / "succeeding", batches, SlowProvisioner())
+    thread.join()
+
+    assert _run(tmp_path / "succeeding", batches).loads == []
+    assert _run(tmp_path / "failing", [[_workspace("ws_1", "One")]]).loads == [["ws_1"]]
@@ -0,0 +1,93 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+)
+
+
+from pathlib import Path
+
+import pytest
+from fake_api_server import FakeApiServer  # type: ignore
+from gooddata_pipelines import UserDataFilterFullLoad
+from utils.sessions import connection_pools  # type: ignore
+from utils.user_data_filter_provisioner import (  # type: ignore
+    ExtendedUserDataFilterProvisioner,
+)
+from utils.utils import create_client  # type: ignore
+
+MAQL_COLUMN = "{label/client_id}"
+
+
+def _user_data_filter(user_id: str, maql: str) -> dict:
+    return {
+        "id": user_id,
+        "type": "userDataFilter",
+        "attributes": {"maql": maql},
+        "relationships": {"user": {"data": {"id": user_id, "type": "user"}}},
+    }
+
+
+def test_only_changed_user_data_filters_are_overwritten(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    rows = [
+        UserDataFilterFullLoad(
+            workspace_id=workspace_id, udf_id=udf_id, udf_value=value
+        )
+        for workspace_id, udf_id, value in [
+            ("ws_same", "user_1", "client_b"),
+            ("ws_same", "user_1", "client_a"),
+            ("ws_changed", "user_1", "client_c"),
+            ("ws_new", "user_1", "client_a"),
+        ]
+    ]
+
+    with FakeApiServer() as server:
+        for name, value in server.environment().items():
+            monkeypatch.setenv(name, value)
+        for workspace_id in ("ws_same", "ws_changed", "ws_new"):
+            server.organization.add_workspace(workspace_id)
+        server.organization.put(
+            "workspaces/ws_same/userDataFilters",
+            _user_data_filter("user_1", f'{MAQL_COLUMN} IN ("client_a", "client_b")'),
+        )
+        server.organization.put(
+            "workspaces/ws_changed/userDataFilters",
+            _user_data_filter("user_1", f'{MAQL_COLUMN} IN ("client_a")'),
+        )
+        server.organization.put(
+            "workspaces/ws_changed/userDataFilters",
+            _user_data_filter("user_2", f'{MAQL_COLUMN} IN ("client_a")'),
+        )
+        connection_pools.clear()
+        provisioner = create_client(
+            ExtendedUserDataFilterProvisioner, Path("missing.yaml"), "default"
+        )
+        provisioner.set_ldm_column_name("client_id")
+        provisioner.set_maql_column_name(MAQL_COLUMN)
+        provisioner.set_max_workers(3)
+
+        server.stats.reset()
+        provisioner.full_load(rows)
+        connection_pools.clear()
+
+        entities = server.organization.entities
+        writes = [r for r in server.stats.records if r.method != "GET"]
+
+    assert (
+        entities["workspaces/ws_changed/userDataFilters"]["user_1"]["attributes"][
+            "maql"
+        ]
+        == f'{MAQL_COLUMN} IN ("client_c")'
+    )
+    assert "user_2" not in entities["workspaces/ws_changed/userDataFilters"]
+    assert "user_1" in entities["workspaces/ws_new/userDataFilters"]
+    # Update and delete in ws_changed, create in ws_new, nothing in ws_same
+    assert len(writes) == 3
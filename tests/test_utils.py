@@ -0,0 +1,59 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+from pathlib import Path
+from typing import Any, Iterable
+
+import pytest
+from utils.utils import (  # type: ignore
+    batched,
+    iter_csv_file,
+    iter_validated_batches,
+    read_csv_file_to_dict,
+)
+
+PERMISSIONS_CSV = Path("tests/data/csv/permissions.csv")
+
+
+def _validate_ids(rows: Iterable[dict[str, Any]]) -> list[str]:
+    return [row["ws_id"] for row in rows]
+
+
+def test_iter_csv_file_is_lazy_and_matches_eager_read():
+    rows = iter_csv_file(PERMISSIONS_CSV)
+
+    assert not isinstance(rows, list)
+    assert list(rows) == read_csv_file_to_dict(PERMISSIONS_CSV)
+
+
+def test_batched_splits_into_bounded_lists():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
+
+
+def test_batched_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        list(batched(range(5), 0))
+
+
+def test_iter_validated_batches_without_batch_size_yields_single_batch():
+    batches = list(
+        iter_validated_batches(iter_csv_file(PERMISSIONS_CSV), _validate_ids)
+    )
+
+    assert batches == [["ws_id_1", "ws_id_1", "ws_id_1", "ws_id_2", "ws_id_2"]]
+
+
+def test_iter_validated_batches_with_batch_size():
+    batches = list(
+        iter_validated_batches(iter_csv_file(PERMISSIONS_CSV), _validate_ids, 2)
+    )
+
+    assert batches == [["ws_id_1", "ws_id_1"], ["ws_id_1", "ws_id_2"], ["ws_id_2"]]
@@ -0,0 +1,97 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+import logging
+from pathlib import Path
+from typing import Any
+
+import pytest
+from permission_mgmt import validate_permission_data  # type: ignore
+from utils.utils import read_csv_file_to_dict  # type: ignore
+from utils.validation import (  # type: ignore
+    RowValidationError,
+    get_worker_pool,
+    validate_rows,
+)
+
+PERMISSIONS_CSV = Path("tests/data/csv/permissions.csv")
+
+
+def _to_int(row: dict[str, Any]) -> int:
+    return int(row["value"])
+
+
+def _rows(values: list[str]) -> list[dict[str, Any]]:
+    return [{"value": value} for value in values]
+
+
+def _worker_pid(row: dict[str, Any]) -> int:
+    return os.getpid()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_rows_preserves_order(workers):
+    rows = _rows([str(i) for i in range(50)])
+
+    validated = validate_rows(rows, _to_int, workers=workers, chunk_size=7)
+
+    assert validated == list(range(50))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_rows_logs_and_skips_invalid_rows(workers, caplog):
+    rows = _rows(["1", "x", "3"])
+
+    with caplog.at_level(logging.ERROR):
+        validated = validate_rows(rows, _to_int, workers=workers, chunk_size=1)
+
+    assert validated == [1, 3]
+    assert caplog.messages == [
+        "Unable to load following row: \"{'value': 'x'}\". "
+        + "Error: \"invalid literal for int() with base 10: 'x'\""
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_rows_raises_on_error(workers):
+    with pytest.raises(RowValidationError, match="Unable to load following row"):
+        validate_rows(_rows(["1", "x"]), _to_int, raise_on_error=True, workers=workers)
+
+
+def test_batches_are_validated_by_the_same_worker_processes():
+    pids = set()
+    for _ in range(3):
+        pids.update(
+            validate_rows(_rows(["1"] * 20), _worker_pid, workers=2, chunk_size=1)
+        )
+
+    assert get_worker_pool(2) is get_worker_pool(2)
+    assert os.getpid() not in pids
+    assert len(pids) <= 2
+
+
+def test_validate_permission_data_error_messages(caplog):
+    raw_permissions = read_csv_file_to_dict(PERMISSIONS_CSV)
+    raw_permissions.append({"user_id": "user_3"})
+
+    with caplog.at_level(logging.ERROR):
+        permissions = validate_permission_data(raw_permissions, workers=2)
+
+    assert [permission.entity_id for permission in permissions] == [
+        "user_1",
+        "user_1",
+        "ug_1",
+        "ug_2",
+    ]
+    assert len(caplog.messages) == 2
+    assert "mutually exclusive" in caplog.messages[0]
+    assert caplog.messages[1] == (
+        "Missing key in following row: {'user_id': 'user_3'}. Error: 'ug_id'"
+    )
@@ -0,0 +1,85 @@
+# (C) 2025 GoodData Corporation
+
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../scripts"))
+)
+
+
+from pathlib import Path
+
+import pytest
+from utils.args.schemas import WorkspaceArgs  # type: ignore
+from utils.sharding import Shard  # type: ignore
+from workspace_mgmt import read_workspaces_from_csv  # type: ignore
+
+WORKSPACES = """parent_id,workspace_id,workspace_name,workspace_data_filter_id,workspace_data_filter_values,is_active
+parent,c1,Client 1,wdf_a,1,True
+parent,c2,Client 2,wdf_a,2,True
+parent,c1,Client 1,wdf_b,3,True
+parent,c3,Client 3,,,True
+"""
+
+
+def _args(
+    path: Path,
+    batch_size: int | None,
+    validation_engine: str = "rows",
+    shard: Shard | None = None,
+) -> WorkspaceArgs:
+    return WorkspaceArgs(
+        filepath=path,
+        delimiter=",",
+        inner_delimiter="|",
+        quotechar='"',
+        profile_config=Path("missing.yaml"),
+        profile="default",
+        http_pool_size=10,
+        shard=shard,
+        batch_size=batch_size,
+        validation_workers=1,
+        validation_engine=validation_engine,
+        provisioning_workers=1,
+        state_file=None,
+        checkpoint_file=None,
+        resume=False,
+        plan=False,
+        api_calls_per_second=None,
+    )
+
+
+@pytest.mark.parametrize("engine", ["rows", "columnar"])
+def test_rows_of_a_workspace_stay_in_one_batch(tmp_path, engine):
+    path = Path(tmp_path, "workspaces.csv")
+    path.write_text(WORKSPACES)
+
+    batches = read_workspaces_from_csv(_args(path, 1, engine))
+
+    assert [
+        [(row.workspace_id, row.workspace_data_filter_id) for row in batch]
+        for batch in batches
+    ] == [[("c1", "wdf_a"), ("c1", "wdf_b")], [("c2", "wdf_a")], [("c3", "")]]
+
+
+def test_shards_keep_whole_hierarchies(tmp_path):
+    rows = [f"parent,region_{i},Region {i},,,True" for i in range(4)]
+    rows += [f"region_{i % 4},client_{i},Client {i},,,True" for i in range(16)]
+    path = Path(tmp_path, "workspaces.csv")
+    path.write_text("\n".join([WORKSPACES.splitlines()[0], *rows]) + "\n")
+
+    shards = [
+        [
+            row.workspace_id
+            for batch in read_workspaces_from_csv(_args(path, 5, shard=Shard(i, 2)))
+            for row in batch
+        ]
+        for i in (1, 2)
+    ]
+
+    assert shards[0] and shards[1]
+    assert len(shards[0] + shards[1]) == 20
+    for i in range(16):
+        shard = shards[0] if f"client_{i}" in shards[0] else shards[1]
+        assert shard.index(f"region_{i % 4}") < shard.index(f"client_{i}")